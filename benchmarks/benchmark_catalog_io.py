@@ -0,0 +1,86 @@
+""" Benchmarks of the reading of halo catalogs by `~halotools.sim_manager`
+from ascii files and from the hdf5 files of the cache.
+"""
+from __future__ import division
+
+import os
+
+from halotools.sim_manager import (TabularAsciiReader, CachedHaloCatalog,
+    write_clustered_fake_sim)
+
+from .synthetic_data import (write_ascii_halo_catalog, throughput,
+    file_size_in_mb, Lbox)
+
+ascii_num_halos = int(2e5)
+position_columns = ['halo_x', 'halo_y', 'halo_z']
+
+
+class ReadAsciiSuite(object):
+    """ Runtime and throughput of `~halotools.sim_manager.TabularAsciiReader.read_ascii`
+    as a function of the number of worker processes and of the row cuts.
+    """
+    params = ([1, 4], ['none', 'mass'])
+    param_names = ['num_workers', 'row_cut']
+    timeout = 600
+
+    def setup_cache(self):
+        fname = os.path.abspath('fake_hlist.list')
+        columns_to_keep_dict = write_ascii_halo_catalog(fname, ascii_num_halos)
+        return fname, columns_to_keep_dict
+
+    def setup(self, cache, num_workers, row_cut):
+        fname, columns_to_keep_dict = cache
+        row_cut_min_dict = {'halo_mvir': 1e12} if row_cut == 'mass' else {}
+        self.reader = TabularAsciiReader(fname, columns_to_keep_dict,
+            row_cut_min_dict = row_cut_min_dict)
+
+    def time_read_ascii(self, cache, num_workers, row_cut):
+        self.reader.read_ascii(num_workers = num_workers)
+
+    def track_mb_per_sec(self, cache, num_workers, row_cut):
+        return throughput(lambda: self.reader.read_ascii(num_workers = num_workers),
+            file_size_in_mb(cache[0]))
+    track_mb_per_sec.unit = 'MB/sec'
+
+    def track_rows_per_sec(self, cache, num_workers, row_cut):
+        return throughput(lambda: self.reader.read_ascii(num_workers = num_workers),
+            ascii_num_halos)
+    track_rows_per_sec.unit = 'rows/sec'
+
+
+class CachedHaloTableSuite(object):
+    """ Runtime and throughput of loading the
+    `~halotools.sim_manager.CachedHaloCatalog.halo_table` of a newly constructed catalog
+    as a function of the number of halos, of the hdf5 layout of the file
+    and of the columns that are read.
+    """
+    params = ([int(1e5), int(1e6)], ['compound', 'columnar'], ['all', 'positions'])
+    param_names = ['num_halos', 'hdf5_layout', 'columns']
+    timeout = 600
+
+    def setup_cache(self):
+        fnames = {}
+        for num_halos in self.params[0]:
+            for hdf5_layout in self.params[1]:
+                fname = os.path.abspath('fake_halos_{0}_{1}.hdf5'.format(num_halos, hdf5_layout))
+                write_clustered_fake_sim(fname, num_halos, Lbox = Lbox,
+                    hdf5_layout = hdf5_layout, overwrite = True)
+                fnames[(num_halos, hdf5_layout)] = fname
+        return fnames
+
+    def setup(self, fnames, num_halos, hdf5_layout, columns):
+        self.fname = fnames[(num_halos, hdf5_layout)]
+        self.columns = position_columns if columns == 'positions' else None
+        halo_table = self.load_halo_table()
+        self.nbytes = sum(halo_table[key].nbytes for key in halo_table.keys())
+
+    def load_halo_table(self):
+        halocat = CachedHaloCatalog(fname = self.fname, columns = self.columns)
+        return halocat.halo_table
+
+    def time_halo_table(self, fnames, num_halos, hdf5_layout, columns):
+        self.load_halo_table()
+
+    def track_mb_per_sec(self, fnames, num_halos, hdf5_layout, columns):
+        return throughput(self.load_halo_table, self.nbytes/1e6)
+    track_mb_per_sec.unit = 'MB/sec'
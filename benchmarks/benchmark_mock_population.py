@@ -0,0 +1,81 @@
+""" Benchmarks of the mock population of `~halotools.empirical_models`
+on clustered fake halo catalogs.
+"""
+from __future__ import division
+
+import numpy as np
+from astropy.table import Table
+
+from halotools.empirical_models import PrebuiltHodModelFactory, NFWPhaseSpace
+from halotools.sim_manager import ClusteredFakeSim
+
+from .synthetic_data import throughput, Lbox
+
+
+class HodMockPopulateSuite(object):
+    """ Runtime and throughput of `~halotools.empirical_models.HodMockFactory.populate`
+    as a function of the number of halos and of the luminosity threshold,
+    which sets the number density of the galaxies.
+    """
+    params = ([int(1e5), int(1e6)], [-19, -21])
+    param_names = ['num_halos', 'threshold']
+    timeout = 600
+
+    def setup(self, num_halos, threshold):
+        halocat = ClusteredFakeSim(num_halos = num_halos, Lbox = Lbox, seed = 43)
+        self.model = PrebuiltHodModelFactory('zheng07', threshold = threshold)
+        self.model.populate_mock(halocat)
+
+    def time_populate(self, num_halos, threshold):
+        self.model.mock.populate()
+
+    def track_galaxies_per_sec(self, num_halos, threshold):
+        self.model.mock.populate()
+        num_gals = len(self.model.mock.galaxy_table)
+        return throughput(self.model.mock.populate, num_gals)
+    track_galaxies_per_sec.unit = 'galaxies/sec'
+
+    def track_halos_per_sec(self, num_halos, threshold):
+        return throughput(self.model.mock.populate, len(self.model.mock.halo_table))
+    track_halos_per_sec.unit = 'halos/sec'
+
+
+class NFWPhaseSpaceSuite(object):
+    """ Runtime and throughput of `~halotools.empirical_models.NFWPhaseSpace.assign_phase_space`
+    as a function of the number of satellites and of the precision
+    of the concentration binning of the lookup tables.
+    """
+    params = ([int(1e4), int(1e5), int(1e6)], [False, True])
+    param_names = ['num_gals', 'high_precision']
+    timeout = 600
+
+    def setup(self, num_gals, high_precision):
+        self.nfw = NFWPhaseSpace(high_precision = high_precision)
+
+        rng = np.random.RandomState(43)
+        mass = 10**rng.uniform(11, 15, num_gals)
+        zeros = np.zeros(num_gals)
+        self.table = Table({'halo_mvir': mass,
+            'halo_rvir': 0.2*(mass/1e12)**(1./3.),
+            'conc_NFWmodel': rng.uniform(1.5, 15, num_gals),
+            'host_centric_distance': zeros.copy(),
+            'x': zeros.copy(), 'y': zeros.copy(), 'z': zeros.copy(),
+            'vx': zeros.copy(), 'vy': zeros.copy(), 'vz': zeros.copy()})
+        for key in ('halo_x', 'halo_y', 'halo_z'):
+            self.table[key] = rng.uniform(0, Lbox, num_gals)
+        for key in ('halo_vx', 'halo_vy', 'halo_vz'):
+            self.table[key] = rng.normal(0, 300, num_gals)
+
+    def assign_phase_space(self):
+        # assign_phase_space adds the offsets to the positions,
+        # so that they are first reset to the halo centers
+        for key in ('x', 'y', 'z', 'vx', 'vy', 'vz'):
+            self.table[key][:] = self.table['halo_' + key]
+        self.nfw.assign_phase_space(self.table)
+
+    def time_assign_phase_space(self, num_gals, high_precision):
+        self.assign_phase_space()
+
+    def track_galaxies_per_sec(self, num_gals, high_precision):
+        return throughput(self.assign_phase_space, num_gals)
+    track_galaxies_per_sec.unit = 'galaxies/sec'
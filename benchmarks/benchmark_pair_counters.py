@@ -0,0 +1,50 @@
+""" Benchmarks of the pair counters of `~halotools.mock_observables`
+on clustered fake halo catalogs.
+"""
+from __future__ import division
+
+import numpy as np
+
+from halotools.mock_observables.pair_counters import npairs
+
+from .synthetic_data import clustered_points, throughput, Lbox
+
+rbins_options = {
+    'log_0.1_10': np.logspace(-1, 1, 15),
+    'log_0.1_30': np.logspace(-1, np.log10(30), 15),
+    'linear_0_20': np.linspace(0, 20, 41)}
+
+
+class NpairsSuite(object):
+    """ Runtime and throughput of `~halotools.mock_observables.npairs`
+    as a function of the number of points, threads and binning.
+    """
+    params = ([int(1e4), int(1e5)], [1, 4], sorted(rbins_options.keys()))
+    param_names = ['num_pts', 'num_threads', 'rbins']
+    timeout = 600
+
+    def setup(self, num_pts, num_threads, rbins):
+        self.data1 = clustered_points(num_pts, seed = 43)
+        self.data2 = clustered_points(num_pts, seed = 44)
+        self.rbins = rbins_options[rbins]
+        self.period = np.array([Lbox, Lbox, Lbox])
+
+    def count_pairs(self, num_threads):
+        return npairs(self.data1, self.data2, self.rbins,
+            period = self.period, num_threads = num_threads)
+
+    def time_npairs(self, num_pts, num_threads, rbins):
+        self.count_pairs(num_threads)
+
+    def track_pairs_per_sec(self, num_pts, num_threads, rbins):
+        """ Number of pairs separated by less than the largest bin counted per second.
+        """
+        num_pairs = self.count_pairs(num_threads)[-1]
+        return throughput(lambda: self.count_pairs(num_threads), num_pairs)
+    track_pairs_per_sec.unit = 'pairs/sec'
+
+    def track_points_per_sec(self, num_pts, num_threads, rbins):
+        """ Number of points of ``data1`` processed per second.
+        """
+        return throughput(lambda: self.count_pairs(num_threads), num_pts)
+    track_points_per_sec.unit = 'points/sec'
@@ -0,0 +1,58 @@
+""" Functions generating the synthetic data shared by the benchmarks,
+so that the benchmarks never need to download a halo catalog.
+All data are generated from fixed seeds, so that results of different commits
+are measured on identical inputs.
+"""
+from __future__ import division
+
+import os
+from timeit import default_timer
+import numpy as np
+
+from halotools.sim_manager.fake_sim import clustered_fake_halo_chunks
+
+Lbox = 250.
+
+
+def clustered_points(num_pts, seed = 43):
+    """ Length-num_pts array of the 3d positions of the halos of a
+    clustered fake catalog, host halos and subhalos in random order.
+    """
+    chunks = list(clustered_fake_halo_chunks(1.2*num_pts, Lbox = Lbox, seed = seed))
+    halos = np.concatenate([table.as_array() for table in chunks])
+    rows = np.random.RandomState(seed).permutation(len(halos))[0:int(num_pts)]
+    return np.vstack([halos[key][rows] for key in ('halo_x', 'halo_y', 'halo_z')]).T.astype('f8')
+
+
+def write_ascii_halo_catalog(fname, num_halos, seed = 43):
+    """ Write a clustered fake catalog to an ascii file in the format of
+    the hlists of Rockstar: a ``#`` header line followed by one row per halo.
+    Returns the dictionary of the columns that can be passed to
+    `~halotools.sim_manager.TabularAsciiReader`.
+    """
+    chunks = clustered_fake_halo_chunks(num_halos, Lbox = Lbox, seed = seed, chunk_size = 1e5)
+    with open(fname, 'w') as f:
+        for i, table in enumerate(chunks):
+            if i == 0:
+                keys = table.keys()
+                f.write('#' + ' '.join(keys) + '\n')
+            fmt = ['%d' if table[key].dtype.kind == 'i' else '%.6g' for key in keys]
+            np.savetxt(f, table.as_array(), fmt = fmt)
+    return dict((key, (i, 'i8' if key in ('halo_id', 'halo_upid', 'halo_hostid') else 'f4'))
+        for i, key in enumerate(keys))
+
+
+def throughput(func, num_items, repeat = 3):
+    """ Number of items processed per second by the input function
+    taking no arguments, using the fastest of ``repeat`` calls.
+    """
+    runtimes = []
+    for i in range(repeat):
+        start = default_timer()
+        func()
+        runtimes.append(default_timer() - start)
+    return num_items/max(min(runtimes), 1e-9)
+
+
+def file_size_in_mb(fname):
+    return os.path.getsize(fname)/1e6
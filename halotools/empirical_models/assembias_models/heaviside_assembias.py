@@ -229,13 +229,21 @@ class HeavisideAssembias(object):
         """
         """
 
+        prim_haloprop_key, sec_haloprop_key = self.prim_haloprop_key, self.sec_haloprop_key
+
         def assembias_percentile_calculator(table):
             return compute_conditional_percentiles(
                 table = table, 
-                prim_haloprop_key = self.prim_haloprop_key, 
-                sec_haloprop_key = self.sec_haloprop_key
+                prim_haloprop_key = prim_haloprop_key, 
+                sec_haloprop_key = sec_haloprop_key
                 )
 
+        # Allows the percentiles to be stored in the hdf5 file of a CachedHaloCatalog 
+        # and reused by subsequent mocks, see the new_haloprop_func_dict mechanism docs
+        assembias_percentile_calculator.derived_column_generator = (
+            'halotools.utils.compute_conditional_percentiles(prim_haloprop_key = ' + 
+            prim_haloprop_key + ', sec_haloprop_key = ' + sec_haloprop_key + '), version 1')
+
         key = self.sec_haloprop_key + '_percentile'
         try:
             self.new_haloprop_func_dict[key] = assembias_percentile_calculator
@@ -30,6 +30,7 @@ except ImportError:
 from ...sim_manager import sim_defaults
 from ...utils.array_utils import randomly_downsample_data
 from ...utils.table_utils import SampleSelector
+from ...utils.instrumentation import step_timer
 from ...sim_manager import FakeSim
 from ...custom_exceptions import *
 
@@ -142,7 +143,8 @@ class HodMockFactory(MockFactory):
         try:
             d = self.model.new_haloprop_func_dict
             for new_haloprop_key, new_haloprop_func in d.iteritems():
-                halo_table[new_haloprop_key] = new_haloprop_func(table = halo_table)
+                halo_table[new_haloprop_key] = self._compute_new_haloprop(
+                    halocat, halo_table, new_haloprop_key, new_haloprop_func)
                 self.additional_haloprops.append(new_haloprop_key)
         except AttributeError:
             pass
@@ -223,72 +225,90 @@ class HodMockFactory(MockFactory):
         except KeyError:
             self.enforce_PBC = True
 
-        try:
-            masking_function = kwargs['masking_function']
-            mask = masking_function(self._orig_halo_table)
-            self.halo_table = self._orig_halo_table[mask]
-        except:
-            self.halo_table = self._orig_halo_table
-
-        self.allocate_memory()
-
-        # Loop over all gal_types in the model 
-        for gal_type in self.gal_types:
+        # Time spent in each step is recorded if instrumentation is enabled, 
+        # see `~halotools.utils.instrument`
+        steps = step_timer()
+        self._step_timer = steps
 
-            # Retrieve the indices of our pre-allocated arrays 
-            # that store the info pertaining to gal_type galaxies
-            gal_type_slice = self._gal_type_indices[gal_type]
-            # gal_type_slice is a slice object
-
-            # For the gal_type_slice indices of 
-            # the pre-allocated array self.gal_type, 
-            # set each string-type entry equal to the gal_type string
-            self.galaxy_table['gal_type'][gal_type_slice] = (
-                np.repeat(gal_type, self._total_abundance[gal_type],axis=0))
-
-            # Store all other relevant host halo properties into their 
-            # appropriate pre-allocated array 
-            for halocatkey in self.additional_haloprops:
-                self.galaxy_table[halocatkey][gal_type_slice] = np.repeat(
-                    self.halo_table[halocatkey], self._occupation[gal_type], axis=0)
-
-        self.galaxy_table['x'] = self.galaxy_table['halo_x']
-        self.galaxy_table['y'] = self.galaxy_table['halo_y']
-        self.galaxy_table['z'] = self.galaxy_table['halo_z']
-        self.galaxy_table['vx'] = self.galaxy_table['halo_vx']
-        self.galaxy_table['vy'] = self.galaxy_table['halo_vy']
-        self.galaxy_table['vz'] = self.galaxy_table['halo_vz']
-
-        for method in self._remaining_methods_to_call:
-            func = getattr(self.model, method)
-            gal_type_slice = self._gal_type_indices[func.gal_type]
-            func(table = self.galaxy_table[gal_type_slice])
+        try:
+            try:
+                masking_function = kwargs['masking_function']
+                mask = masking_function(self._orig_halo_table)
+                self.halo_table = self._orig_halo_table[mask]
+            except:
+                self.halo_table = self._orig_halo_table
+            steps.lap('halo_table_mask')
+
+            self.allocate_memory()
+
+            # Loop over all gal_types in the model 
+            for gal_type in self.gal_types:
+
+                # Retrieve the indices of our pre-allocated arrays 
+                # that store the info pertaining to gal_type galaxies
+                gal_type_slice = self._gal_type_indices[gal_type]
+                # gal_type_slice is a slice object
+
+                # For the gal_type_slice indices of 
+                # the pre-allocated array self.gal_type, 
+                # set each string-type entry equal to the gal_type string
+                self.galaxy_table['gal_type'][gal_type_slice] = (
+                    np.repeat(gal_type, self._total_abundance[gal_type],axis=0))
+
+                # Store all other relevant host halo properties into their 
+                # appropriate pre-allocated array 
+                for halocatkey in self.additional_haloprops:
+                    self.galaxy_table[halocatkey][gal_type_slice] = np.repeat(
+                        self.halo_table[halocatkey], self._occupation[gal_type], axis=0)
+
+            self.galaxy_table['x'] = self.galaxy_table['halo_x']
+            self.galaxy_table['y'] = self.galaxy_table['halo_y']
+            self.galaxy_table['z'] = self.galaxy_table['halo_z']
+            self.galaxy_table['vx'] = self.galaxy_table['halo_vx']
+            self.galaxy_table['vy'] = self.galaxy_table['halo_vy']
+            self.galaxy_table['vz'] = self.galaxy_table['halo_vz']
+            steps.lap('inherit_halo_properties')
+
+            for method in self._remaining_methods_to_call:
+                func = getattr(self.model, method)
+                gal_type_slice = self._gal_type_indices[func.gal_type]
+                func(table = self.galaxy_table[gal_type_slice])
+                steps.lap(method)
                 
-        if self.enforce_PBC is True:
-            self.galaxy_table['x'], self.galaxy_table['vx'] = (
-                model_helpers.enforce_periodicity_of_box(
-                    self.galaxy_table['x'], self.Lbox, 
-                    velocity = self.galaxy_table['vx'], 
-                    check_multiple_box_lengths = self._testing_mode)
-                )
-
-            self.galaxy_table['y'], self.galaxy_table['vy'] = (
-                model_helpers.enforce_periodicity_of_box(
-                    self.galaxy_table['y'], self.Lbox, 
-                    velocity = self.galaxy_table['vy'], 
-                    check_multiple_box_lengths = self._testing_mode)
-                )
-
-            self.galaxy_table['z'], self.galaxy_table['vz'] = (
-                model_helpers.enforce_periodicity_of_box(
-                    self.galaxy_table['z'], self.Lbox, 
-                    velocity = self.galaxy_table['vz'], 
-                    check_multiple_box_lengths = self._testing_mode)
-                )
-
-        if hasattr(self.model, 'galaxy_selection_func'):
-            mask = self.model.galaxy_selection_func(self.galaxy_table)
-            self.galaxy_table = self.galaxy_table[mask]
+            if self.enforce_PBC is True:
+                self.galaxy_table['x'], self.galaxy_table['vx'] = (
+                    model_helpers.enforce_periodicity_of_box(
+                        self.galaxy_table['x'], self.Lbox, 
+                        velocity = self.galaxy_table['vx'], 
+                        check_multiple_box_lengths = self._testing_mode)
+                    )
+
+                self.galaxy_table['y'], self.galaxy_table['vy'] = (
+                    model_helpers.enforce_periodicity_of_box(
+                        self.galaxy_table['y'], self.Lbox, 
+                        velocity = self.galaxy_table['vy'], 
+                        check_multiple_box_lengths = self._testing_mode)
+                    )
+
+                self.galaxy_table['z'], self.galaxy_table['vz'] = (
+                    model_helpers.enforce_periodicity_of_box(
+                        self.galaxy_table['z'], self.Lbox, 
+                        velocity = self.galaxy_table['vz'], 
+                        check_multiple_box_lengths = self._testing_mode)
+                    )
+                steps.lap('enforce_PBC')
+
+            if hasattr(self.model, 'galaxy_selection_func'):
+                mask = self.model.galaxy_selection_func(self.galaxy_table)
+                self.galaxy_table = self.galaxy_table[mask]
+                steps.lap('galaxy_selection_func')
+
+            steps.record('HodMockFactory.populate', 
+                num_halos = len(self.halo_table), num_galaxies = len(self.galaxy_table))
+        finally:
+            # The timer is bound to the instance only for the duration of the call, 
+            # so that a later call to `allocate_memory` never records into a stale timer
+            del self._step_timer
 
     def allocate_memory(self):
         """ Method allocates the memory for all the numpy arrays 
@@ -301,6 +321,7 @@ class HodMockFactory(MockFactory):
         """
 
         self.galaxy_table = Table() 
+        steps = getattr(self, '_step_timer', None) or step_timer()
 
         # We will keep track of the calling sequence with a list called _remaining_methods_to_call
         # Each time a function in this list is called, we will remove that function from the list
@@ -317,6 +338,7 @@ class HodMockFactory(MockFactory):
             else:
                 func = getattr(self.model, func_name)
                 func(table = self.halo_table)
+                steps.lap(func_name)
                 galprops_assigned_to_halo_table_by_func = func._galprop_dtypes_to_allocate.names
                 galprops_assigned_to_halo_table.extend(galprops_assigned_to_halo_table_by_func)
                 self._remaining_methods_to_call.remove(func_name)
@@ -342,6 +364,7 @@ class HodMockFactory(MockFactory):
             # Call the component model to get a Monte Carlo
             # realization of the abundance of gal_type galaxies
             self._occupation[gal_type] = occupation_func(table=self.halo_table)
+            steps.lap(occupation_func_name)
 
             # Now use the above result to set up the indexing scheme
             self._total_abundance[gal_type] = (
@@ -375,4 +398,4 @@ class HodMockFactory(MockFactory):
         dt = self.model._galprop_dtypes_to_allocate
         for key in dt.names:
             self.galaxy_table[key] = np.zeros(self.Ngals, dtype = dt[key].type)
-
+        steps.lap('allocate_memory')
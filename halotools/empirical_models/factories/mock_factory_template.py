@@ -29,6 +29,7 @@ except ImportError:
 from ...sim_manager import sim_defaults
 from ...utils.array_utils import randomly_downsample_data
 from ...sim_manager import FakeSim
+from ...sim_manager.derived_column_cache import retrieve_derived_column, rows_checksum
 from ...custom_exceptions import *
 
 
@@ -75,6 +76,8 @@ class MockFactory(object):
             self.ptcl_table = halocat.ptcl_table # pre-retrieve the particles from disk, if available
         except:
             pass   
+        # Used to load larger particle tables on demand, if available
+        self._load_ptcl_table = getattr(halocat, 'load_ptcl_table', None)
             
         try:
             self.gal_types = self.model.gal_types 
@@ -92,6 +95,51 @@ class MockFactory(object):
 
         self.galaxy_table = Table() 
 
+    def _compute_new_haloprop(self, halocat, halo_table, new_haloprop_key, new_haloprop_func):
+        """ Value of the new halo property created by a function of the 
+        ``new_haloprop_func_dict`` of the model. 
+
+        If the function has a ``derived_column_generator`` attribute and ``halocat`` 
+        is a `~halotools.sim_manager.CachedHaloCatalog` with ``cache_derived_columns`` 
+        set to True, the result is stored in the derived-column sidecar file of the catalog, 
+        and subsequent calls for the same rows of the same catalog 
+        read the stored result rather than calling the function. 
+
+        Parameters 
+        ------------
+        halocat : object 
+            Halo catalog used to populate the mock. 
+
+        halo_table : `~astropy.table.Table` 
+            Table of halos passed to the function, 
+            i.e., the ``halo_table`` of ``halocat`` after any cuts made by the mock factory. 
+
+        new_haloprop_key : string 
+            Name of the new halo property. 
+
+        new_haloprop_func : function object 
+            Function accepting a ``table`` keyword argument and returning the new halo property. 
+
+        Returns 
+        --------
+        new_haloprop : array_like 
+            Array of length ``len(halo_table)``. 
+
+        See also 
+        ---------
+        :ref:`new_haloprop_func_dict_mechanism`
+        """
+        generator = getattr(new_haloprop_func, 'derived_column_generator', None)
+        fname = getattr(halocat, 'fname', None)
+        if ((generator is None) or (fname is None) or 
+            (getattr(halocat, 'cache_derived_columns', False) is not True) or 
+            ('halo_id' not in halo_table.keys())):
+            return new_haloprop_func(table = halo_table)
+
+        return retrieve_derived_column(fname, new_haloprop_key, 
+            lambda: new_haloprop_func(table = halo_table), generator, 
+            rows = rows_checksum(halo_table['halo_id']))
+
     @abstractmethod
     def populate(self, **kwargs):
         """ 
@@ -320,6 +368,16 @@ class MockFactory(object):
             Number of CPU cores to use in the calculation. 
             Default is maximum number available. 
 
+        num_ptcl : int, optional 
+            Number of dark matter particles used in the calculation, 
+            allowing accuracy to be traded against speed. 
+            If ``num_ptcl`` exceeds the number of particles in the ``ptcl_table``, 
+            a larger random downsampling is loaded from the cached particle catalog, 
+            e.g., one stored with the 
+            `~halotools.sim_manager.UserSuppliedPtclCatalog.add_ptcl_pyramid_to_cache` method. 
+            Default is the larger of the number of galaxies and the ``default_nptcls`` 
+            set in the `~halotools.empirical_models.model_defaults` module. 
+
         Returns 
         --------
         rbin_centers : array 
@@ -379,8 +437,14 @@ class MockFactory(object):
                 )
             raise HalotoolsError(msg)
 
-        nptcl = np.max([model_defaults.default_nptcls, len(self.galaxy_table)])
-        ptcl_table = randomly_downsample_data(self.ptcl_table, nptcl)
+        try:
+            nptcl = int(kwargs['num_ptcl'])
+        except KeyError:
+            nptcl = np.max([model_defaults.default_nptcls, len(self.galaxy_table)])
+        if (nptcl > len(self.ptcl_table)) and (self._load_ptcl_table is not None):
+            ptcl_table = self._load_ptcl_table(num_ptcl = nptcl)
+        else:
+            ptcl_table = randomly_downsample_data(self.ptcl_table, nptcl)
         ptcl_pos = three_dim_pos_bundle(table = ptcl_table, 
             key1='x', key2='y', key3='z')
 
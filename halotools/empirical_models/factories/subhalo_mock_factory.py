@@ -18,6 +18,7 @@ from astropy.table import Table
 from .mock_factory_template import MockFactory
 
 from .. import model_helpers, model_defaults
+from ...utils.instrumentation import step_timer
 from ...custom_exceptions import *
 
 
@@ -83,7 +84,8 @@ class SubhaloMockFactory(MockFactory):
         try:
             d = self.model.new_haloprop_func_dict
             for new_haloprop_key, new_haloprop_func in d.iteritems():
-                halo_table[new_haloprop_key] = new_haloprop_func(table = halo_table)
+                halo_table[new_haloprop_key] = self._compute_new_haloprop(
+                    halocat, halo_table, new_haloprop_key, new_haloprop_func)
                 self.additional_haloprops.append(new_haloprop_key)
         except AttributeError:
             pass
@@ -186,15 +188,25 @@ class SubhaloMockFactory(MockFactory):
         >>> model_instance.mock.populate()
 
         """
+        # Time spent in each step is recorded if instrumentation is enabled, 
+        # see `~halotools.utils.instrument`
+        steps = step_timer()
+
         self._allocate_memory()
+        steps.lap('allocate_memory')
 
         for method in self.model._mock_generation_calling_sequence:
             func = getattr(self.model, method)
             func(table = self.galaxy_table)
+            steps.lap(method)
 
         if hasattr(self.model, 'galaxy_selection_func'):
             mask = self.model.galaxy_selection_func(self.galaxy_table)
             self.galaxy_table = self.galaxy_table[mask]
+            steps.lap('galaxy_selection_func')
+
+        steps.record('SubhaloMockFactory.populate', 
+            num_halos = len(self.halo_table), num_galaxies = len(self.galaxy_table))
 
     def _allocate_memory(self):
         """
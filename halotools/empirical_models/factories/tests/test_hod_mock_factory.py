@@ -15,6 +15,7 @@ from ....mock_observables import return_xyz_formatted_array, tpcf_one_two_halo_d
 from ....sim_manager import FakeSim, CachedHaloCatalog
 from ....sim_manager.fake_sim import FakeSimHalosNearBoundaries
 from ..prebuilt_model_factory import PrebuiltHodModelFactory
+from ....utils.instrumentation import instrument
 from ....custom_exceptions import HalotoolsError
 
 aph_home = u'/Users/aphearin'
@@ -171,6 +172,38 @@ class TestHodMockFactory(TestCase):
 
         runtime = time() - start
 
+    def test_populate_instrumentation(self):
+        """ Enforce that the time spent in each step of the
+        mock-generation calling sequence is recorded inside an `instrument` context.
+        """
+        with instrument() as report:
+            self.model.mock.populate()
+        record = report['HodMockFactory.populate'][0]
+
+        assert record['num_galaxies'] == len(self.model.mock.galaxy_table)
+        assert record['num_halos'] == len(self.model.mock.halo_table)
+        steps = record['calling_sequence']
+        assert steps[0] == 'halo_table_mask'
+        assert steps[-1] == 'enforce_PBC'
+        for method in self.model._mock_generation_calling_sequence:
+            assert method in steps
+        assert set(record['step_time'].keys()) == set(steps)
+        assert sum(record['step_time'].values()) <= record['total_time']
+
+        self.model.mock.populate()
+        assert len(report['HodMockFactory.populate']) == 1
+
+        # The step timer is removed from the mock even if populate raises an exception
+        def allocate_memory():
+            raise HalotoolsError("allocate_memory failed")
+        self.model.mock.allocate_memory = allocate_memory
+        with instrument() as report:
+            with pytest.raises(HalotoolsError):
+                self.model.mock.populate()
+        del self.model.mock.allocate_memory
+        assert not hasattr(self.model.mock, '_step_timer')
+        assert 'HodMockFactory.populate' not in report
+
     @pytest.mark.slow
     def test_satellite_positions1(self):
         start = time()
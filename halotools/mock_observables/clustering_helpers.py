@@ -17,6 +17,7 @@ __all__ = ['_tpcf_process_args',\
            '_tpcf_jackknife_process_args',\
            '_rp_pi_tpcf_process_args',
            '_s_mu_tpcf_process_args',\
+           '_s_multipole_tpcf_process_args',\
            '_marked_tpcf_process_args',\
            '_delta_sigma_process_args',\
            '_tpcf_one_two_halo_decomp_process_args',\
@@ -585,6 +586,42 @@ def _s_mu_tpcf_process_args(sample1, s_bins, mu_bins, sample2, randoms,\
            do_auto, do_cross, num_threads, _sample1_is_sample2, PBCs
 
 
+def _s_multipole_tpcf_process_args(sample1, s_bins, sample2, randoms,\
+                                   period, orders, do_auto, do_cross, estimator,\
+                                   num_threads, max_sample_size,
+                                   approx_cell1_size, approx_cell2_size,\
+                                   approx_cellran_size):
+    """ 
+    Private method to do bounds-checking on the arguments passed to 
+    `~halotools.mock_observables.s_multipole_tpcf`. 
+    """
+    
+    available_estimators = ['Natural', 'Landy-Szalay']
+    if estimator not in available_estimators:
+        msg = ("\n Input `estimator` must be one of the following: \n"
+               "{0}".format(available_estimators))
+        raise HalotoolsError(msg)
+    
+    sample1, s_bins, sample2, randoms, period, do_auto, do_cross, num_threads,\
+        _sample1_is_sample2, PBCs, RR_precomputed, NR_precomputed = (
+        _tpcf_process_args(sample1, s_bins, sample2, randoms, 
+            period, do_auto, do_cross, estimator, num_threads, max_sample_size,
+            approx_cell1_size, approx_cell2_size, approx_cellran_size, None, None)
+        )
+    
+    orders = convert_to_ndarray(orders)
+    try:
+        assert orders.ndim == 1
+        assert set(orders.tolist()).issubset([0, 2, 4])
+    except AssertionError:
+        msg = ("\n Input `orders` must be a subset of the even multipoles [0, 2, 4].")
+        raise HalotoolsError(msg)
+    orders = orders.astype(int)
+    
+    return sample1, s_bins, sample2, randoms, period, orders,\
+           do_auto, do_cross, num_threads, _sample1_is_sample2, PBCs
+
+
 def _marked_tpcf_process_args(sample1, rbins, sample2, marks1, marks2,\
                               period, do_auto, do_cross, num_threads,\
                               max_sample_size, wfunc, normalize_by,\
@@ -6,14 +6,22 @@ functions to assist in error estimation of mock observations.
 
 from __future__ import (absolute_import, division, print_function, unicode_literals)
 
-__all__=['jackknife_covariance_matrix','cuboid_subvolume_labels']
+__all__=['jackknife_covariance_matrix','cuboid_subvolume_labels',
+    'kmeans_subvolume_labels','subvolume_labels','region_resampling_covariance']
 __author__ = ('Duncan Campbell', )
 
 import numpy as np
+from collections import OrderedDict
+from scipy.spatial import cKDTree
 from ..utils.array_utils import convert_to_ndarray
 from ..custom_exceptions import *
 from warnings import warn
 
+# labels computed by `subvolume_labels`, keyed by the ``cache_key`` supplied by the caller 
+# together with the parameters used to compute them.
+_subvolume_labels_cache = OrderedDict()
+_subvolume_labels_cache_size = 16
+
 
 def cuboid_subvolume_labels(sample, Nsub, Lbox):
     """
@@ -99,8 +107,7 @@ def cuboid_subvolume_labels(sample, Nsub, Lbox):
     #tag each particle with an integer indicating which subvolume it is in
     index = np.floor(sample/dL).astype(int)
     #take care of the case where a point falls on the boundary
-    for i in range(3):
-        index[:, i] = np.where(index[:, i] == Nsub[i], Nsub[i] - 1, index[:, i])
+    index = np.minimum(index, Nsub - 1)
     index = inds[index[:,0],index[:,1],index[:,2]].astype(int)
     
     return index, int(N_sub_vol)
@@ -149,12 +156,313 @@ def jackknife_covariance_matrix(observations):
                "of samples or decrease the number of observations.")
         warn(msg)
     
-    cov = np.zeros((Nr,Nr)) # 2D array that stores the covariance matrix 
-    for i in range(Nr):
-        for j in range(Nr):
-            tmp = 0.0
-            for k in range(N_samples):
-                tmp = tmp + after_subtraction[k,i]*after_subtraction[k,j]
-                cov[i,j] = (((N_samples-1)/N_samples)*tmp)
+    # 2D array that stores the covariance matrix 
+    cov = ((N_samples-1)/N_samples)*np.dot(after_subtraction.T, after_subtraction)
+    
+    return np.matrix(cov)
+
+
+def kmeans_subvolume_labels(sample, Nsub, max_iter=100, seed=None, 
+    max_sample_size=int(1e5)):
+    """
+    return integer labels indicating which of ``Nsub`` compact regions, found by 
+    k-means clustering of the positions, a set of points occupy. 
+    
+    Unlike `~halotools.mock_observables.cuboid_subvolume_labels`, this does not 
+    assume the points fill a cuboid volume, and so is suitable for surveys with 
+    irregular footprints. 
+    
+    Parameters
+    ----------
+    sample : array_like
+        Npts x Ndim numpy array containing the positions of points, e.g. 3-D positions, 
+        or the unit vectors pointing to each point on the sky. 
+    
+    Nsub : int
+        number of regions.
+    
+    max_iter : int, optional
+        maximum number of iterations of Lloyd's algorithm. 
+    
+    seed : int, optional
+        random number seed used to choose the initial centers of the regions. 
+    
+    max_sample_size : int, optional
+        The centers of the regions are found using a random subsample of at most 
+        ``max_sample_size`` points, after which every point is assigned to the 
+        nearest center. 
+    
+    Returns
+    -------
+    labels : numpy.array
+        numpy array with integer labels in the range [1,Nsub] indicating 
+        the region each point in ``sample`` occupies.
+    
+    N_sub_vol : int
+       number of regions.
+    
+    Examples
+    --------
+    >>> Npts = 1000
+    >>> coords = np.random.random((Npts, 3))
+    >>> labels, N_sub_vol = kmeans_subvolume_labels(coords, 10, seed=43)
+    """
+    
+    #process inputs and check for consistency
+    sample = convert_to_ndarray(sample).astype(float)
+    if sample.ndim != 2:
+        msg = "sample must be a length-N by Ndim array."
+        raise HalotoolsError(msg)
+    Nsub = int(Nsub)
+    if (Nsub < 1) | (Nsub > len(sample)):
+        msg = "Nsub must be a positive integer no larger than the number of points."
+        raise HalotoolsError(msg)
+    
+    rng = np.random.RandomState(seed)
+    if len(sample) > max_sample_size:
+        training_sample = sample[rng.choice(len(sample), max_sample_size, replace=False)]
+    else:
+        training_sample = sample
+    
+    #Lloyd's algorithm
+    centers = training_sample[rng.choice(len(training_sample), Nsub, replace=False)]
+    for i in range(max_iter):
+        index = cKDTree(centers).query(training_sample)[1]
+        n = np.bincount(index, minlength=Nsub).astype(float)
+        new_centers = np.array([np.bincount(index, weights=training_sample[:,j], 
+            minlength=Nsub) for j in range(sample.shape[1])]).T
+        empty = (n == 0)
+        new_centers[~empty] /= n[~empty, np.newaxis]
+        #re-seed empty regions with randomly chosen points
+        new_centers[empty] = training_sample[rng.choice(len(training_sample), np.sum(empty))]
+        converged = np.all(new_centers == centers)
+        centers = new_centers
+        if converged: break
+    
+    index = cKDTree(centers).query(sample)[1]
+    
+    return index.astype(int) + 1, Nsub
+
+
+def subvolume_labels(sample, Nsub, Lbox=None, method='cuboid', seed=None, cache_key=None):
+    """
+    return integer labels indicating which subvolume a set of points occupy, 
+    optionally reusing the labels computed by a previous call for the same points. 
+    
+    Parameters
+    ----------
+    sample : array_like
+        Npts x 3 numpy array containing 3-D positions of points.
+    
+    Nsub : array_like
+        If ``method`` is 'cuboid', see `~halotools.mock_observables.cuboid_subvolume_labels`. 
+        If ``method`` is 'kmeans', the total number of regions. 
+    
+    Lbox : array_like, optional
+        Lengths of the sides of the cuboid volume that ``sample`` occupies. 
+        Required if ``method`` is 'cuboid'. 
+    
+    method : string, optional
+        'cuboid' to use `~halotools.mock_observables.cuboid_subvolume_labels`, or 
+        'kmeans' to use `~halotools.mock_observables.kmeans_subvolume_labels`. 
+    
+    seed : int, optional
+        random number seed passed to `~halotools.mock_observables.kmeans_subvolume_labels`. 
+    
+    cache_key : hashable, optional
+        Name identifying the catalog ``sample``, e.g. 'randoms'. If not None, the labels 
+        are stored in memory, keyed by ``cache_key`` and the input parameters, and are 
+        returned by subsequent calls with the same ``cache_key`` without being recomputed. 
+        It is the responsibility of the caller to use a different ``cache_key`` 
+        whenever the positions change. The labels of the 16 most recently stored keys 
+        are kept. This is mainly useful for the 'kmeans' method, as cuboid labels 
+        are about as fast to compute as to look up. Default is None, in which case 
+        the labels are always computed and nothing is stored. 
+    
+    Returns
+    -------
+    labels : numpy.array
+        numpy array with integer labels in the range [1,N_sub_vol] indicating 
+        the subvolume each point in ``sample`` occupies.
+    
+    N_sub_vol : int
+       number of subvolumes.
+    
+    Examples
+    --------
+    >>> Npts = 1000
+    >>> coords = np.random.random((Npts, 3))
+    >>> labels, N_sub_vol = subvolume_labels(coords, 4, Lbox=1)
+    >>> labels, N_sub_vol = subvolume_labels(coords, 20, method='kmeans', seed=43, cache_key='coords')
+    """
+    
+    sample = convert_to_ndarray(sample)
+    
+    if method == 'cuboid':
+        if Lbox is None:
+            msg = "If ``method`` is 'cuboid', you must pass in ``Lbox``."
+            raise HalotoolsError(msg)
+        compute_labels = lambda: cuboid_subvolume_labels(sample, Nsub, Lbox)
+    elif method == 'kmeans':
+        compute_labels = lambda: kmeans_subvolume_labels(sample, Nsub, seed=seed)
+    else:
+        msg = "Input ``method`` must be either 'cuboid' or 'kmeans'."
+        raise HalotoolsError(msg)
+    
+    if cache_key is None:
+        return compute_labels()
+    
+    key = (cache_key, method, sample.shape, 
+        tuple(np.atleast_1d(Nsub).tolist()), 
+        None if Lbox is None else tuple(np.atleast_1d(Lbox).tolist()), seed)
+    
+    try:
+        labels, N_sub_vol = _subvolume_labels_cache[key]
+    except KeyError:
+        labels, N_sub_vol = compute_labels()
+        _subvolume_labels_cache[key] = (labels, N_sub_vol)
+        if len(_subvolume_labels_cache) > _subvolume_labels_cache_size:
+            _subvolume_labels_cache.popitem(last=False)
+    
+    return np.copy(labels), N_sub_vol
+
+
+def region_resampling_covariance(statistic=None, region_stats=[], region_pair_stats=[], 
+    method='jackknife', N_resamples=None, seed=None):
+    """
+    Calculate the covariance matrix of a summary statistic by jackknife, bootstrap or 
+    subsample resampling of spatial regions, given quantities measured once per region. 
+    
+    Each input quantity must be additive over regions, e.g. the number of points 
+    in each region, or the number of pairs between each pair of regions as returned by 
+    `~halotools.mock_observables.pair_counters.region_npairs` and 
+    `~halotools.mock_observables.pair_counters.xy_z_region_npairs`. 
+    The quantities are summed over the regions of each resampled realization of the data, 
+    and passed to ``statistic``. As a result, the covariance of e.g. 
+    `~halotools.mock_observables.wp`, `~halotools.mock_observables.delta_sigma`, 
+    and abundances all follow from a single pair-counting pass. 
+    
+    Parameters
+    ----------
+    statistic : callable, optional
+        function that takes the total of each quantity in ``region_stats`` followed by 
+        the total of each quantity in ``region_pair_stats`` as positional arguments, 
+        and returns a 1-D array of observations. If None, there must be exactly one 
+        input quantity, the total of which is the observation. 
+    
+    region_stats : list, optional
+        list of arrays of shape (N_regions, ...), storing quantities measured in 
+        each region, e.g., the number of points in each region. 
+    
+    region_pair_stats : list, optional
+        list of arrays of shape (N_regions, N_regions, ...), storing quantities measured 
+        between each pair of regions, e.g., pair counts. 
+    
+    method : string, optional
+        'jackknife' (the default) omits each region in turn. 
+        'bootstrap' draws ``N_resamples`` realizations of N_regions regions with 
+        replacement; the quantities of pairs of regions are weighted by the 
+        product of the number of times each of the two regions is drawn. 
+        'subsample' treats each region as an independent realization, and scales the 
+        covariance between regions by the ratio of the volume of a region to the 
+        total volume, assuming regions of equal volume. 
+    
+    N_resamples : int, optional
+        number of bootstrap realizations. Default is 100. 
+        Ignored unless ``method`` is 'bootstrap'. 
+    
+    seed : int, optional
+        random number seed used to draw bootstrap realizations. 
+    
+    Returns
+    -------
+    cov : numpy.matrix
+        covariance matrix shape (N_observations, N_observations).
+    
+    Examples
+    --------
+    For demonstration purposes we create a randomly distributed set of points within a 
+    periodic unit cube, and split it into 27 cubes. 
+    
+    >>> Npts, Lbox = 1000, 1.0
+    >>> coords = np.random.random((Npts, 3))
+    >>> labels, N_sub_vol = subvolume_labels(coords, 3, Lbox=Lbox)
+    
+    Then we count pairs between every pair of cubes, and points within every cube 
+    in a single pass, 
+    
+    >>> from halotools.mock_observables.pair_counters import xy_z_region_npairs
+    >>> rp_bins, pi_bins = np.logspace(-2, -1, 5), np.array([0, 0.1])
+    >>> DD = xy_z_region_npairs(coords, coords, rp_bins, pi_bins, labels, labels, N_sub_vol, period=Lbox)
+    >>> N = np.bincount(labels-1, minlength=N_sub_vol)
+    >>> volume = np.ones(N_sub_vol)*Lbox**3/N_sub_vol
+    
+    and compute the covariance of the projected correlation function together 
+    with the number density: 
+    
+    >>> def wp_and_number_density(N, volume, DD):
+    ...     DD = np.diff(np.diff(DD, axis=0), axis=1)[:,0]
+    ...     RR = N*(N-1)/volume*np.pi*np.diff(rp_bins**2)*2*pi_bins[1]
+    ...     wp = 2*pi_bins[1]*(DD/RR - 1)
+    ...     return np.append(wp, N/volume)
+    >>> cov = region_resampling_covariance(wp_and_number_density, [N, volume], [DD])
+    """
+    
+    region_stats = [convert_to_ndarray(x) for x in region_stats]
+    region_pair_stats = [convert_to_ndarray(x) for x in region_pair_stats]
+    
+    if len(region_stats) > 0:
+        N_regions = region_stats[0].shape[0]
+    elif len(region_pair_stats) > 0:
+        N_regions = region_pair_stats[0].shape[0]
+    else:
+        msg = "You must pass in at least one of ``region_stats`` or ``region_pair_stats``."
+        raise HalotoolsError(msg)
+    
+    if np.any([x.shape[0] != N_regions for x in region_stats]) | np.any(
+        [x.shape[:2] != (N_regions, N_regions) for x in region_pair_stats]):
+        msg = ("The first axis of every array in ``region_stats``, and the first two \n"
+               "axes of every array in ``region_pair_stats``, must have the same length.")
+        raise HalotoolsError(msg)
+    
+    if statistic is None:
+        if len(region_stats) + len(region_pair_stats) != 1:
+            msg = ("If ``statistic`` is None, you must pass in exactly one quantity.")
+            raise HalotoolsError(msg)
+        statistic = lambda x: x
+    
+    #weight of each region in each realization
+    if method == 'jackknife':
+        weights = 1.0 - np.identity(N_regions)
+    elif method == 'bootstrap':
+        if N_resamples is None: N_resamples = 100
+        rng = np.random.RandomState(seed)
+        weights = np.array([np.bincount(rng.randint(0, N_regions, N_regions), 
+            minlength=N_regions) for i in range(N_resamples)], dtype=float)
+    elif method == 'subsample':
+        weights = np.identity(N_regions)
+    else:
+        msg = "Input ``method`` must be one of 'jackknife', 'bootstrap' or 'subsample'."
+        raise HalotoolsError(msg)
+    N_realizations = weights.shape[0]
+    
+    #sum each quantity over the regions of each realization
+    totals = [np.tensordot(weights, x, axes=(1, 0)) for x in region_stats]
+    for x in region_pair_stats:
+        partial_sum = np.tensordot(weights, x, axes=(1, 0))
+        w = weights.reshape(weights.shape + (1,)*(x.ndim-2))
+        totals.append(np.sum(w*partial_sum, axis=1))
+    
+    observations = np.array([np.ravel(statistic(*[x[i] for x in totals])) 
+        for i in range(N_realizations)])
+    
+    after_subtraction = observations - np.mean(observations, axis=0)
+    cov = np.dot(after_subtraction.T, after_subtraction)
+    if method == 'jackknife':
+        cov *= (N_realizations-1)/N_realizations
+    elif method == 'bootstrap':
+        cov /= (N_realizations-1)
+    elif method == 'subsample':
+        cov /= (N_realizations-1)*N_realizations
     
     return np.matrix(cov)
@@ -71,7 +71,7 @@ def large_scale_density_spherical_volume(sample, tracers, radius,
         the `~halotools.mock_observables.pair_counters.FlatRectanguloidDoubleTree` 
         will apportion the ``sample1`` points into subvolumes of the simulation box. 
         The optimum choice unavoidably depends on the specs of your machine. 
-        Default choice is to use *max(rbins)* in each dimension, 
+        Default choice is to use 1/10 of the box size in each dimension, 
         which will return reasonable result performance for most use-cases. 
         Performance can vary sensitively with this parameter, so it is highly 
         recommended that you experiment with this parameter when carrying out  
@@ -96,12 +96,12 @@ def large_scale_density_spherical_volume(sample, tracers, radius,
     >>> result = large_scale_density_spherical_volume(sample, tracers, radius, period=1)
 
     """
-    sample, tracers, rbins, period, sample_volume, num_threads, approx_cell1_size = (
+    sample, tracers, period, sample_volume, num_threads, approx_cell1_size = (
         _large_scale_density_spherical_volume_process_args(
             sample, tracers, radius, period, sample_volume, num_threads, approx_cell1_size)
         )
 
-    _ = per_object_npairs(sample, tracers, rbins, period = period,
+    _ = per_object_environment_npairs(sample, tracers, [radius], period = period,
         num_threads = num_threads, approx_cell1_size = approx_cell1_size)
     result = _[:,0]
 
@@ -162,7 +162,7 @@ def large_scale_density_spherical_annulus(sample, tracers, inner_radius, outer_r
         the `~halotools.mock_observables.pair_counters.FlatRectanguloidDoubleTree` 
         will apportion the ``sample1`` points into subvolumes of the simulation box. 
         The optimum choice unavoidably depends on the specs of your machine. 
-        Default choice is to use *max(rbins)* in each dimension, 
+        Default choice is to use 1/10 of the box size in each dimension, 
         which will return reasonable result performance for most use-cases. 
         Performance can vary sensitively with this parameter, so it is highly 
         recommended that you experiment with this parameter when carrying out  
@@ -187,15 +187,15 @@ def large_scale_density_spherical_annulus(sample, tracers, inner_radius, outer_r
     >>> result = large_scale_density_spherical_annulus(sample, tracers, inner_radius, outer_radius, period=1)
 
     """
-    sample, tracers, rbins, period, sample_volume, num_threads, approx_cell1_size = (
+    sample, tracers, period, sample_volume, num_threads, approx_cell1_size = (
         _large_scale_density_spherical_annulus_process_args(
             sample, tracers, inner_radius, outer_radius, 
             period, sample_volume, num_threads, approx_cell1_size)
         )
 
-    _ = per_object_npairs(sample, tracers, rbins, period = period,
-        num_threads = num_threads, approx_cell1_size = approx_cell1_size)
-    result = np.diff(_, axis=1)
+    _ = per_object_environment_npairs(sample, tracers, [(inner_radius, outer_radius)], 
+        period = period, num_threads = num_threads, approx_cell1_size = approx_cell1_size)
+    result = _[:,0]
 
     environment_volume = (4/3.)*np.pi*(outer_radius**3 - inner_radius**3)
     number_density = result/environment_volume
@@ -19,9 +19,6 @@ def _large_scale_density_spherical_volume_process_args(
     """
     sample = convert_to_ndarray(sample)
     tracers = convert_to_ndarray(tracers)
-    _ = convert_to_ndarray(radius, dt=float)
-    rbins = np.append(_, _[0]+0.0001)
-
 
     if period is None:
         if sample_volume is None:
@@ -44,7 +41,7 @@ def _large_scale_density_spherical_volume_process_args(
             msg = ("If period is not None, do not pass in sample_volume")
             raise HalotoolsError(msg)
 
-    return sample, tracers, rbins, period, sample_volume, num_threads, approx_cell1_size
+    return sample, tracers, period, sample_volume, num_threads, approx_cell1_size
 
 def _large_scale_density_spherical_annulus_process_args(
     sample, tracers, inner_radius, outer_radius, 
@@ -59,7 +56,6 @@ def _large_scale_density_spherical_annulus_process_args(
     except AssertionError:
         msg = ("Input ``outer_radius`` must be larger than input ``inner_radius``")
         raise HalotoolsError(msg)
-    rbins = np.array([inner_radius, outer_radius])
 
     if period is None:
         if sample_volume is None:
@@ -82,7 +78,7 @@ def _large_scale_density_spherical_annulus_process_args(
             msg = ("If period is not None, do not pass in sample_volume")
             raise HalotoolsError(msg)
 
-    return sample, tracers, rbins, period, sample_volume, num_threads, approx_cell1_size
+    return sample, tracers, period, sample_volume, num_threads, approx_cell1_size
 
 
 
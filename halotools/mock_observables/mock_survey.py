@@ -13,9 +13,11 @@ from scipy.interpolate import interp1d
 from astropy import cosmology
 from astropy.constants import c #the speed of light
 
+from ..custom_exceptions import HalotoolsError
 
-__all__=['distant_observer_redshift', 'ra_dec_z']
-__author__ = ['Duncan Campbell']
+__all__=['distant_observer_redshift', 'ra_dec_z', 
+    'light_cone', 'light_cone_chunk_generator']
+__author__ = ['Duncan Campbell', 'Andrew Hearin']
 
 
 def distant_observer_redshift(x, v, period=None, cosmo=None):
@@ -214,5 +216,333 @@ def ra_dec_z(x, v, cosmo=None):
     dec = theta - np.pi/2.0
     
     return ra, dec, redshift
-    
-    
+
+
+def light_cone_chunk_generator(x, v, period, ra_range, dec_range, redshift_range, 
+    cosmo=None, observer=None, chunk_size=int(1e6)):
+    """
+    Generator yielding the galaxies of a light-cone mock survey built by lazily 
+    tiling a periodic box around an observer. 
+
+    The periodic box is never copied. Instead, the generator loops over the 
+    integer replica offsets :math:`\\vec{n}` of the box, 
+    culls every replica whose bounding box cannot overlap the survey footprint, 
+    and for each surviving replica processes the input points ``chunk_size`` 
+    at a time, computing the observed redshift including redshift-space distortions 
+    and keeping only the points inside the (ra, dec, z) footprint. 
+
+    See `light_cone` for a description of the arguments. 
+
+    Yields 
+    -------
+    chunk : dict 
+        Dictionary of Numpy arrays storing the galaxies of the light-cone found 
+        in a single chunk of a single replica. Keys are 
+        ``ra``, ``dec``, ``redshift``, ``redshift_cosmological``, 
+        ``x``, ``y``, ``z``, ``catalog_index``. 
+        Chunks in which no point survives the footprint cuts are not yielded. 
+
+    Examples 
+    --------
+    >>> Npts, Lbox = 1000, 250.
+    >>> coords = np.random.uniform(0, Lbox, Npts*3).reshape((Npts, 3))
+    >>> vels = np.random.normal(0, 200., Npts*3).reshape((Npts, 3))
+    >>> footprint = dict(ra_range=(0, 0.5), dec_range=(0, 0.5), redshift_range=(0.05, 0.15))
+    >>> for chunk in light_cone_chunk_generator(coords, vels, Lbox, **footprint): 
+    ...     ra, redshift = chunk['ra'], chunk['redshift']
+    """
+    x, v, period, ra_range, dec_range, redshift_range, cosmo, observer, chunk_size = (
+        _light_cone_process_args(x, v, period, ra_range, dec_range, redshift_range, 
+            cosmo, observer, chunk_size))
+
+    c_km_s = c.to('km/s').value
+    zmin, zmax = redshift_range
+
+    # Peculiar velocities shift galaxies in redshift-space, so the replicas are 
+    # culled against a footprint that is padded by the maximum possible shift
+    umax = np.sqrt(np.max(np.sum(v*v, axis=1)))/c_km_s
+    if umax >= 1:
+        raise HalotoolsError("Input velocities must be smaller than the speed of light")
+    zmin_cos = max(0., (zmin - umax)/(1. + umax))
+    zmax_cos = (zmax + umax)/(1. - umax)
+
+    # Lookup table for the comoving distance-redshift relation in Mpc/h
+    zgrid = np.linspace(0., zmax_cos*1.01 + 0.01, 2000)
+    dgrid = cosmo.comoving_distance(zgrid).value*cosmo.h
+    rmin, rmax = np.interp([zmin_cos, zmax_cos], zgrid, dgrid)
+
+    box_min, box_max = _spherical_sector_bounding_box(ra_range, dec_range, rmin, rmax)
+
+    for shift in _light_cone_replica_shift_generator(period, observer, 
+        box_min, box_max, rmin, rmax):
+
+        for first in range(0, len(x), chunk_size):
+            last = min(first + chunk_size, len(x))
+            chunk = _light_cone_process_chunk(x[first:last], v[first:last], shift, 
+                ra_range, dec_range, redshift_range, zgrid, dgrid, c_km_s)
+            if len(chunk['ra']) > 0:
+                chunk['catalog_index'] += first
+                yield chunk 
+
+
+def light_cone(x, v, period, ra_range, dec_range, redshift_range, 
+    cosmo=None, observer=None, chunk_size=int(1e6), output_fname=None, overwrite=False):
+    """
+    Build a light-cone mock survey by replicating the periodic simulation box 
+    around an observer, including the effect of redshift-space distortions. 
+
+    The box is replicated lazily: no copies of the input catalog are ever made, 
+    and replicas that lie outside the survey footprint are culled with 
+    bounding-box tests before any point in them is touched. 
+    When ``output_fname`` is passed, the light-cone is streamed to disk in chunks 
+    so that the memory footprint stays at a single chunk regardless of the 
+    size of the survey. 
+
+    Parameters
+    ----------
+    x : array_like
+        Npts x 3 numpy array containing 3-d positions in Mpc/h, 
+        with all points inside the box [0, period).
+
+    v : array_like
+        Npts x 3 numpy array containing 3-d velocities in km/s
+
+    period : array_like
+        Length-3 array defining axis-aligned periodic boundary conditions. If only 
+        one number, Lbox, is specified, period is assumed to be [Lbox]*3.
+
+    ra_range : array_like 
+        Length-2 sequence storing the minimum and maximum right ascension 
+        of the survey in radians, with 0 <= ra_range[0] < ra_range[1] <= 2pi. 
+
+    dec_range : array_like 
+        Length-2 sequence storing the minimum and maximum declination 
+        of the survey in radians, with -pi/2 <= dec_range[0] < dec_range[1] <= pi/2. 
+
+    redshift_range : array_like 
+        Length-2 sequence storing the minimum and maximum observed redshift 
+        of the survey. 
+
+    cosmo : object, optional
+        Instance of an Astropy `~astropy.cosmology` object.  The default is 
+        FlatLambdaCDM(H0=70, Om0=0.3)
+
+    observer : array_like, optional 
+        Length-3 array storing the position of the observer in Mpc/h in the 
+        coordinate system of ``x``. Default is the origin. 
+
+    chunk_size : int, optional 
+        Number of points of the input catalog processed at a time. 
+        Default is 1e6. 
+
+    output_fname : string, optional 
+        Absolute path to an hdf5 file. If passed, each chunk of the light-cone 
+        is appended to resizable datasets of the file as soon as it is computed, 
+        and nothing is returned. Requires h5py. 
+
+    overwrite : bool, optional 
+        If ``output_fname`` already exists, it will only be overwritten 
+        if ``overwrite`` is True. Default is False. 
+
+    Returns
+    -------
+    result : dict 
+        Dictionary of Numpy arrays storing the galaxies of the light-cone. 
+        ``ra`` and ``dec`` are in radians, ``redshift`` is the observed redshift 
+        and ``redshift_cosmological`` the redshift in the absence of peculiar velocities. 
+        ``x``, ``y``, ``z`` store the comoving position in Mpc/h relative to the observer. 
+        ``catalog_index`` stores the row of the input catalog the galaxy was copied from, 
+        so that any other galaxy property can be attached to the light-cone 
+        by fancy indexing. 
+        Only returned if ``output_fname`` is None. 
+
+    Notes 
+    -----
+    A box side length smaller than the radial depth of the survey implies that the 
+    same galaxy appears several times in the light-cone, at different positions. 
+
+    Examples
+    --------
+    >>> Npts, Lbox = 1000, 250.
+    >>> coords = np.random.uniform(0, Lbox, Npts*3).reshape((Npts, 3))
+    >>> vels = np.random.normal(0, 200., Npts*3).reshape((Npts, 3))
+    >>> result = light_cone(coords, vels, Lbox, (0, 0.5), (0, 0.5), (0.05, 0.15))
+    >>> ra, dec, redshift = result['ra'], result['dec'], result['redshift']
+
+    """
+    gen = light_cone_chunk_generator(x, v, period, ra_range, dec_range, redshift_range, 
+        cosmo=cosmo, observer=observer, chunk_size=chunk_size)
+
+    if output_fname is None:
+        chunklist = list(gen)
+        result = {}
+        for key, dt in _light_cone_dtypes: 
+            if len(chunklist) == 0:
+                result[key] = np.zeros(0, dtype=dt)
+            else:
+                result[key] = np.concatenate([chunk[key] for chunk in chunklist])
+        return result
+    else:
+        _write_light_cone_to_disk(gen, output_fname, overwrite, 
+            period, ra_range, dec_range, redshift_range, observer)
+
+
+_light_cone_dtypes = (('ra', 'f8'), ('dec', 'f8'), ('redshift', 'f8'), 
+    ('redshift_cosmological', 'f8'), ('x', 'f4'), ('y', 'f4'), ('z', 'f4'), 
+    ('catalog_index', 'i8'))
+
+
+def _light_cone_process_args(x, v, period, ra_range, dec_range, redshift_range, 
+    cosmo, observer, chunk_size):
+    """ Private method used to check the inputs of `light_cone_chunk_generator`. 
+    """
+    x = np.asarray(x)
+    v = np.asarray(v)
+    if (x.ndim != 2) or (x.shape[1] != 3) or (x.shape != v.shape):
+        raise HalotoolsError("Input ``x`` and ``v`` must both have shape (Npts, 3)")
+
+    period = np.atleast_1d(period).astype(float)
+    if len(period) == 1:
+        period = np.array([period[0]]*3)
+    if (len(period) != 3) or np.any(period <= 0):
+        raise HalotoolsError("Input ``period`` must be a positive scalar or length-3 sequence")
+
+    ra_range = np.asarray(ra_range, dtype=float)
+    dec_range = np.asarray(dec_range, dtype=float)
+    redshift_range = np.asarray(redshift_range, dtype=float)
+    if (ra_range.shape != (2, )) or (ra_range[0] < 0) or (
+        ra_range[1] > 2*np.pi) or (ra_range[0] >= ra_range[1]):
+        raise HalotoolsError("Input ``ra_range`` must satisfy 0 <= ra_min < ra_max <= 2pi")
+    if (dec_range.shape != (2, )) or (dec_range[0] < -np.pi/2.) or (
+        dec_range[1] > np.pi/2.) or (dec_range[0] >= dec_range[1]):
+        raise HalotoolsError("Input ``dec_range`` must satisfy -pi/2 <= dec_min < dec_max <= pi/2")
+    if (redshift_range.shape != (2, )) or (redshift_range[0] < 0) or (
+        redshift_range[0] >= redshift_range[1]):
+        raise HalotoolsError("Input ``redshift_range`` must satisfy 0 <= zmin < zmax")
+
+    if cosmo is None:
+        cosmo = cosmology.FlatLambdaCDM(H0=70., Om0=0.3)
+
+    if observer is None:
+        observer = np.zeros(3)
+    observer = np.asarray(observer, dtype=float)
+    if observer.shape != (3, ):
+        raise HalotoolsError("Input ``observer`` must be a length-3 sequence")
+
+    chunk_size = int(chunk_size)
+    if chunk_size < 1:
+        raise HalotoolsError("Input ``chunk_size`` must be a positive integer")
+
+    return x, v, period, ra_range, dec_range, redshift_range, cosmo, observer, chunk_size
+
+
+def _spherical_sector_bounding_box(ra_range, dec_range, rmin, rmax):
+    """ Private method returning the exact axis-aligned bounding box 
+    of the region rmin <= r <= rmax inside the input (ra, dec) footprint. 
+
+    Each Cartesian coordinate is a product of factors that each depend on a 
+    single one of (r, ra, dec), so the extrema are attained at the boundaries 
+    of the footprint, or at the angles where a factor is extremal. 
+    """
+    ra_candidates = [ra_range[0], ra_range[1]]
+    ra_candidates.extend(k*np.pi/2. for k in range(5) 
+        if ra_range[0] < k*np.pi/2. < ra_range[1])
+    dec_candidates = [dec_range[0], dec_range[1]]
+    if dec_range[0] < 0 < dec_range[1]:
+        dec_candidates.append(0.)
+
+    ra, dec, r = np.meshgrid(ra_candidates, dec_candidates, [rmin, rmax])
+    ra, dec, r = ra.flatten(), dec.flatten(), r.flatten()
+    pts = np.vstack((r*np.cos(dec)*np.cos(ra), r*np.cos(dec)*np.sin(ra), r*np.sin(dec))).T
+    return pts.min(axis=0), pts.max(axis=0)
+
+
+def _light_cone_replica_shift_generator(period, observer, box_min, box_max, rmin, rmax):
+    """ Private method yielding the shift n*period - observer of every replica 
+    of the periodic box that overlaps the footprint bounding box [box_min, box_max] 
+    and the spherical shell rmin <= r <= rmax around the observer. 
+    """
+    nlow = np.floor((box_min + observer)/period).astype(int)
+    nhigh = np.floor((box_max + observer)/period).astype(int)
+
+    for nx in range(nlow[0], nhigh[0]+1):
+        for ny in range(nlow[1], nhigh[1]+1):
+            for nz in range(nlow[2], nhigh[2]+1):
+                shift = np.array((nx, ny, nz))*period - observer
+                lo, hi = shift, shift + period
+
+                closest_point = np.clip(0., lo, hi)
+                farthest_point = np.where(np.abs(lo) > np.abs(hi), lo, hi)
+                if np.sqrt(np.sum(closest_point**2)) > rmax:
+                    continue 
+                if np.sqrt(np.sum(farthest_point**2)) < rmin:
+                    continue 
+                yield shift 
+
+
+def _light_cone_process_chunk(x, v, shift, ra_range, dec_range, redshift_range, 
+    zgrid, dgrid, c_km_s):
+    """ Private method applying redshift-space distortions to a single chunk of 
+    a single replica, and returning the points inside the footprint. 
+    """
+    pos = x + shift
+    r = np.sqrt(np.sum(pos*pos, axis=1))
+    mask = (r > 0) & (r <= dgrid[-1])
+    pos, r, idx = pos[mask], r[mask], np.flatnonzero(mask)
+
+    ra = np.mod(np.arctan2(pos[:, 1], pos[:, 0]), 2*np.pi)
+    dec = np.arcsin(pos[:, 2]/r)
+    mask = (ra >= ra_range[0]) & (ra <= ra_range[1])
+    mask &= (dec >= dec_range[0]) & (dec <= dec_range[1])
+    pos, r, idx, ra, dec = pos[mask], r[mask], idx[mask], ra[mask], dec[mask]
+
+    vr = np.sum(v[idx]*pos, axis=1)/r
+    z_cos = np.interp(r, dgrid, zgrid)
+    z_obs = z_cos + (vr/c_km_s)*(1.0 + z_cos)
+    mask = (z_obs >= redshift_range[0]) & (z_obs <= redshift_range[1])
+
+    chunk = {'ra': ra[mask], 'dec': dec[mask], 
+        'redshift': z_obs[mask], 'redshift_cosmological': z_cos[mask], 
+        'x': pos[mask, 0].astype('f4'), 'y': pos[mask, 1].astype('f4'), 
+        'z': pos[mask, 2].astype('f4'), 'catalog_index': idx[mask].astype('i8')}
+    return chunk
+
+
+def _write_light_cone_to_disk(gen, output_fname, overwrite, 
+    period, ra_range, dec_range, redshift_range, observer):
+    """ Private method appending each chunk yielded by ``gen`` to 
+    resizable datasets of the hdf5 file ``output_fname``. 
+    """
+    try:
+        import h5py 
+    except ImportError:
+        raise HalotoolsError("Must have h5py installed to write a light-cone to disk")
+
+    import os
+    if os.path.isfile(output_fname) and (overwrite is False):
+        raise HalotoolsError("The following filename already exists: \n" + output_fname + 
+            "\nIf you want to overwrite this file, you must set overwrite=True")
+
+    f = h5py.File(output_fname, 'w')
+    try:
+        for key, dt in _light_cone_dtypes:
+            f.create_dataset(key, shape=(0, ), maxshape=(None, ), dtype=dt, chunks=True)
+
+        num_gals = 0
+        for chunk in gen:
+            n = len(chunk['ra'])
+            for key, dt in _light_cone_dtypes:
+                f[key].resize((num_gals + n, ))
+                f[key][num_gals:] = chunk[key]
+            num_gals += n 
+
+        f.attrs['period'] = np.atleast_1d(period).astype(float)
+        f.attrs['ra_range'] = np.asarray(ra_range, dtype=float)
+        f.attrs['dec_range'] = np.asarray(dec_range, dtype=float)
+        f.attrs['redshift_range'] = np.asarray(redshift_range, dtype=float)
+        if observer is not None:
+            f.attrs['observer'] = np.asarray(observer, dtype=float)
+        f.attrs['num_gals'] = num_gals 
+    finally:
+        f.close()
+
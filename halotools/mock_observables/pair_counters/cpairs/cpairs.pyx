@@ -24,7 +24,10 @@ __all__ = ['npairs_no_pbc',\
            'xy_z_jnpairs_no_pbc',\
            'xy_z_jnpairs_pbc',\
            's_mu_npairs_no_pbc',\
-           's_mu_npairs_pbc']
+           's_mu_npairs_pbc',\
+           's_multipole_npairs_no_pbc',\
+           'region_npairs_no_pbc',\
+           'xy_z_region_npairs_no_pbc']
 
 __author__=['Duncan Campbell']
 
@@ -1398,6 +1401,237 @@ def s_mu_npairs_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
     return counts
 
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def s_multipole_npairs_no_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                              np.ndarray[np.float64_t, ndim=1] y_icell1,
+                              np.ndarray[np.float64_t, ndim=1] z_icell1,
+                              np.ndarray[np.float64_t, ndim=1] x_icell2,
+                              np.ndarray[np.float64_t, ndim=1] y_icell2,
+                              np.ndarray[np.float64_t, ndim=1] z_icell2,
+                              np.ndarray[np.float64_t, ndim=1] s_bins):
+    """
+    Calculate the Legendre-weighted pair counts, :math:`\\sum L_{\\ell}(\\mu)`, 
+    for :math:`\\ell = 0, 2, 4` of pairs in the bins s_bins[k-1] < s <= s_bins[k].
+    
+    :math:`s` is the radial separation, and :math:`\\mu` is cosine of the angle wrt 
+    the z-direction.  Each pair contributes to exactly one :math:`s` bin, so that 
+    the result does not depend on any binning in :math:`\\mu`.
+    
+    This can be used for pair counting with PBCs if the points are pre-shifted to 
+    account for the PBC.
+    
+    Parameters
+    ----------
+    x_icell1, y_icell1, z_icell1 : numpy.array
+         arrays of positions of length N1 (data1)
+    
+    x_icell2, y_icell2, z_icell2 : numpy.array
+         arrays of positions of length N2 (data2)
+    
+    s_bins : numpy.array
+         array of length Ns_bins+1 defining :math:`s` bins in which to sum the pair counts
+    
+    Returns
+    -------
+    result : numpy.ndarray
+        Ns_bins x 3 array of the sums of :math:`L_0(\\mu)`, :math:`L_2(\\mu)` and 
+        :math:`L_4(\\mu)` over the pairs in each :math:`s` bin.
+    """
+    
+    #c definitions
+    cdef int ns_bins = len(s_bins)
+    cdef np.ndarray[np.float64_t, ndim=1] s_bins_sq = s_bins**2
+    cdef double smin_sq = s_bins_sq[0]
+    cdef double smax_sq = s_bins_sq[ns_bins-1]
+    cdef np.ndarray[np.float64_t, ndim=2] counts =\
+        np.zeros((ns_bins-1, 3), dtype=np.float64)
+    cdef double d_perp, d_para, d, mu_sq
+    cdef int i, j, k
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    
+    #loop over points in grid1's cell
+    for i in range(0,Ni):
+                
+        #loop over points in grid2's cell
+        for j in range(0,Nj):
+                    
+            #calculate the square distance
+            d_perp = perp_square_distance(x_icell1[i], y_icell1[i],\
+                                          x_icell2[j], y_icell2[j])
+            d_para = para_square_distance(z_icell1[i], z_icell2[j])
+            d = d_perp + d_para
+            
+            if (d <= smin_sq) or (d > smax_sq): continue
+            
+            k = 1
+            while d > s_bins_sq[k]:
+                k = k + 1
+            
+            #the even Legendre polynomials only depend upon mu**2
+            mu_sq = d_para/d
+            counts[k-1,0] += 1.0
+            counts[k-1,1] += 0.5*(3.0*mu_sq - 1.0)
+            counts[k-1,2] += 0.125*((35.0*mu_sq - 30.0)*mu_sq + 3.0)
+        
+    return counts
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def region_npairs_no_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                         np.ndarray[np.float64_t, ndim=1] y_icell1,
+                         np.ndarray[np.float64_t, ndim=1] z_icell1,
+                         np.ndarray[np.float64_t, ndim=1] x_icell2,
+                         np.ndarray[np.float64_t, ndim=1] y_icell2,
+                         np.ndarray[np.float64_t, ndim=1] z_icell2,
+                         np.ndarray[np.int_t, ndim=1] region_icell1,
+                         np.ndarray[np.int_t, ndim=1] region_icell2,
+                         np.ndarray[np.float64_t, ndim=1] rbins,
+                         np.ndarray[np.int_t, ndim=3] counts):
+    """
+    Update, in place, the number of pairs between each pair of regions, 
+    binned by the smallest radius of rbins that is larger than their separation. 
+    The cumulative counts are recovered with `numpy.cumsum` along the last axis. 
+    
+    This can be used for pair counting with PBCs if the points are pre-shifted to 
+    account for the PBC.
+    
+    Parameters
+    ----------
+    x_icell1, y_icell1, z_icell1 : numpy.array
+         arrays of positions of length N1 (data1)
+    
+    x_icell2, y_icell2, z_icell2 : numpy.array
+         arrays of positions of length N2 (data2)
+    
+    region_icell1 : numpy.array
+        array of integer region labels of data1 in the range [0, N_regions-1]
+    
+    region_icell2 : numpy.array
+        array of integer region labels of data2 in the range [0, N_regions-1]
+    
+    rbins : numpy.array
+         array defining radial bins in which to sum the pair counts
+    
+    counts : numpy.ndarray
+        N_regions x N_regions x len(rbins) array of pair counts, updated in place.
+    """
+    
+    #c definitions
+    cdef int nbins = len(rbins)
+    cdef np.ndarray[np.float64_t, ndim=1] rbins_sq = rbins**2
+    cdef double rmax_sq = rbins_sq[nbins-1]
+    cdef double d
+    cdef int i, j, k
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    
+    #loop over points in grid1's cell
+    for i in range(0,Ni):
+                
+        #loop over points in grid2's cell
+        for j in range(0,Nj):
+                    
+            #calculate the square distance
+            d = square_distance(x_icell1[i],y_icell1[i],z_icell1[i],\
+                                x_icell2[j],y_icell2[j],z_icell2[j])
+            
+            if d > rmax_sq: continue
+            
+            k = 0
+            while d > rbins_sq[k]:
+                k = k + 1
+            
+            counts[region_icell1[i], region_icell2[j], k] += 1
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def xy_z_region_npairs_no_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                              np.ndarray[np.float64_t, ndim=1] y_icell1,
+                              np.ndarray[np.float64_t, ndim=1] z_icell1,
+                              np.ndarray[np.float64_t, ndim=1] x_icell2,
+                              np.ndarray[np.float64_t, ndim=1] y_icell2,
+                              np.ndarray[np.float64_t, ndim=1] z_icell2,
+                              np.ndarray[np.int_t, ndim=1] region_icell1,
+                              np.ndarray[np.int_t, ndim=1] region_icell2,
+                              np.ndarray[np.float64_t, ndim=1] rp_bins,
+                              np.ndarray[np.float64_t, ndim=1] pi_bins,
+                              np.ndarray[np.int_t, ndim=4] counts):
+    """
+    Update, in place, the number of pairs between each pair of regions, 
+    binned by the smallest values of rp_bins and pi_bins that are larger than 
+    their perpendicular and parallel separations. The cumulative counts are 
+    recovered with `numpy.cumsum` along the last two axes. 
+    
+    This can be used for pair counting with PBCs if the points are pre-shifted to 
+    account for the PBC.
+    
+    Parameters
+    ----------
+    x_icell1, y_icell1, z_icell1 : numpy.array
+         arrays of positions of length N1 (data1)
+    
+    x_icell2, y_icell2, z_icell2 : numpy.array
+         arrays of positions of length N2 (data2)
+    
+    region_icell1 : numpy.array
+        array of integer region labels of data1 in the range [0, N_regions-1]
+    
+    region_icell2 : numpy.array
+        array of integer region labels of data2 in the range [0, N_regions-1]
+    
+    rp_bins : numpy.array
+        array defining projected separation in which to sum the pair counts
+    
+    pi_bins : numpy.array
+        array defining parallel separation in which to sum the pair counts
+    
+    counts : numpy.ndarray
+        N_regions x N_regions x len(rp_bins) x len(pi_bins) array of pair counts, 
+        updated in place.
+    """
+    
+    #c definitions
+    cdef int nrp_bins = len(rp_bins)
+    cdef int npi_bins = len(pi_bins)
+    cdef np.ndarray[np.float64_t, ndim=1] rp_bins_sq = rp_bins**2
+    cdef np.ndarray[np.float64_t, ndim=1] pi_bins_sq = pi_bins**2
+    cdef double rp_max_sq = rp_bins_sq[nrp_bins-1]
+    cdef double pi_max_sq = pi_bins_sq[npi_bins-1]
+    cdef double d_perp, d_para
+    cdef int i, j, k, l
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    
+    #loop over points in grid1's cell
+    for i in range(0,Ni):
+                
+        #loop over points in grid2's cell
+        for j in range(0,Nj):
+                    
+            #calculate the square distances
+            d_perp = perp_square_distance(x_icell1[i], y_icell1[i],\
+                                          x_icell2[j], y_icell2[j])
+            d_para = para_square_distance(z_icell1[i], z_icell2[j])
+            
+            if (d_perp > rp_max_sq) or (d_para > pi_max_sq): continue
+            
+            k = 0
+            while d_perp > rp_bins_sq[k]:
+                k = k + 1
+            l = 0
+            while d_para > pi_bins_sq[l]:
+                l = l + 1
+            
+            counts[region_icell1[i], region_icell2[j], k, l] += 1
+
+
 ###########################
 #### binning functions ####
 ###########################
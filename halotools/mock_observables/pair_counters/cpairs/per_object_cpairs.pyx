@@ -12,8 +12,8 @@ cimport numpy as np
 
 from .distances cimport *
 
-__all__ = ['per_object_npairs_no_pbc']
-__author__=['Duncan Campbell']
+__all__ = ['per_object_npairs_no_pbc', 'per_object_weighted_npairs_no_pbc']
+__author__=['Duncan Campbell', 'Andrew Hearin']
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
@@ -114,6 +114,105 @@ def per_object_npairs_no_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
     return outer_counts
 
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def per_object_weighted_npairs_no_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                                      np.ndarray[np.float64_t, ndim=1] y_icell1,
+                                      np.ndarray[np.float64_t, ndim=1] z_icell1,
+                                      np.ndarray[np.float64_t, ndim=1] x_icell2,
+                                      np.ndarray[np.float64_t, ndim=1] y_icell2,
+                                      np.ndarray[np.float64_t, ndim=1] z_icell2,
+                                      np.ndarray[np.int32_t, ndim=1] sample_id2,
+                                      np.ndarray[np.float64_t, ndim=2] w_icell2,
+                                      np.ndarray[np.float64_t, ndim=1] rbins,
+                                      np.int_t num_samples, 
+                                      np.ndarray[np.int32_t, ndim=3] counts, 
+                                      np.ndarray[np.float64_t, ndim=4] weighted_counts):
+    """
+    Accumulate the differential pair counts per object, :math:`N_i(r_{k-1} < r \\leq r_k)`, 
+    separately for each tracer sample, together with the sum of each weight column of 
+    the tracers in each bin. 
+    
+    Each pair is binned exactly once, rather than once per enclosing bin edge. 
+    Cumulative counts are recovered by the caller with a cumulative sum over the bin axis. 
+    This can be used for pair counting with PBCs if the points are pre-shifted to 
+    account for the PBC.
+    
+    Parameters
+    ----------
+    x_icell1, y_icell1, z_icell1 : numpy.array
+         arrays of positions of length N1 (data1)
+    
+    x_icell2, y_icell2, z_icell2 : numpy.array
+         arrays of positions of length N2 (data2)
+    
+    sample_id2 : numpy.array
+        int32 array of length N2 storing the tracer sample each point in data2 belongs to, 
+        with values in [0, num_samples). 
+    
+    w_icell2 : numpy.ndarray
+        2-D array of weights of length N2 and depth Nweights >= 0 
+    
+    rbins : numpy.array
+         array defining the outer edges of the radial bins 
+    
+    num_samples : int 
+        Number of distinct tracer samples in data2 
+    
+    counts : numpy.ndarray 
+        int32 array of shape (N1, num_samples, len(rbins)) 
+        into which the differential counts are accumulated in place. 
+    
+    weighted_counts : numpy.ndarray 
+        float64 array of shape (N1, num_samples, len(rbins), Nweights) 
+        into which the differential weighted counts are accumulated in place. 
+    
+    Examples
+    --------
+    >>> Npts = 1000
+    >>> x, y, z = np.random.random((3, Npts))
+    >>> sample_id = np.zeros(Npts, dtype='i4')
+    >>> weights = np.ones((Npts, 1))
+    >>> rbins = np.array([0.1, 0.2])
+    >>> counts = np.zeros((Npts, 1, 2), dtype='i4')
+    >>> weighted_counts = np.zeros((Npts, 1, 2, 1))
+    >>> per_object_weighted_npairs_no_pbc(x,y,z,x,y,z,sample_id,weights,rbins,1,counts,weighted_counts)
+    """
+    
+    #c definitions
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    cdef int nbins = len(rbins)
+    cdef int nweights = w_icell2.shape[1]
+    cdef np.ndarray[np.float64_t, ndim=1] rbins_sq = rbins**2
+    cdef double rmax_sq = rbins_sq[nbins-1]
+    cdef double d
+    cdef int i, j, k, s, w
+    
+    #loop over points in grid1's cells
+    for i in range(0,Ni):
+        
+        #loop over points in grid2's cells
+        for j in range(0,Nj):
+            
+            #calculate the square distance
+            d = square_distance(x_icell1[i],y_icell1[i],z_icell1[i],\
+                                x_icell2[j],y_icell2[j],z_icell2[j])
+            
+            if d > rmax_sq: continue
+            
+            #find the innermost bin edge enclosing the pair
+            k = 0
+            while d > rbins_sq[k]:
+                k = k + 1
+            
+            s = sample_id2[j]
+            counts[i, s, k] += 1
+            for w in range(0, nweights):
+                weighted_counts[i, s, k, w] += w_icell2[j, w]
+
+
 cdef inline radial_binning(np.int_t* counts, np.float64_t* bins,\
                            np.float64_t d, np.int_t k):
     """
@@ -18,6 +18,7 @@ from functools import partial
 
 from ...custom_exceptions import *
 from ...utils.array_utils import convert_to_ndarray, array_is_monotonic
+from ...utils.instrumentation import instrumentation_enabled, record_call, timed_call
 
 __all__ = (
     ['_npairs_process_args', '_enclose_in_box', '_set_approximate_cell_sizes', 
@@ -320,4 +321,81 @@ def _set_approximate_xy_z_cell_sizes(approx_cell1_size, approx_cell2_size,
 
 
 
-    
\ No newline at end of file
+    
+
+
+class _PairCountingInstrumentation(object):
+    """ Private class recording the instrumentation of a call of a pair counter, 
+    see `~halotools.utils.instrument`. While instrumentation is disabled, 
+    the only overhead is checking a flag when the instance is created. 
+    """
+
+    def __init__(self, name, num_threads):
+        self.name = name
+        self.num_threads = num_threads
+        self.enabled = instrumentation_enabled()
+        self.start = time()
+
+    def tree_built(self):
+        """ Mark the end of the construction of the double tree. 
+        """
+        self.tree_build_time = time() - self.start
+
+    def map(self, engine, cells):
+        """ List of the results of the input engine applied to each element of ``cells``, 
+        computed in a pool of ``num_threads`` processes if ``num_threads`` > 1. 
+        """
+        counting_start = time()
+        if self.enabled:
+            engine = partial(timed_call, engine)
+
+        if self.num_threads > 1:
+            pool = multiprocessing.Pool(self.num_threads)
+            results = pool.map(engine, cells)
+            pool.close()
+        else:
+            results = list(map(engine, cells))
+
+        if self.enabled:
+            self.counting_time = time() - counting_start
+            self.worker_wall_time = {}
+            for result, pid, wall_time in results:
+                self.worker_wall_time[pid] = self.worker_wall_time.get(pid, 0.) + wall_time
+            results = [result for result, pid, wall_time in results]
+        return results
+
+    def record(self, double_tree, cells, search_lengths, pairs_binned):
+        """ Record the call if instrumentation is enabled. 
+
+        The numbers of cells visited and of distance evaluations are those of 
+        the engines, which compare every point in each cell of ``tree1`` in ``cells`` to 
+        every point in each cell of ``tree2`` within the input search lengths. 
+        """
+        if not self.enabled:
+            return
+        total_time = time() - self.start
+
+        cells_visited, distance_evaluations = 0, 0
+        tree1, tree2 = double_tree.tree1, double_tree.tree2
+        for icell1 in np.concatenate([np.atleast_1d(cell) for cell in cells]):
+            num_pts1 = len(tree1.x[tree1.slice_array[icell1]])
+            for icell2, xshift, yshift, zshift in double_tree.adjacent_cell_generator(
+                    icell1, *search_lengths):
+                cells_visited += 1
+                distance_evaluations += num_pts1*len(tree2.x[tree2.slice_array[icell2]])
+
+        record_call(self.name, {
+            'num_points1': len(tree1.x), 
+            'num_points2': len(tree2.x), 
+            'num_threads': self.num_threads, 
+            'num_cells1': len(tree1.slice_array), 
+            'num_cells2': len(tree2.slice_array), 
+            'tree_build_time': self.tree_build_time, 
+            'counting_time': self.counting_time, 
+            'total_time': total_time, 
+            'cells_visited': cells_visited, 
+            'distance_evaluations': distance_evaluations, 
+            'pairs_binned': float(pairs_binned), 
+            'worker_wall_time': [self.worker_wall_time[pid] 
+                for pid in sorted(self.worker_wall_time.keys())]
+            })
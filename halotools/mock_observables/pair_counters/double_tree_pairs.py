@@ -7,9 +7,15 @@ separation variable(s) are available, including 3-D spherical shells,
 `~halotools.mock_observables.pair_counters.npairs`, 2+1-D cylindrical shells, 
 `~halotools.mock_observables.pair_counters.xy_z_npairs`, and separations 
 :math:`s + \\theta_{\\rm los}` defined by angular & line-of-sight coordinates, 
-`~halotools.mock_observables.pair_counters.s_mu_npairs`. 
+`~halotools.mock_observables.pair_counters.s_mu_npairs`, 
+together with the Legendre-weighted counts in :math:`s` bins returned by 
+`~halotools.mock_observables.pair_counters.s_multipole_npairs`. 
 There is also a function `~halotools.mock_observables.pair_counters.jnpairs` 
-used to provide jackknife error estimates on the pair counts. 
+used to provide jackknife error estimates on the pair counts, and the functions 
+`~halotools.mock_observables.pair_counters.region_npairs` and 
+`~halotools.mock_observables.pair_counters.xy_z_region_npairs` 
+that count pairs between every pair of spatial sub-volumes for use with 
+`~halotools.mock_observables.region_resampling_covariance`. 
 """
 
 from __future__ import (absolute_import, division, print_function, unicode_literals)
@@ -25,13 +31,15 @@ from functools import partial
 
 from .double_tree import FlatRectanguloidDoubleTree
 from .double_tree_helpers import *
+from .double_tree_helpers import _PairCountingInstrumentation
 
 from .cpairs import *
 
 from ...custom_exceptions import *
 from ...utils.array_utils import convert_to_ndarray, array_is_monotonic
 
-__all__ = ['npairs', 'jnpairs', 'xy_z_npairs', 's_mu_npairs']
+__all__ = ['npairs', 'jnpairs', 'xy_z_npairs', 's_mu_npairs', 's_multipole_npairs',
+    'region_npairs', 'xy_z_region_npairs']
 __author__ = ['Duncan Campbell', 'Andrew Hearin']
 
 ##########################################################################
@@ -142,6 +150,7 @@ def npairs(data1, data2, rbins, period = None,\
         _npairs_process_args(data1, data2, rbins, period, 
             verbose, num_threads, approx_cell1_size, approx_cell2_size)
         )        
+    instrumentation = _PairCountingInstrumentation('npairs', num_threads)
     
     xperiod, yperiod, zperiod = period 
     rmax = np.max(rbins)
@@ -163,6 +172,7 @@ def npairs(data1, data2, rbins, period = None,\
         approx_x1cell_size, approx_y1cell_size, approx_z1cell_size, 
         approx_x2cell_size, approx_y2cell_size, approx_z2cell_size, 
         rmax, rmax, rmax, xperiod, yperiod, zperiod, PBCs=PBCs)
+    instrumentation.tree_built()
         
     #number of cells
     Ncell1 = double_tree.num_x1divs*double_tree.num_y1divs*double_tree.num_z1divs
@@ -181,13 +191,8 @@ def npairs(data1, data2, rbins, period = None,\
         double_tree, rbins, period, PBCs)
     
     #do the pair counting
-    if num_threads > 1:
-        pool = multiprocessing.Pool(num_threads)
-        result = pool.map(engine,range(Ncell1))
-        pool.close()
-        counts = np.sum(result,axis=0)
-    if num_threads == 1:
-        counts = np.sum(map(engine,range(Ncell1)),axis=0)
+    counts = np.sum(instrumentation.map(engine, range(Ncell1)), axis=0)
+    instrumentation.record(double_tree, range(Ncell1), (rmax, rmax, rmax), counts[-1])
     
     if verbose==True:
         print("total run time: {0} seconds".format(time.time()-start))
@@ -366,6 +371,7 @@ def jnpairs(data1, data2, rbins, period=None, weights1=None, weights2=None,
         _npairs_process_args(data1, data2, rbins, period, 
             verbose, num_threads, approx_cell1_size, approx_cell2_size)
         )
+    instrumentation = _PairCountingInstrumentation('jnpairs', num_threads)
     xperiod, yperiod, zperiod = period 
     rmax = np.max(rbins)
     
@@ -394,6 +400,7 @@ def jnpairs(data1, data2, rbins, period=None, weights1=None, weights2=None,
         approx_x1cell_size, approx_y1cell_size, approx_z1cell_size, 
         approx_x2cell_size, approx_y2cell_size, approx_z2cell_size, 
         rmax, rmax, rmax, xperiod, yperiod, zperiod, PBCs=PBCs)
+    instrumentation.tree_built()
 
 
     #sort the weights arrays
@@ -421,12 +428,8 @@ def jnpairs(data1, data2, rbins, period=None, weights1=None, weights2=None,
         weights1, weights2, jtags1, jtags2, N_samples, rbins, period, PBCs)
     
     #do the pair counting
-    if num_threads > 1:
-        pool = multiprocessing.Pool(num_threads)
-        counts = np.sum(pool.map(engine,range(Ncell1)),axis=0)
-        pool.close()
-    else:
-        counts = np.sum(map(engine,range(Ncell1)),axis=0)
+    counts = np.sum(instrumentation.map(engine, range(Ncell1)), axis=0)
+    instrumentation.record(double_tree, range(Ncell1), (rmax, rmax, rmax), counts[0,-1])
     
     return counts
 
@@ -595,6 +598,7 @@ def xy_z_npairs(data1, data2, rp_bins, pi_bins, period=None, verbose=False, num_
             verbose, num_threads, approx_cell1_size, approx_cell2_size)
         )        
     
+    instrumentation = _PairCountingInstrumentation('xy_z_npairs', num_threads)
     xperiod, yperiod, zperiod = period 
     rp_max = np.max(rp_bins)
     pi_max = np.max(pi_bins)
@@ -625,6 +629,7 @@ def xy_z_npairs(data1, data2, rp_bins, pi_bins, period=None, verbose=False, num_
         approx_x1cell_size, approx_y1cell_size, approx_z1cell_size, 
         approx_x2cell_size, approx_y2cell_size, approx_z2cell_size, 
         rp_max, rp_max, pi_max, xperiod, yperiod, zperiod, PBCs=PBCs)
+    instrumentation.tree_built()
 
     #number of cells
     Ncell1 = double_tree.num_x1divs*double_tree.num_y1divs*double_tree.num_z1divs
@@ -643,12 +648,8 @@ def xy_z_npairs(data1, data2, rp_bins, pi_bins, period=None, verbose=False, num_
         pi_bins, period, PBCs)
 
     #do the pair counting
-    if num_threads > 1:
-        pool = multiprocessing.Pool(num_threads)
-        counts = np.sum(pool.map(engine,range(Ncell1)),axis=0)
-        pool.close()
-    if num_threads == 1:
-        counts = np.sum(map(engine,range(Ncell1)),axis=0)
+    counts = np.sum(instrumentation.map(engine, range(Ncell1)), axis=0)
+    instrumentation.record(double_tree, range(Ncell1), (rp_max, rp_max, pi_max), counts[-1,-1])
 
     return counts
 
@@ -823,6 +824,7 @@ def s_mu_npairs(data1, data2, s_bins, mu_bins, period = None,\
             verbose, num_threads, approx_cell1_size, approx_cell2_size)
         )        
     
+    instrumentation = _PairCountingInstrumentation('s_mu_npairs', num_threads)
     xperiod, yperiod, zperiod = period 
     rmax = np.max(s_bins)
     
@@ -850,6 +852,7 @@ def s_mu_npairs(data1, data2, s_bins, mu_bins, period = None,\
         approx_x1cell_size, approx_y1cell_size, approx_z1cell_size, 
         approx_x2cell_size, approx_y2cell_size, approx_z2cell_size, 
         rmax, rmax, rmax, xperiod, yperiod, zperiod, PBCs=PBCs)
+    instrumentation.tree_built()
     
     #number of cells
     Ncell1 = double_tree.num_x1divs*double_tree.num_y1divs*double_tree.num_z1divs
@@ -859,12 +862,8 @@ def s_mu_npairs(data1, data2, s_bins, mu_bins, period = None,\
     engine = partial(_s_mu_npairs_engine, double_tree, s_bins, mu_bins, period, PBCs)
     
     #do the pair counting
-    if num_threads > 1:
-        pool = multiprocessing.Pool(num_threads)
-        counts = np.sum(pool.map(engine,range(Ncell1)),axis=0)
-        pool.close()
-    if num_threads == 1:
-        counts = np.sum(map(engine,range(Ncell1)),axis=0)
+    counts = np.sum(instrumentation.map(engine, range(Ncell1)), axis=0)
+    instrumentation.record(double_tree, range(Ncell1), (rmax, rmax, rmax), counts[-1,-1])
 
     return counts
 
@@ -908,3 +907,550 @@ def _s_mu_npairs_engine(double_tree, s_bins, mu_bins, period, PBCs, icell1):
     return counts
 
 
+def s_multipole_npairs(data1, data2, s_bins, period = None,\
+                       verbose = False, num_threads = 1,\
+                       approx_cell1_size = None, approx_cell2_size = None):
+    """ 
+    Function sums the Legendre polynomials :math:`L_{\\ell}(\\mu)` of order 
+    :math:`\\ell = 0, 2, 4` over all pairs of points in bins of radial separation, *s,* 
+    where :math:`\\mu\\equiv\\cos(\\theta_{\\rm los})` and :math:`\\theta_{\\rm los}` 
+    is the line-of-sight angle between points. 
+    
+    Each pair is weighted by the Legendre polynomials evaluated at its own value of 
+    :math:`\\mu`, so that the multipoles of the pair counts are exact, and 
+    computed for about the cost of `~halotools.mock_observables.npairs`, 
+    rather than approximated by integrating the output of 
+    `~halotools.mock_observables.s_mu_npairs` over bins of :math:`\\mu`. 
+    
+    Note that if data1 == data2 that the 
+    `~halotools.mock_observables.s_multipole_npairs` function double-counts pairs. 
+    
+    Parameters
+    ----------
+    data1 : array_like
+        N1 by 3 numpy array of 3-dimensional positions. 
+        Values of each dimension should be between zero and the corresponding dimension 
+        of the input period.
+            
+    data2 : array_like
+        N2 by 3 numpy array of 3-dimensional positions.
+        Values of each dimension should be between zero and the corresponding dimension 
+        of the input period.
+            
+    s_bins : array_like
+        numpy array of boundaries defining the radial bins in which pairs are counted.
+    
+    period : array_like, optional
+        Length-3 array defining the periodic boundary conditions. 
+        If only one number is specified, the enclosing volume is assumed to 
+        be a periodic cube (by far the most common case). 
+        If period is set to None, the default option, 
+        PBCs are set to infinity.  
+    
+    verbose : Boolean, optional
+        If True, print out information and progress.
+    
+    num_threads : int, optional
+        Number of CPU cores to use in the pair counting. 
+        If ``num_threads`` is set to the string 'max', use all available cores. 
+        Default is 1 thread for a serial calculation that 
+        does not open a multiprocessing pool. 
+
+    approx_cell1_size : array_like, optional 
+        Length-3 array serving as a guess for the optimal manner by which 
+        the `~halotools.mock_observables.pair_counters.FlatRectanguloidDoubleTree` 
+        will apportion the ``data`` points into subvolumes of the simulation box. 
+        The optimum choice unavoidably depends on the specs of your machine. 
+        Default choice is to use 1/10 of the box size in each dimension, 
+        which will result in reasonable performance for most use-cases. 
+        Performance can vary sensitively with this parameter, so it is highly 
+        recommended that you experiment with it when carrying out  
+        performance-critical calculations. 
+    
+    approx_cell2_size : array_like, optional 
+        See comments for ``approx_cell1_size``. 
+    
+    Returns
+    -------
+    Legendre_counts : np.ndarray
+        *len(s_bins)-1* by 3 array storing :math:`\\sum L_{\\ell}(\\mu)` for 
+        :math:`\\ell = 0, 2, 4` over the pairs with s_bins[k] < s <= s_bins[k+1]. 
+        The first column is the number of pairs in each bin. 
+        Note that, unlike `~halotools.mock_observables.npairs`, the counts are 
+        *not* cumulative. 
+    
+    Examples 
+    --------
+    For demonstration purposes we create randomly distributed sets of points within a 
+    periodic unit cube. 
+    
+    >>> Npts1, Npts2, Lbox = 1e3, 1e3, 200.
+    >>> period = [Lbox, Lbox, Lbox]
+    >>> s_bins = np.logspace(-1, 1.25, 15)
+    
+    >>> x1 = np.random.uniform(0, Lbox, Npts1)
+    >>> y1 = np.random.uniform(0, Lbox, Npts1)
+    >>> z1 = np.random.uniform(0, Lbox, Npts1)
+    >>> x2 = np.random.uniform(0, Lbox, Npts2)
+    >>> y2 = np.random.uniform(0, Lbox, Npts2)
+    >>> z2 = np.random.uniform(0, Lbox, Npts2)
+    
+    We transform our *x, y, z* points into the array shape used by the pair-counter by 
+    taking the transpose of the result of `numpy.vstack`. This boilerplate transformation 
+    is used throughout the `~halotools.mock_observables` sub-package:
+    
+    >>> data1 = np.vstack([x1, y1, z1]).T 
+    >>> data2 = np.vstack([x2, y2, z2]).T 
+    
+    >>> result = s_multipole_npairs(data1, data2, s_bins, period = period)
+    >>> monopole_counts, quadrupole_counts, hexadecapole_counts = result.T
+    """
+    
+    # Process the inputs with the helper function
+    x1, y1, z1, x2, y2, z2, s_bins, period, num_threads, PBCs = (
+        _npairs_process_args(data1, data2, s_bins, period, 
+            verbose, num_threads, approx_cell1_size, approx_cell2_size)
+        )        
+    
+    instrumentation = _PairCountingInstrumentation('s_multipole_npairs', num_threads)
+    xperiod, yperiod, zperiod = period 
+    rmax = np.max(s_bins)
+    
+    if verbose==True:
+        print("running double_tree_pairs.s_multipole_npairs on {0} x {1}\n"
+              "points with PBCs={2}".format(len(data1), len(data2), PBCs))
+        start = time.time()
+    
+    ### Compute the estimates for the cell sizes
+    approx_cell1_size, approx_cell2_size = (
+        _set_approximate_cell_sizes(approx_cell1_size, approx_cell2_size, rmax, period)
+        )
+    approx_x1cell_size, approx_y1cell_size, approx_z1cell_size = approx_cell1_size
+    approx_x2cell_size, approx_y2cell_size, approx_z2cell_size = approx_cell2_size
+
+    double_tree = FlatRectanguloidDoubleTree(
+        x1, y1, z1, x2, y2, z2,  
+        approx_x1cell_size, approx_y1cell_size, approx_z1cell_size, 
+        approx_x2cell_size, approx_y2cell_size, approx_z2cell_size, 
+        rmax, rmax, rmax, xperiod, yperiod, zperiod, PBCs=PBCs)
+    instrumentation.tree_built()
+    
+    #number of cells
+    Ncell1 = double_tree.num_x1divs*double_tree.num_y1divs*double_tree.num_z1divs
+
+    if verbose==True:
+        print("volume 1 split {0},{1},{2} times along each dimension,\n"
+              "resulting in {3} cells.".format(double_tree.num_x1divs,\
+              double_tree.num_y1divs,double_tree.num_z1divs,Ncell1))
+
+    #create a function to call with only one argument
+    engine = partial(_s_multipole_npairs_engine, double_tree, s_bins, period, PBCs)
+    
+    #do the pair counting
+    counts = np.sum(instrumentation.map(engine, range(Ncell1)), axis=0)
+    instrumentation.record(double_tree, range(Ncell1), (rmax, rmax, rmax), np.sum(counts[:,0]))
+
+    if verbose==True:
+        print("total run time: {0} seconds".format(time.time()-start))
+
+    return counts
+
+def _s_multipole_npairs_engine(double_tree, s_bins, period, PBCs, icell1):
+    """
+    pair counting engine for s_multipole_npairs function.  This code calls a cython function.
+    """
+    
+    counts = np.zeros((len(s_bins)-1, 3))
+    
+    #extract the points in the cell
+    s1 = double_tree.tree1.slice_array[icell1]
+    x_icell1, y_icell1, z_icell1 = (
+        double_tree.tree1.x[s1],
+        double_tree.tree1.y[s1],
+        double_tree.tree1.z[s1])
+        
+    xsearch_length = s_bins[-1]
+    ysearch_length = s_bins[-1]
+    zsearch_length = s_bins[-1]
+    adj_cell_generator = double_tree.adjacent_cell_generator(
+        icell1, xsearch_length, ysearch_length, zsearch_length)
+            
+    for icell2, xshift, yshift, zshift in adj_cell_generator:
+                
+        #extract the points in the cell
+        s2 = double_tree.tree2.slice_array[icell2]
+        x_icell2 = double_tree.tree2.x[s2] + xshift
+        y_icell2 = double_tree.tree2.y[s2] + yshift 
+        z_icell2 = double_tree.tree2.z[s2] + zshift
+        
+        #use cython functions to do pair counting
+        counts += s_multipole_npairs_no_pbc(
+            x_icell1, y_icell1, z_icell1,
+            x_icell2, y_icell2, z_icell2,
+            s_bins)
+            
+    return counts
+
+
+def region_npairs(data1, data2, rbins, jtags1, jtags2, N_samples, period = None,\
+                  verbose = False, num_threads = 1,\
+                  approx_cell1_size = None, approx_cell2_size = None):
+    """
+    Function counts the number of pairs of points separated by a three-dimensional distance 
+    smaller than the input ``rbins``, separately for every pair of spatial sub-volumes. 
+    
+    The counts for any jackknife, bootstrap or sub-sample realization of the 
+    points can be obtained from this single pass by summing over the sub-volumes. 
+    See `~halotools.mock_observables.region_resampling_covariance`. 
+    
+    Parameters
+    ----------
+    data1 : array_like
+        N1 by 3 numpy array of 3-dimensional positions. 
+        Values of each dimension should be between zero and the corresponding dimension 
+        of the input period.
+            
+    data2 : array_like
+        N2 by 3 numpy array of 3-dimensional positions.
+        Values of each dimension should be between zero and the corresponding dimension 
+        of the input period.
+            
+    rbins : array_like
+        Boundaries defining the bins in which pairs are counted.
+    
+    jtags1 : array_like
+        length N1 array containing integer tags in the range [1, N_samples] 
+        defining the sub-volume of each point in ``data1``, e.g., as returned by 
+        `~halotools.mock_observables.cuboid_subvolume_labels`. 
+        
+    jtags2 : array_like
+        length N2 array containing integer tags in the range [1, N_samples] 
+        defining the sub-volume of each point in ``data2``. 
+    
+    N_samples : int
+        Total number of sub-volumes. 
+    
+    period : array_like, optional
+        Length-3 array defining the periodic boundary conditions. 
+        If only one number is specified, the enclosing volume is assumed to 
+        be a periodic cube (by far the most common case). 
+        If period is set to None, the default option, 
+        PBCs are set to infinity.  
+    
+    verbose : Boolean, optional
+        If True, print out information and progress.
+    
+    num_threads : int, optional
+        Number of CPU cores to use in the pair counting. 
+        If ``num_threads`` is set to the string 'max', use all available cores. 
+        Default is 1 thread for a serial calculation that 
+        does not open a multiprocessing pool. 
+
+    approx_cell1_size : array_like, optional 
+        Length-3 array serving as a guess for the optimal manner by which 
+        the `~halotools.mock_observables.pair_counters.FlatRectanguloidDoubleTree` 
+        will apportion the ``data`` points into subvolumes of the simulation box. 
+        Default choice is to use 1/10 of the box size in each dimension. 
+        
+    approx_cell2_size : array_like, optional 
+        See comments for ``approx_cell1_size``. 
+    
+    Returns
+    -------
+    N_pairs : np.ndarray
+        Numpy array of shape (N_samples, N_samples, len(rbins)). 
+        The sub-array N_pairs[i-1, j-1, :] stores the number of pairs 
+        of points in ``data1`` with tag *i* and points in ``data2`` with tag *j* 
+        separated by less than ``rbins``, so that summing over the first two 
+        axes gives the result of `~halotools.mock_observables.npairs`. 
+    
+    Examples 
+    --------
+    For demonstration purposes we create randomly distributed sets of points within a 
+    periodic unit cube. 
+    
+    >>> Npts1, Npts2, Lbox = 1000, 1000, 250.
+    >>> period = [Lbox, Lbox, Lbox]
+    >>> rbins = np.logspace(-1, 1.5, 15)
+    
+    >>> data1 = np.random.uniform(0, Lbox, Npts1*3).reshape((Npts1, 3))
+    >>> data2 = np.random.uniform(0, Lbox, Npts2*3).reshape((Npts2, 3))
+    
+    >>> from halotools.mock_observables import cuboid_subvolume_labels
+    >>> jtags1, N_samples = cuboid_subvolume_labels(data1, 3, Lbox)
+    >>> jtags2, N_samples = cuboid_subvolume_labels(data2, 3, Lbox)
+    
+    >>> result = region_npairs(data1, data2, rbins, jtags1, jtags2, N_samples, period = period)
+    """
+    
+    ### Process the inputs with the helper function
+    x1, y1, z1, x2, y2, z2, rbins, period, num_threads, PBCs = (
+        _npairs_process_args(data1, data2, rbins, period, 
+            verbose, num_threads, approx_cell1_size, approx_cell2_size)
+        )
+    instrumentation = _PairCountingInstrumentation('region_npairs', num_threads)
+    xperiod, yperiod, zperiod = period 
+    rmax = np.max(rbins)
+    
+    # Process the jackknife-tags with the helper function
+    weights1, weights2, jtags1, jtags2 = (
+        _jnpairs_process_weights_jtags(data1, data2, 
+            None, None, jtags1, jtags2, N_samples))
+    
+    ### Compute the estimates for the cell sizes
+    approx_cell1_size, approx_cell2_size = (
+        _set_approximate_cell_sizes(approx_cell1_size, approx_cell2_size, rmax, period)
+        )
+    approx_x1cell_size, approx_y1cell_size, approx_z1cell_size = approx_cell1_size
+    approx_x2cell_size, approx_y2cell_size, approx_z2cell_size = approx_cell2_size
+
+    double_tree = FlatRectanguloidDoubleTree(
+        x1, y1, z1, x2, y2, z2,  
+        approx_x1cell_size, approx_y1cell_size, approx_z1cell_size, 
+        approx_x2cell_size, approx_y2cell_size, approx_z2cell_size, 
+        rmax, rmax, rmax, xperiod, yperiod, zperiod, PBCs=PBCs)
+    instrumentation.tree_built()
+    
+    #sort the tags, and convert them to array indices
+    jtags1 = (jtags1[double_tree.tree1.idx_sorted] - 1).astype(np.int_)
+    jtags2 = (jtags2[double_tree.tree2.idx_sorted] - 1).astype(np.int_)
+    
+    #number of cells
+    Ncell1 = double_tree.num_x1divs*double_tree.num_y1divs*double_tree.num_z1divs
+    
+    #create a function to call with only one argument. 
+    #Each call handles a block of cells, as the count matrix can be large. 
+    engine = partial(_region_npairs_engine, double_tree, 
+        jtags1, jtags2, N_samples, rbins, period, PBCs)
+    cell1_blocks = np.array_split(np.arange(Ncell1), num_threads)
+    
+    #do the pair counting
+    counts = np.sum(instrumentation.map(engine, cell1_blocks), axis=0)
+    instrumentation.record(double_tree, cell1_blocks, (rmax, rmax, rmax), np.sum(counts))
+    
+    return np.cumsum(counts, axis=-1)
+
+def _region_npairs_engine(double_tree, jtags1, jtags2, N_samples, 
+    rbins, period, PBCs, icell1_block):
+    """
+    pair counting engine for region_npairs function.  This code calls a cython function.
+    """
+    
+    counts = np.zeros((N_samples, N_samples, len(rbins)), dtype=np.int_)
+    
+    xsearch_length = rbins[-1]
+    ysearch_length = rbins[-1]
+    zsearch_length = rbins[-1]
+    
+    for icell1 in icell1_block:
+        #extract the points in the cell
+        s1 = double_tree.tree1.slice_array[icell1]
+        x_icell1, y_icell1, z_icell1 = (
+            double_tree.tree1.x[s1],
+            double_tree.tree1.y[s1],
+            double_tree.tree1.z[s1])
+        j_icell1 = jtags1[s1]
+        
+        adj_cell_generator = double_tree.adjacent_cell_generator(
+            icell1, xsearch_length, ysearch_length, zsearch_length)
+        
+        for icell2, xshift, yshift, zshift in adj_cell_generator:
+            
+            #extract the points in the cell
+            s2 = double_tree.tree2.slice_array[icell2]
+            x_icell2 = double_tree.tree2.x[s2] + xshift
+            y_icell2 = double_tree.tree2.y[s2] + yshift 
+            z_icell2 = double_tree.tree2.z[s2] + zshift
+            j_icell2 = jtags2[s2]
+            
+            #use cython functions to do pair counting
+            region_npairs_no_pbc(x_icell1, y_icell1, z_icell1,
+                x_icell2, y_icell2, z_icell2,
+                j_icell1, j_icell2, rbins, counts)
+            
+    return counts
+
+
+def xy_z_region_npairs(data1, data2, rp_bins, pi_bins, jtags1, jtags2, N_samples, 
+    period=None, verbose=False, num_threads=1, 
+    approx_cell1_size = None, approx_cell2_size = None):
+    """
+    Function counts the number of pairs of points with separation in the xy-plane 
+    less than the input ``rp_bins`` and separation in the z-dimension less than 
+    the input ``pi_bins``, separately for every pair of spatial sub-volumes. 
+    
+    The counts for any jackknife, bootstrap or sub-sample realization of the 
+    points can be obtained from this single pass by summing over the sub-volumes, 
+    e.g., to estimate the covariance of 
+    `~halotools.mock_observables.wp` or `~halotools.mock_observables.delta_sigma`. 
+    See `~halotools.mock_observables.region_resampling_covariance`. 
+    
+    Parameters
+    ----------
+    data1 : array_like
+        N1 by 3 numpy array of 3-dimensional positions. 
+        Values of each dimension should be between zero and the corresponding dimension 
+        of the input period.
+            
+    data2 : array_like
+        N2 by 3 numpy array of 3-dimensional positions.
+        Values of each dimension should be between zero and the corresponding dimension 
+        of the input period.
+            
+    rp_bins : array_like
+        array of boundaries defining the bins perpendicular to the LOS in which 
+        pairs are counted.
+        
+    pi_bins : array_like
+        array of boundaries defining the bins parallel to the LOS in which 
+        pairs are counted.
+    
+    jtags1 : array_like
+        length N1 array containing integer tags in the range [1, N_samples] 
+        defining the sub-volume of each point in ``data1``. 
+        
+    jtags2 : array_like
+        length N2 array containing integer tags in the range [1, N_samples] 
+        defining the sub-volume of each point in ``data2``. 
+    
+    N_samples : int
+        Total number of sub-volumes. 
+    
+    period : array_like, optional
+        Length-3 array defining the periodic boundary conditions. 
+        If only one number is specified, the enclosing volume is assumed to 
+        be a periodic cube (by far the most common case). 
+        If period is set to None, the default option, 
+        PBCs are set to infinity.  
+    
+    verbose : Boolean, optional
+        If True, print out information and progress.
+    
+    num_threads : int, optional
+        Number of CPU cores to use in the pair counting. 
+        If ``num_threads`` is set to the string 'max', use all available cores. 
+        Default is 1 thread for a serial calculation that 
+        does not open a multiprocessing pool. 
+
+    approx_cell1_size : array_like, optional 
+        See comments for `~halotools.mock_observables.xy_z_npairs`. 
+        
+    approx_cell2_size : array_like, optional 
+        See comments for ``approx_cell1_size``. 
+    
+    Returns
+    -------
+    N_pairs : np.ndarray
+        Numpy array of shape (N_samples, N_samples, len(rp_bins), len(pi_bins)). 
+        Summing over the first two axes gives the result of 
+        `~halotools.mock_observables.xy_z_npairs`. 
+    
+    Examples 
+    --------
+    >>> Npts1, Npts2, Lbox = 1000, 1000, 250.
+    >>> period = [Lbox, Lbox, Lbox]
+    >>> rp_bins = np.logspace(-1, 1.5, 15)
+    >>> pi_bins = np.logspace(-1, 1.5, 15)
+    
+    >>> data1 = np.random.uniform(0, Lbox, Npts1*3).reshape((Npts1, 3))
+    >>> data2 = np.random.uniform(0, Lbox, Npts2*3).reshape((Npts2, 3))
+    
+    >>> from halotools.mock_observables import cuboid_subvolume_labels
+    >>> jtags1, N_samples = cuboid_subvolume_labels(data1, 3, Lbox)
+    >>> jtags2, N_samples = cuboid_subvolume_labels(data2, 3, Lbox)
+    
+    >>> result = xy_z_region_npairs(data1, data2, rp_bins, pi_bins, jtags1, jtags2, N_samples, period = period)
+    """
+    
+    ### Process the inputs with the helper function
+    x1, y1, z1, x2, y2, z2, rp_bins, pi_bins, period, num_threads, PBCs = (
+        _xy_z_npairs_process_args(data1, data2, rp_bins, pi_bins, period, 
+            verbose, num_threads, approx_cell1_size, approx_cell2_size)
+        )
+    
+    instrumentation = _PairCountingInstrumentation('xy_z_region_npairs', num_threads)
+    xperiod, yperiod, zperiod = period 
+    rp_max = np.max(rp_bins)
+    pi_max = np.max(pi_bins)
+    
+    # Process the jackknife-tags with the helper function
+    weights1, weights2, jtags1, jtags2 = (
+        _jnpairs_process_weights_jtags(data1, data2, 
+            None, None, jtags1, jtags2, N_samples))
+    
+    ### Compute the estimates for the cell sizes
+    approx_cell1_size, approx_cell2_size = _set_approximate_xy_z_cell_sizes(
+        approx_cell1_size, approx_cell2_size, rp_max, pi_max, period)
+    
+    approx_x1cell_size, approx_y1cell_size = approx_cell1_size[:2]
+    approx_z1cell_size = approx_cell1_size[2]
+    
+    approx_x2cell_size, approx_y2cell_size = approx_cell2_size[:2]
+    approx_z2cell_size = approx_cell2_size[2]
+    
+    double_tree = FlatRectanguloidDoubleTree(
+        x1, y1, z1, x2, y2, z2,  
+        approx_x1cell_size, approx_y1cell_size, approx_z1cell_size, 
+        approx_x2cell_size, approx_y2cell_size, approx_z2cell_size, 
+        rp_max, rp_max, pi_max, xperiod, yperiod, zperiod, PBCs=PBCs)
+    instrumentation.tree_built()
+    
+    #sort the tags, and convert them to array indices
+    jtags1 = (jtags1[double_tree.tree1.idx_sorted] - 1).astype(np.int_)
+    jtags2 = (jtags2[double_tree.tree2.idx_sorted] - 1).astype(np.int_)
+    
+    #number of cells
+    Ncell1 = double_tree.num_x1divs*double_tree.num_y1divs*double_tree.num_z1divs
+    
+    #create a function to call with only one argument. 
+    #Each call handles a block of cells, as the count matrix can be large. 
+    engine = partial(_xy_z_region_npairs_engine, double_tree, 
+        jtags1, jtags2, N_samples, rp_bins, pi_bins, period, PBCs)
+    cell1_blocks = np.array_split(np.arange(Ncell1), num_threads)
+    
+    #do the pair counting
+    counts = np.sum(instrumentation.map(engine, cell1_blocks), axis=0)
+    instrumentation.record(double_tree, cell1_blocks, (rp_max, rp_max, pi_max), np.sum(counts))
+    
+    return np.cumsum(np.cumsum(counts, axis=-1), axis=-2)
+
+def _xy_z_region_npairs_engine(double_tree, jtags1, jtags2, N_samples, 
+    rp_bins, pi_bins, period, PBCs, icell1_block):
+    """
+    pair counting engine for xy_z_region_npairs function.  This code calls a cython function.
+    """
+    
+    counts = np.zeros((N_samples, N_samples, len(rp_bins), len(pi_bins)), dtype=np.int_)
+    
+    xsearch_length = rp_bins[-1]
+    ysearch_length = rp_bins[-1]
+    zsearch_length = pi_bins[-1]
+    
+    for icell1 in icell1_block:
+        #extract the points in the cell
+        s1 = double_tree.tree1.slice_array[icell1]
+        x_icell1, y_icell1, z_icell1 = (
+            double_tree.tree1.x[s1],
+            double_tree.tree1.y[s1],
+            double_tree.tree1.z[s1])
+        j_icell1 = jtags1[s1]
+        
+        adj_cell_generator = double_tree.adjacent_cell_generator(
+            icell1, xsearch_length, ysearch_length, zsearch_length)
+        
+        for icell2, xshift, yshift, zshift in adj_cell_generator:
+            
+            #extract the points in the cell
+            s2 = double_tree.tree2.slice_array[icell2]
+            x_icell2 = double_tree.tree2.x[s2] + xshift
+            y_icell2 = double_tree.tree2.y[s2] + yshift 
+            z_icell2 = double_tree.tree2.z[s2] + zshift
+            j_icell2 = jtags2[s2]
+            
+            #use cython functions to do pair counting
+            xy_z_region_npairs_no_pbc(x_icell1, y_icell1, z_icell1,
+                x_icell2, y_icell2, z_icell2,
+                j_icell1, j_icell2, rp_bins, pi_bins, counts)
+            
+    return counts
+
@@ -20,7 +20,7 @@ from .cpairs import *
 from ...custom_exceptions import *
 from ...utils.array_utils import convert_to_ndarray, array_is_monotonic
 
-__all__ = ['per_object_npairs']
+__all__ = ['per_object_npairs', 'per_object_environment_npairs']
 __author__ = ['Duncan Campbell', 'Andrew Hearin']
 
 ##########################################################################
@@ -208,3 +208,312 @@ def _per_object_npairs_engine(double_tree, rbins, period, PBCs, icell1):
             rbins)
     
     return counts
+
+
+def per_object_environment_npairs(data1, tracers, radii, weights = None, period = None, 
+                                  verbose = False, num_threads = 1, 
+                                  approx_cell1_size = None, approx_cell2_size = None):
+    """    
+    Function counts, for each point in ``data1``, the number of tracers 
+    inside each of a list of spheres and spherical annuli, 
+    optionally for several tracer samples and summing several tracer weight columns, 
+    all from a single traversal of the tree. 
+
+    In contrast to `per_object_npairs`, each pair is binned only once 
+    regardless of the number of requested radii, only the requested 
+    columns are returned, and the returned arrays are 
+    compact int32/float32 arrays ordered in the same way as the input ``data1``. 
+    
+    Parameters
+    ----------
+    data1 : array_like
+        N1 by 3 numpy array of 3-dimensional positions. 
+        Values of each dimension should be between zero and the corresponding dimension 
+        of the input period.
+            
+    tracers : array_like or list 
+        N2 by 3 numpy array of 3-dimensional positions of the tracers, 
+        or a list of such arrays if the environment should be measured 
+        for several tracer samples at once. 
+            
+    radii : list 
+        List of the environment measures to compute. Each entry is either a float *r*, 
+        in which case tracers at a separation *d <= r* are counted, 
+        or a length-2 sequence *(r_in, r_out)*, 
+        in which case tracers at a separation *r_in < d <= r_out* are counted. 
+
+    weights : array_like or list, optional 
+        Length-N2 or N2 x Nweights array of tracer weights, 
+        or a list of such arrays (all with the same number of columns) 
+        if ``tracers`` is a list. 
+        If passed, the sum of the weights of the tracers in each sphere and annulus 
+        is returned in addition to the counts. 
+    
+    period : array_like, optional
+        Length-3 array defining the periodic boundary conditions. 
+        If only one number is specified, the enclosing volume is assumed to 
+        be a periodic cube (by far the most common case). 
+        If period is set to None, the default option, 
+        PBCs are set to infinity.  
+
+    verbose : Boolean, optional
+        If True, print out information and progress.
+    
+    num_threads : int, optional
+        Number of CPU cores to use in the pair counting. 
+        If ``num_threads`` is set to the string 'max', use all available cores. 
+        Default is 1 thread for a serial calculation that 
+        does not open a multiprocessing pool. 
+
+    approx_cell1_size : array_like, optional 
+        Length-3 array serving as a guess for the optimal manner by which 
+        the `~halotools.mock_observables.pair_counters.FlatRectanguloidDoubleTree` 
+        will apportion the ``data`` points into subvolumes of the simulation box. 
+        Default choice is to use 1/10 of the box size in each dimension. 
+
+    approx_cell2_size : array_like, optional 
+        See comments for ``approx_cell1_size``. 
+    
+    Returns
+    -------
+    counts : array_like 
+        int32 Numpy array of shape (N1, len(radii)) storing the number of tracers 
+        in each environment measure. If ``tracers`` is a list, 
+        the shape is (N1, len(tracers), len(radii)). 
+
+    weighted_counts : array_like 
+        float32 Numpy array storing the sums of the tracer weights, 
+        with the same shape as ``counts`` followed by a trailing axis of length 
+        Nweights if the weights are two-dimensional. 
+        Only returned if ``weights`` is not None. 
+
+    Examples 
+    --------
+    >>> Npts1, Npts2, Lbox = 1000, 1000, 250.
+    >>> data1 = np.random.uniform(0, Lbox, Npts1*3).reshape((Npts1, 3))
+    >>> data2 = np.random.uniform(0, Lbox, Npts2*3).reshape((Npts2, 3))
+    >>> radii = [5., 10., (10., 20.)]
+    >>> counts = per_object_environment_npairs(data1, data2, radii, period = Lbox)
+
+    Counts around three different radii, for two tracer samples, 
+    also summing a weight column of each tracer: 
+
+    >>> data3 = np.random.uniform(0, Lbox, Npts2*3).reshape((Npts2, 3))
+    >>> mass2, mass3 = np.random.random(Npts2), np.random.random(Npts2)
+    >>> counts, masses = per_object_environment_npairs(data1, [data2, data3], radii, weights = [mass2, mass3], period = Lbox)
+    """
+
+    data1 = convert_to_ndarray(data1)
+    data2, sample_id2, weights2, num_samples, multiple_samples, multiple_weights = (
+        _per_object_environment_process_tracers(tracers, weights))
+    rbins, outer_idx, inner_idx = _per_object_environment_process_radii(radii)
+    rmax = rbins[-1]
+
+    ### Process the inputs with the helper function
+    x1, y1, z1, x2, y2, z2, _, period, num_threads, PBCs = (
+        _npairs_process_args(data1, data2, np.array([0., rmax]), period, 
+            verbose, num_threads, approx_cell1_size, approx_cell2_size)
+        )
+    xperiod, yperiod, zperiod = period 
+
+    if verbose==True:
+        print("running per_object_environment_npairs on {0} x {1}\n"
+              "points with PBCs={2}".format(len(data1), len(data2), PBCs))
+        start = time.time()
+
+    ### Compute the estimates for the cell sizes
+    approx_cell1_size, approx_cell2_size = (
+        _set_approximate_cell_sizes(approx_cell1_size, approx_cell2_size, rmax, period)
+        )
+    approx_x1cell_size, approx_y1cell_size, approx_z1cell_size = approx_cell1_size
+    approx_x2cell_size, approx_y2cell_size, approx_z2cell_size = approx_cell2_size
+
+    double_tree = FlatRectanguloidDoubleTree(
+        x1, y1, z1, x2, y2, z2,  
+        approx_x1cell_size, approx_y1cell_size, approx_z1cell_size, 
+        approx_x2cell_size, approx_y2cell_size, approx_z2cell_size, 
+        rmax, rmax, rmax, xperiod, yperiod, zperiod, PBCs=PBCs)
+
+    #sort the tracer sample labels and weights
+    sample_id2 = np.ascontiguousarray(sample_id2[double_tree.tree2.idx_sorted])
+    weights2 = np.ascontiguousarray(weights2[double_tree.tree2.idx_sorted, :])
+
+    #number of cells
+    Ncell1 = double_tree.num_x1divs*double_tree.num_y1divs*double_tree.num_z1divs
+
+    #create a function to call with only one argument
+    engine = partial(_per_object_environment_npairs_engine, 
+        double_tree, sample_id2, weights2, num_samples, rbins, outer_idx, inner_idx)
+
+    #do the pair counting
+    if num_threads > 1:
+        pool = multiprocessing.Pool(num_threads)
+        result = pool.map(engine,range(Ncell1))
+        pool.close()
+    else:
+        result = list(map(engine,range(Ncell1)))
+
+    #restore the input ordering of data1
+    counts = np.zeros((len(data1), num_samples, len(outer_idx)), dtype=np.int32)
+    counts[double_tree.tree1.idx_sorted] = np.concatenate([r[0] for r in result])
+    if not multiple_samples:
+        counts = counts[:, 0, :]
+
+    if verbose==True:
+        print("total run time: {0} seconds".format(time.time()-start))
+
+    if weights is None:
+        return counts 
+
+    weighted_counts = np.zeros((len(data1), num_samples, len(outer_idx), weights2.shape[1]), 
+        dtype=np.float32)
+    weighted_counts[double_tree.tree1.idx_sorted] = np.concatenate([r[1] for r in result])
+    if not multiple_samples:
+        weighted_counts = weighted_counts[:, 0, ...]
+    if not multiple_weights:
+        weighted_counts = weighted_counts[..., 0]
+
+    return counts, weighted_counts 
+
+
+def _per_object_environment_npairs_engine(double_tree, sample_id2, weights2, 
+    num_samples, rbins, outer_idx, inner_idx, icell1):
+    """
+    pair counting engine for per_object_environment_npairs function.
+    This code calls a cython function.
+    """
+    #extract the points in the cell
+    s1 = double_tree.tree1.slice_array[icell1]
+    x_icell1, y_icell1, z_icell1 = (
+        double_tree.tree1.x[s1],
+        double_tree.tree1.y[s1],
+        double_tree.tree1.z[s1])
+
+    num_weights = weights2.shape[1]
+    counts = np.zeros((len(x_icell1), num_samples, len(rbins)), dtype=np.int32)
+    weighted_counts = np.zeros((len(x_icell1), num_samples, len(rbins), num_weights))
+
+    xsearch_length = rbins[-1]
+    ysearch_length = rbins[-1]
+    zsearch_length = rbins[-1]
+    adj_cell_generator = double_tree.adjacent_cell_generator(
+        icell1, xsearch_length, ysearch_length, zsearch_length)
+
+    for icell2, xshift, yshift, zshift in adj_cell_generator:
+
+        #extract the points in the cell
+        s2 = double_tree.tree2.slice_array[icell2]
+        x_icell2 = double_tree.tree2.x[s2] + xshift
+        y_icell2 = double_tree.tree2.y[s2] + yshift 
+        z_icell2 = double_tree.tree2.z[s2] + zshift
+
+        #use cython functions to do pair counting
+        per_object_weighted_npairs_no_pbc(
+            x_icell1, y_icell1, z_icell1,
+            x_icell2, y_icell2, z_icell2,
+            sample_id2[s2], weights2[s2, :], 
+            rbins, num_samples, counts, weighted_counts)
+
+    #convert the differential counts into the requested spheres and annuli
+    counts = np.cumsum(counts, axis=2, dtype=np.int32)
+    weighted_counts = np.cumsum(weighted_counts, axis=2)
+    result_counts = counts[:, :, outer_idx]
+    result_weighted_counts = weighted_counts[:, :, outer_idx, :]
+    is_annulus = inner_idx >= 0
+    result_counts[:, :, is_annulus] -= counts[:, :, inner_idx[is_annulus]]
+    result_weighted_counts[:, :, is_annulus, :] -= weighted_counts[:, :, inner_idx[is_annulus], :]
+
+    return result_counts, result_weighted_counts.astype(np.float32)
+
+
+def _per_object_environment_process_tracers(tracers, weights):
+    """
+    Concatenate the input tracer samples into a single array of positions, 
+    and build the matching arrays of sample labels and weights. 
+    """
+    multiple_samples = isinstance(tracers, (list, tuple))
+    if multiple_samples:
+        tracer_list = [convert_to_ndarray(t) for t in tracers]
+    else:
+        tracer_list = [convert_to_ndarray(tracers)]
+    num_samples = len(tracer_list)
+    try:
+        assert num_samples > 0
+        for t in tracer_list: 
+            assert t.ndim == 2
+            assert t.shape[1] == 3
+    except AssertionError:
+        msg = ("Input ``tracers`` must be an Npts x 3 array or a list of such arrays")
+        raise HalotoolsError(msg)
+
+    data2 = np.concatenate(tracer_list)
+    sample_id2 = np.concatenate([np.zeros(len(t), dtype=np.int32) + i 
+        for i, t in enumerate(tracer_list)])
+
+    if weights is None:
+        return data2, sample_id2, np.zeros((len(data2), 0)), num_samples, multiple_samples, False 
+
+    if multiple_samples:
+        try:
+            assert isinstance(weights, (list, tuple))
+            assert len(weights) == num_samples 
+        except AssertionError:
+            msg = ("When ``tracers`` is a list, ``weights`` must be a list of the same length")
+            raise HalotoolsError(msg)
+        weight_list = [np.asarray(w, dtype=np.float64) for w in weights]
+    else:
+        weight_list = [np.asarray(weights, dtype=np.float64)]
+
+    multiple_weights = weight_list[0].ndim == 2
+    weight_list = [np.atleast_2d(w.T).T for w in weight_list]
+    try:
+        for t, w in zip(tracer_list, weight_list):
+            assert w.ndim == 2
+            assert w.shape[0] == t.shape[0]
+            assert w.shape[1] == weight_list[0].shape[1]
+    except AssertionError:
+        msg = ("Each array of ``weights`` must have the same length as its tracer sample, \n"
+            "and all arrays of ``weights`` must have the same number of columns")
+        raise HalotoolsError(msg)
+    weights2 = np.concatenate(weight_list)
+
+    return data2, sample_id2, weights2, num_samples, multiple_samples, multiple_weights 
+
+
+def _per_object_environment_process_radii(radii):
+    """
+    Build the sorted array of unique bin edges spanned by the input spheres and annuli, 
+    together with the indices of the outer and inner edge of each measure 
+    (the inner index is -1 for spheres). 
+    """
+    try:
+        radii = list(radii)
+        assert len(radii) > 0
+    except (TypeError, AssertionError):
+        msg = ("Input ``radii`` must be a non-empty list of radii and (inner, outer) pairs")
+        raise HalotoolsError(msg)
+
+    outer, inner = [], []
+    for entry in radii:
+        entry = np.atleast_1d(entry).astype(float)
+        if len(entry) == 1:
+            inner.append(None)
+            outer.append(entry[0])
+        elif (len(entry) == 2) and (entry[0] < entry[1]):
+            inner.append(entry[0])
+            outer.append(entry[1])
+        else:
+            msg = ("Each annulus in ``radii`` must be an (inner, outer) pair with inner < outer")
+            raise HalotoolsError(msg)
+
+    edges = outer + [r for r in inner if r is not None]
+    if (np.min(outer) <= 0) or (np.min(edges) < 0):
+        msg = ("All entries of ``radii`` must be positive")
+        raise HalotoolsError(msg)
+
+    rbins = np.unique(edges)
+    outer_idx = np.searchsorted(rbins, outer)
+    inner_idx = np.array([-1 if r is None else np.searchsorted(rbins, r) for r in inner], 
+        dtype=int)
+
+    return rbins, outer_idx, inner_idx
@@ -3,4 +3,5 @@
 from __future__ import (absolute_import, division, print_function, unicode_literals)
 
 from .marked_cpairs import *
-from .conditional_pairwise_distances import *
\ No newline at end of file
+from .conditional_pairwise_distances import *
+from .velocity_moment_cpairs import *
\ No newline at end of file
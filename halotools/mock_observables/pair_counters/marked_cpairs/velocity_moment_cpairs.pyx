@@ -0,0 +1,238 @@
+# cython: profile=False
+
+"""
+brute force pair counters accumulating the moments of the pairwise velocity
+distribution in a single pass, using numerically stable online updates.
+"""
+
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+import sys
+cimport cython
+import numpy as np
+cimport numpy as np
+from libc.math cimport sqrt, fabs
+
+from .distances cimport *
+
+__author__ = ['Andrew Hearin', 'Duncan Campbell']
+__all__ = ['radial_velocity_moments_no_pbc', 'los_velocity_moments_no_pbc']
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def radial_velocity_moments_no_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                                   np.ndarray[np.float64_t, ndim=1] y_icell1,
+                                   np.ndarray[np.float64_t, ndim=1] z_icell1,
+                                   np.ndarray[np.float64_t, ndim=1] x_icell2,
+                                   np.ndarray[np.float64_t, ndim=1] y_icell2,
+                                   np.ndarray[np.float64_t, ndim=1] z_icell2,
+                                   np.ndarray[np.float64_t, ndim=2] v_icell1,
+                                   np.ndarray[np.float64_t, ndim=2] v_icell2,
+                                   np.ndarray[np.float64_t, ndim=1] rbins,
+                                   np.ndarray[np.float64_t, ndim=1] counts,
+                                   np.ndarray[np.float64_t, ndim=1] mean,
+                                   np.ndarray[np.float64_t, ndim=1] m2,
+                                   np.ndarray[np.float64_t, ndim=1] m3,
+                                   np.int_t compute_m3):
+    """
+    Update, in place, the number of pairs and the central moments of the relative
+    radial velocity :math:`v_{12} = (\\vec{v}_1 - \\vec{v}_2)\\cdot\\hat{r}_{12}`
+    of pairs in the radial bins rbins[k-1] < r <= rbins[k].
+
+    Each bin stores the running count, mean, and sums of the second and third
+    powers of the deviations from the mean, updated for every pair with
+    Welford's algorithm so that the result is accurate in double precision
+    even for very large numbers of pairs per bin.
+    This can be used for pair counting with PBCs if the points are pre-shifted to
+    account for the PBC.
+
+    Parameters
+    ----------
+    x_icell1, y_icell1, z_icell1 : numpy.array
+         arrays of positions of length N1 (data1)
+
+    x_icell2, y_icell2, z_icell2 : numpy.array
+         arrays of positions of length N2 (data2)
+
+    v_icell1 : numpy.ndarray
+        N1 x 3 array of velocities of data1
+
+    v_icell2 : numpy.ndarray
+        N2 x 3 array of velocities of data2
+
+    rbins : numpy.array
+         array of length Nrbins+1 defining the radial bins
+
+    counts, mean, m2, m3 : numpy.array
+        Length-Nrbins accumulators, updated in place.
+
+    compute_m3 : int
+        If 0, ``m3`` is left untouched.
+
+    Examples
+    --------
+    >>> Npts = 1000
+    >>> x, y, z = np.random.random((3, Npts))
+    >>> v = np.random.normal(size=(Npts, 3))
+    >>> rbins = np.linspace(0.01, 0.2, 5)
+    >>> counts, mean, m2, m3 = np.zeros((4, len(rbins)-1))
+    >>> radial_velocity_moments_no_pbc(x,y,z,x,y,z,v,v,rbins,counts,mean,m2,m3,1)
+    """
+
+    #c definitions
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    cdef int nbins = len(rbins)
+    cdef np.ndarray[np.float64_t, ndim=1] rbins_sq = rbins**2
+    cdef double rmin_sq = rbins_sq[0]
+    cdef double rmax_sq = rbins_sq[nbins-1]
+    cdef double d, rx, ry, rz, vr
+    cdef int i, j, k
+
+    #loop over points in grid1's cells
+    for i in range(0,Ni):
+
+        #loop over points in grid2's cells
+        for j in range(0,Nj):
+
+            #calculate the square distance
+            d = square_distance(x_icell1[i],y_icell1[i],z_icell1[i],\
+                                x_icell2[j],y_icell2[j],z_icell2[j])
+
+            if (d <= rmin_sq) or (d > rmax_sq): continue
+
+            k = 1
+            while d > rbins_sq[k]:
+                k = k + 1
+
+            #radial component of the velocity difference
+            rx = x_icell1[i] - x_icell2[j]
+            ry = y_icell1[i] - y_icell2[j]
+            rz = z_icell1[i] - z_icell2[j]
+            vr = ((v_icell1[i,0] - v_icell2[j,0])*rx +
+                  (v_icell1[i,1] - v_icell2[j,1])*ry +
+                  (v_icell1[i,2] - v_icell2[j,2])*rz)/sqrt(d)
+
+            _welford_update(<np.float64_t*> counts.data, <np.float64_t*> mean.data,
+                <np.float64_t*> m2.data, <np.float64_t*> m3.data, k-1, vr, compute_m3)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def los_velocity_moments_no_pbc(np.ndarray[np.float64_t, ndim=1] x_icell1,
+                                np.ndarray[np.float64_t, ndim=1] y_icell1,
+                                np.ndarray[np.float64_t, ndim=1] z_icell1,
+                                np.ndarray[np.float64_t, ndim=1] x_icell2,
+                                np.ndarray[np.float64_t, ndim=1] y_icell2,
+                                np.ndarray[np.float64_t, ndim=1] z_icell2,
+                                np.ndarray[np.float64_t, ndim=1] vz_icell1,
+                                np.ndarray[np.float64_t, ndim=1] vz_icell2,
+                                np.ndarray[np.float64_t, ndim=1] rp_bins,
+                                np.ndarray[np.float64_t, ndim=1] pi_bins,
+                                np.ndarray[np.float64_t, ndim=2] counts,
+                                np.ndarray[np.float64_t, ndim=2] mean,
+                                np.ndarray[np.float64_t, ndim=2] m2,
+                                np.ndarray[np.float64_t, ndim=2] m3,
+                                np.int_t compute_m3):
+    """
+    Update, in place, the number of pairs and the central moments of the relative
+    line-of-sight velocity :math:`|v_{z,1} - v_{z,2}|` of pairs in the bins
+    rp_bins[k-1] < rp <= rp_bins[k] and pi_bins[l-1] < pi <= pi_bins[l].
+
+    See `radial_velocity_moments_no_pbc` for a description of the accumulators.
+
+    Parameters
+    ----------
+    x_icell1, y_icell1, z_icell1 : numpy.array
+         arrays of positions of length N1 (data1)
+
+    x_icell2, y_icell2, z_icell2 : numpy.array
+         arrays of positions of length N2 (data2)
+
+    vz_icell1 : numpy.array
+        array of line-of-sight velocities of data1
+
+    vz_icell2 : numpy.array
+        array of line-of-sight velocities of data2
+
+    rp_bins : numpy.array
+         array of length Nrp_bins+1 defining the projected separation bins
+
+    pi_bins : numpy.array
+         array of length Npi_bins+1 defining the parallel separation bins
+
+    counts, mean, m2, m3 : numpy.ndarray
+        Nrp_bins x Npi_bins accumulators, updated in place.
+
+    compute_m3 : int
+        If 0, ``m3`` is left untouched.
+
+    Examples
+    --------
+    >>> Npts = 1000
+    >>> x, y, z = np.random.random((3, Npts))
+    >>> vz = np.random.normal(size=Npts)
+    >>> rp_bins = np.linspace(0.01, 0.2, 5)
+    >>> pi_bins = np.array([0, 0.2])
+    >>> counts, mean, m2, m3 = np.zeros((4, len(rp_bins)-1, len(pi_bins)-1))
+    >>> los_velocity_moments_no_pbc(x,y,z,x,y,z,vz,vz,rp_bins,pi_bins,counts,mean,m2,m3,1)
+    """
+
+    #c definitions
+    cdef int Ni = len(x_icell1)
+    cdef int Nj = len(x_icell2)
+    cdef int nrp_bins = len(rp_bins)
+    cdef int npi_bins = len(pi_bins)
+    cdef int npi_bins_minus_one = npi_bins - 1
+    cdef np.ndarray[np.float64_t, ndim=1] rp_bins_sq = rp_bins**2
+    cdef np.ndarray[np.float64_t, ndim=1] pi_bins_sq = pi_bins**2
+    cdef double d_perp, d_para, vz
+    cdef int i, j, k, l
+
+    #loop over points in grid1's cells
+    for i in range(0,Ni):
+
+        #loop over points in grid2's cells
+        for j in range(0,Nj):
+
+            #calculate the square distances
+            d_perp = perp_square_distance(x_icell1[i], y_icell1[i],\
+                                          x_icell2[j], y_icell2[j])
+            d_para = para_square_distance(z_icell1[i], z_icell2[j])
+
+            if (d_perp <= rp_bins_sq[0]) or (d_perp > rp_bins_sq[nrp_bins-1]): continue
+            if (d_para <= pi_bins_sq[0]) or (d_para > pi_bins_sq[npi_bins-1]): continue
+
+            k = 1
+            while d_perp > rp_bins_sq[k]:
+                k = k + 1
+            l = 1
+            while d_para > pi_bins_sq[l]:
+                l = l + 1
+
+            vz = fabs(vz_icell1[i] - vz_icell2[j])
+
+            _welford_update(<np.float64_t*> counts.data, <np.float64_t*> mean.data,
+                <np.float64_t*> m2.data, <np.float64_t*> m3.data,
+                (k-1)*npi_bins_minus_one + (l-1), vz, compute_m3)
+
+
+cdef inline void _welford_update(np.float64_t* counts, np.float64_t* mean,
+                                 np.float64_t* m2, np.float64_t* m3,
+                                 int k, double x, np.int_t compute_m3):
+    """
+    Online update of the count, mean and central moment sums of bin k with value x.
+    """
+    cdef double n1 = counts[k]
+    cdef double n = n1 + 1.0
+    cdef double delta = x - mean[k]
+    cdef double delta_n = delta/n
+    cdef double term1 = delta*delta_n*n1
+
+    counts[k] = n
+    mean[k] += delta_n
+    if compute_m3 != 0:
+        m3[k] += term1*delta_n*(n - 2.0) - 3.0*delta_n*m2[k]
+    m2[k] += term1
@@ -23,7 +23,9 @@ from ...utils.array_utils import convert_to_ndarray, array_is_monotonic
 __all__ = ['marked_npairs',\
            'xy_z_marked_npairs',\
            'velocity_marked_npairs',\
-           'xy_z_velocity_marked_npairs']
+           'xy_z_velocity_marked_npairs',\
+           'velocity_moment_npairs',\
+           'xy_z_velocity_moment_npairs']
 __author__ = ['Duncan Campbell', 'Andrew Hearin']
 
 
@@ -786,5 +788,420 @@ def _xy_z_velocity_marked_npairs_engine(double_tree, weights1, weights2,
         counts1 += holder1 
         counts2 += holder2
         counts3 += holder3
-    return counts1, counts2, counts3 
+    return counts1, counts2, counts3
+
+
+def velocity_moment_npairs(data1, data2, rbins, velocities1, velocities2, 
+    period=None, compute_skewness=False, verbose=False, num_threads=1, 
+    approx_cell1_size=None, approx_cell2_size=None):
+    """
+    Calculate the number of pairs and the moments of the distribution of the 
+    relative radial velocity, :math:`v_{12} = (\\vec{v}_1 - \\vec{v}_2)\\cdot\\hat{r}_{12}`, 
+    in bins of separation, from a single traversal of the tree. 
+
+    In contrast to `velocity_marked_npairs`, which returns running sums 
+    :math:`\\sum v` and :math:`\\sum v^2`, the moments are accumulated with 
+    Welford's online algorithm for each cell, and the per-cell accumulators are merged 
+    at the end. This keeps the mean and variance accurate in double precision 
+    even for very large numbers of pairs per bin. 
+    
+    Parameters
+    ----------
+    data1 : array_like
+        *N1* by 3 array of 3-D positions.  If the ``period`` parameter is set, each
+        component of the coordinates should be bounded between zero and the corresponding
+        periodic boundary.
+    
+    data2 : array_like
+        *N2* by 3 array of 3-D positions.  If the ``period`` parameter is set, each
+        component of the coordinates should be bounded between zero and the corresponding
+        periodic boundary.
+    
+    rbins : array_like
+        numpy array of length *Nrbins+1* defining the boundaries of bins in which 
+        pairs are counted. 
+
+    velocities1 : array_like
+        *N1* by 3 array of velocities of ``data1``. 
+
+    velocities2 : array_like
+        *N2* by 3 array of velocities of ``data2``. 
+    
+    period : array_like, optional
+        Length-3 array defining axis-aligned periodic boundary conditions. If only 
+        one number, Lbox, is specified, the period is assumed to be np.array([Lbox]*3).
+
+    compute_skewness : bool, optional 
+        If True, the sum of the cubed deviations from the mean is also accumulated 
+        and returned. Default is False. 
+    
+    verbose : Boolean, optional
+        If True, print out information and progress.
+    
+    num_threads : int, optional
+        number of 'threads' to use in the pair counting.  if set to 'max', use all 
+        available cores.  num_threads=1 is the default.
+    
+    approx_cell1_size : array_like, optional 
+        Length-3 array serving as a guess for the optimal manner by which 
+        the `~halotools.mock_observables.pair_counters.FlatRectanguloidDoubleTree` 
+        will apportion the ``data`` points into subvolumes of the simulation box. 
+        Default choice is to use 1/10 of the box size in each dimension. 
+    
+    approx_cell2_size : array_like, optional 
+        See comments for ``approx_cell1_size``. 
+        
+    Returns
+    -------
+    N_pairs : numpy.array
+        array of length *Nrbins* containing the number of pairs in each bin, 
+        rbins[i] < r <= rbins[i+1]
+    
+    mean : numpy.array
+        array of length *Nrbins* containing the mean relative radial velocity 
+    
+    m2 : numpy.array
+        array of length *Nrbins* containing the sum of the squared deviations 
+        from the mean, so that the sample variance is m2/(N_pairs-1) 
+
+    m3 : numpy.array
+        array of length *Nrbins* containing the sum of the cubed deviations 
+        from the mean, so that the skewness is sqrt(N_pairs)*m3/m2**1.5. 
+        Only returned if ``compute_skewness`` is True. 
+
+    Examples 
+    --------
+    >>> Npts, Lbox = 1000, 1.
+    >>> data = np.random.random((Npts, 3))
+    >>> velocities = np.random.normal(size=(Npts, 3))
+    >>> rbins = np.linspace(0.01, 0.2, 5)
+    >>> N_pairs, mean, m2 = velocity_moment_npairs(data, data, rbins, velocities, velocities, period=Lbox)
+    >>> sigma = np.sqrt(m2/(N_pairs-1))
+    """
+    
+    ### Process the inputs with the helper function
+    x1, y1, z1, x2, y2, z2, rbins, period, num_threads, PBCs = (
+        _npairs_process_args(data1, data2, rbins, period, 
+            verbose, num_threads, approx_cell1_size, approx_cell2_size)
+        )
+    xperiod, yperiod, zperiod = period 
+    rmax = np.max(rbins)
+    rbins = rbins.astype(np.float64)
+
+    velocities1, velocities2 = _velocity_moment_process_velocities(
+        data1, data2, velocities1, velocities2, 3)
+
+    ### Compute the estimates for the cell sizes
+    approx_cell1_size, approx_cell2_size = (
+        _set_approximate_cell_sizes(approx_cell1_size, approx_cell2_size, rmax, period)
+        )
+    approx_x1cell_size, approx_y1cell_size, approx_z1cell_size = approx_cell1_size
+    approx_x2cell_size, approx_y2cell_size, approx_z2cell_size = approx_cell2_size
+
+    double_tree = FlatRectanguloidDoubleTree(
+        x1, y1, z1, x2, y2, z2,  
+        approx_x1cell_size, approx_y1cell_size, approx_z1cell_size, 
+        approx_x2cell_size, approx_y2cell_size, approx_z2cell_size, 
+        rmax, rmax, rmax, xperiod, yperiod, zperiod, PBCs=PBCs)
+
+    #sort the velocity arrays
+    velocities1 = np.ascontiguousarray(velocities1[double_tree.tree1.idx_sorted, :])
+    velocities2 = np.ascontiguousarray(velocities2[double_tree.tree2.idx_sorted, :])
+
+    #number of cells
+    Ncell1 = double_tree.num_x1divs*double_tree.num_y1divs*double_tree.num_z1divs
+
+    #create a function to call with only one argument
+    engine = partial(_velocity_moment_npairs_engine, double_tree, 
+        velocities1, velocities2, rbins, int(compute_skewness))
+
+    #do the pair counting
+    if num_threads > 1:
+        pool = multiprocessing.Pool(num_threads)
+        result = pool.map(engine,range(Ncell1))
+        pool.close()
+    else:
+        result = map(engine,range(Ncell1))
+
+    counts, mean, m2, m3 = _merge_velocity_moments(result)
+
+    if compute_skewness:
+        return counts, mean, m2, m3
+    else:
+        return counts, mean, m2
+
+
+def _velocity_moment_npairs_engine(double_tree, velocities1, velocities2, 
+    rbins, compute_m3, icell1):
+    """
+    private internal function for 
+    `~halotools.mock_observables.pair_counters.marked_double_tree_pairs.velocity_moment_npairs`.
+    
+    This is an engine that calls a cython module to accumulate the velocity moments 
+    of all pairs involving the points in cell *icell1*. 
+    """
+    counts, mean, m2, m3 = np.zeros((4, len(rbins)-1))
+
+    #extract the points in the cell
+    s1 = double_tree.tree1.slice_array[icell1]
+    x_icell1, y_icell1, z_icell1 = (
+        double_tree.tree1.x[s1],
+        double_tree.tree1.y[s1],
+        double_tree.tree1.z[s1])
+    v_icell1 = velocities1[s1, :]
+
+    xsearch_length = rbins[-1]
+    ysearch_length = rbins[-1]
+    zsearch_length = rbins[-1]
+    adj_cell_generator = double_tree.adjacent_cell_generator(
+        icell1, xsearch_length, ysearch_length, zsearch_length)
+
+    for icell2, xshift, yshift, zshift in adj_cell_generator:
+
+        #extract the points in the cell
+        s2 = double_tree.tree2.slice_array[icell2]
+        x_icell2 = double_tree.tree2.x[s2] + xshift
+        y_icell2 = double_tree.tree2.y[s2] + yshift 
+        z_icell2 = double_tree.tree2.z[s2] + zshift
+        v_icell2 = velocities2[s2, :]
+
+        #use cython functions to update the moments in place
+        radial_velocity_moments_no_pbc(x_icell1, y_icell1, z_icell1,
+            x_icell2, y_icell2, z_icell2, v_icell1, v_icell2, 
+            rbins, counts, mean, m2, m3, compute_m3)
+
+    return counts, mean, m2, m3
+
+
+def xy_z_velocity_moment_npairs(data1, data2, rp_bins, pi_bins, velocities1, velocities2, 
+    period=None, compute_skewness=False, verbose=False, num_threads=1, 
+    approx_cell1_size=None, approx_cell2_size=None):
+    """
+    Calculate the number of pairs and the moments of the distribution of the 
+    relative line-of-sight velocity, :math:`|v_{z,1} - v_{z,2}|`, 
+    in bins of :math:`r_{\\perp}` and :math:`r_{\\parallel}`, 
+    from a single traversal of the tree. 
+
+    :math:`r_{\\perp}` and :math:`r_{\\parallel}` are defined wrt the z-direction. 
+    See `velocity_moment_npairs` for a description of the accumulation scheme. 
+    
+    Parameters
+    ----------
+    data1 : array_like
+        *N1* by 3 array of 3-D positions.  If the ``period`` parameter is set, each
+        component of the coordinates should be bounded between zero and the corresponding
+        periodic boundary.
+    
+    data2 : array_like
+        *N2* by 3 array of 3-D positions.  If the ``period`` parameter is set, each
+        component of the coordinates should be bounded between zero and the corresponding
+        periodic boundary.
+    
+    rp_bins : array_like
+        numpy array of length Nrp_bins+1 defining the boundaries of bins of projected 
+        separation, :math:`r_{\\rm p}`, in which pairs are counted.
+    
+    pi_bins : array_like
+        numpy array of length Npi_bins+1 defining the boundaries of bins of parallel
+        separation, :math:`\\pi`, in which pairs are counted.
+
+    velocities1 : array_like
+        Length-*N1* array of the line-of-sight velocities of ``data1``. 
+
+    velocities2 : array_like
+        Length-*N2* array of the line-of-sight velocities of ``data2``. 
+    
+    period : array_like, optional
+        Length-3 array defining axis-aligned periodic boundary conditions. If only 
+        one number, Lbox, is specified, the period is assumed to be np.array([Lbox]*3).
+
+    compute_skewness : bool, optional 
+        If True, the sum of the cubed deviations from the mean is also accumulated 
+        and returned. Default is False. 
+    
+    verbose : Boolean, optional
+        If True, print out information and progress.
+    
+    num_threads : int, optional
+        number of 'threads' to use in the pair counting.  if set to 'max', use all 
+        available cores.  num_threads=1 is the default.
+    
+    approx_cell1_size : array_like, optional 
+        Length-3 array serving as a guess for the optimal manner by which 
+        the `~halotools.mock_observables.pair_counters.FlatRectanguloidDoubleTree` 
+        will apportion the ``data`` points into subvolumes of the simulation box. 
+        Default choice is to use 1/10 of the box size in each dimension. 
+    
+    approx_cell2_size : array_like, optional 
+        See comments for ``approx_cell1_size``. 
+        
+    Returns
+    -------
+    N_pairs : numpy.array
+        2-D array of shape *(Nrp_bins,Npi_bins)* containing the number of pairs 
+    
+    mean : numpy.array
+        2-D array of shape *(Nrp_bins,Npi_bins)* containing the mean relative 
+        line-of-sight velocity 
+    
+    m2 : numpy.array
+        2-D array of shape *(Nrp_bins,Npi_bins)* containing the sum of the squared 
+        deviations from the mean 
+
+    m3 : numpy.array
+        2-D array of shape *(Nrp_bins,Npi_bins)* containing the sum of the cubed 
+        deviations from the mean. Only returned if ``compute_skewness`` is True. 
+
+    Examples 
+    --------
+    >>> Npts, Lbox = 1000, 1.
+    >>> data = np.random.random((Npts, 3))
+    >>> vz = np.random.normal(size=Npts)
+    >>> rp_bins = np.linspace(0.01, 0.2, 5)
+    >>> pi_bins = np.array([0, 0.2])
+    >>> N_pairs, mean, m2 = xy_z_velocity_moment_npairs(data, data, rp_bins, pi_bins, vz, vz, period=Lbox)
+    """
+    
+    ### Process the inputs with the helper function
+    x1, y1, z1, x2, y2, z2, rp_bins, pi_bins, period, num_threads, PBCs = (
+        _xy_z_npairs_process_args(data1, data2, rp_bins, pi_bins, period, 
+            verbose, num_threads, approx_cell1_size, approx_cell2_size)
+        )
+    xperiod, yperiod, zperiod = period 
+    rp_max = np.max(rp_bins)
+    pi_max = np.max(pi_bins)
+    rp_bins = rp_bins.astype(np.float64)
+    pi_bins = pi_bins.astype(np.float64)
+
+    velocities1, velocities2 = _velocity_moment_process_velocities(
+        data1, data2, velocities1, velocities2, 1)
+
+    ### Compute the estimates for the cell sizes
+    approx_cell1_size, approx_cell2_size = _set_approximate_xy_z_cell_sizes(
+        approx_cell1_size, approx_cell2_size, rp_max, pi_max, period)
+    approx_x1cell_size, approx_y1cell_size, approx_z1cell_size = approx_cell1_size
+    approx_x2cell_size, approx_y2cell_size, approx_z2cell_size = approx_cell2_size
+
+    double_tree = FlatRectanguloidDoubleTree(
+        x1, y1, z1, x2, y2, z2,  
+        approx_x1cell_size, approx_y1cell_size, approx_z1cell_size, 
+        approx_x2cell_size, approx_y2cell_size, approx_z2cell_size, 
+        rp_max, rp_max, pi_max, xperiod, yperiod, zperiod, PBCs=PBCs)
+
+    #sort the velocity arrays
+    velocities1 = np.ascontiguousarray(velocities1[double_tree.tree1.idx_sorted, 0])
+    velocities2 = np.ascontiguousarray(velocities2[double_tree.tree2.idx_sorted, 0])
+
+    #number of cells
+    Ncell1 = double_tree.num_x1divs*double_tree.num_y1divs*double_tree.num_z1divs
+
+    #create a function to call with only one argument
+    engine = partial(_xy_z_velocity_moment_npairs_engine, double_tree, 
+        velocities1, velocities2, rp_bins, pi_bins, int(compute_skewness))
+
+    #do the pair counting
+    if num_threads > 1:
+        pool = multiprocessing.Pool(num_threads)
+        result = pool.map(engine,range(Ncell1))
+        pool.close()
+    else:
+        result = map(engine,range(Ncell1))
+
+    counts, mean, m2, m3 = _merge_velocity_moments(result)
+
+    if compute_skewness:
+        return counts, mean, m2, m3
+    else:
+        return counts, mean, m2
+
+
+def _xy_z_velocity_moment_npairs_engine(double_tree, velocities1, velocities2, 
+    rp_bins, pi_bins, compute_m3, icell1):
+    """
+    private internal function for 
+    `~halotools.mock_observables.pair_counters.marked_double_tree_pairs.xy_z_velocity_moment_npairs`.
+    
+    This is an engine that calls a cython module to accumulate the velocity moments 
+    of all pairs involving the points in cell *icell1*. 
+    """
+    counts, mean, m2, m3 = np.zeros((4, len(rp_bins)-1, len(pi_bins)-1))
+
+    #extract the points in the cell
+    s1 = double_tree.tree1.slice_array[icell1]
+    x_icell1, y_icell1, z_icell1 = (
+        double_tree.tree1.x[s1],
+        double_tree.tree1.y[s1],
+        double_tree.tree1.z[s1])
+    vz_icell1 = velocities1[s1]
+
+    xsearch_length = rp_bins[-1]
+    ysearch_length = rp_bins[-1]
+    zsearch_length = pi_bins[-1]
+    adj_cell_generator = double_tree.adjacent_cell_generator(
+        icell1, xsearch_length, ysearch_length, zsearch_length)
+
+    for icell2, xshift, yshift, zshift in adj_cell_generator:
+
+        #extract the points in the cell
+        s2 = double_tree.tree2.slice_array[icell2]
+        x_icell2 = double_tree.tree2.x[s2] + xshift
+        y_icell2 = double_tree.tree2.y[s2] + yshift 
+        z_icell2 = double_tree.tree2.z[s2] + zshift
+        vz_icell2 = velocities2[s2]
+
+        #use cython functions to update the moments in place
+        los_velocity_moments_no_pbc(x_icell1, y_icell1, z_icell1,
+            x_icell2, y_icell2, z_icell2, vz_icell1, vz_icell2, 
+            rp_bins, pi_bins, counts, mean, m2, m3, compute_m3)
+
+    return counts, mean, m2, m3
+
+
+def _velocity_moment_process_velocities(data1, data2, velocities1, velocities2, ndim):
+    """
+    Process the input velocities of `velocity_moment_npairs` 
+    and `xy_z_velocity_moment_npairs` into contiguous float64 arrays of 
+    shape (Npts, ndim). 
+    """
+    velocities1 = np.asarray(velocities1, dtype=np.float64)
+    velocities2 = np.asarray(velocities2, dtype=np.float64)
+    if velocities1.ndim == 1: velocities1 = velocities1.reshape((-1, 1))
+    if velocities2.ndim == 1: velocities2 = velocities2.reshape((-1, 1))
+
+    try:
+        assert velocities1.shape == (np.shape(data1)[0], ndim)
+        assert velocities2.shape == (np.shape(data2)[0], ndim)
+    except AssertionError:
+        if ndim == 1:
+            msg = ("Input velocities must be 1-D arrays with the same length as the positions")
+        else:
+            msg = ("Input velocities must be Npts x 3 arrays with the same length as the positions")
+        raise HalotoolsError(msg)
+
+    return velocities1, velocities2
+
+
+def _merge_velocity_moments(result):
+    """
+    Merge the per-cell (count, mean, m2, m3) accumulators into the moments of the 
+    full set of pairs using the pairwise update formulae of Chan, Golub & LeVeque (1979). 
+    """
+    counts, mean, m2, m3 = None, None, None, None
+    for nb, meanb, m2b, m3b in result:
+        if counts is None:
+            counts, mean, m2, m3 = np.copy(nb), np.copy(meanb), np.copy(m2b), np.copy(m3b)
+            continue
+
+        na = counts 
+        n = na + nb
+        inv_n = np.zeros_like(n)
+        inv_n[n > 0] = 1./n[n > 0]
+        delta = meanb - mean
+
+        m3 = (m3 + m3b + delta**3*na*nb*(na - nb)*inv_n**2 + 
+            3.*delta*(na*m2b - nb*m2)*inv_n)
+        m2 = m2 + m2b + delta**2*na*nb*inv_n
+        mean = mean + delta*nb*inv_n
+        counts = n 
 
+    return counts, mean, m2, m3
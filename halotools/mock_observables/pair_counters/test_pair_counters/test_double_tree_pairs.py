@@ -5,7 +5,8 @@ from __future__ import (absolute_import, division, print_function,
 import numpy as np
 
 #load pair counters
-from ..double_tree_pairs import npairs, jnpairs, xy_z_npairs, s_mu_npairs
+from ..double_tree_pairs import npairs, jnpairs, xy_z_npairs, s_mu_npairs, s_multipole_npairs
+from ..double_tree_pairs import region_npairs, xy_z_region_npairs
 #load comparison simple pair counters
 from ..pairs import npairs as simp_npairs
 from ..pairs import wnpairs as simp_wnpairs
@@ -14,13 +15,16 @@ from ..pairs import xy_z_npairs as simp_xy_z_npairs
 from ...tests.cf_helpers import generate_locus_of_3d_points
 
 from ....custom_exceptions import HalotoolsError
+from ....utils.instrumentation import instrument
 
 import pytest
 slow = pytest.mark.slow
 
 __all__=['test_npairs_periodic','test_npairs_nonperiodic','test_xy_z_npairs_periodic',\
          'test_xy_z_npairs_nonperiodic','test_s_mu_npairs_periodic',\
-         'test_s_mu_npairs_nonperiodic','test_jnpairs_periodic','test_jnpairs_nonperiodic']
+         'test_s_mu_npairs_nonperiodic','test_s_multipole_npairs_periodic',\
+         'test_jnpairs_periodic','test_jnpairs_nonperiodic','test_region_npairs_periodic',\
+         'test_npairs_instrumentation']
 
 #set up random points to test pair counters
 np.random.seed(1)
@@ -185,6 +189,37 @@ def test_s_mu_npairs_nonperiodic():
     assert np.all(result == test_result), msg
 
 
+def test_s_multipole_npairs_periodic():
+    """
+    test s_multipole_npairs against the Legendre polynomials summed by brute force, 
+    and its monopole against npairs. 
+    """
+    
+    s_bins = np.array([0.0,0.1,0.2,0.3])
+    sample1, sample2 = random_sample[:300], random_sample[300:600]
+    
+    result = s_multipole_npairs(sample1, sample2, s_bins, period=period,\
+                                num_threads=num_threads)
+    
+    msg = 'The returned result is an unexpected shape.'
+    assert np.shape(result)==(len(s_bins)-1,3), msg
+    
+    test_result = npairs(sample1, sample2, s_bins, period=period,\
+                         num_threads=num_threads)
+    msg = "The monopole counts are not equivalent to npairs."
+    assert np.all(result[:,0] == np.diff(test_result)), msg
+    
+    dx = sample1[:,np.newaxis,:] - sample2[np.newaxis,:,:]
+    dx = (dx + period/2.0)%period - period/2.0
+    s = np.sqrt(np.sum(dx*dx, axis=-1))
+    mu = np.abs(dx[:,:,2])/s
+    ibin = np.digitize(s, s_bins, right=True)
+    for k in range(1, len(s_bins)):
+        mu_k = mu[ibin==k]
+        assert np.allclose(result[k-1,1], np.sum(0.5*(3*mu_k**2-1)))
+        assert np.allclose(result[k-1,2], np.sum((35*mu_k**4-30*mu_k**2+3)/8.0))
+
+
 def test_jnpairs_periodic():
     """
     test jnpairs with periodic boundary conditions.
@@ -252,6 +287,44 @@ def test_jnpairs_nonperiodic():
 #            verbose = False, num_threads = 1,\
 #            approx_cell1_size = None, approx_cell2_size = None):
 
+def test_region_npairs_periodic():
+    """
+    test region_npairs and xy_z_region_npairs with periodic boundary conditions.
+    """
+    
+    rbins = np.array([0.0,0.1,0.2,0.3])
+    pi_bins = np.array([0.0,0.1,0.2])
+    sample1, sample2 = random_sample[:500], random_sample[500:]
+    
+    #split the box into octants
+    jtags1 = 1 + np.sum(np.floor(2*sample1).astype(int)*np.array([4,2,1]), axis=1)
+    jtags2 = 1 + np.sum(np.floor(2*sample2).astype(int)*np.array([4,2,1]), axis=1)
+    N_samples = 8
+    
+    result = region_npairs(sample1, sample2, rbins, jtags1, jtags2, N_samples,
+        period=period, num_threads=num_threads)
+    msg = 'The returned result is an unexpected shape.'
+    assert np.shape(result)==(N_samples, N_samples, len(rbins)), msg
+    
+    test_result = npairs(sample1, sample2, rbins, period=period, num_threads=num_threads)
+    msg = "The sum over regions is not equivalent to npairs."
+    assert np.all(np.sum(result, axis=(0,1)) == test_result), msg
+    
+    test_result = npairs(sample1[jtags1==2], sample2[jtags2==7], rbins, period=period)
+    msg = "The counts between two regions are not equivalent to npairs."
+    assert np.all(result[1,6] == test_result), msg
+    
+    result = xy_z_region_npairs(sample1, sample2, rbins, pi_bins, jtags1, jtags2, N_samples,
+        period=period, num_threads=num_threads)
+    msg = 'The returned result is an unexpected shape.'
+    assert np.shape(result)==(N_samples, N_samples, len(rbins), len(pi_bins)), msg
+    
+    test_result = xy_z_npairs(sample1, sample2, rbins, pi_bins, period=period, 
+        num_threads=num_threads)
+    msg = "The sum over regions is not equivalent to xy_z_npairs."
+    assert np.all(np.sum(result, axis=(0,1)) == test_result), msg
+
+
 def test_tight_locus1():
     """ Verify that the pair counters return the correct results 
     when operating on a tight locus of points. 
@@ -330,9 +403,40 @@ def test_tight_locus2():
     assert np.all(counts6 == correct_result)
 
 
-
-
-
-
-
-
+def test_npairs_instrumentation():
+    """
+    test the records of the instrumentation of npairs and region_npairs
+    """
+    rbins = np.array([0.0,0.1,0.2,0.3])
+    
+    counts = npairs(random_sample, random_sample, rbins, period=period)
+    with instrument() as report:
+        result = npairs(random_sample, random_sample, rbins, period=period, 
+            num_threads=num_threads)
+        region_counts = region_npairs(random_sample, random_sample, rbins, 
+            np.ones(Npts, dtype=int), np.ones(Npts, dtype=int), 1, period=period, 
+            num_threads=num_threads)
+    
+    assert np.all(result == counts)
+    assert np.all(region_counts[0,0] == counts)
+    assert set(report.keys()) == set(['npairs', 'region_npairs'])
+    
+    for name in ('npairs', 'region_npairs'):
+        assert len(report[name]) == 1
+        record = report[name][0]
+        assert record['num_points1'] == Npts
+        assert record['num_threads'] == num_threads
+        assert record['pairs_binned'] == counts[-1]
+        assert record['cells_visited'] >= record['num_cells1']
+        assert record['distance_evaluations'] >= record['pairs_binned']
+        assert 1 <= len(record['worker_wall_time']) <= num_threads
+        assert 0 <= record['tree_build_time'] <= record['total_time']
+        assert 0 <= record['counting_time'] <= record['total_time']
+    
+    #the pairs counted do not depend on how the cells are split between processes
+    assert (report['npairs'][0]['distance_evaluations'] == 
+        report['region_npairs'][0]['distance_evaluations'])
+    
+    #nothing is recorded outside the context
+    result = npairs(random_sample, random_sample, rbins, period=period)
+    assert len(report['npairs']) == 1
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+
+from ..double_tree_per_object_pairs import per_object_environment_npairs
+
+from ....custom_exceptions import HalotoolsError
+
+import pytest
+
+__all__ = ['test_per_object_environment_npairs_brute_force',
+    'test_per_object_environment_npairs_exception_handling']
+
+np.random.seed(43)
+period = np.array([1.0, 1.0, 1.0])
+
+
+def _brute_force_environment(sample, tracers, weights, radii):
+    """ Compute the environment measures by direct summation over all pairs.
+    """
+    dx = np.abs(sample[:, np.newaxis, :] - tracers[np.newaxis, :, :])
+    dx = np.minimum(dx, period - dx)
+    d = np.sqrt(np.sum(dx*dx, axis=-1))
+
+    counts, weighted_counts = [], []
+    for r in radii:
+        if np.ndim(r) == 0:
+            mask = d <= r
+        else:
+            mask = (d > r[0]) & (d <= r[1])
+        counts.append(np.sum(mask, axis=1))
+        weighted_counts.append(np.dot(mask.astype(float), weights))
+    return np.array(counts).T, np.array(weighted_counts).T
+
+
+def test_per_object_environment_npairs_brute_force():
+    """ Verify that the fused counts for several radii, annuli, tracer samples
+    and weight columns agree with direct summation, in the input ordering.
+    """
+    sample = np.random.random((200, 3))
+    tracers1, tracers2 = np.random.random((300, 3)), np.random.random((250, 3))
+    weights1, weights2 = np.random.random(300), np.random.random(250)
+    radii = [0.05, 0.1, (0.05, 0.2)]
+
+    counts, weighted_counts = per_object_environment_npairs(sample,
+        [tracers1, tracers2], radii, weights = [weights1, weights2],
+        period = period, num_threads = 2)
+    assert counts.shape == (200, 2, 3)
+    assert counts.dtype == np.int32
+    assert weighted_counts.shape == (200, 2, 3)
+    assert weighted_counts.dtype == np.float32
+
+    for i, (tracers, weights) in enumerate(((tracers1, weights1), (tracers2, weights2))):
+        correct_counts, correct_weighted_counts = _brute_force_environment(
+            sample, tracers, weights, radii)
+        assert np.all(counts[:, i, :] == correct_counts)
+        assert np.allclose(weighted_counts[:, i, :], correct_weighted_counts, rtol=1e-4)
+
+    counts = per_object_environment_npairs(sample, tracers1, [0.1], period = period)
+    assert counts.shape == (200, 1)
+    correct_counts, _ = _brute_force_environment(sample, tracers1, weights1, [0.1])
+    assert np.all(counts == correct_counts)
+
+
+def test_per_object_environment_npairs_exception_handling():
+    """
+    """
+    sample = np.random.random((20, 3))
+    tracers = np.random.random((30, 3))
+
+    with pytest.raises(HalotoolsError) as err:
+        per_object_environment_npairs(sample, tracers, [(0.2, 0.1)], period = period)
+    substr = "Each annulus in ``radii`` must be an (inner, outer) pair with inner < outer"
+    assert substr in err.value.message
+
+    with pytest.raises(HalotoolsError) as err:
+        per_object_environment_npairs(sample, [tracers, tracers], [0.1],
+            weights = np.ones(30), period = period)
+    substr = "When ``tracers`` is a list, ``weights`` must be a list of the same length"
+    assert substr in err.value.message
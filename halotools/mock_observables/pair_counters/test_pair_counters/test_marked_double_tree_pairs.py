@@ -10,6 +10,7 @@ from copy import copy
 from ..pairs import wnpairs as pure_python_weighted_pairs
 from ..pairs import xy_z_wnpairs as pure_python_xy_z_weighted_pairs
 from ..marked_double_tree_pairs import marked_npairs, xy_z_marked_npairs
+from ..marked_double_tree_pairs import velocity_moment_npairs, xy_z_velocity_moment_npairs
 from ..marked_double_tree_helpers import _func_signature_int_from_wfunc
 from ..double_tree_pairs import npairs
 
@@ -17,7 +18,8 @@ from ....custom_exceptions import HalotoolsError
 
 __all__ = ['test_marked_npairs_periodic','test_marked_npairs_nonperiodic',\
            'test_xy_z_marked_npairs_periodic','test_xy_z_marked_npairs_nonperiodic',\
-           'test_marked_npairs_wfuncs_signatures','test_marked_npairs_wfuncs_behavior']
+           'test_marked_npairs_wfuncs_signatures','test_marked_npairs_wfuncs_behavior',\
+           'test_velocity_moment_npairs_brute_force','test_xy_z_velocity_moment_npairs_brute_force']
 
 #set up random points to test pair counters
 np.random.seed(1)
@@ -260,3 +262,57 @@ def test_marked_npairs_wfuncs_behavior():
     assert np.all(result == -3*test_result), error_msg
 
 
+def test_velocity_moment_npairs_brute_force():
+    """
+    test that the single-pass moments of the radial velocity agree with 
+    the moments computed directly from all pairs.
+    """
+    Npts1, Npts2 = 200, 300
+    sample1, sample2 = np.random.random((Npts1,3)), np.random.random((Npts2,3))
+    velocities1, velocities2 = np.random.normal(size=(Npts1,3)), np.random.normal(size=(Npts2,3))
+    rbins = np.linspace(0.02, 0.2, 5)
+
+    counts, mean, m2, m3 = velocity_moment_npairs(sample1, sample2, rbins, 
+        velocities1, velocities2, period=period, compute_skewness=True, num_threads=num_threads)
+
+    dx = sample1[:,np.newaxis,:] - sample2[np.newaxis,:,:]
+    dx = (dx + period/2.)%period - period/2.
+    d = np.sqrt(np.sum(dx*dx, axis=-1))
+    dv = velocities1[:,np.newaxis,:] - velocities2[np.newaxis,:,:]
+    vr = np.sum(dv*dx, axis=-1)/d
+    ibin = np.digitize(d, rbins, right=True)
+    for k in range(len(rbins)-1):
+        vr_k = vr[ibin==k+1]
+        assert counts[k] == len(vr_k)
+        assert np.allclose(mean[k], np.mean(vr_k))
+        assert np.allclose(m2[k], np.sum((vr_k - np.mean(vr_k))**2))
+        assert np.allclose(m3[k], np.sum((vr_k - np.mean(vr_k))**3))
+
+
+def test_xy_z_velocity_moment_npairs_brute_force():
+    """
+    test that the single-pass moments of the line-of-sight velocity agree with 
+    the moments computed directly from all pairs.
+    """
+    Npts1, Npts2 = 200, 300
+    sample1, sample2 = np.random.random((Npts1,3)), np.random.random((Npts2,3))
+    vz1, vz2 = np.random.normal(size=Npts1), np.random.normal(size=Npts2)
+    rp_bins = np.linspace(0.02, 0.2, 5)
+    pi_bins = np.array([0.0, 0.1, 0.2])
+
+    counts, mean, m2 = xy_z_velocity_moment_npairs(sample1, sample2, rp_bins, pi_bins, 
+        vz1, vz2, num_threads=num_threads)
+    assert counts.shape == (len(rp_bins)-1, len(pi_bins)-1)
+
+    dx = sample1[:,np.newaxis,:] - sample2[np.newaxis,:,:]
+    rp = np.sqrt(np.sum(dx[:,:,:2]**2, axis=-1))
+    pi = np.abs(dx[:,:,2])
+    dvz = np.abs(vz1[:,np.newaxis] - vz2[np.newaxis,:])
+    irp = np.digitize(rp, rp_bins, right=True)
+    ipi = np.digitize(pi, pi_bins, right=True)
+    for k in range(len(rp_bins)-1):
+        for l in range(len(pi_bins)-1):
+            dvz_kl = dvz[(irp==k+1) & (ipi==l+1)]
+            assert counts[k,l] == len(dvz_kl)
+            assert np.allclose(mean[k,l], np.mean(dvz_kl))
+            assert np.allclose(m2[k,l], np.sum((dvz_kl - np.mean(dvz_kl))**2))
@@ -9,7 +9,7 @@ from __future__ import (absolute_import, division, print_function, unicode_liter
 import sys
 import numpy as np
 from math import pi, gamma
-from .pair_counters.marked_double_tree_pairs import velocity_marked_npairs, xy_z_velocity_marked_npairs
+from .pair_counters.marked_double_tree_pairs import velocity_moment_npairs, xy_z_velocity_moment_npairs
 from .pairwise_velocity_helpers import *
 
 
@@ -107,7 +107,7 @@ def mean_radial_velocity_vs_r(sample1, velocities1, rbins,
     :math:`\\bar{v}_{12}(r)` is the mean of that quantity calculated in radial bins.
     
     Pairs and radial velocities are calculated using 
-    `~halotools.mock_observables.pair_counters.velocity_marked_npairs`.
+    `~halotools.mock_observables.pair_counters.velocity_moment_npairs`.
     
     Examples
     --------
@@ -152,93 +152,14 @@ def mean_radial_velocity_vs_r(sample1, velocities1, rbins,
     
     rbins = _process_radial_bins(rbins, period, PBCs)
     
-    #create marks for the marked pair counter.
-    marks1 = np.vstack((sample1.T, velocities1.T)).T
-    marks2 = np.vstack((sample2.T, velocities2.T)).T
-    
-    def marked_pair_counts(sample1, sample2, rbins, period, num_threads,\
-                           do_auto, do_cross, marks1, marks2,\
-                           wfunc, _sample1_is_sample2, approx_cell1_size,
-                           approx_cell2_size):
-        """
-        Count velocity weighted data pairs.
-        """
-        
-        if do_auto==True:
-            D1D1, dummy, N1N1 = velocity_marked_npairs(sample1, sample1, rbins,\
-                                 weights1=marks1, weights2=marks1,\
-                                 wfunc = wfunc,\
-                                 period=period, num_threads=num_threads,
-                                 approx_cell1_size = approx_cell1_size,
-                                 approx_cell2_size = approx_cell1_size)
-            D1D1 = np.diff(D1D1)
-            N1N1 = np.diff(N1N1)
-        else:
-            D1D1=None
-            D2D2=None
-            N1N1=None
-            N2N2=None
-        
-        if _sample1_is_sample2:
-            D1D2 = D1D1
-            D2D2 = D1D1
-            N1N2 = N1N1
-            N2N2 = N1N1
-        else:
-            if do_cross==True:
-                D1D2, dummy, N1N2 = velocity_marked_npairs(sample1, sample2, rbins,\
-                                     weights1=marks1, weights2=marks2,\
-                                     wfunc = wfunc,\
-                                     period=period, num_threads=num_threads,
-                                     approx_cell1_size = approx_cell1_size,
-                                     approx_cell2_size = approx_cell2_size)
-                D1D2 = np.diff(D1D2)
-                N1N2 = np.diff(N1N2)
-            else: 
-                D1D2=None
-                N1N2=None
-            if do_auto==True:
-                D2D2, dummy, N2N2 = velocity_marked_npairs(sample2, sample2, rbins,\
-                                     weights1=marks2, weights2=marks2,\
-                                     wfunc = wfunc,\
-                                     period=period, num_threads=num_threads,
-                                     approx_cell1_size = approx_cell2_size,
-                                     approx_cell2_size = approx_cell2_size)
-                D2D2 = np.diff(D2D2)
-                N2N2 = np.diff(N2N2)
-            else: 
-                D2D2=None
-                N2N2=None
-    
-        return D1D1, D1D2, D2D2, N1N1, N1N2, N2N2
-    
-    
-    #count the sum of radial velocities and number of pairs
-    wfunc = 11
-    V1V1,V1V2,V2V2, N1N1,N1N2,N2N2 =\
-        marked_pair_counts(sample1, sample2, rbins, period,\
-                           num_threads, do_auto, do_cross,\
-                           marks1, marks2, wfunc,\
-                           _sample1_is_sample2,\
-                           approx_cell1_size, approx_cell2_size)
-    
-    #return results: the sum of radial velocities divided by the number of pairs
-    if _sample1_is_sample2:
-        M_11 = V1V1/N1N1
-        return M_11
-    else:
-        if (do_auto==True) & (do_cross==True): 
-            M_11 = V1V1/N1N1
-            M_12 = V1V2/N1N2
-            M_22 = V2V2/N2N2
-            return M_11, M_12, M_22
-        elif (do_cross==True):
-            M_12 = V1V2/N1N2
-            return M_12
-        elif (do_auto==True):
-            M_11 = V1V1/N1N1
-            M_22 = V2V2/N2N2 
-            return M_11, M_22
+    #count the pairs and accumulate the moments of the radial velocities
+    moments = _radial_velocity_moments(sample1, velocities1, sample2, velocities2, 
+        rbins, period, num_threads, do_auto, do_cross, _sample1_is_sample2, 
+        approx_cell1_size, approx_cell2_size)
+    
+    #return results: the mean radial velocity of the pairs in each bin
+    return _velocity_statistic_result(moments, _mean_velocity, 
+        do_auto, do_cross, _sample1_is_sample2)
 
 
 def radial_pvd_vs_r(sample1, velocities1, rbins, sample2=None,
@@ -310,7 +231,7 @@ def radial_pvd_vs_r(sample1, velocities1, rbins, sample2=None,
     :math:`\\sigma_{12}(r)` is the standard deviation of this quantity in radial bins.
     
     Pairs and radial velocities are calculated using 
-    `~halotools.mock_observables.pair_counters.velocity_marked_npairs`.
+    `~halotools.mock_observables.pair_counters.velocity_moment_npairs`.
     
     Examples
     --------
@@ -357,113 +278,14 @@ def radial_pvd_vs_r(sample1, velocities1, rbins, sample2=None,
     
     rbins = _process_radial_bins(rbins, period, PBCs)
     
-    #calculate velocity difference scale
-    std_v1 = np.sqrt(np.std(velocities1[0,:]))
-    std_v2 = np.sqrt(np.std(velocities2[0,:]))
-    
-    #build the marks.
-    shift1 = np.repeat(std_v1,len(sample1))
-    shift2 = np.repeat(std_v2,len(sample2))
-    marks1 = np.vstack((sample1.T, velocities1.T, shift1)).T
-    marks2 = np.vstack((sample2.T, velocities2.T, shift2)).T
+    #count the pairs and accumulate the moments of the radial velocities
+    moments = _radial_velocity_moments(sample1, velocities1, sample2, velocities2, 
+        rbins, period, num_threads, do_auto, do_cross, _sample1_is_sample2, 
+        approx_cell1_size, approx_cell2_size)
     
-    
-    def marked_pair_counts(sample1, sample2, rbins, period, num_threads,\
-                           do_auto, do_cross, marks1, marks2,\
-                           wfunc, _sample1_is_sample2, approx_cell1_size,
-                           approx_cell2_size):
-        """
-        Count velocity weighted data pairs.
-        """
-        
-        if do_auto==True:
-            D1D1, S1S1, N1N1 = velocity_marked_npairs(sample1, sample1, rbins,\
-                                 weights1=marks1, weights2=marks1,\
-                                 wfunc = wfunc,\
-                                 period=period, num_threads=num_threads,
-                                 approx_cell1_size = approx_cell1_size,
-                                 approx_cell2_size = approx_cell1_size)
-            D1D1 = np.diff(D1D1)
-            S1S1 = np.diff(S1S1)
-            N1N1 = np.diff(N1N1)
-        else:
-            D1D1=None
-            D2D2=None
-            N1N1=None
-            N2N2=None
-            S1S1=None
-            S2S2=None
-        
-        if _sample1_is_sample2:
-            D1D2 = D1D1
-            D2D2 = D1D1
-            N1N2 = N1N1
-            N2N2 = N1N1
-            S1S2 = S1S1
-            S2S2 = S1S1
-        else:
-            if do_cross==True:
-                D1D2, S1S2, N1N2 = velocity_marked_npairs(sample1, sample2, rbins,\
-                                     weights1=marks1, weights2=marks2,\
-                                     wfunc = wfunc,\
-                                     period=period, num_threads=num_threads,
-                                     approx_cell1_size = approx_cell1_size,
-                                     approx_cell2_size = approx_cell2_size)
-                D1D2 = np.diff(D1D2)
-                S1S2 = np.diff(S1S2)
-                N1N2 = np.diff(N1N2)
-            else: 
-                D1D2=None
-                N1N2=None
-                S1S2=None
-            if do_auto==True:
-                D2D2, S2S2, N2N2 = velocity_marked_npairs(sample2, sample2, rbins,\
-                                     weights1=marks2, weights2=marks2,\
-                                     wfunc = wfunc,\
-                                     period=period, num_threads=num_threads,
-                                     approx_cell1_size = approx_cell2_size,
-                                     approx_cell2_size = approx_cell2_size)
-                D2D2 = np.diff(D2D2)
-                S2S2 = np.diff(S2S2)
-                N2N2 = np.diff(N2N2)
-            else: 
-                D2D2=None
-                N2N2=None
-    
-        return D1D1, D1D2, D2D2, S1S1, S1S2, S2S2, N1N1, N1N2, N2N2
-    
-    wfunc = 13
-    V1V1,V1V2,V2V2, S1S1, S1S2, S2S2, N1N1,N1N2,N2N2 = marked_pair_counts(sample1, sample2, rbins, period,\
-                                                        num_threads, do_auto, do_cross,\
-                                                        marks1, marks2, wfunc,\
-                                                        _sample1_is_sample2,\
-                                                        approx_cell1_size, approx_cell2_size)
-    
-    
-    def _shifted_std(N, sum_x, sum_x_sqr):
-        """
-        calculate the variance
-        """
-        variance = (sum_x_sqr - (sum_x * sum_x)/N)/(N - 1)
-        return np.sqrt(variance)
-    
-    #return results
-    if _sample1_is_sample2:
-        sigma_11 = _shifted_std(N1N1,V1V1,S1S1)
-        return sigma_11
-    else:
-        if (do_auto==True) & (do_cross==True): 
-            sigma_11 = _shifted_std(N1N1,V1V1,S1S1)
-            sigma_12 = _shifted_std(N1N2,V1V2,S1S2)
-            sigma_22 = _shifted_std(N2N2,V2V2,S2S2)
-            return sigma_11, sigma_12, sigma_22
-        elif (do_cross==True):
-            sigma_12 = _shifted_std(N1N2,V1V2,S1S2)
-            return sigma_12
-        elif (do_auto==True):
-            sigma_11 = _shifted_std(N1N1,V1V1,S1S1)
-            sigma_22 = _shifted_std(N2N2,V2V2,S2S2)
-            return sigma_11, sigma_22
+    #return results: the dispersion of the radial velocity of the pairs in each bin
+    return _velocity_statistic_result(moments, _velocity_dispersion, 
+        do_auto, do_cross, _sample1_is_sample2)
 
 
 def mean_los_velocity_vs_rp(sample1, velocities1, rp_bins, pi_max,
@@ -551,7 +373,7 @@ def mean_los_velocity_vs_rp(sample1, velocities1, rp_bins, pi_max,
     :math:`\\bar{v}_{z12}(r_p)` is the mean of this quantity in projected radial bins.
     
     Pairs and radial velocities are calculated using 
-    `~halotools.mock_observables.pair_counters.xy_z_velocity_marked_npairs`.
+    `~halotools.mock_observables.pair_counters.xy_z_velocity_moment_npairs`.
     
     Examples
     --------
@@ -594,99 +416,14 @@ def mean_los_velocity_vs_rp(sample1, velocities1, rp_bins, pi_max,
     rp_bins, pi_max = _process_rp_bins(rp_bins, pi_max, period, PBCs)
     pi_bins = np.array([0.0,pi_max])
     
-    #create marks for the marked pair counter.
-    marks1 = velocities1[:,2] #z-component of velocity
-    marks2 = velocities2[:,2] #z-component of velocity
-    
-    def marked_pair_counts(sample1, sample2, rp_bins, pi_bins, period, num_threads,\
-                           do_auto, do_cross, marks1, marks2,\
-                           wfunc, _sample1_is_sample2, approx_cell1_size,
-                           approx_cell2_size):
-        """
-        Count velocity weighted data pairs.
-        """
-        
-        if do_auto==True:
-            D1D1, dummy, N1N1 = xy_z_velocity_marked_npairs(sample1, sample1, rp_bins, pi_bins,\
-                                 weights1=marks1, weights2=marks1,\
-                                 wfunc = wfunc,\
-                                 period=period, num_threads=num_threads,
-                                 approx_cell1_size = approx_cell1_size,
-                                 approx_cell2_size = approx_cell1_size)
-            D1D1 = np.diff(D1D1,axis=1)[:,0]
-            D1D1 = np.diff(D1D1)
-            N1N1 = np.diff(N1N1,axis=1)[:,0]
-            N1N1 = np.diff(N1N1)
-        else:
-            D1D1=None
-            D2D2=None
-            N1N1=None
-            N2N2=None
-        
-        if _sample1_is_sample2:
-            D1D2 = D1D1
-            D2D2 = D1D1
-            N1N2 = N1N1
-            N2N2 = N1N1
-        else:
-            if do_cross==True:
-                D1D2, dummy, N1N2 = xy_z_velocity_marked_npairs(sample1, sample2, rp_bins, pi_bins,\
-                                     weights1=marks1, weights2=marks2,\
-                                     wfunc = wfunc,\
-                                     period=period, num_threads=num_threads,
-                                     approx_cell1_size = approx_cell1_size,
-                                     approx_cell2_size = approx_cell2_size)
-                D1D2 = np.diff(D1D2,axis=1)[:,0]
-                D1D2 = np.diff(D1D2)
-                N1N2 = np.diff(N1N2,axis=1)[:,0]
-                N1N2 = np.diff(N1N2)
-            else: 
-                D1D2=None
-                N1N2=None
-            if do_auto==True:
-                D2D2, dummy, N2N2 = xy_z_velocity_marked_npairs(sample2, sample2, rp_bins, pi_bins,\
-                                     weights1=marks2, weights2=marks2,\
-                                     wfunc = wfunc,\
-                                     period=period, num_threads=num_threads,
-                                     approx_cell1_size = approx_cell2_size,
-                                     approx_cell2_size = approx_cell2_size)
-                D2D2 = np.diff(D2D2,axis=1)[:,0]
-                D2D2 = np.diff(D2D2)
-                N2N2 = np.diff(N2N2,axis=1)[:,0]
-                N2N2 = np.diff(N2N2)
-            else: 
-                D2D2=None
-                N2N2=None
-    
-        return D1D1, D1D2, D2D2, N1N1, N1N2, N2N2
-    
-    
-    #count the sum of radial velocities and number of pairs
-    wfunc = 14
-    V1V1,V1V2,V2V2, N1N1,N1N2,N2N2 =\
-        marked_pair_counts(sample1, sample2, rp_bins, pi_bins, period,\
-                           num_threads, do_auto, do_cross,\
-                           marks1, marks2, wfunc,\
-                           _sample1_is_sample2,\
-                           approx_cell1_size, approx_cell2_size)
-    
-    #return results: the sum of radial velocities divided by the number of pairs
-    if _sample1_is_sample2:
-        M_11 = V1V1/N1N1
-        return M_11
-    else:
-        if (do_auto==True) & (do_cross==True): 
-            M_11 = V1V1/N1N1
-            M_12 = V1V2/N1N2
-            M_22 = V2V2/N2N2
-            return M_11, M_12, M_22
-        elif (do_cross==True):
-            M_12 = V1V2/N1N2
-            return M_12
-        elif (do_auto==True):
-            M_11 = V1V1/N1N1
-            M_22 = V2V2/N2N2 
-            return M_11, M_22
+    #count the pairs and accumulate the moments of the LOS velocities
+    moments = _los_velocity_moments(sample1, velocities1, sample2, velocities2, 
+        rp_bins, pi_bins, period, num_threads, do_auto, do_cross, _sample1_is_sample2, 
+        approx_cell1_size, approx_cell2_size)
+    
+    #return results: the mean LOS velocity of the pairs in each bin
+    return _velocity_statistic_result(moments, _mean_velocity, 
+        do_auto, do_cross, _sample1_is_sample2)
 
 
 def los_pvd_vs_rp(sample1, velocities1, rp_bins, pi_max, sample2=None,
@@ -760,7 +497,7 @@ def los_pvd_vs_rp(sample1, velocities1, rp_bins, pi_max, sample2=None,
     projected radial bins.
     
     Pairs and radial velocities are calculated using 
-    `~halotools.mock_observables.pair_counters.xy_z_velocity_marked_npairs`.
+    `~halotools.mock_observables.pair_counters.xy_z_velocity_moment_npairs`.
     
     Examples
     --------
@@ -820,118 +557,108 @@ def los_pvd_vs_rp(sample1, velocities1, rp_bins, pi_max, sample2=None,
     rp_bins, pi_max = _process_rp_bins(rp_bins, pi_max, period, PBCs)
     pi_bins = np.array([0.0,pi_max])
     
-    #calculate velocity difference scale
-    std_v1 = np.sqrt(np.std(velocities1[2,:]))
-    std_v2 = np.sqrt(np.std(velocities2[2,:]))
+    #count the pairs and accumulate the moments of the LOS velocities
+    moments = _los_velocity_moments(sample1, velocities1, sample2, velocities2, 
+        rp_bins, pi_bins, period, num_threads, do_auto, do_cross, _sample1_is_sample2, 
+        approx_cell1_size, approx_cell2_size)
     
-    #build the marks.
-    shift1 = np.repeat(std_v1,len(sample1))
-    shift2 = np.repeat(std_v2,len(sample2))
-    marks1 = np.vstack((velocities1[:,2], shift1)).T #z-component of the velocity
-    marks2 = np.vstack((velocities2[:,2], shift2)).T #z-component of the velocity
-    
-    
-    def marked_pair_counts(sample1, sample2, rp_bins, pi_bins, period, num_threads,\
-                           do_auto, do_cross, marks1, marks2,\
-                           wfunc, _sample1_is_sample2, approx_cell1_size,
-                           approx_cell2_size):
-        """
-        Count velocity weighted data pairs.
-        """
-        
+    #return results: the dispersion of the LOS velocity of the pairs in each bin
+    return _velocity_statistic_result(moments, _velocity_dispersion, 
+        do_auto, do_cross, _sample1_is_sample2)
+
+
+def _radial_velocity_moments(sample1, velocities1, sample2, velocities2, 
+    rbins, period, num_threads, do_auto, do_cross, _sample1_is_sample2, 
+    approx_cell1_size, approx_cell2_size):
+    """
+    Count the pairs and accumulate the moments of the relative radial velocity 
+    for each requested combination of samples, with a single call to 
+    `~halotools.mock_observables.pair_counters.velocity_moment_npairs` each. 
+    """
+    def moments(s1, v1, s2, v2, cell1_size, cell2_size):
+        return velocity_moment_npairs(s1, s2, rbins, v1, v2, period=period, 
+            num_threads=num_threads, approx_cell1_size=cell1_size, 
+            approx_cell2_size=cell2_size)
+
+    return _sample_combination_moments(moments, sample1, velocities1, 
+        sample2, velocities2, do_auto, do_cross, _sample1_is_sample2, 
+        approx_cell1_size, approx_cell2_size)
+
+
+def _los_velocity_moments(sample1, velocities1, sample2, velocities2, 
+    rp_bins, pi_bins, period, num_threads, do_auto, do_cross, _sample1_is_sample2, 
+    approx_cell1_size, approx_cell2_size):
+    """
+    Count the pairs and accumulate the moments of the relative line-of-sight velocity 
+    for each requested combination of samples, with a single call to 
+    `~halotools.mock_observables.pair_counters.xy_z_velocity_moment_npairs` each. 
+    Pairs are summed over the single bin of line-of-sight separation. 
+    """
+    def moments(s1, v1, s2, v2, cell1_size, cell2_size):
+        counts, mean, m2 = xy_z_velocity_moment_npairs(s1, s2, rp_bins, pi_bins, 
+            v1[:,2], v2[:,2], period=period, num_threads=num_threads, 
+            approx_cell1_size=cell1_size, approx_cell2_size=cell2_size)
+        return counts[:,0], mean[:,0], m2[:,0]
+
+    return _sample_combination_moments(moments, sample1, velocities1, 
+        sample2, velocities2, do_auto, do_cross, _sample1_is_sample2, 
+        approx_cell1_size, approx_cell2_size)
+
+
+def _sample_combination_moments(moments, sample1, velocities1, sample2, velocities2, 
+    do_auto, do_cross, _sample1_is_sample2, approx_cell1_size, approx_cell2_size):
+    """
+    Return a dictionary storing the output of the input ``moments`` function 
+    for the 11, 12 and 22 combinations of samples that are requested. 
+    """
+    result = {}
+    if do_auto==True:
+        result['11'] = moments(sample1, velocities1, sample1, velocities1, 
+            approx_cell1_size, approx_cell1_size)
+
+    if _sample1_is_sample2:
         if do_auto==True:
-            D1D1, S1S1, N1N1 = xy_z_velocity_marked_npairs(sample1, sample1, rp_bins, pi_bins,\
-                                 weights1=marks1, weights2=marks1,\
-                                 wfunc = wfunc,\
-                                 period=period, num_threads=num_threads,
-                                 approx_cell1_size = approx_cell1_size,
-                                 approx_cell2_size = approx_cell1_size)
-            D1D1 = np.diff(D1D1,axis=1)[:,0]
-            D1D1 = np.diff(D1D1)
-            S1S1 = np.diff(S1S1,axis=1)[:,0]
-            S1S1 = np.diff(S1S1)
-            N1N1 = np.diff(N1N1,axis=1)[:,0]
-            N1N1 = np.diff(N1N1)
-        else:
-            D1D1=None
-            D2D2=None
-            N1N1=None
-            N2N2=None
-            S1S1=None
-            S2S2=None
-        
-        if _sample1_is_sample2:
-            D1D2 = D1D1
-            D2D2 = D1D1
-            N1N2 = N1N1
-            N2N2 = N1N1
-            S1S2 = S1S1
-            S2S2 = S1S1
-        else:
-            if do_cross==True:
-                D1D2, S1S2, N1N2 = xy_z_velocity_marked_npairs(sample1, sample2, rp_bins, pi_bins,\
-                                     weights1=marks1, weights2=marks2,\
-                                     wfunc = wfunc,\
-                                     period=period, num_threads=num_threads,
-                                     approx_cell1_size = approx_cell1_size,
-                                     approx_cell2_size = approx_cell2_size)
-                D1D2 = np.diff(D1D2,axis=1)[:,0]
-                D1D2 = np.diff(D1D2)
-                S1S2 = np.diff(S1S2,axis=1)[:,0]
-                S1S2 = np.diff(S1S2)
-                N1N2 = np.diff(N1N2,axis=1)[:,0]
-                N1N2 = np.diff(N1N2)
-            else: 
-                D1D2=None
-                N1N2=None
-                S1S2=None
-            if do_auto==True:
-                D2D2, S2S2, N2N2 = xy_z_velocity_marked_npairs(sample2, sample2, rp_bins, pi_bins,\
-                                     weights1=marks2, weights2=marks2,\
-                                     wfunc = wfunc,\
-                                     period=period, num_threads=num_threads,
-                                     approx_cell1_size = approx_cell2_size,
-                                     approx_cell2_size = approx_cell2_size)
-                D2D2 = np.diff(D2D2,axis=1)[:,0]
-                D2D2 = np.diff(D2D2)
-                S2S2 = np.diff(S2S2,axis=1)[:,0]
-                S2S2 = np.diff(S2S2)
-                N2N2 = np.diff(N2N2,axis=1)[:,0]
-                N2N2 = np.diff(N2N2)
-            else: 
-                D2D2=None
-                N2N2=None
-    
-        return D1D1, D1D2, D2D2, S1S1, S1S2, S2S2, N1N1, N1N2, N2N2
-    
-    wfunc = 16
-    V1V1,V1V2,V2V2, S1S1, S1S2, S2S2, N1N1,N1N2,N2N2 = marked_pair_counts(sample1, sample2, rp_bins, pi_bins, period,\
-                                                        num_threads, do_auto, do_cross,\
-                                                        marks1, marks2, wfunc,\
-                                                        _sample1_is_sample2,\
-                                                        approx_cell1_size, approx_cell2_size)
-    
-    def _shifted_std(N, sum_x, sum_x_sqr):
-        """
-        calculate the variance
-        """
-        variance = (sum_x_sqr - (sum_x * sum_x)/N)/(N - 1)
-        return np.sqrt(variance)
-    
-    #return results
+            result['12'] = result['11']
+            result['22'] = result['11']
+    else:
+        if do_cross==True:
+            result['12'] = moments(sample1, velocities1, sample2, velocities2, 
+                approx_cell1_size, approx_cell2_size)
+        if do_auto==True:
+            result['22'] = moments(sample2, velocities2, sample2, velocities2, 
+                approx_cell2_size, approx_cell2_size)
+
+    return result 
+
+
+def _mean_velocity(counts, mean, m2):
+    """
+    Mean pairwise velocity, undefined in bins without pairs. 
+    """
+    return np.where(counts > 0, mean, np.nan)
+
+
+def _velocity_dispersion(counts, mean, m2):
+    """
+    Sample standard deviation of the pairwise velocity, 
+    undefined in bins with fewer than two pairs. 
+    """
+    return np.sqrt(m2/(counts - 1))
+
+
+def _velocity_statistic_result(moments, statistic, do_auto, do_cross, _sample1_is_sample2):
+    """
+    Apply the input ``statistic`` function to the moments of each combination 
+    of samples, and return the results in the order used by all functions 
+    in this module. 
+    """
     if _sample1_is_sample2:
-        sigma_11 = _shifted_std(N1N1,V1V1,S1S1)
-        return sigma_11
+        return statistic(*moments['11'])
     else:
         if (do_auto==True) & (do_cross==True): 
-            sigma_11 = _shifted_std(N1N1,V1V1,S1S1)
-            sigma_12 = _shifted_std(N1N2,V1V2,S1S2)
-            sigma_22 = _shifted_std(N2N2,V2V2,S2S2)
-            return sigma_11, sigma_12, sigma_22
+            return (statistic(*moments['11']), statistic(*moments['12']), 
+                statistic(*moments['22']))
         elif (do_cross==True):
-            sigma_12 = _shifted_std(N1N2,V1V2,S1S2)
-            return sigma_12
+            return statistic(*moments['12'])
         elif (do_auto==True):
-            sigma_11 = _shifted_std(N1N1,V1V1,S1S1)
-            sigma_22 = _shifted_std(N2N2,V2V2,S2S2)
-            return sigma_11, sigma_22
+            return statistic(*moments['11']), statistic(*moments['22'])
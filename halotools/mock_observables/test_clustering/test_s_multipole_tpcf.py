@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import numpy as np
+import pytest
+
+from ..tpcf_multipole import s_multipole_tpcf
+
+from ...custom_exceptions import HalotoolsError
+
+__all__=['test_s_multipole_tpcf_anisotropic_pairs','test_s_multipole_tpcf_randoms',
+    'test_s_multipole_tpcf_exception_handling']
+
+np.random.seed(2)
+period = np.array([1.0,1.0,1.0])
+s_bins = np.linspace(0.02,0.2,6)
+
+
+def test_s_multipole_tpcf_anisotropic_pairs():
+    """
+    test that pairs separated along the line-of-sight produce the Legendre 
+    polynomials evaluated at mu=1 in the bin containing their separation. 
+    """
+    Npts = 1000
+    sample1 = np.random.random((Npts,3))
+    companions = np.copy(sample1)
+    companions[:,2] = (companions[:,2] + 0.05)%1.0
+    sample = np.vstack((sample1, companions))
+    
+    xi_l = s_multipole_tpcf(sample, s_bins, period=period)
+    assert np.shape(xi_l) == (len(s_bins)-1, 3)
+    
+    #all three Legendre polynomials are unity at mu=1, so the excess of 
+    #pairs at s=0.05 contributes (2l+1) times the same amount to each multipole.
+    excess = xi_l[0,:]/np.array([1.0, 5.0, 9.0])
+    assert np.allclose(excess, excess[0], rtol=0.1)
+    assert np.all(np.abs(xi_l[1:,:]) < 0.1)
+    
+    xi_2 = s_multipole_tpcf(sample, s_bins, period=period, orders=[2])
+    assert np.allclose(xi_2[:,0], xi_l[:,1])
+
+
+def test_s_multipole_tpcf_randoms():
+    """
+    test s_multipole_tpcf with randoms and without periodic boundary conditions.
+    """
+    sample1 = np.random.random((500,3))
+    sample2 = np.random.random((500,3))
+    randoms = np.random.random((500,3))
+    
+    xi_11, xi_12, xi_22 = s_multipole_tpcf(sample1, s_bins, sample2=sample2, 
+        randoms=randoms, estimator='Landy-Szalay')
+    for xi_l in (xi_11, xi_12, xi_22):
+        assert np.shape(xi_l) == (len(s_bins)-1, 3)
+    
+    #data identical to the randoms has a vanishing correlation function
+    xi_l = s_multipole_tpcf(randoms, s_bins, randoms=randoms, estimator='Natural')
+    assert np.allclose(xi_l, 0.0)
+
+
+def test_s_multipole_tpcf_exception_handling():
+    """
+    """
+    sample1 = np.random.random((100,3))
+    
+    with pytest.raises(HalotoolsError) as err:
+        s_multipole_tpcf(sample1, s_bins, period=period, orders=[1])
+    substr = "Input `orders` must be a subset of the even multipoles [0, 2, 4]."
+    assert substr in err.value.message
+    
+    with pytest.raises(HalotoolsError) as err:
+        s_multipole_tpcf(sample1, s_bins, period=period, estimator='Hamilton')
+    substr = "Input `estimator` must be one of the following"
+    assert substr in err.value.message
@@ -6,9 +6,10 @@ import numpy as np
 import sys
 import pytest 
 
-from ..mock_survey import distant_observer_redshift, ra_dec_z
+from ..mock_survey import distant_observer_redshift, ra_dec_z, light_cone
 
-__all__=['test_distant_observer','test_ra_dec_z']
+__all__=['test_distant_observer','test_ra_dec_z', 'test_light_cone_footprint', 
+    'test_light_cone_brute_force_replication']
 
 #create some toy data to test functions
 N=100
@@ -50,3 +51,61 @@ def test_ra_dec_z():
     assert len(z)==N
     assert np.all(ra<2.0*np.pi) & np.all(ra>0.0), "ra range is incorrect"
     assert np.all(dec>-1.0*np.pi/2.0) & np.all(dec<np.pi/2.0), "ra range is incorrect"
+
+
+def test_light_cone_footprint():
+    """
+    test that all light-cone galaxies lie inside the requested footprint
+    """
+    Npts, Lbox = 1000, 100.
+    coords = np.random.uniform(0, Lbox, Npts*3).reshape((Npts, 3))
+    vels = np.random.normal(0, 300., Npts*3).reshape((Npts, 3))
+    ra_range, dec_range, redshift_range = (0.2, 0.9), (-0.3, 0.5), (0.02, 0.06)
+
+    result = light_cone(coords, vels, Lbox, ra_range, dec_range, redshift_range, 
+        chunk_size=300)
+
+    assert len(result['ra']) > 0
+    assert np.all(result['ra'] >= ra_range[0]) & np.all(result['ra'] <= ra_range[1])
+    assert np.all(result['dec'] >= dec_range[0]) & np.all(result['dec'] <= dec_range[1])
+    assert np.all(result['redshift'] >= redshift_range[0])
+    assert np.all(result['redshift'] <= redshift_range[1])
+    assert np.all(result['catalog_index'] >= 0) & np.all(result['catalog_index'] < Npts)
+
+
+def test_light_cone_brute_force_replication():
+    """
+    test that lazy box replication agrees with explicitly tiling the box
+    """
+    from astropy import cosmology
+    from astropy.constants import c
+    c_km_s = c.to('km/s').value
+    cosmo = cosmology.FlatLambdaCDM(H0=70., Om0=0.3)
+
+    Npts, Lbox = 500, 100.
+    coords = np.random.uniform(0, Lbox, Npts*3).reshape((Npts, 3))
+    vels = np.random.normal(0, 300., Npts*3).reshape((Npts, 3))
+    ra_range, dec_range, redshift_range = (0.2, 0.9), (-0.3, 0.5), (0.02, 0.06)
+    observer = np.array((10., 20., 30.))
+
+    result = light_cone(coords, vels, Lbox, ra_range, dec_range, redshift_range, 
+        observer=observer, cosmo=cosmo)
+
+    zgrid = np.linspace(0, 0.1, 5000)
+    dgrid = cosmo.comoving_distance(zgrid).value*cosmo.h
+    num_expected = 0
+    for nx in range(-3, 4):
+        for ny in range(-3, 4):
+            for nz in range(-3, 4):
+                pos = coords + np.array((nx, ny, nz))*Lbox - observer
+                r = np.sqrt(np.sum(pos*pos, axis=1))
+                ra = np.mod(np.arctan2(pos[:, 1], pos[:, 0]), 2*np.pi)
+                dec = np.arcsin(pos[:, 2]/r)
+                z_cos = np.interp(r, dgrid, zgrid)
+                z_obs = z_cos + np.sum(vels*pos, axis=1)/r/c_km_s*(1 + z_cos)
+                mask = (ra >= ra_range[0]) & (ra <= ra_range[1])
+                mask &= (dec >= dec_range[0]) & (dec <= dec_range[1])
+                mask &= (z_obs >= redshift_range[0]) & (z_obs <= redshift_range[1])
+                num_expected += np.count_nonzero(mask)
+
+    assert np.abs(len(result['ra']) - num_expected) <= 2
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+import numpy as np
+import pytest
+
+from ..error_estimation_tools import *
+from ...custom_exceptions import HalotoolsError
+
+__all__ = ['test_cuboid_subvolume_labels', 'test_jackknife_covariance_matrix', 
+    'test_subvolume_labels_cache', 'test_kmeans_subvolume_labels', 
+    'test_region_resampling_covariance_jackknife', 
+    'test_region_resampling_covariance_pairs', 
+    'test_region_resampling_covariance_exception_handling']
+
+np.random.seed(43)
+
+
+def test_cuboid_subvolume_labels():
+    """
+    """
+    sample = np.array([[0.1, 0.1, 0.1], [0.9, 0.1, 0.1], [1.0, 1.0, 1.0]])
+    labels, N_sub_vol = cuboid_subvolume_labels(sample, 2, 1.0)
+    assert N_sub_vol == 8
+    assert np.all(labels == [1, 5, 8])
+
+
+def test_jackknife_covariance_matrix():
+    """
+    """
+    observations = np.random.random((20, 5))
+    cov = jackknife_covariance_matrix(observations)
+    N_samples = len(observations)
+    correct_cov = np.cov(observations, rowvar=0)*(N_samples-1)**2/N_samples
+    assert np.allclose(cov, correct_cov)
+
+
+def test_subvolume_labels_cache():
+    """
+    """
+    sample = np.random.random((1000, 3))
+    labels1, N_sub_vol = subvolume_labels(sample, 3, Lbox=1.0, cache_key='sample')
+    correct_labels, N_sub_vol = cuboid_subvolume_labels(sample, 3, 1.0)
+    assert np.all(labels1 == correct_labels)
+    
+    #modifying the returned labels does not corrupt the cache
+    labels1[:] = 0
+    labels2, N_sub_vol = subvolume_labels(sample, 3, Lbox=1.0, cache_key='sample')
+    assert np.all(labels2 == correct_labels)
+    
+    #labels are looked up by key rather than recomputed from the positions
+    shifted_sample = np.mod(sample + 0.5, 1.0)
+    labels2, N_sub_vol = subvolume_labels(shifted_sample, 3, Lbox=1.0, cache_key='sample')
+    assert np.all(labels2 == correct_labels)
+    labels2, N_sub_vol = subvolume_labels(shifted_sample, 3, Lbox=1.0)
+    assert np.all(labels2 == cuboid_subvolume_labels(shifted_sample, 3, 1.0)[0])
+    
+    labels1, N_sub_vol = subvolume_labels(sample, 10, method='kmeans', seed=43, 
+        cache_key='sample')
+    assert np.all(labels1 == subvolume_labels(sample, 10, method='kmeans', seed=43)[0])
+    
+    with pytest.raises(HalotoolsError) as err:
+        subvolume_labels(sample, 3)
+    substr = "If ``method`` is 'cuboid', you must pass in ``Lbox``."
+    assert substr in err.value.message
+
+
+def test_kmeans_subvolume_labels():
+    """
+    test that k-means regions of points in two well-separated clumps 
+    never straddle the two clumps.
+    """
+    clump1 = 0.1*np.random.random((500, 3))
+    clump2 = 0.1*np.random.random((500, 3)) + 0.8
+    sample = np.vstack((clump1, clump2))
+    
+    labels, N_sub_vol = kmeans_subvolume_labels(sample, 6, seed=43)
+    assert N_sub_vol == 6
+    assert set(labels) == set(range(1, 7))
+    assert len(set(labels[:500]) & set(labels[500:])) == 0
+
+
+def test_region_resampling_covariance_jackknife():
+    """
+    test that the jackknife covariance from per-region quantities agrees with 
+    the covariance of explicitly recomputed jackknife realizations.
+    """
+    N_regions = 10
+    region_sums = np.random.random((N_regions, 4))
+    
+    cov = region_resampling_covariance(region_stats=[region_sums])
+    observations = np.array([np.sum(np.delete(region_sums, i, axis=0), axis=0) 
+        for i in range(N_regions)])
+    assert np.allclose(cov, jackknife_covariance_matrix(observations))
+    
+    statistic = lambda x: x[1:]/x[0]
+    cov = region_resampling_covariance(statistic, region_stats=[region_sums])
+    observations = np.array([statistic(x) for x in observations])
+    assert np.allclose(cov, jackknife_covariance_matrix(observations))
+    
+    cov = region_resampling_covariance(region_stats=[region_sums], method='subsample')
+    correct_cov = np.cov(region_sums, rowvar=0)/N_regions
+    assert np.allclose(cov, correct_cov)
+    
+    cov = region_resampling_covariance(region_stats=[region_sums], method='bootstrap', 
+        N_resamples=50, seed=43)
+    assert np.shape(cov) == (4, 4)
+    assert np.all(np.diag(cov) > 0)
+
+
+def test_region_resampling_covariance_pairs():
+    """
+    test that realizations of quantities measured for pairs of regions 
+    omit all pairs involving the omitted region.
+    """
+    N_regions = 6
+    pair_counts = np.random.random((N_regions, N_regions, 3))
+    
+    observations = []
+    for i in range(N_regions):
+        keep = np.arange(N_regions) != i
+        observations.append(np.sum(pair_counts[keep][:, keep], axis=(0, 1)))
+    correct_cov = jackknife_covariance_matrix(np.array(observations))
+    
+    cov = region_resampling_covariance(region_pair_stats=[pair_counts])
+    assert np.allclose(cov, correct_cov)
+
+
+def test_region_resampling_covariance_exception_handling():
+    """
+    """
+    with pytest.raises(HalotoolsError) as err:
+        region_resampling_covariance(region_stats=[np.ones(5)], method='bootstrapp')
+    substr = "Input ``method`` must be one of 'jackknife', 'bootstrap' or 'subsample'."
+    assert substr in err.value.message
+    
+    with pytest.raises(HalotoolsError) as err:
+        region_resampling_covariance(region_stats=[np.ones(5)], 
+            region_pair_stats=[np.ones((4, 4))])
+    substr = "must have the same length"
+    assert substr in err.value.message
+    
+    with pytest.raises(HalotoolsError) as err:
+        region_resampling_covariance(region_stats=[np.ones(5), np.ones(5)])
+    substr = "If ``statistic`` is None, you must pass in exactly one quantity."
+    assert substr in err.value.message
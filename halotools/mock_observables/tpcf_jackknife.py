@@ -281,9 +281,10 @@ def tpcf_jackknife(sample1, randoms, rbins, Nsub=[5,5,5],\
     N2 = len(sample2)
     NR = len(randoms)
     
-    j_index_1, N_sub_vol = cuboid_subvolume_labels(sample1, Nsub, Lbox)
-    j_index_2, N_sub_vol = cuboid_subvolume_labels(sample2, Nsub, Lbox)
-    j_index_random, N_sub_vol = cuboid_subvolume_labels(randoms, Nsub, Lbox)
+    #label the points by the cuboid subvolume they occupy
+    j_index_1, N_sub_vol = subvolume_labels(sample1, Nsub, Lbox=Lbox)
+    j_index_2, N_sub_vol = subvolume_labels(sample2, Nsub, Lbox=Lbox)
+    j_index_random, N_sub_vol = subvolume_labels(randoms, Nsub, Lbox=Lbox)
     
     #number of points in each subvolume
     NR_subs = get_subvolume_numbers(j_index_random,N_sub_vol)
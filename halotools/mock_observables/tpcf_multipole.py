@@ -12,9 +12,12 @@ from ..utils.array_utils import convert_to_ndarray
 from ..custom_exceptions import *
 from warnings import warn
 from scipy.special import legendre
+
+from .clustering_helpers import _s_multipole_tpcf_process_args
+from .pair_counters.double_tree_pairs import s_multipole_npairs
 ##########################################################################################
 
-__all__ = ['tpcf_multipole']
+__all__ = ['tpcf_multipole', 's_multipole_tpcf']
 
 __author__ = ['Duncan Campbell']
 
@@ -69,6 +72,12 @@ def tpcf_multipole(s_mu_tcpf_result, mu_bins, order=0):
     Then, we can claclulate the quadrapole of the correlatio function:
     
     >>> xi_2 = tpcf_multipole(xi, mu_bins, order=2)
+    
+    Notes
+    -----
+    The accuracy of the result is limited by the width of the ``mu_bins``. 
+    `~halotools.mock_observables.s_multipole_tpcf` computes the multipoles 
+    directly from the pairs, without any binning in :math:`\\mu`. 
     """
     
     #process inputs
@@ -87,3 +96,216 @@ def tpcf_multipole(s_mu_tcpf_result, mu_bins, order=0):
              np.sum(s_mu_tcpf_result * np.diff(mu_bins) * Ln(mu_bin_centers), axis=1)
     
     return result
+
+
+def s_multipole_tpcf(sample1, s_bins, sample2=None, randoms=None, period=None,\
+                     orders=[0, 2, 4], do_auto=True, do_cross=True, estimator='Natural',\
+                     num_threads=1, max_sample_size=int(1e6), approx_cell1_size=None,
+                     approx_cell2_size=None, approx_cellran_size=None):
+    """
+    Calculate the monopole, quadrupole and hexadecapole of the redshift space 
+    correlation function, :math:`\\xi_{\\ell}(s)`, directly from Legendre-weighted 
+    pair counts. 
+    
+    Each pair is weighted by :math:`L_{\\ell}(\\mu)` evaluated at its own 
+    :math:`\\mu\\equiv\\cos(\\theta_{\\rm LOS})`, so, unlike 
+    `~halotools.mock_observables.tpcf_multipole`, the result does not depend on 
+    any binning in :math:`\\mu`, and costs about as much as a single call to 
+    `~halotools.mock_observables.npairs`. 
+    
+    As in `~halotools.mock_observables.s_mu_tpcf`, the z-dimension is taken to be the 
+    line-of-sight ('distant observer' approximation). 
+    
+    Parameters 
+    ----------
+    sample1 : array_like
+        Npts x 3 numpy array containing 3-D positions of points. 
+    
+    s_bins : array_like
+        numpy array of :math:`s` boundaries defining the bins in which pairs are counted. 
+    
+    sample2 : array_like, optional
+        Npts x 3 numpy array containing 3-D positions of points.
+    
+    randoms : array_like, optional
+        Nran x 3 numpy array containing 3-D positions of points.  If no randoms are 
+        provided 'analytic randoms' are used (only valid for periodic boundary conditions).
+    
+    period : array_like, optional
+        Length-3 array defining axis-aligned periodic boundary conditions. If only 
+        one number, Lbox, is specified, period is assumed to be [Lbox]*3.
+        If none, PBCs are set to infinity.
+    
+    orders : array_like, optional
+        Orders of the multipoles to return, a subset of [0, 2, 4]. Default is all three.
+    
+    do_auto : boolean, optional
+        do auto-correlation?  Default is True.
+    
+    do_cross : boolean, optional
+        do cross-correlation?  Default is True.
+    
+    estimator : string, optional
+        options: 'Natural', 'Landy-Szalay'
+    
+    num_threads : int, optional
+        number of threads to use in calculation. Default is 1. A string 'max' may be used
+        to indicate that the pair counters should use all available cores on the machine.
+    
+    max_sample_size : int, optional
+        Defines maximum size of the sample that will be passed to the pair counter. 
+        
+        If sample size exeeds max_sample_size, the sample will be randomly down-sampled 
+        such that the subsample length is equal to max_sample_size.
+    
+    approx_cell1_size : array_like, optional 
+        Length-3 array serving as a guess for the optimal manner by which 
+        the `~halotools.mock_observables.pair_counters.FlatRectanguloidDoubleTree` 
+        will apportion the sample1 points into subvolumes of the simulation box. 
+        Default choice is to use 1/10 of the box size in each dimension.
+    
+    approx_cell2_size : array_like, optional 
+        Analogous to ``approx_cell1_size``, but for ``sample2``. 
+    
+    approx_cellran_size : array_like, optional 
+        Analogous to ``approx_cell1_size``, but for ``randoms``. 
+    
+    Returns 
+    -------
+    xi_l : np.ndarray
+        *len(s_bins)-1* by *len(orders)* ndarray containing the multipoles 
+        :math:`\\xi_{\\ell}(s)` of the indicated orders.
+        
+        If ``sample2`` is not None (and not exactly the same as ``sample1``), 
+        three such arrays are returned, the multipoles of the autocorrelation of 
+        ``sample1``, the cross-correlation between ``sample1`` and ``sample2``, 
+        and the autocorrelation of ``sample2``, respectively. If ``do_auto`` or 
+        ``do_cross`` is set to False, the appropriate result(s) are returned.
+    
+    Notes
+    -----
+    The Legendre-weighted pair counts, e.g. 
+    :math:`\\mathrm{DD}_{\\ell}(s) = \\sum_{\\rm pairs} L_{\\ell}(\\mu)`, are computed by 
+    `~halotools.mock_observables.pair_counters.s_multipole_npairs`. 
+    Normalizing each count by the number of possible pairs, the multipoles are 
+    
+    .. math::
+        \\xi_{\\ell}(s) = (2\\ell+1) \\left[\\mathrm{DD}_{\\ell} - \\mathrm{RR}_{\\ell}\\right] / \\mathrm{RR}_0
+    
+    if ``estimator`` is set to 'Natural', and 
+    
+    .. math::
+        \\xi_{\\ell}(s) = (2\\ell+1) \\left[\\mathrm{DD}_{\\ell} - \\mathrm{D_1R}_{\\ell} - \\mathrm{D_2R}_{\\ell} + \\mathrm{RR}_{\\ell}\\right] / \\mathrm{RR}_0
+    
+    if ``estimator`` is set to 'Landy-Szalay'. 
+    
+    If the points are distributed in a continuous "periodic box" and ``randoms`` 
+    are not provided, the random counts are computed analytically: random pairs are 
+    isotropic, so :math:`\\mathrm{RR}_{\\ell} = 0` for :math:`\\ell > 0`, and 
+    :math:`\\mathrm{RR}_0` is the volume of each spherical shell divided by the 
+    volume of the box. In this case both estimators are equivalent. 
+    
+    Examples
+    --------
+    For demonstration purposes we create a randomly distributed set of points within a 
+    periodic unit cube. 
+    
+    >>> Npts = 1000
+    >>> Lbox = 1.0
+    >>> period = np.array([Lbox,Lbox,Lbox])
+    
+    >>> x = np.random.random(Npts)
+    >>> y = np.random.random(Npts)
+    >>> z = np.random.random(Npts)
+    >>> coords = np.vstack((x,y,z)).T
+    
+    >>> s_bins  = np.linspace(0.01,0.25,10)
+    >>> xi_l = s_multipole_tpcf(coords, s_bins, period=period)
+    >>> xi_0, xi_2, xi_4 = xi_l.T
+    """
+    
+    #process arguments
+    function_args = [sample1, s_bins, sample2, randoms, period, orders, do_auto,\
+                     do_cross, estimator, num_threads, max_sample_size,\
+                     approx_cell1_size, approx_cell2_size, approx_cellran_size]
+    
+    sample1, s_bins, sample2, randoms, period, orders, do_auto, do_cross, num_threads,\
+        _sample1_is_sample2, PBCs = _s_multipole_tpcf_process_args(*function_args)
+    
+    def legendre_counts(sampleA, sampleB, approx_cellA_size, approx_cellB_size, 
+        is_auto):
+        """
+        Legendre-weighted pair counts, normalized by the number of possible pairs.
+        """
+        NA, NB = len(sampleA), len(sampleB)
+        counts = s_multipole_npairs(sampleA, sampleB, s_bins, period=period,
+            num_threads=num_threads, approx_cell1_size=approx_cellA_size,
+            approx_cell2_size=approx_cellB_size)
+        if is_auto:
+            return counts/(NA*(NA-1.0))
+        else:
+            return counts/(NA*float(NB))
+    
+    def random_counts(sampleA, approx_cellA_size):
+        """
+        Normalized Legendre-weighted random-random and data-random counts. 
+        In a periodic box without randoms, these are computed analytically.
+        """
+        if randoms is None:
+            global_volume = period.prod()
+            dv = (4.0*np.pi/3.0)*np.diff(s_bins**3)
+            RR = np.zeros((len(s_bins)-1, 3))
+            RR[:,0] = dv/global_volume
+            return RR, RR
+        
+        if (estimator == 'Landy-Szalay'):
+            DR = legendre_counts(sampleA, randoms, 
+                approx_cellA_size, approx_cellran_size, False)
+        else:
+            DR = None
+        return DR, RR_randoms
+    
+    def multipoles(DD, DAR, DBR, RR):
+        """
+        Apply the estimator to the normalized Legendre-weighted counts.
+        """
+        if estimator == 'Landy-Szalay':
+            numerator = DD - DAR - DBR + RR
+        else:
+            numerator = DD - RR
+        xi_l = (2.0*np.arange(0, 5, 2) + 1.0)*numerator/RR[:,0:1]
+        return xi_l[:, orders//2]
+    
+    if randoms is not None:
+        RR_randoms = legendre_counts(randoms, randoms, 
+            approx_cellran_size, approx_cellran_size, True)
+    
+    #count pairs!
+    if do_auto==True:
+        D1D1 = legendre_counts(sample1, sample1, approx_cell1_size, approx_cell1_size, True)
+    if (_sample1_is_sample2==False) & (do_cross==True):
+        D1D2 = legendre_counts(sample1, sample2, approx_cell1_size, approx_cell2_size, False)
+    if (_sample1_is_sample2==False) & (do_auto==True):
+        D2D2 = legendre_counts(sample2, sample2, approx_cell2_size, approx_cell2_size, True)
+    
+    D1R, RR = random_counts(sample1, approx_cell1_size)
+    if _sample1_is_sample2==False:
+        D2R, RR = random_counts(sample2, approx_cell2_size)
+    
+    #return results
+    if _sample1_is_sample2:
+        xi_11 = multipoles(D1D1, D1R, D1R, RR)
+        return xi_11
+    else:
+        if (do_auto==True) & (do_cross==True): 
+            xi_11 = multipoles(D1D1, D1R, D1R, RR)
+            xi_12 = multipoles(D1D2, D1R, D2R, RR)
+            xi_22 = multipoles(D2D2, D2R, D2R, RR)
+            return xi_11, xi_12, xi_22
+        elif (do_cross==True):
+            xi_12 = multipoles(D1D2, D1R, D2R, RR)
+            return xi_12
+        elif (do_auto==True):
+            xi_11 = multipoles(D1D1, D1R, D1R, RR)
+            xi_22 = multipoles(D2D2, D2R, D2R, RR)
+            return xi_11, xi_22
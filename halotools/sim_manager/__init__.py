@@ -16,15 +16,19 @@ except OSError:
 	pass
 
 from .supported_sims import *
-from .fake_sim import FakeSim
+from .fake_sim import FakeSim, ClusteredFakeSim, write_clustered_fake_sim
 
 from .download_manager import *
 
 from .cached_halo_catalog import CachedHaloCatalog
+from .lazy_hdf5_table import LazyHdf5Table, write_spatial_cell_index
+from .hdf5_table_layout import write_table_to_hdf5, read_hdf5_table
+from .ptcl_table_pyramid import write_ptcl_pyramid
 from .user_supplied_halo_catalog import UserSuppliedHaloCatalog
 from .user_supplied_ptcl_catalog import UserSuppliedPtclCatalog
 
 from .rockstar_hlist_reader import RockstarHlistReader
 from .tabular_ascii_reader import TabularAsciiReader
 from .halo_table_cache import HaloTableCache
-from .ptcl_table_cache import PtclTableCache
\ No newline at end of file
+from .ptcl_table_cache import PtclTableCache
+from .cache_log_database import CacheLogDatabase
\ No newline at end of file
@@ -0,0 +1,259 @@
+""" Module storing the `CacheLogDatabase` class, the SQLite database used to
+store the cache logs of `~halotools.sim_manager.HaloTableCache` and
+`~halotools.sim_manager.PtclTableCache`.
+"""
+import os
+import sqlite3
+from warnings import warn
+from astropy.table import Table
+
+from ..custom_exceptions import HalotoolsError
+
+__all__ = ('CacheLogDatabase', )
+
+class CacheLogDatabase(object):
+    """ SQLite database storing the rows of a Halotools cache log.
+
+    Compared to a log stored as ASCII data, the database offers:
+
+        * indexed lookups of the rows matching some metadata,
+
+        * updates of individual rows, each performed as a single transaction, so that concurrent updates from different processes cannot overwrite one another or corrupt the log,
+
+        * write-ahead logging, so that any number of processes may read the log while another process updates it.
+
+    Every column of the log is stored as text, except for ``redshift``,
+    which is stored as a float. Repeated rows are not permitted.
+    """
+    table_name = 'cache_log'
+    info_table_name = 'cache_log_info'
+
+    # Number of seconds a process waits for another process to finish updating the log
+    timeout = 60.
+
+    def __init__(self, fname, log_attributes, ascii_fname = None):
+        """
+        Parameters
+        -----------
+        fname : string
+            Name of the SQLite database file. The file is created the first time it is needed.
+
+        log_attributes : list of strings
+            Names of the columns of the log, e.g.,
+            `~halotools.sim_manager.HaloTableCacheLogEntry.log_attributes`.
+
+        ascii_fname : string, optional
+            Name of an ASCII cache log written by a previous version of Halotools.
+            The first time the database is accessed, the rows of this log are copied into the database.
+            The ASCII file itself is left untouched. Default is None.
+        """
+        self.fname = fname
+        self.log_attributes = list(log_attributes)
+        self.ascii_fname = ascii_fname
+        self._initialized = False
+
+    def _connect(self):
+        """ Open a connection to the database. The first connection of each instance,
+        or any connection after the database file has been removed, also creates the tables
+        and migrates the ASCII log if necessary.
+        """
+        if self._initialized and os.path.isfile(self.fname):
+            return sqlite3.connect(self.fname, timeout = self.timeout)
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.fname)))
+        except OSError:
+            pass
+
+        conn = sqlite3.connect(self.fname, timeout = self.timeout)
+        try:
+            self._initialize(conn)
+        except:
+            conn.close()
+            raise
+        self._initialized = True
+        return conn
+
+    def _initialize(self, conn):
+        # Write-ahead logging is persistent, so this only changes the database on the first call.
+        # On filesystems that do not support it, the default rollback journal is used.
+        try:
+            conn.execute('PRAGMA journal_mode = WAL')
+        except sqlite3.DatabaseError:
+            pass
+
+        columns = ', '.join(attr + (' REAL' if attr == 'redshift' else ' TEXT') + ' NOT NULL'
+            for attr in self.log_attributes)
+        index_columns = ', '.join(attr for attr in self.log_attributes if attr != 'fname')
+        with conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS ' + self.table_name +
+                ' (' + columns + ', UNIQUE (' + ', '.join(self.log_attributes) + '))')
+            conn.execute('CREATE INDEX IF NOT EXISTS ' + self.table_name + '_metadata_index ON ' +
+                self.table_name + ' (' + index_columns + ')')
+            conn.execute('CREATE TABLE IF NOT EXISTS ' + self.info_table_name +
+                ' (key TEXT PRIMARY KEY, value TEXT)')
+
+        if self.ascii_fname is not None:
+            self._migrate_ascii_log(conn)
+
+    def _migrate_ascii_log(self, conn):
+        """ Copy the rows of the ASCII log into the database, unless this has already been done.
+        If the ASCII log cannot be read, a warning is issued and the migration
+        is attempted again the next time a `CacheLogDatabase` is created.
+        """
+        migrated = conn.execute('SELECT value FROM ' + self.info_table_name +
+            ' WHERE key = ?', ('migrated_ascii_log', )).fetchone()
+        if (migrated is not None) or (not os.path.isfile(self.ascii_fname)):
+            return
+
+        try:
+            log_table = Table.read(self.ascii_fname, format = 'ascii')
+            if set(log_table.keys()) != set(self.log_attributes):
+                raise ValueError("The columns of the log are " + str(log_table.keys()) + ", "
+                    "but the ``log_attributes`` of the database are " + str(self.log_attributes))
+            rows = [dict((attr, row[attr]) for attr in self.log_attributes) for row in log_table]
+        except (IOError, OSError, ValueError) as err:
+            msg = ("\nThe following ASCII cache log written by a previous version of Halotools \n"
+                "could not be read:\n" + str(self.ascii_fname) + "\n"
+                "Its entries have not been copied into the cache log database:\n" +
+                str(self.fname) + "\nThe error was:\n" + str(err) + "\n"
+                "If you fix or remove the ASCII log, the migration will be attempted again \n"
+                "the next time the cache is accessed.\n")
+            warn(msg)
+            return
+
+        with conn:
+            self._insert(conn, rows)
+            conn.execute('INSERT OR REPLACE INTO ' + self.info_table_name +
+                ' (key, value) VALUES (?, ?)', ('migrated_ascii_log', str(self.ascii_fname)))
+
+    def _values(self, row):
+        return tuple(float(row[attr]) if attr == 'redshift' else str(row[attr])
+            for attr in self.log_attributes)
+
+    def _insert(self, conn, rows):
+        placeholders = ', '.join('?' for attr in self.log_attributes)
+        conn.executemany('INSERT OR IGNORE INTO ' + self.table_name +
+            ' (' + ', '.join(self.log_attributes) + ') VALUES (' + placeholders + ')',
+            [self._values(row) for row in rows])
+
+    def rows(self, dz_tol = 0.0, **kwargs):
+        """ Rows of the log matching the input metadata.
+
+        Parameters
+        -----------
+        dz_tol : float, optional
+            Tolerance of the match on ``redshift``. Default is 0.
+
+        **kwargs :
+            Values of any of the ``log_attributes`` that the returned rows must match.
+
+        Returns
+        --------
+        rows : list
+            List of dictionaries storing the value of each log attribute,
+            sorted by the order of the ``log_attributes``.
+        """
+        try:
+            assert set(kwargs.keys()).issubset(set(self.log_attributes))
+        except AssertionError:
+            msg = ("\nThe only acceptable keyword arguments to CacheLogDatabase.rows \n"
+                "are the ``log_attributes`` of the database.\n")
+            raise KeyError(msg)
+
+        conditions, values = [], []
+        for attr in self.log_attributes:
+            if attr not in kwargs:
+                continue
+            elif attr == 'redshift':
+                # The range is padded so that the exact tolerance can be applied below
+                redshift = float(kwargs[attr])
+                conditions.append('redshift BETWEEN ? AND ?')
+                values.extend((redshift - dz_tol - 1e-8, redshift + dz_tol + 1e-8))
+            else:
+                conditions.append(attr + ' = ?')
+                values.append(str(kwargs[attr]))
+
+        query = 'SELECT ' + ', '.join(self.log_attributes) + ' FROM ' + self.table_name
+        if len(conditions) > 0:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY ' + ', '.join(self.log_attributes)
+
+        conn = self._connect()
+        try:
+            result = conn.execute(query, values).fetchall()
+        finally:
+            conn.close()
+
+        rows = [dict((attr, value if attr == 'redshift' else str(value))
+            for attr, value in zip(self.log_attributes, row)) for row in result]
+        if 'redshift' in kwargs:
+            redshift = float(kwargs['redshift'])
+            rows = [row for row in rows if abs(row['redshift'] - redshift) <= dz_tol]
+        return rows
+
+    def insert_rows(self, rows):
+        """ Add the input rows to the log in a single transaction.
+        Rows already stored in the log are ignored.
+
+        Parameters
+        -----------
+        rows : list
+            List of dictionaries, or objects such as
+            `~halotools.sim_manager.HaloTableCacheLogEntry`,
+            storing the value of each log attribute.
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                self._insert(conn, [self._as_dict(row) for row in rows])
+        finally:
+            conn.close()
+
+    def delete_rows(self, rows):
+        """ Remove the input rows from the log in a single transaction.
+        Rows not stored in the log are ignored.
+
+        Parameters
+        -----------
+        rows : list
+            List of dictionaries, or objects such as
+            `~halotools.sim_manager.HaloTableCacheLogEntry`,
+            storing the value of each log attribute.
+        """
+        conditions = ' AND '.join(attr + ' = ?' for attr in self.log_attributes)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany('DELETE FROM ' + self.table_name + ' WHERE ' + conditions,
+                    [self._values(self._as_dict(row)) for row in rows])
+        finally:
+            conn.close()
+
+    def replace_rows(self, rows):
+        """ Replace the entire contents of the log with the input rows in a single transaction.
+
+        Parameters
+        -----------
+        rows : list
+            List of dictionaries, or objects such as
+            `~halotools.sim_manager.HaloTableCacheLogEntry`,
+            storing the value of each log attribute.
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('DELETE FROM ' + self.table_name)
+                self._insert(conn, [self._as_dict(row) for row in rows])
+        finally:
+            conn.close()
+
+    def _as_dict(self, row):
+        if isinstance(row, dict):
+            return row
+        try:
+            return dict((attr, getattr(row, attr)) for attr in self.log_attributes)
+        except AttributeError:
+            msg = ("\nRows of the CacheLogDatabase must be dictionaries or objects \n"
+                "with an attribute for each of the ``log_attributes``.\n")
+            raise HalotoolsError(msg)
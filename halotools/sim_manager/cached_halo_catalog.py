@@ -19,7 +19,12 @@ except ImportError:
 from ..sim_manager import sim_defaults, supported_sims
 
 from ..utils import broadcast_host_halo_property, add_halo_hostid
+from ..utils.array_utils import randomly_downsample_data
 
+from .lazy_hdf5_table import LazyHdf5Table
+from .hdf5_table_layout import read_hdf5_table
+from .derived_column_cache import load_derived_column, store_derived_column
+from .ptcl_table_pyramid import read_ptcl_pyramid_levels, read_ptcl_table_prefix
 from .halo_table_cache import HaloTableCache
 from .ptcl_table_cache import PtclTableCache
 from .halo_table_cache_log_entry import get_redshift_string
@@ -56,7 +61,8 @@ class CachedHaloCatalog(object):
     """
     acceptable_kwargs = ('ptcl_version_name', 'fname', 'simname', 
         'halo_finder', 'redshift', 'version_name', 'dz_tol', 'update_cached_fname', 
-        'preload_halo_table')
+        'preload_halo_table', 'columns', 'row_cut_predicates', 'bounding_box', 
+        'cache_derived_columns', 'num_ptcl')
 
     def __init__(self, *args, **kwargs):
         """
@@ -117,6 +123,55 @@ class CachedHaloCatalog(object):
             Halo catalogs in cache with a redshift that differs by greater 
             than ``dz_tol`` will be ignored. Default is 0.05. 
 
+        columns : list of strings, optional 
+            Names of the columns of the ``halo_table``. Only these columns are 
+            read from disk, which can substantially reduce the time and memory 
+            required to load catalogs with many columns. Besides the columns 
+            stored in the hdf5 file, the list may include the derived 
+            ``halo_hostid`` and ``halo_mvir_host_halo`` columns. 
+            When ``columns`` is specified, the rows of the ``halo_table`` 
+            appear in the order in which they are stored on disk. 
+            Default is None, in which case all columns are loaded. 
+
+        row_cut_predicates : list, optional 
+            List of three-element tuples (colname, operator, value), where ``operator`` 
+            is one of '<', '<=', '>', '>=', '==', '!=', 'in' or 'not in'. 
+            Only halos passing every predicate are included in the ``halo_table``. 
+            The predicates are evaluated in chunks while reading the hdf5 file, 
+            so that the rejected halos are never loaded into memory. 
+            Default is an empty list. 
+
+        bounding_box : sequence, optional 
+            Three (min, max) pairs. Only halos with ``min <= halo_x < max``, 
+            and likewise for ``halo_y`` and ``halo_z``, are included in the ``halo_table``. 
+            Periodic boundary conditions are not applied. 
+            If the hdf5 file stores an index written by 
+            `~halotools.sim_manager.write_spatial_cell_index`, only the halos 
+            in the cells overlapping the box are read from disk. 
+            Default is None, in which case the entire box is loaded. 
+
+        cache_derived_columns : bool, optional 
+            If True, the derived ``halo_hostid`` and ``halo_mvir_host_halo`` columns, 
+            as well as the new halo properties created by the ``new_haloprop_func_dict`` 
+            of any model used to populate the catalog, are stored in a sidecar file 
+            of the Halotools cache the first time they are computed, 
+            and are read from disk on subsequent loads. 
+            The hdf5 file of the catalog is never written to. 
+            Stored columns are automatically recomputed whenever the halo table is modified. 
+            Default is True. 
+
+        num_ptcl : int, optional 
+            Number of particles in the ``ptcl_table``. If the particle catalog 
+            stores its particles in a random order, as is the case for catalogs stored with the 
+            `~halotools.sim_manager.UserSuppliedPtclCatalog.add_ptcl_pyramid_to_cache` method, 
+            only the first ``num_ptcl`` particles are read from disk. 
+            Otherwise the entire catalog is read and randomly downsampled. 
+            Default is None, in which case the ``ptcl_table`` stores the smallest 
+            downsampling stored in the catalog with at least ``default_num_ptcl`` particles, 
+            as set in the `~halotools.sim_manager.sim_defaults` module, or 
+            all particles of catalogs that do not store nested downsamplings. 
+            See `load_ptcl_table` for loading particle tables of several sizes. 
+
         Examples 
         ---------
         If you followed the instructions in the 
@@ -151,6 +206,37 @@ class CachedHaloCatalog(object):
 
         >>> halocat = CachedHaloCatalog(redshift = 1, simname = 'multidark') # doctest: +SKIP
 
+        If you only need a few halo properties, use the ``columns`` argument 
+        so that the remaining columns are never read from disk: 
+
+        >>> halocat = CachedHaloCatalog(columns = ['halo_mvir', 'halo_x', 'halo_y', 'halo_z']) # doctest: +SKIP
+
+        Alternatively, the ``lazy_halo_table`` attribute reads each column 
+        of the catalog only when it is first accessed: 
+
+        >>> mass_array = halocat.lazy_halo_table['halo_vmax'] # doctest: +SKIP
+
+        Cuts on the rows of the catalog can be applied while the data is read, 
+        which is considerably more memory-efficient than loading the full catalog 
+        and masking it afterwards, e.g., with the ``masking_function`` argument of 
+        `~halotools.empirical_models.HodMockFactory`: 
+
+        >>> halocat = CachedHaloCatalog(row_cut_predicates = [('halo_mvir', '>', 1e11)]) # doctest: +SKIP
+        >>> halocat = CachedHaloCatalog(bounding_box = [(0, 50), (0, 50), (0, 50)]) # doctest: +SKIP
+
+        The values of the ``halo_hostid`` and ``halo_mvir_host_halo`` columns are computed 
+        from the full catalog, so they are correct even if the host halo has been cut. 
+        Unless ``cache_derived_columns`` is set to False, these columns are only 
+        computed the first time the catalog is loaded: 
+
+        >>> halocat = CachedHaloCatalog(cache_derived_columns = False) # doctest: +SKIP
+
+        The number of dark matter particles in the ``ptcl_table`` can also be chosen. 
+        For particle catalogs that store their particles in a random order, 
+        only the requested number of particles is read from disk: 
+
+        >>> halocat = CachedHaloCatalog(num_ptcl = 1e5) # doctest: +SKIP
+
         If you forget which catalogs you have stored in cache, 
         you have two options for how to remind yourself. 
         First, you can use the `~halotools.sim_manager.HaloTableCache` class:
@@ -159,10 +245,10 @@ class CachedHaloCatalog(object):
         >>> cache = HaloTableCache()
         >>> for entry in cache.log: print(entry) # doctest: +SKIP
 
-        Alternatively, you can simply use a text editor to open the cache log, 
-        which is stored as ASCII data in the following location on your machine:
+        Alternatively, you can open the cache log with the sqlite3 command-line tool; 
+        the log is stored as an SQLite database in the following location on your machine:
 
-        $HOME/.astropy/cache/halotools/halo_table_cache_log.txt
+        $HOME/.astropy/cache/halotools/halo_table_cache_log.db
 
         See also 
         ----------
@@ -190,6 +276,41 @@ class CachedHaloCatalog(object):
             update_cached_fname = False
         self._update_cached_fname = update_cached_fname
 
+        try:
+            columns = kwargs['columns']
+            if columns is not None:
+                columns = [str(key) for key in columns]
+        except KeyError:
+            columns = None
+        except TypeError:
+            msg = ("\nThe input ``columns`` must be a list of strings.\n")
+            raise HalotoolsError(msg)
+        self._columns = columns
+
+        try:
+            self._row_cut_predicates = list(kwargs['row_cut_predicates'])
+        except KeyError:
+            self._row_cut_predicates = []
+        except TypeError:
+            msg = ("\nThe input ``row_cut_predicates`` must be a list of "
+                "three-element tuples (colname, operator, value).\n")
+            raise HalotoolsError(msg)
+
+        try:
+            self._bounding_box = kwargs['bounding_box']
+        except KeyError:
+            self._bounding_box = None
+
+        try:
+            self.cache_derived_columns = bool(kwargs['cache_derived_columns'])
+        except KeyError:
+            self.cache_derived_columns = True
+
+        try:
+            self._num_ptcl = kwargs['num_ptcl']
+        except KeyError:
+            self._num_ptcl = None
+
         self.halo_table_cache = HaloTableCache() 
 
         self.log_entry = self._determine_cache_log_entry(**kwargs)
@@ -533,19 +654,136 @@ class CachedHaloCatalog(object):
         try:
             return self._halo_table
         except AttributeError:
-            if self.log_entry.safe_for_cache == True:
-                self._halo_table = Table.read(self.fname, path='data')
+            if ((self._row_cut_predicates != []) or (self._bounding_box is not None)):
+                rows = self.lazy_halo_table.select_rows(
+                    row_cut_predicates = self._row_cut_predicates, 
+                    bounding_box = self._bounding_box)
+                columns = self._columns
+                if columns is None:
+                    columns = self.lazy_halo_table.keys()
+                    columns.extend(key for key in self._derived_columns if key not in columns)
+                self._halo_table = self._read_selected_columns(columns, rows = rows)
+                return self._halo_table
+            elif self._columns is not None:
+                self._halo_table = self._read_selected_columns(self._columns)
+                return self._halo_table
+            elif self.log_entry.safe_for_cache == True:
+                self._halo_table = read_hdf5_table(self.fname)
                 self._add_new_derived_columns(self._halo_table)
                 return self._halo_table
             else:
                 raise InvalidCacheLogEntry(self.log_entry._cache_safety_message)
 
+    @property 
+    def lazy_halo_table(self):
+        """
+        `~halotools.sim_manager.LazyHdf5Table` providing read-only, dictionary-like 
+        access to the columns stored in the hdf5 file of the halo catalog. 
+        Each column is only read from disk when it is first accessed, 
+        and is memory-mapped if the data is stored contiguously and without compression. 
+
+        >>> halocat = CachedHaloCatalog() # doctest: +SKIP
+        >>> mass_array = halocat.lazy_halo_table['halo_mvir'] # doctest: +SKIP
+
+        Note that the derived ``halo_hostid`` and ``halo_mvir_host_halo`` columns 
+        of the ``halo_table`` are only available if they are stored in the hdf5 file. 
+        """
+        try:
+            return self._lazy_halo_table
+        except AttributeError:
+            if self.log_entry.safe_for_cache == True:
+                self._lazy_halo_table = LazyHdf5Table(self.fname, path='data')
+                return self._lazy_halo_table
+            else:
+                raise InvalidCacheLogEntry(self.log_entry._cache_safety_message)
+
+    _derived_columns = ('halo_hostid', 'halo_mvir_host_halo')
+
+    def _read_selected_columns(self, columns, rows = None):
+        """ Create a `~astropy.table.Table` storing the input columns, 
+        reading only the data required to compute them. 
+        If ``rows`` is not None, only the rows with these sorted indices are included. 
+        """
+        lazy_halo_table = self.lazy_halo_table
+        derived_columns = self._derived_columns
+
+        for key in columns:
+            if (key not in lazy_halo_table.keys()) & (key not in derived_columns):
+                msg = ("\nThe ``" + key + "`` column appearing in the input ``columns`` \n"
+                    "is not stored in the following halo catalog:\n" + self.fname + "\n")
+                raise HalotoolsError(msg)
+
+        # Load any requested derived columns stored in the hdf5 file, 
+        # and compute the remaining ones from the few columns they require
+        missing_derived_columns = [key for key in derived_columns 
+            if (key in columns) & (key not in lazy_halo_table.keys())]
+        derived_data = dict((key, self._load_derived_column(key)) 
+            for key in missing_derived_columns)
+        uncomputed_columns = [key for key in missing_derived_columns 
+            if derived_data[key] is None]
+        if len(uncomputed_columns) > 0:
+            hosts = Table([lazy_halo_table['halo_id'], lazy_halo_table['halo_upid']], 
+                names = ['halo_id', 'halo_upid'], copy = False)
+            if 'halo_hostid' in lazy_halo_table.keys():
+                hosts['halo_hostid'] = lazy_halo_table['halo_hostid']
+            elif derived_data.get('halo_hostid') is not None:
+                hosts['halo_hostid'] = derived_data['halo_hostid']
+            else:
+                add_halo_hostid(hosts)
+
+            if 'halo_mvir_host_halo' in uncomputed_columns:
+                hosts['halo_mvir'] = lazy_halo_table['halo_mvir']
+                broadcast_host_halo_property(hosts, 'halo_mvir')
+
+            for key in uncomputed_columns:
+                derived_data[key] = hosts[key]
+                self._store_derived_column(key, hosts[key])
+
+        data = []
+        for key in columns:
+            if key in missing_derived_columns:
+                data.append(derived_data[key] if rows is None else derived_data[key][rows])
+            elif rows is None:
+                data.append(lazy_halo_table[key])
+            else:
+                data.append(lazy_halo_table.read_column_rows(key, rows))
+        return Table(data, names = list(columns), copy = False)
+
     def _add_new_derived_columns(self, t):
         if 'halo_hostid' not in t.keys():
-            add_halo_hostid(t)
+            hostid = self._load_derived_column('halo_hostid')
+            if hostid is None:
+                add_halo_hostid(t)
+                self._store_derived_column('halo_hostid', t['halo_hostid'])
+            else:
+                t['halo_hostid'] = hostid
 
         if 'halo_mvir_host_halo' not in t.keys():
-            broadcast_host_halo_property(t, 'halo_mvir')
+            mvir_host_halo = self._load_derived_column('halo_mvir_host_halo')
+            if mvir_host_halo is None:
+                broadcast_host_halo_property(t, 'halo_mvir')
+                self._store_derived_column('halo_mvir_host_halo', t['halo_mvir_host_halo'])
+            else:
+                t['halo_mvir_host_halo'] = mvir_host_halo
+
+    # Names of the functions computing the derived columns, recorded in the 
+    # sidecar file storing the derived columns. Changing the version number 
+    # of a function invalidates the columns stored by previous versions. 
+    _derived_column_generators = {
+        'halo_hostid': 'halotools.utils.add_halo_hostid, version 1', 
+        'halo_mvir_host_halo': 'halotools.utils.broadcast_host_halo_property(halo_mvir), version 1'}
+
+    def _load_derived_column(self, key):
+        """ Derived column stored in the sidecar file, or None if the column is 
+        not stored, is stale, or ``cache_derived_columns`` is False. 
+        """
+        if self.cache_derived_columns is False:
+            return None
+        return load_derived_column(self.fname, key, self._derived_column_generators[key])
+
+    def _store_derived_column(self, key, data):
+        if self.cache_derived_columns is True:
+            store_derived_column(self.fname, key, data, self._derived_column_generators[key])
 
     def _bind_additional_metadata(self):
         """ Create convenience bindings of all metadata to the `CachedHaloCatalog` instance. 
@@ -555,7 +793,7 @@ class CachedHaloCatalog(object):
                 self.log_entry.fname + "\n\n")
             raise InvalidCacheLogEntry(msg)
 
-        f = self.h5py.File(self.log_entry.fname)
+        f = self.h5py.File(self.log_entry.fname, 'r')
         for attr_key in f.attrs.keys():
             if attr_key == 'redshift':
                 setattr(self, attr_key, float(get_redshift_string(f.attrs[attr_key])))
@@ -600,23 +838,95 @@ class CachedHaloCatalog(object):
     def ptcl_table(self):
         """
         Astropy `~astropy.table.Table` object storing a collection of ~1e6 randomly selected dark matter particles. 
+        The number of particles can be chosen with the ``num_ptcl`` argument 
+        of the constructor, or with the `load_ptcl_table` method. 
         """
         try:
             return self._ptcl_table
         except AttributeError:
-            try:
-                ptcl_log_entry = self.ptcl_log_entry 
-            except AttributeError:
-                self.ptcl_log_entry = (
-                    self._retrieve_matching_ptcl_cache_log_entry()
-                    )
-                ptcl_log_entry = self.ptcl_log_entry
+            self._ptcl_table = self.load_ptcl_table(num_ptcl = self._num_ptcl)
+            return self._ptcl_table
 
-            if ptcl_log_entry.safe_for_cache == True:
-                self._ptcl_table = Table.read(ptcl_log_entry.fname, path='data')
-                return self._ptcl_table
-            else:
-                raise InvalidCacheLogEntry(ptcl_log_entry._cache_safety_message)
+    def _verified_ptcl_fname(self):
+        """ Name of the hdf5 file storing the particle catalog associated with the halos. 
+        """
+        try:
+            ptcl_log_entry = self.ptcl_log_entry 
+        except AttributeError:
+            self.ptcl_log_entry = (
+                self._retrieve_matching_ptcl_cache_log_entry()
+                )
+            ptcl_log_entry = self.ptcl_log_entry
+
+        if ptcl_log_entry.safe_for_cache == True:
+            return ptcl_log_entry.fname
+        else:
+            raise InvalidCacheLogEntry(ptcl_log_entry._cache_safety_message)
+
+    @property 
+    def ptcl_pyramid_levels(self):
+        """
+        Sorted array of the sizes of the nested random downsamplings stored in the particle catalog, 
+        or None if the catalog does not store its particles in a random order. 
+        """
+        return read_ptcl_pyramid_levels(self._verified_ptcl_fname())
+
+    def load_ptcl_table(self, num_ptcl = None):
+        """ Load a random downsampling of the dark matter particles. 
+
+        If the particle catalog was stored with the 
+        `~halotools.sim_manager.UserSuppliedPtclCatalog.add_ptcl_pyramid_to_cache` method, 
+        its particles are stored in a random order, so that only the first ``num_ptcl`` 
+        particles need be read from disk. Otherwise, the entire catalog is read 
+        and then randomly downsampled. 
+
+        Parameters 
+        ------------
+        num_ptcl : int, optional 
+            Number of particles. Any number up to the size of the particle catalog 
+            may be chosen. For catalogs storing their particles in a random order, 
+            the particles loaded for a smaller ``num_ptcl`` 
+            are always a subset of the particles loaded for a larger ``num_ptcl``. 
+            Default is None, in which case the smallest stored downsampling with at least 
+            ``default_num_ptcl`` particles is loaded, as set in the 
+            `~halotools.sim_manager.sim_defaults` module, or all particles of catalogs 
+            that do not store nested downsamplings. 
+
+        Returns 
+        --------
+        ptcl_table : `~astropy.table.Table` 
+
+        Examples 
+        ---------
+        >>> halocat = CachedHaloCatalog() # doctest: +SKIP
+        >>> print(halocat.ptcl_pyramid_levels) # doctest: +SKIP
+        [   100000   1000000  10000000 100000000]
+
+        A quick estimate of the galaxy-matter cross-correlation could then use 
+        1e5 particles, and a more precise one 1e7 particles:
+
+        >>> ptcls = halocat.load_ptcl_table(num_ptcl = 1e5) # doctest: +SKIP
+        >>> ptcls = halocat.load_ptcl_table(num_ptcl = 1e7) # doctest: +SKIP
+        """
+        ptcl_fname = self._verified_ptcl_fname()
+        levels = read_ptcl_pyramid_levels(ptcl_fname)
+
+        if levels is not None:
+            if num_ptcl is None:
+                idx = np.searchsorted(levels, sim_defaults.default_num_ptcl)
+                num_ptcl = levels[min(idx, len(levels) - 1)]
+            return read_ptcl_table_prefix(ptcl_fname, num_ptcl)
+
+        ptcl_table = read_hdf5_table(ptcl_fname)
+        if num_ptcl is None:
+            return ptcl_table
+        elif (int(num_ptcl) < 1) or (int(num_ptcl) > len(ptcl_table)):
+            msg = ("\nThe input ``num_ptcl`` = " + str(int(num_ptcl)) + " must be positive and \n"
+                "may not exceed the number of particles stored in the following file:\n"
+                + str(ptcl_fname) + "\nwhich stores " + str(len(ptcl_table)) + " particles.\n")
+            raise HalotoolsError(msg)
+        else:
+            return randomly_downsample_data(ptcl_table, int(num_ptcl))
 
     def _enforce_halo_ptcl_catalog_consistency(self, halo_log_entry, ptcl_log_entry):
         """
@@ -624,8 +934,8 @@ class CachedHaloCatalog(object):
         halo_fname = halo_log_entry.fname
         ptcl_fname = ptcl_log_entry.fname
 
-        hf = self.h5py.File(halo_fname)
-        pf = self.h5py.File(ptcl_fname)
+        hf = self.h5py.File(halo_fname, 'r')
+        pf = self.h5py.File(ptcl_fname, 'r')
 
         try:
             assert abs(float(hf.attrs['redshift']) - float(pf.attrs['redshift'])) < 0.001
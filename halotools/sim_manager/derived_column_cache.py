@@ -0,0 +1,187 @@
+""" Module storing the functions used to persist derived columns of a cached halo catalog,
+e.g., ``halo_hostid`` or the ``new_haloprop_func_dict`` columns of a composite model,
+in a sidecar hdf5 file of the ``halo_table_sidecars`` directory of the Halotools cache.
+The hdf5 file storing the halo table is never written to.
+A derived column need only be computed the first time a catalog is loaded;
+on subsequent loads the stored column is read from disk.
+
+Each stored column records the name of the function that generated it,
+a checksum of the ``halo_id`` of the rows it was computed for,
+and the fingerprint of the ``data`` dataset of the file at the time it was computed.
+Whenever any of these differ from the values at the time of loading,
+the stored column is stale and is ignored, and the recomputed column replaces it.
+"""
+import os
+import zlib
+import numpy as np
+
+from .halo_table_cache_log_entry import halo_table_fingerprint, halo_table_sidecar_fname
+
+__all__ = ('load_derived_column', 'store_derived_column',
+    'retrieve_derived_column', 'rows_checksum')
+
+derived_column_sidecar_extension = '.derived_columns.hdf5'
+
+
+def rows_checksum(halo_id):
+    """ String identifying a selection of rows of a halo table
+    by a checksum of the input ``halo_id`` of the selected rows.
+
+    Parameters
+    -----------
+    halo_id : array_like
+        Array storing the ``halo_id`` of each row, in the order of the rows.
+
+    Returns
+    --------
+    checksum : string
+    """
+    halo_id = np.ascontiguousarray(halo_id)
+    checksum = zlib.crc32(halo_id.tobytes()) & 0xffffffff
+    return str(len(halo_id)) + '_' + str(checksum)
+
+
+def load_derived_column(fname, key, generator, rows = 'all'):
+    """ Load the derived column ``key`` stored in the sidecar file of the input hdf5 file,
+    provided that it is not stale.
+
+    Parameters
+    -----------
+    fname : string
+        Name of the hdf5 file storing the halo table in its ``data`` dataset.
+
+    key : string
+        Name of the derived column.
+
+    generator : string
+        Name, including any version and parameters,
+        of the function used to compute the column,
+        e.g., ``halotools.utils.add_halo_hostid``.
+
+    rows : string, optional
+        Identifier of the rows of the halo table the column was computed for,
+        either the output of `rows_checksum` or ``all``. Default is ``all``.
+
+    Returns
+    --------
+    data : array_like or None
+        Stored column, or None if the column is not stored, is stale,
+        or the file cannot be read.
+    """
+    fingerprint = halo_table_fingerprint(fname)
+    if fingerprint is None:
+        return None
+
+    import h5py
+    try:
+        f = h5py.File(halo_table_sidecar_fname(fname, derived_column_sidecar_extension), 'r')
+    except (IOError, OSError):
+        return None
+
+    try:
+        dataset = f[key]
+        attrs = dataset.attrs
+        if ((attrs['generator'] != str(generator)) or
+            (attrs['rows'] != str(rows)) or
+            (attrs['source_fingerprint'] != fingerprint)):
+            return None
+        return dataset[...]
+    except (KeyError, IOError, OSError):
+        return None
+    finally:
+        f.close()
+
+
+def store_derived_column(fname, key, data, generator, rows = 'all'):
+    """ Store the input derived column in the sidecar file of the input hdf5 file,
+    replacing any previously stored column of the same name.
+    If the sidecar file cannot be written, the column is not stored.
+
+    Parameters
+    -----------
+    fname : string
+        Name of the hdf5 file storing the halo table in its ``data`` dataset.
+
+    key : string
+        Name of the derived column.
+
+    data : array_like
+        Derived column.
+
+    generator : string
+        Name, including any version and parameters,
+        of the function used to compute the column.
+
+    rows : string, optional
+        Identifier of the rows of the halo table the column was computed for,
+        either the output of `rows_checksum` or ``all``. Default is ``all``.
+
+    Returns
+    --------
+    success : bool
+        True if the column was stored.
+    """
+    fingerprint = halo_table_fingerprint(fname)
+    if fingerprint is None:
+        return False
+
+    import h5py
+    sidecar_fname = halo_table_sidecar_fname(fname, derived_column_sidecar_extension)
+    try:
+        try:
+            os.makedirs(os.path.dirname(sidecar_fname))
+        except OSError:
+            pass
+        f = h5py.File(sidecar_fname, 'a')
+    except (IOError, OSError):
+        return False
+
+    try:
+        f.attrs['fname'] = str(os.path.abspath(fname))
+        if key in f.keys():
+            del f[key]
+        dataset = f.create_dataset(key, data = np.asarray(data))
+        dataset.attrs['generator'] = str(generator)
+        dataset.attrs['rows'] = str(rows)
+        dataset.attrs['source_fingerprint'] = fingerprint
+        success = True
+    except (IOError, OSError, ValueError, TypeError):
+        success = False
+    finally:
+        f.close()
+
+    return success
+
+
+def retrieve_derived_column(fname, key, func, generator, rows = 'all'):
+    """ Load the derived column ``key`` stored in the sidecar file of the input hdf5 file,
+    or, if it is missing or stale, compute it by calling ``func`` and store the result.
+
+    Parameters
+    -----------
+    fname : string
+        Name of the hdf5 file storing the halo table in its ``data`` dataset.
+
+    key : string
+        Name of the derived column.
+
+    func : callable
+        Function called with no arguments that returns the derived column.
+
+    generator : string
+        Name, including any version and parameters,
+        of the function used to compute the column.
+
+    rows : string, optional
+        Identifier of the rows of the halo table the column is computed for,
+        either the output of `rows_checksum` or ``all``. Default is ``all``.
+
+    Returns
+    --------
+    data : array_like
+    """
+    data = load_derived_column(fname, key, generator, rows = rows)
+    if data is None:
+        data = func()
+        store_derived_column(fname, key, data, generator, rows = rows)
+    return data
@@ -45,7 +45,7 @@ except ImportError:
 
 from ..utils.array_utils import find_idx_nearest_val
 from ..utils.array_utils import custom_len
-from ..utils.io_utils import download_file_from_url
+from ..utils.io_utils import download_file_with_resume, read_checksum_manifest
 
 unsupported_simname_msg = "There are no web locations recognized by Halotools \n for simname ``%s``"
 
@@ -65,6 +65,8 @@ class DownloadManager(object):
     def download_processed_halo_table(self, simname, halo_finder, redshift, 
         dz_tol = 0.1, overwrite=False, version_name = sim_defaults.default_version_name, 
         download_dirname = 'std_cache_loc', ignore_nearby_redshifts = False, 
+        num_connections = sim_defaults.default_num_download_connections, 
+        verify_checksum = True, 
         **kwargs):
         """ Method to download one of the pre-processed binary files
         storing a reduced halo catalog.
@@ -114,6 +116,17 @@ class DownloadManager(object):
             for the new halo catalog to be stored in cache. 
             Default is False. 
 
+        num_connections : int, optional 
+            Number of simultaneous connections used to download the catalog. 
+            Interrupted downloads are resumed the next time the method is called 
+            with the same arguments. 
+            Default is set in `~halotools.sim_manager.sim_defaults`. 
+
+        verify_checksum : bool, optional 
+            If True, the checksum of the downloaded file is verified against the 
+            manifest published alongside the catalogs, and a corrupted download 
+            is deleted rather than added to the cache. Default is True. 
+
         Examples 
         -----------
         >>> dman = DownloadManager()
@@ -271,7 +284,7 @@ class DownloadManager(object):
             raise HalotoolsCacheError(msg % output_fname)
 
         start = time()
-        download_file_from_url(url, output_fname)
+        self._download_catalog(url, output_fname, num_connections, verify_checksum)
         end = time()
         runtime = (end - start)
         print("\nTotal runtime to download pre-processed "
@@ -356,6 +369,8 @@ class DownloadManager(object):
     def download_ptcl_table(self, simname, redshift, 
         dz_tol = 0.1, overwrite=False, version_name = sim_defaults.default_ptcl_version_name, 
         download_dirname = 'std_cache_loc', ignore_nearby_redshifts = False, 
+        num_connections = sim_defaults.default_num_download_connections, 
+        verify_checksum = True, 
         **kwargs):
         """ Method to download one of the binary files storing a 
         random downsampling of dark matter particles.
@@ -402,6 +417,17 @@ class DownloadManager(object):
             for the new halo catalog to be stored in cache. 
             Default is False. 
 
+        num_connections : int, optional 
+            Number of simultaneous connections used to download the catalog. 
+            Interrupted downloads are resumed the next time the method is called 
+            with the same arguments. 
+            Default is set in `~halotools.sim_manager.sim_defaults`. 
+
+        verify_checksum : bool, optional 
+            If True, the checksum of the downloaded file is verified against the 
+            manifest published alongside the catalogs, and a corrupted download 
+            is deleted rather than added to the cache. Default is True. 
+
         Examples 
         -----------
         >>> dman = DownloadManager()
@@ -553,7 +579,7 @@ class DownloadManager(object):
                     "with the keyword argument `overwrite` set to `True`")
             raise HalotoolsCacheError(msg % output_fname)
 
-        download_file_from_url(url, output_fname)
+        self._download_catalog(url, output_fname, num_connections, verify_checksum)
 
         # overwrite the fname metadata so that 
         # it is consistent with the downloaded location
@@ -613,6 +639,41 @@ class DownloadManager(object):
         else:
             print(success_msg)
 
+    def _published_checksum(self, url):
+        """ Private method returns the checksum of the file at the input url 
+        recorded in the manifest published in the same web directory, 
+        or None if no checksum has been published. 
+        """
+        manifest_url = posixpath.join(posixpath.dirname(url), 
+            sim_defaults.checksum_manifest_basename)
+        try:
+            checksums = read_checksum_manifest(manifest_url)
+        except (requests.RequestException, ValueError):
+            checksums = {}
+
+        try:
+            return checksums[posixpath.basename(url)]
+        except KeyError:
+            msg = ("\nNo checksum has been published for the following url:\n" + url + "\n"
+                "The downloaded file will not be verified against a checksum.\n")
+            warn(msg)
+            return None
+
+    def _download_catalog(self, url, output_fname, num_connections, verify_checksum):
+        """ Private method downloads the input url to ``output_fname`` 
+        over ``num_connections`` simultaneous connections, resuming any interrupted 
+        download of the same file, and verifying its published checksum 
+        if ``verify_checksum`` is True. 
+        """
+        if verify_checksum is True:
+            expected_checksum = self._published_checksum(url)
+        else:
+            expected_checksum = None
+
+        download_file_with_resume(url, output_fname, 
+            num_connections = num_connections, expected_checksum = expected_checksum, 
+            checksum_algorithm = 'sha256')
+
     def _orig_halo_table_web_location(self, **kwargs):
         """
         Parameters
@@ -2,16 +2,24 @@
 """
 
 Simple module used to generate fake simulation data 
-used to test the `~halotools.empirical_models` modules. 
+used to test the `~halotools.empirical_models` modules, 
+and to generate large, clustered fake catalogs used for benchmarking. 
 
 """
+import os 
+import datetime 
 from astropy.table import Table
 import numpy as np
 
 from .user_supplied_halo_catalog import UserSuppliedHaloCatalog
 from .user_supplied_ptcl_catalog import UserSuppliedPtclCatalog
+from .halo_table_cache_log_entry import get_redshift_string
+from .hdf5_table_layout import create_hdf5_table, append_to_hdf5_table, _verify_layout_options
 
-__all__ = ('FakeSim', 'FakeSimHalosNearBoundaries')
+from ..custom_exceptions import HalotoolsError
+
+__all__ = ('FakeSim', 'FakeSimHalosNearBoundaries', 
+	'ClusteredFakeSim', 'clustered_fake_halo_chunks', 'write_clustered_fake_sim')
 
 class FakeSim(UserSuppliedHaloCatalog):
 	""" Fake simulation data used in the test suite of `~halotools.empirical_models`. 
@@ -258,16 +266,438 @@ class FakeSimHalosNearBoundaries(UserSuppliedHaloCatalog):
 			)
 
 
+# Default parameters of the clustered fake catalogs. 
+# The Soneira-Peebles hierarchy with branching ratio 2 and scale ratio 1.78 
+# has a two-point function close to the power law xi(r) ~ r^-1.8 of real halos. 
+# Its amplitude is set by the number density of clusters rather than of halos, 
+# so that the correlation length of host halos is roughly 5 Mpc/h 
+# for any number of halos and box size. Denser catalogs have more levels per cluster, 
+# so that the power law extends down to smaller scales. 
+clustered_fake_sim_defaults = ({
+	'mass_range': (1e10, 1e15), 
+	'mass_function_slope': -1.9, 
+	'mass_function_cutoff': 3e14, 
+	'subhalo_fraction': 0.1, 
+	'cluster_number_density': 2.5e-4, 
+	'branching_ratio': 2, 
+	'scale_ratio': 1.78, 
+	'cluster_radius': 8., 
+	'velocity_dispersion': 300.
+	})
+
+# Gravitational constant in units of Mpc (km/s)^2 / Msun
+_newton_G = 4.302e-9
+
+
+def _clustered_fake_sim_params(**kwargs):
+	""" Dictionary of the clustering and mass function parameters, 
+	with the values in ``kwargs`` overriding the defaults. 
+	"""
+	params = dict(clustered_fake_sim_defaults)
+	for key, value in kwargs.items():
+		if key not in params:
+			msg = ("\n``" + key + "`` is not a parameter of the clustered fake catalogs.\n"
+				"The parameters are " + str(sorted(params.keys())) + ".\n")
+			raise HalotoolsError(msg)
+		params[key] = value
+
+	mmin, mmax = params['mass_range']
+	try:
+		assert 0 < mmin < mmax
+		assert 0 <= params['subhalo_fraction'] < 1
+		assert params['cluster_number_density'] > 0
+		assert params['branching_ratio'] >= 1
+		assert params['scale_ratio'] > 1
+	except AssertionError:
+		msg = ("\nThe parameters of the clustered fake catalog must satisfy \n"
+			"0 < mass_range[0] < mass_range[1], 0 <= subhalo_fraction < 1, cluster_number_density > 0, \n"
+			"branching_ratio >= 1 and scale_ratio > 1.\n")
+		raise HalotoolsError(msg)
+
+	# Tabulate the cumulative distribution of the host mass function 
+	# dn/dM ~ M^slope exp(-M/cutoff), used to draw host masses by inverse transform sampling
+	logm = np.linspace(np.log10(mmin), np.log10(mmax), 1001)
+	m = 10.**logm
+	dn_dlogm = m**(params['mass_function_slope'] + 1)*np.exp(-m/params['mass_function_cutoff'])
+	trapezoids = lambda y: 0.5*(y[1:] + y[:-1])*np.diff(logm)
+	cdf = np.append(0, np.cumsum(trapezoids(dn_dlogm)))
+	params['_host_logm_table'] = logm
+	params['_host_cdf_table'] = cdf/cdf[-1]
+
+	# Hosts of mass M have a Poisson-distributed number of subhalos with mean 
+	# A*(M/(2*mmin) - 1), normalized so that the expected subhalo fraction is ``subhalo_fraction``
+	richness = np.maximum(m/(2.*mmin) - 1, 0)
+	mean_richness = np.sum(trapezoids(richness*dn_dlogm))/cdf[-1]
+	f = params['subhalo_fraction']
+	params['_subhalo_normalization'] = f/(1. - f)/mean_richness if mean_richness > 0 else 0.
+	return params
+
+
+def _random_points_in_sphere(num_points, radius, rng):
+	""" Displacements of ``num_points`` points distributed uniformly in a sphere. 
+	"""
+	direction = rng.normal(size = (num_points, 3))
+	direction /= np.sqrt(np.sum(direction**2, axis=1)).reshape(-1, 1)
+	r = radius*rng.uniform(size = num_points)**(1./3.)
+	return direction*r.reshape(-1, 1)
+
+
+def _soneira_peebles_points(num_points, num_clusters, Lbox, rng, params):
+	""" Positions and velocities of ``num_points`` points of a Soneira-Peebles hierarchy. 
+
+	The ``num_clusters`` cluster centers are distributed uniformly in the box. 
+	At each level, every point is replaced by ``branching_ratio`` points placed uniformly 
+	within a sphere around it, whose radius is divided by ``scale_ratio`` from one level to the next. 
+	The number of levels is the smallest one giving at least ``num_points`` points, 
+	which are then randomly subsampled, so that the clustering amplitude 
+	only depends on the number density of clusters. 
+	Each level also adds a random velocity, whose dispersion decreases with the size of the sphere, 
+	so that nearby points have correlated velocities. 
+	"""
+	branching_ratio = int(params['branching_ratio'])
+	num_levels = 0
+	if branching_ratio > 1:
+		while num_clusters*branching_ratio**num_levels < num_points:
+			num_levels += 1
+	num_clusters = max(num_clusters, int(np.ceil(num_points/float(branching_ratio**num_levels))))
+
+	pos = rng.uniform(0, Lbox, (num_clusters, 3))
+	vel = rng.normal(0, params['velocity_dispersion'], (num_clusters, 3))
+	radius = float(params['cluster_radius'])
+	for level in range(num_levels):
+		num_children = len(pos)*branching_ratio
+		pos = np.repeat(pos, branching_ratio, axis=0) + _random_points_in_sphere(num_children, radius, rng)
+		sigma = params['velocity_dispersion']/params['scale_ratio']**(0.5*(level + 1))
+		vel = np.repeat(vel, branching_ratio, axis=0) + rng.normal(0, sigma, (num_children, 3))
+		radius /= params['scale_ratio']
+
+	if len(pos) > num_points:
+		keep = np.sort(rng.choice(len(pos), num_points, replace = False))
+		pos, vel = pos[keep], vel[keep]
+	return _wrap_positions(pos, Lbox), vel
+
+
+def _wrap_positions(pos, Lbox):
+	""" Apply periodic boundary conditions, returning float32 positions in [0, Lbox). 
+	"""
+	pos = np.mod(pos, Lbox).astype('f4')
+	# Rounding can map positions just below Lbox onto Lbox, which is equivalent to 0
+	pos[pos >= Lbox] = 0
+	return pos
 
 
+def _halo_properties(mass, rng):
+	""" Dictionary of the radius, concentration, vmax, spin and formation time 
+	of halos of the input virial mass, with realistic scaling relations and scatter. 
+	"""
+	rvir = 0.2*(mass/1e12)**(1./3.)
+	conc = 10.*(mass/1e12)**(-0.1)*10.**rng.normal(0, 0.14, len(mass))
+	vvir = np.sqrt(_newton_G*mass/rvir)
+	# Maximum circular velocity of an NFW profile
+	vmax = vvir*np.sqrt(0.216*conc/(np.log(1. + conc) - conc/(1. + conc)))
+	spin = np.exp(rng.normal(np.log(0.035), 0.5, len(mass)))
+	zhalf = np.maximum(0, 1. - 0.3*np.log10(mass/1e12) + rng.normal(0, 0.3, len(mass)))
+	return {'halo_rvir': rvir, 'halo_rs': rvir/conc, 'halo_nfw_conc': conc, 
+		'halo_vmax': vmax, 'halo_spin': spin, 'halo_zhalf': zhalf}
+
+
+def _clustered_fake_halo_chunk(num_hosts, num_clusters, first_halo_id, Lbox, rng, params):
+	""" Table of ``num_hosts`` host halos, in ``num_clusters`` clusters, and their subhalos. 
+	"""
+	mmin = params['mass_range'][0]
+
+	###########################################################
+	# Host halos
+	host_mass = 10.**np.interp(rng.uniform(size = num_hosts), 
+		params['_host_cdf_table'], params['_host_logm_table'])
+	host_pos, host_vel = _soneira_peebles_points(num_hosts, num_clusters, Lbox, rng, params)
+	host_props = _halo_properties(host_mass, rng)
+	host_id = first_halo_id + np.arange(num_hosts, dtype = 'i8')
+
+	###########################################################
+	# Subhalos, with masses drawn from dN/dmu ~ mu^-1.9 for mu = m/Mhost between mmin/Mhost and 0.5
+	mean_richness = params['_subhalo_normalization']*np.maximum(host_mass/(2.*mmin) - 1, 0)
+	richness = rng.poisson(mean_richness)
+	host_index = np.repeat(np.arange(num_hosts), richness)
+	num_subs = len(host_index)
+
+	mu_min, mu_max, p = mmin/host_mass[host_index], 0.5, -0.9
+	mu = (mu_min**p + rng.uniform(size = num_subs)*(mu_max**p - mu_min**p))**(1./p)
+	sub_mass = mu*host_mass[host_index]
+	sub_props = _halo_properties(sub_mass, rng)
+	# Subhalos have lost mass since the time of their peak mass
+	stripping = rng.uniform(0.3, 1, num_subs)
+
+	# Subhalos follow an isothermal profile within the virial radius of their host
+	sub_offset = _random_points_in_sphere(num_subs, 1., rng)
+	sub_offset *= (host_props['halo_rvir'][host_index]*
+		rng.uniform(size = num_subs)/np.sqrt(np.sum(sub_offset**2, axis=1))).reshape(-1, 1)
+	sub_pos = _wrap_positions(host_pos[host_index] + sub_offset, Lbox)
+	sub_sigma = host_props['halo_vmax'][host_index]/np.sqrt(2.)
+	sub_vel = host_vel[host_index] + rng.normal(size = (num_subs, 3))*sub_sigma.reshape(-1, 1)
+	sub_id = first_halo_id + num_hosts + np.arange(num_subs, dtype = 'i8')
+
+	###########################################################
+	# Bundle the hosts and subhalos into a single table
+	def combine(host_value, sub_value, dtype = 'f4'):
+		return np.concatenate((host_value, sub_value)).astype(dtype)
+
+	table = Table()
+	table['halo_id'] = combine(host_id, sub_id, 'i8')
+	table['halo_upid'] = combine(-np.ones(num_hosts, dtype = 'i8'), host_id[host_index], 'i8')
+	table['halo_hostid'] = combine(host_id, host_id[host_index], 'i8')
+	for i, coord in enumerate(('x', 'y', 'z')):
+		table['halo_' + coord] = combine(host_pos[:, i], sub_pos[:, i])
+		table['halo_v' + coord] = combine(host_vel[:, i], sub_vel[:, i])
+	table['halo_mvir'] = combine(host_mass, sub_mass)
+	table['halo_m200b'] = combine(host_mass, sub_mass)
+	table['halo_mpeak'] = combine(host_mass, sub_mass/stripping)
+	for key in sorted(host_props.keys()):
+		table[key] = combine(host_props[key], sub_props[key])
+	table['halo_vpeak'] = combine(host_props['halo_vmax'], sub_props['halo_vmax']/stripping**0.3)
+	return table
+
+
+def clustered_fake_halo_chunks(num_halos, Lbox = 250., seed = 43, chunk_size = int(1e6), **kwargs):
+	""" Generator yielding a large fake halo catalog one chunk at a time. 
+
+	Host halo masses are drawn from a Schechter-like mass function, 
+	:math:`dn/dM \\propto M^{-1.9}\\exp(-M/M_{\\ast})`, 
+	and host positions from a Soneira-Peebles hierarchy, whose two-point function 
+	is close to the power law of real halos. The clusters of the hierarchy have a fixed 
+	``cluster_number_density``, so that the correlation length of host halos, 
+	roughly 5 Mpc/h with the default parameters, does not depend on ``num_halos`` or ``Lbox``. 
+	Each host has a Poisson-distributed number 
+	of subhalos, proportional to its mass, distributed within its virial radius. 
+	The remaining halo properties follow realistic scaling relations with mass. 
+
+	Each chunk is generated independently from its own random seed, so that 
+	catalogs of any size can be generated with constant memory, 
+	and the same ``seed`` and ``chunk_size`` always produce the same catalog. 
+
+	Parameters 
+	----------
+	num_halos : int 
+		Approximate number of halos in the catalog, including subhalos. 
+		The number of subhalos is Poisson-distributed, so that the 
+		actual number of halos fluctuates around ``num_halos``. 
+
+	Lbox : float, optional 
+		Size of the periodic box in Mpc/h. Default is 250. 
+
+	seed : int, optional 
+		Random number seed. Default is 43. 
+
+	chunk_size : int, optional 
+		Approximate number of halos in each chunk. Default is 1e6. 
+
+	**kwargs : optional 
+		Any of the parameters stored in ``clustered_fake_sim_defaults``, 
+		e.g., ``subhalo_fraction``, ``mass_range`` or the ``cluster_number_density`` in (h/Mpc)**3, 
+		``branching_ratio``, ``scale_ratio`` and ``cluster_radius`` of the hierarchy. 
+
+	Yields 
+	-------
+	halo_table : `~astropy.table.Table` 
+		Table of the host halos of the chunk followed by their subhalos, 
+		whose ``halo_id`` values are unique across all chunks. 
+	"""
+	params = _clustered_fake_sim_params(**kwargs)
+	num_hosts = int(round(num_halos*(1. - params['subhalo_fraction'])))
+	hosts_per_chunk = max(1, int(round(chunk_size*(1. - params['subhalo_fraction']))))
+	num_chunks = int(np.ceil(num_hosts/float(hosts_per_chunk)))
+	num_clusters = params['cluster_number_density']*Lbox**3
+	chunk_seeds = np.random.RandomState(seed).randint(0, 2**31 - 1, num_chunks)
+
+	first_halo_id = 0
+	for ichunk in range(num_chunks):
+		rng = np.random.RandomState(chunk_seeds[ichunk])
+		num_chunk_hosts = min(hosts_per_chunk, num_hosts - ichunk*hosts_per_chunk)
+		# Each chunk holds its share of the clusters, so that the clusters 
+		# of all chunks together have the requested number density
+		num_chunk_clusters = max(1, int(round(num_clusters*num_chunk_hosts/float(num_hosts))))
+		table = _clustered_fake_halo_chunk(num_chunk_hosts, num_chunk_clusters, 
+			first_halo_id, Lbox, rng, params)
+		first_halo_id += len(table)
+		yield table
+
+
+def write_clustered_fake_sim(fname, num_halos, Lbox = 250., seed = 43, 
+	redshift = 0., particle_mass = 1.e8, chunk_size = int(1e6), overwrite = False, 
+	simname = 'fake_clustered', halo_finder = 'fake', version_name = 'dummy_version', 
+	hdf5_layout = 'compound', hdf5_chunk_size = None, hdf5_compression = None, 
+	hdf5_shuffle = False, **kwargs):
+	""" Write a large fake halo catalog to an hdf5 file one chunk at a time, 
+	so that catalogs with billions of halos can be generated with constant memory. 
+
+	The file stores the metadata of the Halotools cache, so that the catalog can be loaded 
+	with ``CachedHaloCatalog(fname = fname)`` once it has been added to the cache log 
+	with the `~halotools.sim_manager.HaloTableCache.add_entry_to_cache_log` method. 
+	See `clustered_fake_halo_chunks` for a description of the catalog. 
+
+	Parameters 
+	----------
+	fname : string 
+		Absolute path of the hdf5 file, which must end with ``.hdf5``. 
+
+	num_halos : int 
+		Approximate number of halos in the catalog, including subhalos. 
+
+	Lbox : float, optional 
+		Size of the periodic box in Mpc/h. Default is 250. 
+
+	seed : int, optional 
+		Random number seed. Default is 43. 
+
+	redshift : float, optional 
+		Redshift metadata of the catalog. Default is 0. 
+
+	particle_mass : float, optional 
+		Particle mass metadata of the catalog in Msun/h. Default is 1e8. 
+
+	chunk_size : int, optional 
+		Approximate number of halos generated and written at a time. Default is 1e6. 
+
+	overwrite : bool, optional 
+		If True, any existing file ``fname`` is overwritten. Default is False. 
+
+	simname, halo_finder, version_name : string, optional 
+		Metadata of the catalog used by the Halotools cache. 
+		Defaults are 'fake_clustered', 'fake' and 'dummy_version'. 
+
+	hdf5_layout, hdf5_chunk_size, hdf5_compression, hdf5_shuffle : optional 
+		Storage options of the halo table, 
+		as in `~halotools.sim_manager.RockstarHlistReader`. 
+
+	**kwargs : optional 
+		Any of the parameters stored in ``clustered_fake_sim_defaults``. 
+
+	Returns 
+	--------
+	num_halos : int 
+		Number of halos written to the file. 
+
+	Examples 
+	---------
+	>>> num_halos = write_clustered_fake_sim(fname, int(1e8), Lbox = 1000.) # doctest: +SKIP
+	"""
+	try:
+		import h5py
+	except ImportError:
+		msg = ("\nYou must have h5py installed to write clustered fake catalogs.\n")
+		raise HalotoolsError(msg)
+
+	if fname[-5:] != '.hdf5':
+		msg = ("\nThe fname must end with an ``.hdf5`` extension.\n")
+		raise HalotoolsError(msg)
+	if os.path.isfile(fname) and (overwrite is False):
+		msg = ("\nThe following file already exists:\n" + str(fname) + "\n"
+			"Either choose a different fname or set ``overwrite`` to True.\n")
+		raise HalotoolsError(msg)
+	_verify_layout_options(hdf5_layout, hdf5_chunk_size, hdf5_compression, hdf5_shuffle)
+
+	num_halos_written = 0
+	f = h5py.File(fname, 'w')
+	try:
+		for table in clustered_fake_halo_chunks(num_halos, Lbox = Lbox, 
+			seed = seed, chunk_size = chunk_size, **kwargs):
+			arr = table.as_array()
+			if num_halos_written == 0:
+				create_hdf5_table(f, arr.dtype, path = 'data', layout = hdf5_layout, 
+					chunk_size = hdf5_chunk_size, compression = hdf5_compression, 
+					shuffle = hdf5_shuffle, resizable = True)
+			append_to_hdf5_table(f, arr, path = 'data')
+			num_halos_written += len(arr)
+
+		f.attrs.create('simname', str(simname))
+		f.attrs.create('halo_finder', str(halo_finder))
+		f.attrs.create('version_name', str(version_name))
+		f.attrs.create('redshift', str(get_redshift_string(redshift)))
+		f.attrs.create('fname', str(fname))
+		f.attrs.create('Lbox', Lbox)
+		f.attrs.create('particle_mass', particle_mass)
+		f.attrs.create('seed', seed)
+		time_right_now = str(datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+		f.attrs.create('time_catalog_was_originally_cached', time_right_now)
+		f.attrs.create('processing_notes', str('Clustered fake catalog generated by '
+			'halotools.sim_manager.fake_sim.write_clustered_fake_sim'))
+	finally:
+		f.close()
+
+	return num_halos_written
+
+
+class ClusteredFakeSim(UserSuppliedHaloCatalog):
+	""" Fake simulation with realistic mass function and clustering, 
+	of any size that fits in memory, used for benchmarking. 
+
+	Unlike `FakeSim`, whose halos are uniformly distributed in a handful of mass bins, 
+	the halos of `ClusteredFakeSim` are generated by `clustered_fake_halo_chunks`: 
+	host masses follow a Schechter-like mass function, positions follow a 
+	Soneira-Peebles hierarchy, and each host has a mass-dependent number of subhalos. 
+	Catalogs too large to fit in memory can be written to disk with `write_clustered_fake_sim`. 
+	"""
 
+	def __init__(self, num_halos = int(1e5), num_ptcl = int(1e4), Lbox = 250., 
+		seed = 43, redshift = 0., particle_mass = 1.e8, **kwargs):
+		"""
+		Parameters 
+		----------
+		num_halos : int, optional 
+			Approximate number of halos, including subhalos. Default is 1e5. 
 
+		num_ptcl : int, optional
+			Number of dark matter particles. Default is 1e4. 
 
+		Lbox : float, optional 
+			Size of the periodic box in Mpc/h. Default is 250. 
 
+		seed : int, optional 
+			Random number seed used to generate the fake halos and particles. 
+			Default is 43.
 
+		redshift : float, optional 
+			Default is 0. 
 
+		particle_mass : float, optional 
+			Default is 1e8. 
 
+		**kwargs : optional 
+			Any of the parameters stored in ``clustered_fake_sim_defaults``. 
 
+		Examples 
+		---------
+		>>> halocat = ClusteredFakeSim(num_halos = 1e4)
+		>>> host_mask = halocat.halo_table['halo_upid'] == -1
+		"""
+		self.simname = 'fake_clustered'
+		self.halo_finder = 'fake'
+		self.version_name = 'dummy_version'
+		self.seed = seed
 
+		params = _clustered_fake_sim_params(**kwargs)
+		halo_table = np.concatenate([table.as_array() for table in 
+			clustered_fake_halo_chunks(num_halos, Lbox = Lbox, seed = seed, **kwargs)])
+		self.num_halos = len(halo_table)
+		self.num_ptcl = int(num_ptcl)
+
+		# Particles trace the halos, with the remainder distributed uniformly
+		rng = np.random.RandomState(seed)
+		num_clustered_ptcl = int(0.7*self.num_ptcl)
+		host_index = rng.randint(0, self.num_halos, num_clustered_ptcl)
+		offset = _random_points_in_sphere(num_clustered_ptcl, 1., rng)
+		offset *= halo_table['halo_rvir'][host_index].reshape(-1, 1)
+		ptcl_pos = np.concatenate((
+			np.vstack([halo_table[key][host_index] for key in ('halo_x', 'halo_y', 'halo_z')]).T + offset, 
+			rng.uniform(0, Lbox, (self.num_ptcl - num_clustered_ptcl, 3))))
+		ptcl_pos = _wrap_positions(ptcl_pos, Lbox)
+		ptcl_vel = rng.normal(0, params['velocity_dispersion'], (self.num_ptcl, 3)).astype('f4')
+		ptclcat = UserSuppliedPtclCatalog(
+			Lbox = Lbox, redshift = redshift, particle_mass = particle_mass, 
+			x = ptcl_pos[:, 0], y = ptcl_pos[:, 1], z = ptcl_pos[:, 2], 
+			vx = ptcl_vel[:, 0], vy = ptcl_vel[:, 1], vz = ptcl_vel[:, 2])
 
-
+		halo_columns = dict((key, halo_table[key]) for key in halo_table.dtype.names)
+		UserSuppliedHaloCatalog.__init__(self, copy = False, 
+			Lbox = Lbox, particle_mass = particle_mass, redshift = redshift, 
+			user_supplied_ptclcat = ptclcat, **halo_columns)
@@ -1,4 +1,5 @@
 import os
+import sqlite3
 from copy import copy, deepcopy
 from astropy.config.paths import _find_home
 from astropy.table import Table
@@ -12,6 +13,7 @@ except ImportError:
         "requires h5py to be installed.")
 
 from .halo_table_cache_log_entry import HaloTableCacheLogEntry
+from .cache_log_database import CacheLogDatabase
 
 from ..sim_manager import halotools_cache_dirname
 from ..custom_exceptions import InvalidCacheLogEntry, HalotoolsError
@@ -20,6 +22,15 @@ __all__ = ('HaloTableCache', )
 
 class HaloTableCache(object):
     """ Object providing a collection of halo catalogs for use with Halotools. 
+
+    The cache log is stored in the SQLite database 
+    $HOME/.astropy/cache/halotools/halo_table_cache_log.db, 
+    see `~halotools.sim_manager.CacheLogDatabase`. 
+    The first time the database is accessed, the entries of the ASCII log 
+    $HOME/.astropy/cache/halotools/halo_table_cache_log.txt 
+    used by previous versions of Halotools are copied into the database. 
+    Logs stored in a ``cache_log_fname`` with a .txt extension 
+    continue to be read and written as ASCII data. 
     """ 
 
     def __init__(self, read_log_from_standard_loc = True, **kwargs):
@@ -28,23 +39,38 @@ class HaloTableCache(object):
             os.makedirs(os.path.dirname(self._standard_log_dirname))
         except OSError:
             pass
-        self._standard_log_fname = os.path.join(self._standard_log_dirname, 'halo_table_cache_log.txt')
+        self._standard_log_fname = os.path.join(self._standard_log_dirname, 'halo_table_cache_log.db')
         
         try:
             self.cache_log_fname = kwargs['cache_log_fname']
         except KeyError:
             self.cache_log_fname = copy(self._standard_log_fname)
         self._cache_log_fname_exists = os.path.isfile(self.cache_log_fname)
+
+        if os.path.splitext(self.cache_log_fname)[1] == '.txt':
+            self._log_database = None
+        else:
+            self._log_database = CacheLogDatabase(self.cache_log_fname, 
+                HaloTableCacheLogEntry.log_attributes, 
+                ascii_fname = os.path.splitext(self.cache_log_fname)[0] + '.txt')
         
         if read_log_from_standard_loc == True:
             self.log = self.retrieve_log_from_ascii()
         else:
             self.log = []
+        # Lookups query the database directly only when 
+        # the log in memory agrees with the log on disk 
+        self._log_agrees_with_disk = read_log_from_standard_loc == True
         
     def _overwrite_log_ascii(self, new_log):
+        """ Replace the log on disk with the input log. 
+        """
         new_log.sort()
-        log_table = self._log_table_from_log(new_log)
-        log_table.write(self.cache_log_fname, format='ascii')
+        if self._log_database is not None:
+            self._log_database.replace_rows(new_log)
+        else:
+            log_table = self._log_table_from_log(new_log)
+            log_table.write(self.cache_log_fname, format='ascii')
         
     def _clean_log_of_repeated_entries(self, input_log):
         cleaned_log = list(set(input_log))
@@ -62,12 +88,17 @@ class HaloTableCache(object):
         self.log = self.retrieve_log_from_ascii()
 
     def retrieve_log_from_ascii(self):
-        """ Read '$HOME/.astropy/cache/halotools/halo_table_cache_log.txt', 
+        """ Read the cache log from disk, 
         clean the log of any repeated entries, sort the log, and return the resulting 
         list of `~halotools.sim_manager.HaloTableCacheLogEntry` instances. 
+        Despite the name of the method, the log is read from the SQLite database 
+        unless the ``cache_log_fname`` has a .txt extension. 
         """
         
-        log_table = self._read_log_table_from_ascii()
+        if self._log_database is not None:
+            log_table = self._read_log_table_from_database()
+        else:
+            log_table = self._read_log_table_from_ascii()
         log_inferred_from_ascii = self._log_from_log_table(log_table)
         cleaned_log = self._clean_log_of_repeated_entries(log_inferred_from_ascii)
         cleaned_log.sort()
@@ -91,6 +122,21 @@ class HaloTableCache(object):
         
         return log_table
     
+    def _read_log_table_from_database(self):
+        self._cache_log_fname_exists = os.path.isfile(self.cache_log_fname)
+        try:
+            rows = self._log_database.rows()
+            self._cache_log_fname_is_kosher = True
+        except sqlite3.DatabaseError:
+            rows = []
+            self._cache_log_fname_is_kosher = False
+
+        log_table = self._get_empty_log_table(len(rows))
+        for ii, row in enumerate(rows):
+            for attr in HaloTableCacheLogEntry.log_attributes:
+                log_table[attr][ii] = row[attr]
+        return log_table
+
     def _log_from_log_table(self, log_table):
         result = []
         for entry in log_table:
@@ -135,6 +181,11 @@ class HaloTableCache(object):
             msg = msg[:-2]
             raise KeyError(msg)
 
+        if (self._log_database is not None) & (self._log_agrees_with_disk is True):
+            for row in self._log_database.rows(dz_tol = dz_tol, **kwargs):
+                yield HaloTableCacheLogEntry(**row)
+            return
+
         for entry in self.log:
             yield_entry = True
             for key in kwargs.keys():
@@ -171,7 +222,16 @@ class HaloTableCache(object):
         self.log = list(set(self.log))
         self.log.sort()
         if update_ascii == True:
-            self._overwrite_log_ascii(self.log)
+            if (self._log_database is not None) & (self._log_agrees_with_disk is True):
+                # Only the new entry is written, so that entries added 
+                # by other processes since the log was read are preserved 
+                self._log_database.insert_rows([log_entry])
+                self.log = self.retrieve_log_from_ascii()
+            else:
+                self._overwrite_log_ascii(self.log)
+                self._log_agrees_with_disk = True
+        else:
+            self._log_agrees_with_disk = False
 
     def remove_entry_from_cache_log(self, simname, halo_finder, 
         version_name, redshift, fname, 
@@ -230,15 +290,26 @@ class HaloTableCache(object):
             halo_finder = halo_finder, version_name = version_name, 
             redshift = redshift, fname = fname)
 
+        if ((update_ascii == True) & (self._log_database is not None) & 
+            (self._log_agrees_with_disk is True)):
+            # The entry may have been added by another process since the log was read 
+            self.log = self.retrieve_log_from_ascii()
+
         msg = ''
         try:
             self.log.remove(log_entry)
             _existing_log_entry_detected = True
 
             if update_ascii == True:
-                self._overwrite_log_ascii(self.log)
+                if (self._log_database is not None) & (self._log_agrees_with_disk is True):
+                    self._log_database.delete_rows([log_entry])
+                    self.log = self.retrieve_log_from_ascii()
+                else:
+                    self._overwrite_log_ascii(self.log)
+                    self._log_agrees_with_disk = True
                 msg += ("\nThe log has been updated on disk and in memory.\n")
             else:
+                self._log_agrees_with_disk = False
                 msg += ("\nThe log has been updated in memory "
                     "but not on disk because \n"
                     "the update_ascii argument is set to False.\n")
@@ -1,15 +1,65 @@
 from collections import OrderedDict
 import os
-from astropy.table import Table 
+import zlib
 import numpy as np 
 
+from .hdf5_table_layout import Hdf5TableView
+from ..sim_manager import halotools_cache_dirname
 from ..custom_exceptions import InvalidCacheLogEntry, HalotoolsError
 
 __all__ = ('HaloTableCacheLogEntry', )
 
+# Directory of the Halotools cache storing the files that record information 
+# about cached halo catalogs, so that the catalogs themselves are never written to 
+sidecar_dirname = os.path.join(halotools_cache_dirname, 'halo_table_sidecars')
+
 def get_redshift_string(redshift):
     return str('{0:.4f}'.format(float(redshift)))
 
+def halo_table_sidecar_fname(fname, extension):
+    """ Name of the file of the Halotools cache directory storing 
+    additional information about the input hdf5 file, e.g., the fingerprint 
+    of its most recent verification. The name is unique to the absolute path of 
+    the hdf5 file and the input extension, e.g., ``.verification``. 
+    """
+    fname = os.path.abspath(fname)
+    path_checksum = zlib.crc32(fname.encode('utf-8')) & 0xffffffff
+    basename = os.path.splitext(os.path.basename(fname))[0]
+    return os.path.join(sidecar_dirname, basename + '_' + str(path_checksum) + extension)
+
+def halo_table_fingerprint(fname):
+    """ String summarizing the state of the ``data`` table of the input hdf5 file, 
+    comprising the modification time of the file, the shape, dtype and storage size 
+    of the table, the ``Lbox`` metadata, and a checksum of its first and last rows. 
+    The fingerprint changes whenever the halo table is modified. 
+    Returns None if the table cannot be accessed. 
+    """
+    try:
+        import h5py
+        mtime = os.path.getmtime(fname)
+        f = h5py.File(fname, 'r')
+    except (ImportError, IOError, OSError):
+        return None
+
+    try:
+        table = Hdf5TableView(f, path = 'data')
+        num_rows = table.num_rows
+        num_checksum_rows = max(1, int(1e6/table.dtype.itemsize))
+        checksum = zlib.crc32(table.read_rows(None, num_checksum_rows).tobytes())
+        checksum = zlib.crc32(table.read_rows(max(0, num_rows-num_checksum_rows), None).tobytes(), checksum)
+        fingerprint = ('mtime = ' + str(int(mtime)) + 
+            ', shape = ' + str((num_rows, )) + 
+            ', dtype = ' + str(table.dtype.descr) + 
+            ', storage_size = ' + str(table.storage_size) + 
+            ', Lbox = ' + repr(f.attrs.get('Lbox')) + 
+            ', checksum = ' + str(checksum & 0xffffffff))
+    except:
+        fingerprint = None
+    finally:
+        f.close()
+
+    return fingerprint
+
 class HaloTableCacheLogEntry(object):
     """ Object serving as an entry in the `~halotools.sim_manager.HaloTableCache`. 
     """
@@ -18,6 +68,13 @@ class HaloTableCacheLogEntry(object):
     required_metadata = ['Lbox', 'particle_mass']
     required_metadata.extend(log_attributes)
 
+    # Extension of the sidecar file recording the fingerprint of the 
+    # data that most recently passed the safe_for_cache tests 
+    verification_sidecar_extension = '.verification'
+
+    # Number of rows of the halo table scanned at a time during verification 
+    verification_chunk_size = 2**20
+
     def __init__(self, simname, halo_finder, version_name, redshift, fname):
         """
         Parameters 
@@ -120,7 +177,7 @@ class HaloTableCacheLogEntry(object):
         `~halotools.sim_manager.HaloTableCacheLogEntry` instance stores a valid 
         halo catalog that can safely be added to the cache for future use. 
         `safe_for_cache` is implemented as a property method, so that each request 
-        performs all the checks from scratch. A log entry is considered valid 
+        performs the checks anew. A log entry is considered valid 
         if it passes the following tests:
 
         1. The file exists. 
@@ -131,7 +188,7 @@ class HaloTableCacheLogEntry(object):
 
         4. Each value in the above metadata is consistent with the corresponding value bound to the `~halotools.sim_manager.HaloTableCacheLogEntry` instance. 
 
-        5. The halo table data can be read in using the `~astropy.table.Table.read` method of the `~astropy.table.Table` class. 
+        5. The halo table data can be read in using the `~astropy.table.Table.read` method of the `~astropy.table.Table` class, or is stored in the ``columnar`` layout of `~halotools.sim_manager.hdf5_table_layout.write_table_to_hdf5`. 
 
         6. The halo table has the following columns ``halo_id``, ``halo_x``, ``halo_y``, ``halo_z``, plus at least one additional column storing a mass-like variable.
 
@@ -145,6 +202,16 @@ class HaloTableCacheLogEntry(object):
         the log other entries that may or may not be stored in the cache. Such checks are 
         the responsibility of the `~halotools.sim_manager.HaloTableCache` class. 
 
+        Tests 5-9 only read the metadata of the halo table plus the few columns 
+        they require, in a single pass over the file. When all tests pass, 
+        a fingerprint of the halo table, comprising the modification time of the file, 
+        the shape, dtype and storage size of the ``data`` table, the ``Lbox`` metadata 
+        and a checksum of the first and last rows of the table, 
+        is stored in a file of the ``halo_table_sidecars`` directory of the Halotools cache; 
+        the hdf5 file itself is never written to. 
+        Tests 5-9 are skipped whenever the fingerprint of the file matches the stored one, 
+        so that repeatedly loading the same catalog does not require re-reading its data. 
+        Tests 1-4 are always performed. 
         """
         try:
             import h5py 
@@ -167,37 +234,144 @@ class HaloTableCacheLogEntry(object):
 
             verification_sequence = ('_verify_h5py_extension', 
                 '_verify_hdf5_has_complete_metadata', 
-                '_verify_metadata_consistency', 
-                '_verify_table_read', 
+                '_verify_metadata_consistency')
+
+            data_verification_sequence = ('_verify_table_read', 
                 '_verify_has_required_data_columns', 
                 '_verify_all_keys_begin_with_halo', 
                 '_verify_all_positions_inside_box', 
                 '_verify_halo_ids_are_unique', 
                 '_verify_halo_rvir_mpc_units')
 
-            for verification_function in verification_sequence:
+            fingerprint = self._halo_table_fingerprint()
+            if (fingerprint is not None) & (fingerprint == self._stored_halo_table_fingerprint()):
+                data_verification_sequence = ()
+
+            self._halo_table_summary = None
+            for verification_function in verification_sequence + data_verification_sequence:
                 func = getattr(self, verification_function)
                 tmp_msg, num_failures = func(num_failures)
                 msg += tmp_msg
+            del self._halo_table_summary
             
-            if num_failures > 0: self._cache_safety_message = message_preamble + msg
+            if num_failures > 0: 
+                self._cache_safety_message = message_preamble + msg
+            elif len(data_verification_sequence) > 0:
+                self._store_halo_table_fingerprint(fingerprint)
                 
             self._num_failures = num_failures
             return num_failures == 0
 
+    def _halo_table_fingerprint(self):
+        """ String summarizing the state of the ``data`` table of the hdf5 file, 
+        which changes whenever the halo table is modified. 
+        Returns None if the table cannot be accessed. 
+        """
+        return halo_table_fingerprint(self.fname)
+
+    def _stored_halo_table_fingerprint(self):
+        """ Fingerprint of the halo table stored the last time the 
+        hdf5 file passed the safe_for_cache tests, or None. 
+        """
+        sidecar_fname = halo_table_sidecar_fname(self.fname, self.verification_sidecar_extension)
+        try:
+            with open(sidecar_fname, 'r') as f:
+                return f.read().strip()
+        except (IOError, OSError):
+            return None
+
+    def _store_halo_table_fingerprint(self, fingerprint):
+        """ Record the input fingerprint in the sidecar file of the hdf5 file. 
+        If the sidecar file cannot be written, the fingerprint is not stored, 
+        and the data tests are performed again the next time. 
+        """
+        if fingerprint is None:
+            return
+
+        sidecar_fname = halo_table_sidecar_fname(self.fname, self.verification_sidecar_extension)
+        tmp_fname = sidecar_fname + '.' + str(os.getpid()) + '.tmp'
+        try:
+            try:
+                os.makedirs(os.path.dirname(sidecar_fname))
+            except OSError:
+                pass
+            with open(tmp_fname, 'w') as f:
+                f.write(str(fingerprint))
+            os.rename(tmp_fname, sidecar_fname)
+        except (IOError, OSError):
+            try:
+                os.remove(tmp_fname)
+            except OSError:
+                pass
+
+    def _get_halo_table_summary(self):
+        """ Dictionary storing the quantities of the halo table required by 
+        the verification functions, computed in a single pass over the file. 
+        Only the metadata of the ``data`` table is read, 
+        together with the ``halo_id``, ``halo_x``, ``halo_y``, ``halo_z`` and ``halo_rvir`` columns. 
+
+        Within a call to `safe_for_cache`, the summary is only computed once. 
+        The dictionary is empty if the halo table cannot be read. 
+        """
+        summary = getattr(self, '_halo_table_summary', None)
+        if summary is not None:
+            return summary
+
+        summary = {}
+        try:
+            f = self.h5py.File(self.fname, 'r')
+        except (IOError, OSError):
+            self._halo_table_summary = summary
+            return summary
+
+        try:
+            table = Hdf5TableView(f, path = 'data')
+            keys = list(table.colnames)
+            summary['keys'] = keys
+            summary['Lbox'] = f.attrs.get('Lbox')
+
+            extrema_keys = [key for key in ('halo_x', 'halo_y', 'halo_z', 'halo_rvir') if key in keys]
+            for key in extrema_keys:
+                summary[key + '_min'] = np.inf
+                summary[key + '_max'] = -np.inf
+
+            if 'halo_id' in keys:
+                halo_id = np.empty(table.num_rows, dtype = table.dtype['halo_id'])
+
+            for start in range(0, table.num_rows, self.verification_chunk_size):
+                end = min(start + self.verification_chunk_size, table.num_rows)
+                for key in extrema_keys:
+                    chunk = table.read_column(key, start, end)
+                    summary[key + '_min'] = min(summary[key + '_min'], np.min(chunk))
+                    summary[key + '_max'] = max(summary[key + '_max'], np.max(chunk))
+                if 'halo_id' in keys:
+                    halo_id[start:end] = table.read_column('halo_id', start, end)
+
+            if 'halo_id' in keys:
+                summary['halo_id_dtype'] = halo_id.dtype
+                halo_id.sort()
+                summary['halo_id_unique'] = bool(np.all(np.diff(halo_id) != 0))
+                del halo_id
+        except:
+            summary = {}
+        finally:
+            f.close()
+
+        self._halo_table_summary = summary
+        return summary
+
     def _verify_table_read(self, num_failures):
         """ Enforce that the data can be read using the usual Astropy syntax
         """
         msg = ''
 
-        try:
-            data = Table.read(self.fname, path='data')
-        except:
+        if 'keys' not in self._get_halo_table_summary():
             num_failures += 1
-            msg = (str(num_failures)+". The hdf5 file must be readable with "
-                "Astropy \nusing the following syntax:\n\n"
-                ">>> halo_data = Table.read(fname, path='data')\n\n")
-            pass
+            msg = (str(num_failures)+". The hdf5 file must store the halo table in its ``data`` path, \n"
+                "either as a structured dataset readable with Astropy using the following syntax:\n\n"
+                ">>> halo_data = Table.read(fname, path='data')\n\n"
+                "or as a group storing one dataset per column, as written with the ``columnar`` layout \n"
+                "of halotools.sim_manager.hdf5_table_layout.write_table_to_hdf5\n\n")
         return msg, num_failures
 
 
@@ -211,7 +385,7 @@ class HaloTableCacheLogEntry(object):
         msg = ''
 
         try:
-            f = self.h5py.File(self.fname)
+            f = self.h5py.File(self.fname, 'r')
             
             for key in HaloTableCacheLogEntry.log_attributes:
                 try:
@@ -255,8 +429,7 @@ class HaloTableCacheLogEntry(object):
         msg = ''
 
         try:
-            data = Table.read(self.fname, path='data')
-            for key in data.keys():
+            for key in self._get_halo_table_summary()['keys']:
                 try:
                     assert key[0:5] == 'halo_'
                 except AssertionError:
@@ -275,8 +448,7 @@ class HaloTableCacheLogEntry(object):
         msg = ''
 
         try:
-            data = Table.read(self.fname, path='data')
-            keys = data.keys()
+            keys = self._get_halo_table_summary()['keys']
             try:
                 assert 'halo_x' in keys
                 assert 'halo_y' in keys
@@ -301,21 +473,19 @@ class HaloTableCacheLogEntry(object):
         msg = ''
 
         try:
-            data = Table.read(self.fname, path='data')
-            f = self.h5py.File(self.fname)
-            Lbox = f.attrs['Lbox']
-            f.close()
+            summary = self._get_halo_table_summary()
+            Lbox = summary['Lbox']
+            assert Lbox is not None
+            halo_x_min, halo_x_max = summary['halo_x_min'], summary['halo_x_max']
+            halo_y_min, halo_y_max = summary['halo_y_min'], summary['halo_y_max']
+            halo_z_min, halo_z_max = summary['halo_z_min'], summary['halo_z_max']
             try:
-                halo_x = data['halo_x']
-                halo_y = data['halo_y']
-                halo_z = data['halo_z']
-
-                assert np.all(halo_x >= 0)
-                assert np.all(halo_x <= Lbox)
-                assert np.all(halo_y >= 0)
-                assert np.all(halo_y <= Lbox)
-                assert np.all(halo_z >= 0)
-                assert np.all(halo_z <= Lbox)
+                assert halo_x_min >= 0
+                assert halo_x_max <= Lbox
+                assert halo_y_min >= 0
+                assert halo_y_max <= Lbox
+                assert halo_z_min >= 0
+                assert halo_z_max <= Lbox
 
             except AssertionError:
                 num_failures += 1
@@ -334,11 +504,11 @@ class HaloTableCacheLogEntry(object):
         msg = ''
 
         try:
-            data = Table.read(self.fname, path='data')
+            summary = self._get_halo_table_summary()
+            halo_id_dtype, halo_id_unique = summary['halo_id_dtype'], summary['halo_id_unique']
             try:
-                halo_id = data['halo_id'].data
-                assert halo_id.dtype.str[1] in ('i','u')
-                assert len(halo_id) == len(set(halo_id))
+                assert halo_id_dtype.str[1] in ('i','u')
+                assert halo_id_unique
             except AssertionError:
                 num_failures += 1
                 msg = (str(num_failures)+". The ``halo_id`` column "
@@ -381,10 +551,9 @@ class HaloTableCacheLogEntry(object):
         msg = ''
 
         try:
-            data = Table.read(self.fname, path='data')
+            halo_rvir_max = self._get_halo_table_summary()['halo_rvir_max']
             try:
-                halo_rvir = data['halo_rvir']
-                assert np.all(halo_rvir < 50)
+                assert halo_rvir_max < 50
             except AssertionError:
                 num_failures += 1
                 msg = (str(num_failures)+". All values of the "
@@ -402,7 +571,7 @@ class HaloTableCacheLogEntry(object):
         msg = ''
 
         try:
-            f = self.h5py.File(self.fname)
+            f = self.h5py.File(self.fname, 'r')
             required_set = set(HaloTableCacheLogEntry.required_metadata)
             actual_set = set(f.attrs.keys())
 
@@ -0,0 +1,355 @@
+""" Module storing the functions used to write and read the tables stored in
+the hdf5 files of the Halotools cache, together with the `Hdf5TableView` class
+providing uniform access to tables stored in either of the two supported layouts:
+
+    * ``compound``, the default layout, in which the table is a single structured dataset, as written by the `~astropy.table.Table.write` method of Astropy,
+
+    * ``columnar``, in which the table is a group storing one dataset per column.
+
+In the ``columnar`` layout, reading a column reads no data belonging to any other column,
+and each column can be chunked and compressed independently,
+which makes loading a few columns of a wide table considerably faster,
+particularly on shared filesystems.
+"""
+import numpy as np
+
+from astropy.table import Table
+
+from ..custom_exceptions import HalotoolsError
+
+__all__ = ('Hdf5TableView', 'write_table_to_hdf5', 'create_hdf5_table',
+    'append_to_hdf5_table', 'read_hdf5_table')
+
+hdf5_table_layouts = ('compound', 'columnar')
+hdf5_table_compression_filters = (None, 'lzf', 'gzip')
+
+# Name of the attribute of the group of a columnar table storing the names of its columns in order
+_colnames_attr = 'colnames'
+_layout_attr = 'halotools_table_layout'
+# Number of rows of each column written at a time to columnar tables
+_write_block_length = 2**22
+
+
+def _default_chunk_length(itemsize):
+    """ Number of rows of the input item size in an hdf5 chunk of roughly 1Mb.
+    """
+    return max(1, int(2**20 / itemsize))
+
+
+def _verify_layout_options(layout, chunk_size, compression, shuffle):
+    """ Raise an exception if the input storage options are not supported.
+    """
+    if layout not in hdf5_table_layouts:
+        msg = ("\nThe hdf5 table layout must be one of " + str(hdf5_table_layouts) + ".\n"
+            "The input layout ``" + str(layout) + "`` is not supported.\n")
+        raise HalotoolsError(msg)
+
+    if compression not in hdf5_table_compression_filters:
+        msg = ("\nThe hdf5 compression filter must be one of "
+            + str(hdf5_table_compression_filters) + ".\n"
+            "The input compression ``" + str(compression) + "`` is not supported.\n")
+        raise HalotoolsError(msg)
+
+    if chunk_size is not None:
+        try:
+            assert int(chunk_size) >= 1
+        except (AssertionError, TypeError, ValueError):
+            msg = ("\nThe hdf5 ``chunk_size`` must be a positive integer number of rows.\n")
+            raise HalotoolsError(msg)
+
+    if shuffle not in (True, False):
+        msg = ("\nThe hdf5 ``shuffle`` option must be True or False.\n")
+        raise HalotoolsError(msg)
+
+
+def _dataset_kwargs(dtype, chunk_size, compression, shuffle, resizable):
+    """ Keyword arguments passed to the ``create_dataset`` method of h5py.
+    Datasets are only chunked if needed, since contiguous datasets can be memory-mapped.
+    """
+    kwargs = {}
+    if (chunk_size is not None) or (compression is not None) or (shuffle is True) or resizable:
+        if chunk_size is None:
+            chunk_size = _default_chunk_length(np.dtype(dtype).itemsize)
+        kwargs['chunks'] = (int(chunk_size), )
+        kwargs['maxshape'] = (None, )
+    if compression is not None:
+        kwargs['compression'] = compression
+    if shuffle is True:
+        kwargs['shuffle'] = True
+    return kwargs
+
+
+def create_hdf5_table(f, dtype, path = 'data', layout = 'compound', num_rows = 0,
+    chunk_size = None, compression = None, shuffle = False, resizable = False):
+    """ Create an empty table in the input open hdf5 file.
+
+    Parameters
+    -----------
+    f : h5py File or Group
+        Open hdf5 file, or a group of it, in which the table is created.
+
+    dtype : numpy dtype
+        Structured dtype of the rows of the table.
+
+    path : string, optional
+        Path of the table within the hdf5 file. Default is 'data'.
+
+    layout : string, optional
+        Either ``compound`` or ``columnar``. Default is ``compound``.
+
+    num_rows : int, optional
+        Initial number of rows. Default is 0.
+
+    chunk_size : int, optional
+        Number of rows of each hdf5 chunk. Default is None,
+        in which case uncompressed tables are stored contiguously
+        and other tables in chunks of roughly 1Mb.
+
+    compression : string, optional
+        Compression filter, either None, ``lzf`` or ``gzip``. Default is None.
+
+    shuffle : bool, optional
+        If True, the shuffle filter is applied, which typically improves compression. Default is False.
+
+    resizable : bool, optional
+        If True, rows can be appended to the table with `append_to_hdf5_table`.
+        Resizable tables are always chunked. Default is False.
+    """
+    _verify_layout_options(layout, chunk_size, compression, shuffle)
+    dtype = np.dtype(dtype)
+
+    if layout == 'compound':
+        f.create_dataset(path, shape = (int(num_rows), ), dtype = dtype,
+            **_dataset_kwargs(dtype, chunk_size, compression, shuffle, resizable))
+    else:
+        group = f.create_group(path)
+        group.attrs.create(_layout_attr, str('columnar'))
+        group.attrs.create(_colnames_attr, np.array([str(key) for key in dtype.names], dtype = bytes))
+        for key in dtype.names:
+            group.create_dataset(key, shape = (int(num_rows), ), dtype = dtype[key],
+                **_dataset_kwargs(dtype[key], chunk_size, compression, shuffle, resizable))
+
+
+def append_to_hdf5_table(f, arr, path = 'data'):
+    """ Append the rows of the input structured array to a resizable table
+    created by `create_hdf5_table`.
+
+    Parameters
+    -----------
+    f : h5py File or Group
+        Open hdf5 file storing the table.
+
+    arr : array_like
+        Structured array storing the same columns as the table.
+
+    path : string, optional
+        Path of the table within the hdf5 file. Default is 'data'.
+    """
+    table = Hdf5TableView(f, path = path)
+    first = table.num_rows
+    if table.layout == 'compound':
+        dataset = f[path]
+        dataset.resize((first + len(arr), ))
+        dataset[first:] = arr
+    else:
+        for key in table.colnames:
+            dataset = f[path][key]
+            dataset.resize((first + len(arr), ))
+            dataset[first:] = arr[key]
+
+
+def write_table_to_hdf5(table, fname, path = 'data', layout = 'compound',
+    chunk_size = None, compression = None, shuffle = False, overwrite = False):
+    """ Write the input table to the input hdf5 file.
+
+    Tables written with the default options are identical to those written by
+    the `~astropy.table.Table.write` method of Astropy.
+
+    Parameters
+    -----------
+    table : `~astropy.table.Table`
+        Table to write.
+
+    fname : string
+        Absolute path of the hdf5 file.
+
+    path : string, optional
+        Path of the table within the hdf5 file. Default is 'data'.
+
+    layout : string, optional
+        Either ``compound``, storing the table as a single structured dataset,
+        or ``columnar``, storing each column as a separate dataset. Default is ``compound``.
+
+    chunk_size : int, optional
+        Number of rows of each hdf5 chunk. Default is None,
+        in which case uncompressed tables are stored contiguously
+        and other tables in chunks of roughly 1Mb.
+
+    compression : string, optional
+        Compression filter, either None, ``lzf`` or ``gzip``. Default is None.
+
+    shuffle : bool, optional
+        If True, the shuffle filter is applied, which typically improves compression. Default is False.
+
+    overwrite : bool, optional
+        If True, any existing file ``fname`` is overwritten. Default is False.
+
+    Examples
+    ---------
+    >>> write_table_to_hdf5(halo_table, fname, layout = 'columnar', compression = 'lzf', shuffle = True) # doctest: +SKIP
+    """
+    _verify_layout_options(layout, chunk_size, compression, shuffle)
+
+    if ((layout == 'compound') and (chunk_size is None) and
+        (compression is None) and (shuffle is False)):
+        table.write(fname, path = path, overwrite = overwrite)
+        return
+
+    import h5py
+    import os
+    if os.path.isfile(fname) and (overwrite is False):
+        msg = ("\nThe following file already exists:\n" + str(fname) + "\n"
+            "Either choose a different fname or set ``overwrite`` to True.\n")
+        raise HalotoolsError(msg)
+
+    dtype = table[0:0].as_array().dtype
+    num_rows = len(table)
+    f = h5py.File(fname, 'w')
+    try:
+        create_hdf5_table(f, dtype, path = path, layout = layout, num_rows = num_rows,
+            chunk_size = chunk_size, compression = compression, shuffle = shuffle)
+        if num_rows > 0:
+            if layout == 'compound':
+                f[path][...] = table.as_array()
+            else:
+                # Columns are written in blocks, so that tables whose columns are
+                # memory-mapped are never copied into memory as a whole
+                for key in dtype.names:
+                    for first in range(0, num_rows, _write_block_length):
+                        last = min(first + _write_block_length, num_rows)
+                        f[path][key][first:last] = np.asarray(table[key][first:last])
+    finally:
+        f.close()
+
+
+def read_hdf5_table(fname, path = 'data', columns = None, num_rows = None):
+    """ Read a table stored in the input hdf5 file in either layout.
+
+    Parameters
+    -----------
+    fname : string
+        Absolute path of the hdf5 file.
+
+    path : string, optional
+        Path of the table within the hdf5 file. Default is 'data'.
+
+    columns : list of strings, optional
+        Names of the columns to read. Default is None, in which case all columns are read.
+
+    num_rows : int, optional
+        Number of rows to read, starting from the first row.
+        Default is None, in which case all rows are read.
+
+    Returns
+    --------
+    table : `~astropy.table.Table`
+    """
+    import h5py
+    f = h5py.File(fname, 'r')
+    try:
+        table = Hdf5TableView(f, path = path)
+        if (table.layout != 'compound') or (columns is not None) or (num_rows is not None):
+            if columns is None:
+                columns = table.colnames
+            data = [table.read_column(key, 0, num_rows) for key in columns]
+            return Table(data, names = list(columns))
+    finally:
+        f.close()
+
+    return Table.read(fname, path = path)
+
+
+class Hdf5TableView(object):
+    """ Uniform read access to a table stored in an open hdf5 file,
+    in either the ``compound`` or the ``columnar`` layout.
+    """
+
+    def __init__(self, f, path = 'data'):
+        """
+        Parameters
+        -----------
+        f : h5py File or Group
+            Open hdf5 file storing the table.
+
+        path : string, optional
+            Path of the table within the hdf5 file. Default is 'data'.
+        """
+        import h5py
+
+        try:
+            obj = f[path]
+        except KeyError:
+            msg = ("\nThe hdf5 file does not store a table in the ``" + str(path) + "`` path.\n")
+            raise HalotoolsError(msg)
+
+        if isinstance(obj, h5py.Dataset):
+            if (len(obj.shape) != 1) or (obj.dtype.names is None):
+                msg = ("\nThe ``" + str(path) + "`` dataset of the hdf5 file "
+                    "is not a one-dimensional structured dataset.\n")
+                raise HalotoolsError(msg)
+            self.layout = 'compound'
+            self.colnames = list(obj.dtype.names)
+            self.dtype = obj.dtype
+            self.num_rows = obj.shape[0]
+        else:
+            try:
+                colnames = obj.attrs[_colnames_attr]
+                self.colnames = [str(key.decode('ascii')) if isinstance(key, bytes) else str(key)
+                    for key in colnames]
+                lengths = set(obj[key].shape for key in self.colnames)
+                assert len(lengths) == 1
+                assert len(list(lengths)[0]) == 1
+            except (KeyError, AssertionError):
+                msg = ("\nThe ``" + str(path) + "`` group of the hdf5 file "
+                    "does not store a columnar table: \nevery column must be "
+                    "a one-dimensional dataset of the same length.\n")
+                raise HalotoolsError(msg)
+            self.layout = 'columnar'
+            self.dtype = np.dtype([(str(key), obj[key].dtype) for key in self.colnames])
+            self.num_rows = list(lengths)[0][0]
+
+        self._obj = obj
+
+    def column_dataset(self, key):
+        """ h5py dataset storing the input column of a columnar table,
+        or None for compound tables.
+        """
+        if self.layout == 'compound':
+            return None
+        return self._obj[key]
+
+    @property
+    def storage_size(self):
+        """ Number of bytes of the file used to store the table.
+        """
+        if self.layout == 'compound':
+            return self._obj.id.get_storage_size()
+        return sum(self._obj[key].id.get_storage_size() for key in self.colnames)
+
+    def read_column(self, key, start = None, end = None):
+        """ Read rows ``start`` through ``end`` of the input column.
+        """
+        if self.layout == 'compound':
+            return self._obj[key, start:end]
+        return self._obj[key][start:end]
+
+    def read_rows(self, start = None, end = None):
+        """ Read rows ``start`` through ``end`` of the table as a structured array.
+        """
+        if self.layout == 'compound':
+            return self._obj[start:end]
+        first, last, _ = slice(start, end).indices(self.num_rows)
+        arr = np.empty(max(0, last - first), dtype = self.dtype)
+        for key in self.colnames:
+            arr[key] = self._obj[key][first:last]
+        return arr
@@ -0,0 +1,485 @@
+""" Module storing the `~halotools.sim_manager.LazyHdf5Table`,
+a read-only, dictionary-like view of a table stored in an hdf5 file
+whose columns are only read from disk when they are first accessed,
+together with the `~halotools.sim_manager.write_spatial_cell_index` function
+used to accelerate loading spatial subvolumes of such tables.
+"""
+import numpy as np
+import os
+
+from astropy.table import Table
+
+from .tabular_ascii_reader import _row_cut_operators
+from .hdf5_table_layout import Hdf5TableView
+from ..custom_exceptions import HalotoolsError
+
+__all__ = ('LazyHdf5Table', 'write_spatial_cell_index')
+
+# Name of the hdf5 group storing the spatial cell index
+_cell_index_path = 'spatial_cell_index'
+
+
+def write_spatial_cell_index(fname, Lbox, num_divs = 10, path = 'data',
+    position_keys = ('halo_x', 'halo_y', 'halo_z'), chunk_size = 2**20):
+    """ Write an index to the input hdf5 file recording which rows of the
+    table stored in ``path`` lie in each cell of a regular grid
+    of ``num_divs`` cells per dimension.
+
+    The index allows `LazyHdf5Table.select_rows` and the ``bounding_box`` argument of
+    `~halotools.sim_manager.CachedHaloCatalog` to read only the rows of the cells
+    overlapping the requested subvolume. The positions are read in chunks of
+    ``chunk_size`` rows, so that the table is never loaded into memory at once.
+
+    Parameters
+    -----------
+    fname : string
+        Absolute path to the hdf5 file.
+
+    Lbox : float
+        Size of the periodic box in which the positions are stored.
+
+    num_divs : int, optional
+        Number of cells per dimension. Default is 10.
+
+    path : string, optional
+        Path of the table within the hdf5 file. Default is 'data'.
+
+    position_keys : sequence of strings, optional
+        Names of the columns storing the x, y and z coordinates.
+        Default is ('halo_x', 'halo_y', 'halo_z').
+
+    chunk_size : int, optional
+        Number of rows read at a time. Default is 2**20.
+
+    Examples
+    ---------
+    >>> write_spatial_cell_index(fname, Lbox = 250., num_divs = 10) # doctest: +SKIP
+    >>> halocat = CachedHaloCatalog(fname = fname, bounding_box = [(0, 50), (0, 50), (0, 50)]) # doctest: +SKIP
+    """
+    lazy_table = LazyHdf5Table(fname, path = path, columns = list(position_keys))
+
+    cell_ids = np.zeros(len(lazy_table), dtype = np.int64)
+    for start in range(0, len(lazy_table), chunk_size):
+        end = min(start + chunk_size, len(lazy_table))
+        for key in position_keys:
+            index = np.floor(lazy_table._read_column_slice(key, start, end)*num_divs/float(Lbox))
+            cell_ids[start:end] = (cell_ids[start:end]*num_divs +
+                np.clip(index, 0, num_divs - 1).astype(np.int64))
+
+    row_indices = np.argsort(cell_ids, kind = 'mergesort')
+    cell_offsets = np.searchsorted(cell_ids[row_indices], np.arange(num_divs**3 + 1))
+
+    f = lazy_table.h5py.File(fname, 'a')
+    try:
+        if _cell_index_path in f.keys():
+            del f[_cell_index_path]
+        group = f.create_group(_cell_index_path)
+        group.create_dataset('row_indices', data = row_indices)
+        group.create_dataset('cell_offsets', data = cell_offsets)
+        group.attrs.create('Lbox', float(Lbox))
+        group.attrs.create('num_divs', int(num_divs))
+        group.attrs.create('position_keys', str(','.join(position_keys)))
+        group.attrs.create('path', str(path))
+    finally:
+        f.close()
+
+
+class LazyHdf5Table(object):
+    """ Read-only, dictionary-like view of a table stored in an hdf5 file,
+    such as the ``data`` table of the hdf5 files storing the halo catalogs in the Halotools cache.
+    The table may be stored either as a single structured dataset, or as a group storing
+    one dataset per column, as written with the ``columnar`` layout of
+    `~halotools.sim_manager.hdf5_table_layout.write_table_to_hdf5`.
+
+    No data is read when the `LazyHdf5Table` is created.
+    Each column is read from disk the first time it is accessed,
+    and is then kept for subsequent accesses. If the data is stored
+    contiguously and without compression, the columns are instead
+    memory-mapped views of the file, so that no data is copied into memory
+    and multiple processes reading the same file share the operating system's page cache.
+
+    Memory-mapped columns are opened in copy-on-write mode:
+    modifying a column changes the values held in memory but never the file on disk.
+    """
+
+    def __init__(self, fname, path = 'data', columns = None, memmap = True):
+        """
+        Parameters
+        -----------
+        fname : string
+            Absolute path to the hdf5 file.
+
+        path : string, optional
+            Path of the table within the hdf5 file. Default is 'data'.
+
+        columns : list of strings, optional
+            Names of the columns to expose. Default is None, in which case
+            all columns of the table are exposed.
+
+        memmap : bool, optional
+            If True, memory-map the data whenever it is stored contiguously
+            and without compression. Default is True.
+
+        Examples
+        ---------
+        >>> halos = LazyHdf5Table(fname) # doctest: +SKIP
+        >>> mass = halos['halo_mvir'] # doctest: +SKIP
+
+        Only the ``halo_mvir`` column has been read from disk.
+        A regular `~astropy.table.Table` storing a subset of the columns
+        can be created with the `to_table` method:
+
+        >>> t = halos.to_table(['halo_x', 'halo_y', 'halo_z']) # doctest: +SKIP
+        """
+        try:
+            import h5py
+            self.h5py = h5py
+        except ImportError:
+            raise HalotoolsError("Must have h5py package installed "
+                "to use LazyHdf5Table objects")
+
+        if not os.path.isfile(fname):
+            msg = ("\nThe following input fname does not exist: \n\n" + fname + "\n\n")
+            raise HalotoolsError(msg)
+
+        self.fname = fname
+        self.path = path
+
+        f = self.h5py.File(self.fname, 'r')
+        try:
+            table = Hdf5TableView(f, path = self.path)
+            self.layout = table.layout
+            self._dtype = table.dtype
+            self._num_rows = table.num_rows
+            # Offsets of the memory-mapped table, or of each memory-mapped column
+            self._offset = None
+            self._column_offsets = {}
+            if (memmap is True) and (self.layout == 'compound'):
+                self._offset = self._memmap_offset(f[self.path])
+            elif memmap is True:
+                for key in table.colnames:
+                    offset = self._memmap_offset(table.column_dataset(key))
+                    if offset is not None:
+                        self._column_offsets[key] = offset
+        finally:
+            f.close()
+
+        if columns is None:
+            self.colnames = list(self._dtype.names)
+        else:
+            self.colnames = list(columns)
+            for key in self.colnames:
+                if key not in self._dtype.names:
+                    msg = ("\nThe ``" + key + "`` column does not appear in the ``"
+                        + self.path + "`` dataset of the following file:\n" + self.fname + "\n")
+                    raise HalotoolsError(msg)
+
+        self._loaded_columns = {}
+
+    def _memmap_offset(self, dataset):
+        """ Byte offset of the input dataset within the hdf5 file,
+        or None if the dataset cannot be memory-mapped.
+        """
+        if (dataset.chunks is not None) or (dataset.compression is not None):
+            return None
+        if dataset.id.get_type().get_size() != dataset.dtype.itemsize:
+            return None
+        offset = dataset.id.get_offset()
+        if (offset is None) or (self._num_rows == 0):
+            return None
+        return offset
+
+    @property
+    def is_memory_mapped(self):
+        """ Boolean indicating whether the columns are memory-mapped views of the file.
+        """
+        if self.layout == 'compound':
+            return self._offset is not None
+        return len(self._column_offsets) == len(self._dtype.names)
+
+    def _read_from_file(self, key, start = None, end = None):
+        """ Read rows ``start`` through ``end`` of the input column from the file.
+        """
+        f = self.h5py.File(self.fname, 'r')
+        try:
+            return Hdf5TableView(f, path = self.path).read_column(key, start, end)
+        finally:
+            f.close()
+
+    def _column_memmap(self, key):
+        """ Memory-mapped view of the input column, or None if the column cannot be memory-mapped.
+        """
+        if self._offset is not None:
+            return self._memmap()[key]
+        elif key in self._column_offsets:
+            return np.memmap(self.fname, dtype = self._dtype[key], mode = 'c',
+                offset = self._column_offsets[key], shape = (self._num_rows, ))
+        else:
+            return None
+
+    def keys(self):
+        """ List of the names of the columns.
+        """
+        return list(self.colnames)
+
+    def __len__(self):
+        return self._num_rows
+
+    def __contains__(self, key):
+        return key in self.colnames
+
+    def __iter__(self):
+        return iter(self.colnames)
+
+    def __getitem__(self, key):
+        if key not in self.colnames:
+            msg = ("\nThe ``" + str(key) + "`` column is not one of the columns "
+                "of the LazyHdf5Table.\nUse the ``keys`` method to list the available columns. \n"
+                "To select rows or several columns at once, use the ``to_table`` method.\n")
+            raise HalotoolsError(msg)
+        try:
+            return self._loaded_columns[key]
+        except KeyError:
+            self._loaded_columns[key] = self._read_column(key)
+            return self._loaded_columns[key]
+
+    def _read_column(self, key):
+        """ Read the input column from disk, or create a memory-mapped view of it.
+        """
+        arr = self._column_memmap(key)
+        if arr is None:
+            arr = self._read_from_file(key)
+        return arr
+
+    def _memmap(self):
+        """ Memory-mapped view of the entire dataset.
+        """
+        return np.memmap(self.fname, dtype = self._dtype, mode = 'c',
+            offset = self._offset, shape = (self._num_rows, ))
+
+    def _read_column_slice(self, key, start, end):
+        """ Read rows ``start`` through ``end`` of the input column.
+        """
+        if key in self._loaded_columns:
+            return np.array(self._loaded_columns[key][start:end])
+        arr = self._column_memmap(key)
+        if arr is not None:
+            return np.array(arr[start:end])
+        else:
+            return self._read_from_file(key, start, end)
+
+    def read_column_rows(self, key, rows, chunk_size = 2**20):
+        """ Read only the input rows of the input column.
+
+        Parameters
+        -----------
+        key : string
+            Name of the column, which may be any column of the hdf5 dataset,
+            including those not among the ``columns`` of the LazyHdf5Table.
+
+        rows : array_like
+            Sorted integer array of the indices of the rows to read.
+
+        chunk_size : int, optional
+            If the column is not memory-mapped, the file is read
+            in chunks of at most ``chunk_size`` rows. Default is 2**20.
+
+        Returns
+        --------
+        arr : array_like
+        """
+        if key not in self._dtype.names:
+            msg = ("\nThe ``" + str(key) + "`` column does not appear in the ``"
+                + self.path + "`` dataset of the following file:\n" + self.fname + "\n")
+            raise HalotoolsError(msg)
+
+        rows = np.asarray(rows, dtype = np.int64)
+        if key in self._loaded_columns:
+            return self._loaded_columns[key][rows]
+        arr = self._column_memmap(key)
+        if arr is not None:
+            return arr[rows]
+
+        result = np.empty(len(rows), dtype = self._dtype[key])
+        f = self.h5py.File(self.fname, 'r')
+        try:
+            table = Hdf5TableView(f, path = self.path)
+            first = 0
+            while first < len(rows):
+                start = rows[first]
+                last = np.searchsorted(rows, start + chunk_size, side = 'left')
+                end = rows[last-1] + 1
+                result[first:last] = table.read_column(key, start, end)[rows[first:last] - start]
+                first = last
+        finally:
+            f.close()
+        return result
+
+    @property
+    def has_spatial_cell_index(self):
+        """ Boolean indicating whether the hdf5 file stores an index
+        written by `~halotools.sim_manager.write_spatial_cell_index` for this table.
+        """
+        f = self.h5py.File(self.fname, 'r')
+        try:
+            return ((_cell_index_path in f.keys()) and
+                (f[_cell_index_path].attrs['path'] == self.path))
+        finally:
+            f.close()
+
+    def _cell_index_candidate_rows(self, bounding_box):
+        """ Sorted indices of the rows lying in the cells of the spatial cell index
+        that overlap the input bounding box.
+        """
+        f = self.h5py.File(self.fname, 'r')
+        try:
+            group = f[_cell_index_path]
+            num_divs = int(group.attrs['num_divs'])
+            Lbox = float(group.attrs['Lbox'])
+            cell_offsets = group['cell_offsets'][...]
+
+            cell_ranges = []
+            for low, high in bounding_box:
+                first = int(np.clip(np.floor(low*num_divs/Lbox), 0, num_divs - 1))
+                last = int(np.clip(np.floor(high*num_divs/Lbox), 0, num_divs - 1))
+                cell_ranges.append(range(first, last + 1))
+
+            # For fixed ix and iy, the overlapping cells form one contiguous run of rows
+            candidates = []
+            for ix in cell_ranges[0]:
+                for iy in cell_ranges[1]:
+                    first_cell = (ix*num_divs + iy)*num_divs + cell_ranges[2][0]
+                    last_cell = (ix*num_divs + iy)*num_divs + cell_ranges[2][-1]
+                    start, end = cell_offsets[first_cell], cell_offsets[last_cell + 1]
+                    if end > start:
+                        candidates.append(group['row_indices'][start:end])
+        finally:
+            f.close()
+
+        if len(candidates) == 0:
+            return np.zeros(0, dtype = np.int64)
+        return np.sort(np.concatenate(candidates))
+
+    def select_rows(self, row_cut_predicates = [], bounding_box = None,
+        position_keys = ('halo_x', 'halo_y', 'halo_z'), chunk_size = 2**20):
+        """ Indices of the rows passing the input predicates and lying
+        inside the input bounding box.
+
+        The predicates are evaluated in chunks of ``chunk_size`` rows,
+        reading only the columns appearing in the predicates, so that
+        the rows that do not pass the cuts are never loaded into memory at once.
+        If the hdf5 file stores an index written by
+        `~halotools.sim_manager.write_spatial_cell_index`, only the rows
+        in the cells overlapping the bounding box are read.
+
+        Parameters
+        -----------
+        row_cut_predicates : list, optional
+            List of three-element tuples (colname, operator, value), where ``operator`` is one of
+            '<', '<=', '>', '>=', '==', '!=', 'in' or 'not in'.
+            Only rows passing every predicate are selected. Default is an empty list.
+
+        bounding_box : sequence, optional
+            Three (min, max) pairs. Only rows with ``min <= x < max`` in each
+            of the three dimensions are selected. Periodic boundary conditions are not applied.
+            Default is None, in which case no spatial selection is made.
+
+        position_keys : sequence of strings, optional
+            Names of the columns storing the x, y and z coordinates.
+            Default is ('halo_x', 'halo_y', 'halo_z').
+
+        chunk_size : int, optional
+            Number of rows processed at a time. Default is 2**20.
+
+        Returns
+        --------
+        rows : array_like
+            Sorted integer array of the indices of the selected rows.
+
+        Examples
+        ---------
+        >>> halos = LazyHdf5Table(fname) # doctest: +SKIP
+        >>> rows = halos.select_rows([('halo_mvir', '>', 1e12)]) # doctest: +SKIP
+        >>> massive_halos = halos.to_table(rows = rows) # doctest: +SKIP
+        """
+        clauses = list(row_cut_predicates)
+        if bounding_box is not None:
+            if np.shape(bounding_box) != (3, 2):
+                msg = ("\nThe input ``bounding_box`` must be a sequence of three (min, max) pairs.\n")
+                raise HalotoolsError(msg)
+            for key, (low, high) in zip(position_keys, bounding_box):
+                clauses.extend([(key, '>=', low), (key, '<', high)])
+
+        for clause in clauses:
+            try:
+                colname, operator, value = clause
+                assert colname in self._dtype.names
+                assert operator in _row_cut_operators
+            except (ValueError, TypeError, AssertionError):
+                msg = ("\nEach row-cut predicate must be a three-element tuple (colname, operator, value),\n"
+                    "where colname is a column of the table and operator is one of \n"
+                    + str(sorted(_row_cut_operators.keys())) + ".\n"
+                    "The following predicate is not permissible: " + str(clause) + "\n")
+                raise HalotoolsError(msg)
+
+        if (bounding_box is not None) and self.has_spatial_cell_index:
+            candidates = self._cell_index_candidate_rows(bounding_box)
+        else:
+            candidates = None
+
+        num_candidates = self._num_rows if candidates is None else len(candidates)
+        selected_rows = []
+        for start in range(0, num_candidates, chunk_size):
+            end = min(start + chunk_size, num_candidates)
+            mask = np.ones(end - start, dtype = bool)
+            chunk_columns = {}
+            for colname, operator, value in clauses:
+                if colname not in chunk_columns:
+                    if candidates is None:
+                        chunk_columns[colname] = self._read_column_slice(colname, start, end)
+                    else:
+                        chunk_columns[colname] = self.read_column_rows(
+                            colname, candidates[start:end], chunk_size = chunk_size)
+                mask &= _row_cut_operators[operator](chunk_columns[colname], value)
+
+            if candidates is None:
+                selected_rows.append(start + np.flatnonzero(mask))
+            else:
+                selected_rows.append(candidates[start:end][mask])
+
+        if len(selected_rows) == 0:
+            return np.zeros(0, dtype = np.int64)
+        return np.concatenate(selected_rows).astype(np.int64)
+
+    def to_table(self, columns = None, rows = None):
+        """ Create an Astropy `~astropy.table.Table` storing the input columns.
+        If all rows are requested, memory-mapped columns are not copied.
+
+        Parameters
+        -----------
+        columns : list of strings, optional
+            Names of the columns of the returned table.
+            Default is None, in which case all columns are included.
+
+        rows : array_like, optional
+            Sorted integer array of the indices of the rows of the returned table,
+            such as the output of `select_rows`. Only these rows are read from disk.
+            Default is None, in which case all rows are included.
+
+        Returns
+        --------
+        t : `~astropy.table.Table`
+        """
+        if columns is None:
+            columns = self.colnames
+        if rows is None:
+            data = [self[key] for key in columns]
+        else:
+            data = [self.read_column_rows(key, rows) for key in columns]
+        return Table(data, names = list(columns), copy = False)
+
+    def release_memory(self):
+        """ Discard all columns that have been read,
+        so that they will be read from disk again upon their next access.
+        """
+        self._loaded_columns = {}
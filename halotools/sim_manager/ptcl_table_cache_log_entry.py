@@ -5,6 +5,7 @@ import numpy as np
 
 from ..custom_exceptions import InvalidCacheLogEntry, HalotoolsError
 from .halo_table_cache_log_entry import get_redshift_string
+from .hdf5_table_layout import read_hdf5_table
 
 __all__ = ('PtclTableCacheLogEntry', )
 
@@ -168,7 +169,7 @@ class PtclTableCacheLogEntry(object):
         """ Enforce that the data can be read using the usual Astropy syntax
         """
         try:
-            data = Table.read(self.fname, path='data')
+            data = read_hdf5_table(self.fname)
         except:
             num_failures += 1
             msg += (str(num_failures)+". The hdf5 file must be readable with "
@@ -228,7 +229,7 @@ class PtclTableCacheLogEntry(object):
         """
         """
         try:
-            data = Table.read(self.fname, path='data')
+            data = read_hdf5_table(self.fname)
             keys = data.keys()
             try:
                 assert 'x' in keys
@@ -249,7 +250,7 @@ class PtclTableCacheLogEntry(object):
         """
         """
         try:
-            data = Table.read(self.fname, path='data')
+            data = read_hdf5_table(self.fname)
             f = self.h5py.File(self.fname)
             Lbox = f.attrs['Lbox']
             f.close()
@@ -0,0 +1,245 @@
+""" Module storing the functions used to write and read multi-resolution
+particle tables, hdf5 files whose ``data`` dataset stores a collection of
+dark matter particles in a uniformly random order. Because the order is random,
+the first *num_ptcl* rows of the dataset are themselves a random downsampling
+of the particles, so that a particle table of any resolution can be loaded by reading
+only a prefix of the dataset. The ``ptcl_pyramid_levels`` attribute of the file
+records the sizes of the nested downsamplings the file was built for,
+e.g., 1e5, 1e6, 1e7 and 1e8 particles.
+"""
+import os
+import numpy as np
+
+from astropy.table import Table
+
+from .hdf5_table_layout import Hdf5TableView
+from ..custom_exceptions import HalotoolsError
+
+__all__ = ('write_ptcl_pyramid', 'read_ptcl_pyramid_levels', 'read_ptcl_table_prefix')
+
+ptcl_pyramid_levels_attr = 'ptcl_pyramid_levels'
+
+
+def _as_structured_array(chunk, dtype = None):
+    """ Convert an input chunk of particles, either a `~astropy.table.Table`,
+    a dictionary of equal-length arrays or a structured array, into a structured array.
+    """
+    if isinstance(chunk, np.ndarray) and (chunk.dtype.names is not None):
+        arr = chunk
+    elif isinstance(chunk, Table):
+        arr = chunk.as_array()
+    else:
+        try:
+            keys = sorted(chunk.keys())
+            arr = Table([np.asarray(chunk[key]) for key in keys], names = keys).as_array()
+        except (AttributeError, TypeError, ValueError):
+            msg = ("\nEach chunk of particles must be an Astropy Table, a structured array \n"
+                "or a dictionary of equal-length arrays.\n")
+            raise HalotoolsError(msg)
+
+    if dtype is not None:
+        try:
+            assert set(arr.dtype.names) == set(dtype.names)
+            arr = np.array(arr[list(dtype.names)], dtype = dtype)
+        except (AssertionError, ValueError, TypeError):
+            msg = ("\nEvery chunk of particles must store the same columns.\n"
+                "The first chunk stores the columns " + str(list(dtype.names)) + ",\n"
+                "a later chunk stores the columns " + str(list(arr.dtype.names)) + "\n")
+            raise HalotoolsError(msg)
+    return arr
+
+
+def _pyramid_levels(pyramid_levels, num_ptcl_total):
+    """ Sorted array of the unique sizes of the nested downsamplings,
+    with any size exceeding the total number of particles replaced by the total.
+    """
+    try:
+        levels = np.unique(np.minimum(
+            np.atleast_1d(pyramid_levels).astype(np.int64), int(num_ptcl_total)))
+        assert len(levels) > 0
+        assert levels[0] > 0
+    except (ValueError, TypeError, AssertionError):
+        msg = ("\nThe ``pyramid_levels`` must be a sequence of positive integers.\n")
+        raise HalotoolsError(msg)
+    return levels
+
+
+def write_ptcl_pyramid(fname, chunks, num_ptcl_total, pyramid_levels,
+    num_buckets = 64, seed = None, overwrite = False):
+    """ Write a random downsampling of a particle snapshot to the ``data`` dataset
+    of the input hdf5 file, storing the particles in a uniformly random order.
+
+    The snapshot is processed one chunk at a time, so that neither the snapshot
+    nor the downsampling need fit in memory. Each chunk contributes a number of randomly chosen
+    particles drawn from the hypergeometric distribution, so that every particle of the snapshot
+    is equally likely to be selected. Each selected particle is assigned to one of ``num_buckets``
+    randomly chosen buckets stored in a temporary hdf5 file. The buckets are then shuffled
+    one at a time and written to ``fname`` in sequence, so that only about
+    ``pyramid_levels[-1]/num_buckets`` particles are held in memory at once.
+
+    Parameters
+    -----------
+    fname : string
+        Absolute path of the hdf5 file to write.
+
+    chunks : iterable
+        Iterable of the chunks of the snapshot, each of which is an Astropy `~astropy.table.Table`,
+        a structured array or a dictionary of equal-length arrays storing the same columns.
+
+    num_ptcl_total : int
+        Total number of particles in the snapshot, i.e., the sum of the lengths of the chunks.
+
+    pyramid_levels : sequence of int
+        Sizes of the nested random downsamplings, e.g., (1e5, 1e6, 1e7, 1e8).
+        The number of particles written is the largest level,
+        or ``num_ptcl_total``, whichever is smaller.
+
+    num_buckets : int, optional
+        Number of buckets used to shuffle the selected particles. Default is 64.
+
+    seed : int, optional
+        Seed of the random number generator. Default is None.
+
+    overwrite : bool, optional
+        If True, any existing file ``fname`` is overwritten. Default is False.
+
+    Returns
+    --------
+    levels : array_like
+        Sorted array of the sizes of the nested downsamplings stored in the file.
+    """
+    try:
+        import h5py
+    except ImportError:
+        msg = ("\nYou must have h5py installed to write particle table pyramids.\n")
+        raise HalotoolsError(msg)
+
+    if os.path.isfile(fname) and (overwrite is False):
+        msg = ("\nThe following file already exists:\n" + str(fname) + "\n"
+            "Either choose a different fname or set ``overwrite`` to True.\n")
+        raise HalotoolsError(msg)
+
+    num_ptcl_total = int(num_ptcl_total)
+    levels = _pyramid_levels(pyramid_levels, num_ptcl_total)
+    num_selected = int(levels[-1])
+    num_buckets = int(max(1, min(num_buckets, num_selected)))
+
+    rng = np.random.RandomState(seed)
+    tmp_fname = fname + '.tmp_pyramid_buckets'
+    tmp = h5py.File(tmp_fname, 'w')
+    try:
+        ###########################################################
+        # First pass: select particles from each chunk and distribute them among the buckets
+        num_remaining, num_to_select, dtype = num_ptcl_total, num_selected, None
+        for chunk in chunks:
+            arr = _as_structured_array(chunk, dtype = dtype)
+            if dtype is None:
+                dtype = arr.dtype
+                buckets = [tmp.create_dataset(str(i), shape = (0, ), maxshape = (None, ),
+                    dtype = dtype, chunks = True) for i in range(num_buckets)]
+
+            num_chunk = len(arr)
+            if num_chunk > num_remaining:
+                msg = ("\nThe chunks store more than ``num_ptcl_total`` = "
+                    + str(num_ptcl_total) + " particles.\n")
+                raise HalotoolsError(msg)
+            if num_chunk == 0:
+                continue
+            if num_chunk == num_remaining:
+                num_chunk_selected = num_to_select
+            else:
+                num_chunk_selected = rng.hypergeometric(num_chunk,
+                    num_remaining - num_chunk, num_to_select) if num_to_select > 0 else 0
+            num_remaining -= num_chunk
+            num_to_select -= num_chunk_selected
+
+            selected = np.sort(rng.choice(num_chunk, num_chunk_selected, replace = False))
+            bucket_ids = rng.randint(0, num_buckets, num_chunk_selected)
+            order = np.argsort(bucket_ids, kind = 'mergesort')
+            selected, bucket_ids = arr[selected[order]], bucket_ids[order]
+            bounds = np.searchsorted(bucket_ids, np.arange(num_buckets + 1))
+            for i in np.flatnonzero(np.diff(bounds)):
+                bucket = buckets[i]
+                n = bucket.shape[0]
+                bucket.resize((n + bounds[i+1] - bounds[i], ))
+                bucket[n:] = selected[bounds[i]:bounds[i+1]]
+
+        if (dtype is None) or (num_remaining != 0):
+            msg = ("\nThe chunks store " + str(num_ptcl_total - num_remaining) +
+                " particles, but ``num_ptcl_total`` = " + str(num_ptcl_total) + ".\n")
+            raise HalotoolsError(msg)
+
+        ###########################################################
+        # Second pass: shuffle each bucket in memory and write the buckets in sequence
+        f = h5py.File(fname, 'w')
+        try:
+            data = f.create_dataset('data', shape = (num_selected, ), dtype = dtype)
+            first = 0
+            for bucket in buckets:
+                arr = bucket[...]
+                data[first:first + len(arr)] = arr[rng.permutation(len(arr))]
+                first += len(arr)
+            f.attrs.create(ptcl_pyramid_levels_attr, levels)
+        finally:
+            f.close()
+    finally:
+        tmp.close()
+        os.remove(tmp_fname)
+
+    return levels
+
+
+def read_ptcl_pyramid_levels(fname):
+    """ Sizes of the nested random downsamplings stored in the input particle table file.
+
+    Parameters
+    -----------
+    fname : string
+        Absolute path of the hdf5 file storing the particle table.
+
+    Returns
+    --------
+    levels : array_like or None
+        Sorted array of the sizes of the nested downsamplings, or None
+        if the file was not written by `write_ptcl_pyramid`, in which case
+        the order of the particles in the file is not guaranteed to be random.
+    """
+    import h5py
+    f = h5py.File(fname, 'r')
+    try:
+        if ptcl_pyramid_levels_attr not in f.attrs.keys():
+            return None
+        return np.atleast_1d(f.attrs[ptcl_pyramid_levels_attr]).astype(np.int64)
+    finally:
+        f.close()
+
+
+def read_ptcl_table_prefix(fname, num_ptcl):
+    """ Read only the first ``num_ptcl`` rows of the ``data`` dataset
+    of the input particle table file.
+
+    Parameters
+    -----------
+    fname : string
+        Absolute path of the hdf5 file storing the particle table.
+
+    num_ptcl : int
+        Number of particles to read.
+
+    Returns
+    --------
+    ptcl_table : `~astropy.table.Table`
+    """
+    import h5py
+    f = h5py.File(fname, 'r')
+    try:
+        table = Hdf5TableView(f, path = 'data')
+        num_ptcl = int(num_ptcl)
+        if (num_ptcl < 1) or (num_ptcl > table.num_rows):
+            msg = ("\nThe input ``num_ptcl`` = " + str(num_ptcl) + " must be positive and \n"
+                "may not exceed the number of particles stored in the following file:\n"
+                + str(fname) + "\nwhich stores " + str(table.num_rows) + " particles.\n")
+            raise HalotoolsError(msg)
+        return Table(table.read_rows(None, num_ptcl))
+    finally:
+        f.close()
@@ -21,6 +21,9 @@ from astropy.config.paths import get_cache_dir as get_astropy_cache_dir
 import datetime
 
 from .tabular_ascii_reader import TabularAsciiReader
+from .lazy_hdf5_table import write_spatial_cell_index
+from .hdf5_table_layout import (write_table_to_hdf5, create_hdf5_table, 
+    append_to_hdf5_table, _verify_layout_options)
 from .halo_table_cache import HaloTableCache
 from .halo_table_cache_log_entry import HaloTableCacheLogEntry, get_redshift_string
 
@@ -83,9 +86,10 @@ class RockstarHlistReader(TabularAsciiReader):
         output_fname, simname, halo_finder, redshift, version_name, 
         Lbox, particle_mass, header_char='#', 
         row_cut_min_dict = {}, row_cut_max_dict = {}, 
-        row_cut_eq_dict = {}, row_cut_neq_dict = {}, 
+        row_cut_eq_dict = {}, row_cut_neq_dict = {}, row_cut_predicates = [], 
         overwrite = False, ignore_nearby_redshifts = False, dz_tol = 0.05, 
-        processing_notes = ' ', **kwargs):
+        processing_notes = ' ', hdf5_layout = 'compound', hdf5_chunk_size = None, 
+        hdf5_compression = None, hdf5_shuffle = False, **kwargs):
         """
         Parameters 
         -----------
@@ -224,6 +228,15 @@ class RockstarHlistReader(TabularAsciiReader):
             For example, if row_cut_neq_dict = {'upid': -1}, then *no* rows of the 
             returned data table will have a upid of -1. 
 
+        row_cut_predicates : list, optional 
+            List of three-element tuples (colname, operator, value) providing 
+            general row-cuts on the tabular ASCII data, where ``operator`` is one of 
+            '<', '<=', '>', '>=', '==', '!=', 'in' or 'not in'. 
+            See `~halotools.sim_manager.TabularAsciiReader` for details. 
+
+            For example, if row_cut_predicates = [('halo_mvir', '>=', 1e10)], 
+            then all rows of the returned data table will have a mass of at least 1e10. 
+
         header_char : str, optional
             String to be interpreted as a header line of the ascii hlist file. 
             Default is '#'. 
@@ -249,11 +262,32 @@ class RockstarHlistReader(TabularAsciiReader):
             String used to provide supplementary notes that will be attached to 
             the hdf5 file storing your halo catalog. 
 
+        hdf5_layout : string, optional 
+            Layout of the halo table in the hdf5 file, either ``compound``, 
+            in which the table is a single structured dataset, or ``columnar``, 
+            in which each column is stored as a separate dataset, so that 
+            reading one column of the cached catalog reads no other column. 
+            Both layouts are understood by `~halotools.sim_manager.CachedHaloCatalog`. 
+            Default is ``compound``. 
+
+        hdf5_chunk_size : int, optional 
+            Number of rows of each hdf5 chunk. Default is None, in which case 
+            uncompressed tables are stored contiguously, so that they can be memory-mapped, 
+            and all other tables in chunks of roughly 1Mb. 
+
+        hdf5_compression : string, optional 
+            Compression filter applied to the halo table, either None, ``lzf`` or ``gzip``. 
+            Default is None. 
+
+        hdf5_shuffle : bool, optional 
+            If True, the hdf5 shuffle filter is applied, which typically improves compression. 
+            Default is False. 
+
         Notes 
         ------
         When the ``row_cut_min_dict``, ``row_cut_max_dict``, 
-        ``row_cut_eq_dict`` and ``row_cut_neq_dict`` keyword arguments are used 
-        simultaneously, only rows passing all cuts will be kept. 
+        ``row_cut_eq_dict``, ``row_cut_neq_dict`` and ``row_cut_predicates`` 
+        keyword arguments are used simultaneously, only rows passing all cuts will be kept. 
 
         Examples 
         ----------
@@ -352,7 +386,7 @@ class RockstarHlistReader(TabularAsciiReader):
         TabularAsciiReader.__init__(self, 
             input_fname, columns_to_keep_dict, 
             header_char, row_cut_min_dict, row_cut_max_dict, 
-            row_cut_eq_dict, row_cut_neq_dict)
+            row_cut_eq_dict, row_cut_neq_dict, row_cut_predicates)
 
         # Require that the minimum required columns have been selected, 
         # and that they all begin with `halo_`
@@ -370,6 +404,12 @@ class RockstarHlistReader(TabularAsciiReader):
         self.ignore_nearby_redshifts = ignore_nearby_redshifts
         self.processing_notes = processing_notes
 
+        _verify_layout_options(hdf5_layout, hdf5_chunk_size, hdf5_compression, hdf5_shuffle)
+        self.hdf5_layout = hdf5_layout
+        self.hdf5_chunk_size = hdf5_chunk_size
+        self.hdf5_compression = hdf5_compression
+        self.hdf5_shuffle = hdf5_shuffle
+
         self.output_fname = (
             self._retrieve_output_fname(output_fname, self.overwrite, **kwargs)
             )
@@ -415,15 +455,13 @@ class RockstarHlistReader(TabularAsciiReader):
                     "method will overwrite the existing file and log entry.\n")
                 warn(msg)
             else:
-                linenum = self.halo_table_cache.log.index(self.log_entry) + 1
                 msg += ("In order to proceed, "
                     "you must either set ``overwrite`` to True \n"
                     "or manually delete the existing file and also "
                     "remove the entry from the log.\n"
                     "To delete an entry from the log, \n"
-                    "you can either use the `remove_entry_from_cache_log` method \n"
-                    "of the HaloTableCache class, or equivalently, you can \n"
-                    "manually delete line #"+str(linenum)+"from the log file. \n"
+                    "use the `remove_entry_from_cache_log` method \n"
+                    "of the HaloTableCache class. \n"
                     "The log file is stored in the following location:\n"
                     +self.halo_table_cache.cache_log_fname+"\n"
                     )
@@ -527,7 +565,9 @@ class RockstarHlistReader(TabularAsciiReader):
 
     def read_halocat(self, columns_to_convert_from_kpc_to_mpc, 
         write_to_disk = False, update_cache_log = False, 
-        add_supplementary_halocat_columns = True):
+        add_supplementary_halocat_columns = True, num_workers = 1, 
+        stream_to_disk = False, chunk_memory_size = 500., 
+        spatial_index_num_divs = None, progress_callback = None):
         """ Method reads the ascii data and  
         binds the resulting catalog to ``self.halo_table``.
 
@@ -572,6 +612,50 @@ class RockstarHlistReader(TabularAsciiReader):
             Note that this feature is rather bare-bones and is likely to significantly 
             evolve and/or entirely vanish in future releases. 
 
+        num_workers : int, optional 
+            Number of processes used to parse the hlist file. 
+            Files can only be parsed in parallel if they are uncompressed or 
+            compressed in the BGZF format (e.g., with ``bgzip``). 
+            See `~halotools.sim_manager.TabularAsciiReader.read_ascii`. 
+            Default is 1. 
+
+        stream_to_disk : bool, optional 
+            If True, the catalog is never held in memory as a whole: 
+            each chunk of the ascii data is processed as soon as it has been read, 
+            including the unit conversion and the supplementary columns, 
+            and then appended to the ``data`` table of ``self.output_fname``, 
+            after which the metadata is written to the file. 
+            In this case the ``write_to_disk`` argument is ignored, 
+            and ``self.halo_table`` is not bound to the instance; 
+            the processed catalog can instead be loaded from ``self.output_fname``. 
+            Use this option for catalogs that are too large to fit in memory. 
+            Default is False. 
+
+        chunk_memory_size : int, optional 
+            Approximate amount of Megabytes of the ascii file 
+            processed at a time. When ``stream_to_disk`` is True, 
+            the peak memory usage is roughly ``chunk_memory_size`` + 100 Mb 
+            for each of the ``num_workers`` processes, plus the rows 
+            of up to 2*``num_workers`` chunks passing the cuts, 
+            rather than the size of the catalog. 
+            See `~halotools.sim_manager.TabularAsciiReader.read_ascii`. 
+            Default is 500 Mb. 
+
+        spatial_index_num_divs : int, optional 
+            If not None, after the catalog has been written to disk, 
+            `~halotools.sim_manager.write_spatial_cell_index` is called to store an index 
+            of the halos in each of ``spatial_index_num_divs`` cells per dimension, 
+            which accelerates loading spatial subvolumes with the ``bounding_box`` 
+            argument of `~halotools.sim_manager.CachedHaloCatalog`. 
+            Default is None, in which case no index is written. 
+
+        progress_callback : callable, optional 
+            Function called after each chunk of the ascii data has been processed 
+            as ``progress_callback(num_bytes_read, num_bytes_total, num_rows_kept)``, 
+            both when the catalog is read into memory and when ``stream_to_disk`` is True. 
+            See `~halotools.sim_manager.TabularAsciiReader.read_ascii`. 
+            Default is None, in which case no progress is reported. 
+
         Notes 
         -----
         Regarding the ``columns_to_convert_from_kpc_to_mpc`` argument, 
@@ -598,20 +682,26 @@ class RockstarHlistReader(TabularAsciiReader):
                     "``columns_to_keep_dict``\n")
                 raise HalotoolsError(msg)
 
-        result = self.read_ascii()
-        self.halo_table = Table(result)
-
-        for key in columns_to_convert_from_kpc_to_mpc:
-            self.halo_table[key] /= 1000.
-
-        if add_supplementary_halocat_columns == True: 
-            self.add_supplementary_halocat_columns()
-
-        if write_to_disk is True: 
-            self.write_to_disk()
+        if stream_to_disk == True:
+            self._stream_halocat_to_disk(columns_to_convert_from_kpc_to_mpc, 
+                add_supplementary_halocat_columns, chunk_memory_size, num_workers, 
+                progress_callback)
             self._file_has_been_written_to_disk = True
         else:
-            self._file_has_been_written_to_disk = False
+            result = self.read_ascii(chunk_memory_size = chunk_memory_size, 
+                progress_callback = progress_callback, num_workers = num_workers)
+            self.halo_table = self._process_halocat_chunk(result, 
+                columns_to_convert_from_kpc_to_mpc, add_supplementary_halocat_columns)
+
+            if write_to_disk is True: 
+                self.write_to_disk()
+                self._file_has_been_written_to_disk = True
+            else:
+                self._file_has_been_written_to_disk = False
+
+        if (spatial_index_num_divs is not None) & (self._file_has_been_written_to_disk == True):
+            write_spatial_cell_index(self.output_fname, self.Lbox, 
+                num_divs = spatial_index_num_divs)
 
         if update_cache_log == True:
             if self._file_has_been_written_to_disk == True: 
@@ -631,13 +721,82 @@ class RockstarHlistReader(TabularAsciiReader):
                         "the write_to_disk and update_cache_log methods.\n")
                     raise HalotoolsError(msg)
 
+    def _process_halocat_chunk(self, chunk, columns_to_convert_from_kpc_to_mpc, 
+        add_supplementary_halocat_columns):
+        """ Private method converts a structured array of ascii data 
+        into an Astropy Table, applying the kpc/h --> Mpc/h unit conversion 
+        and adding the supplementary columns. 
+        """
+        halo_table = Table(chunk)
+
+        for key in columns_to_convert_from_kpc_to_mpc:
+            halo_table[key] /= 1000.
+
+        if add_supplementary_halocat_columns == True: 
+            self._add_supplementary_columns_to_table(halo_table)
+
+        return halo_table
+
+    def _stream_halocat_to_disk(self, columns_to_convert_from_kpc_to_mpc, 
+        add_supplementary_halocat_columns, chunk_memory_size, num_workers, 
+        progress_callback = None):
+        """ Private method reads the ascii data one chunk at a time, 
+        processes each chunk and appends it to a resizable, chunked 
+        ``data`` table of ``self.output_fname``, and then writes the metadata. 
+        """
+        if os.path.isfile(self.output_fname) and (self.overwrite == False):
+            msg = ("\nThe following file already exists:\n" + self.output_fname + "\n"
+                "You must set ``overwrite`` to True in order to write to this location.\n")
+            raise HalotoolsError(msg)
+
+        file_size = os.path.getsize(self.input_fname)
+        num_rows_kept = 0
+
+        f = self.h5py.File(self.output_fname, 'w')
+        try:
+            table_created = False
+            for cut_chunk, num_bytes_read in self._cut_chunk_generator(chunk_memory_size, num_workers):
+                arr = self._process_halocat_chunk(cut_chunk, 
+                    columns_to_convert_from_kpc_to_mpc, 
+                    add_supplementary_halocat_columns).as_array()
+
+                if table_created is False:
+                    self._create_hdf5_table(f, arr.dtype)
+                    table_created = True
+                append_to_hdf5_table(f, arr, path = 'data')
+
+                num_rows_kept += len(arr)
+                if progress_callback is not None:
+                    progress_callback(num_bytes_read, file_size, num_rows_kept)
+
+            if table_created is False:
+                arr = self._process_halocat_chunk(np.zeros(0, dtype = self.dt), 
+                    columns_to_convert_from_kpc_to_mpc, 
+                    add_supplementary_halocat_columns).as_array()
+                self._create_hdf5_table(f, arr.dtype)
+        finally:
+            f.close()
+
+        self._write_metadata()
+
+    def _create_hdf5_table(self, f, dtype):
+        """ Create the resizable ``data`` table of the open hdf5 file 
+        with the storage options bound to the instance. 
+        """
+        create_hdf5_table(f, dtype, path = 'data', layout = self.hdf5_layout, 
+            chunk_size = self.hdf5_chunk_size, compression = self.hdf5_compression, 
+            shuffle = self.hdf5_shuffle, resizable = True)
+
     def write_to_disk(self):
         """ Method writes ``self.halo_table`` to ``self.output_fname`` 
+        with the ``hdf5_layout`` chosen in the constructor, 
         and also calls the ``self._write_metadata`` method to place the 
         hdf5 file into standard form. 
         """
-        self.halo_table.write(
-            self.output_fname, path='data', overwrite = self.overwrite)
+        write_table_to_hdf5(self.halo_table, self.output_fname, path = 'data', 
+            layout = self.hdf5_layout, chunk_size = self.hdf5_chunk_size, 
+            compression = self.hdf5_compression, shuffle = self.hdf5_shuffle, 
+            overwrite = self.overwrite)
         self._write_metadata()
 
     def _write_metadata(self):
@@ -679,6 +838,9 @@ class RockstarHlistReader(TabularAsciiReader):
             attrname = haloprop_key + '_row_cut_neq'
             f.attrs.create(attrname, cut_value)
 
+        if len(self.row_cut_predicates) > 0:
+            f.attrs.create('row_cut_predicates', str(self.row_cut_predicates))
+
         f.close()
 
 
@@ -694,17 +856,24 @@ class RockstarHlistReader(TabularAsciiReader):
         This implementation will eventually change in favor of something 
         more flexible. 
         """
+        self._add_supplementary_columns_to_table(self.halo_table)
+
+    def _add_supplementary_columns_to_table(self, halo_table):
+        """ Private method adds the halo_nfw_conc and halo_hostid columns 
+        to the input ``halo_table`` in place, so that the same processing 
+        can be applied to the full catalog or to each chunk of it. 
+        """
         ### Add the halo_nfw_conc column
-        if ('halo_rvir' in self.halo_table.keys()) & ('halo_rs' in self.halo_table.keys()):
-            self.halo_table['halo_nfw_conc'] = (
-                self.halo_table['halo_rvir'] / self.halo_table['halo_rs']
+        if ('halo_rvir' in halo_table.keys()) & ('halo_rs' in halo_table.keys()):
+            halo_table['halo_nfw_conc'] = (
+                halo_table['halo_rvir'] / halo_table['halo_rs']
                 )
 
-        ### Add the halo_nfw_conc column
-        self.halo_table['halo_hostid'] = self.halo_table['halo_id']
-        subhalo_mask = self.halo_table['halo_upid'] != -1
-        self.halo_table['halo_hostid'][subhalo_mask] = (
-            self.halo_table['halo_upid'][subhalo_mask]
+        ### Add the halo_hostid column
+        halo_table['halo_hostid'] = halo_table['halo_id']
+        subhalo_mask = halo_table['halo_upid'] != -1
+        halo_table['halo_hostid'][subhalo_mask] = (
+            halo_table['halo_upid'][subhalo_mask]
             )
 
 
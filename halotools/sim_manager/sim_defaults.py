@@ -26,6 +26,12 @@ default_version_name = 'halotools_alpha_version2'
 default_redshift = 0.0
 default_ptcl_version_name = 'halotools_alpha_version1'
 
+# Number of particles loaded into the ``ptcl_table`` attribute of a CachedHaloCatalog 
+# when the particle catalog stores nested random downsamplings of several sizes, 
+# e.g., one written by the ``add_ptcl_pyramid_to_cache`` method of UserSuppliedPtclCatalog. 
+# The smallest stored downsampling with at least this many particles is loaded. 
+default_num_ptcl = int(1e6)
+
 # The following two variables are used to define completeness cuts applied to halo catalogs
 # The Halotools default completeness cut is to throw out all halos with mpeak < mp*300, 
 # that is, to throw out any halo for which the virial mass of the main progenitor 
@@ -42,6 +48,11 @@ default_cosmology = cosmology.WMAP5
 # URLs of websites hosting catalogs used by the package
 processed_halo_tables_webloc = 'http://www.astro.yale.edu/aphearin/Data_files/halo_catalogs'
 ptcl_tables_webloc = 'http://www.astro.yale.edu/aphearin/Data_files/particle_catalogs'
+# Basename of the manifest published in each web directory of catalogs, 
+# storing the sha256 checksum of every catalog in the directory 
+checksum_manifest_basename = 'checksums.sha256'
+# Number of simultaneous connections used to download a catalog
+default_num_download_connections = 4
 
 default_cache_location = 'pkg_default'
 
@@ -9,10 +9,328 @@ __all__ = ('TabularAsciiReader', )
 
 import os
 import gzip
+import zlib
+import struct
 import collections
-from time import time
+import multiprocessing
+from warnings import warn
 import numpy as np
 
+# Bytes treated as delimiters between the entries of each row: space, tab, \n and \r
+_whitespace_bytes = (32, 9, 10, 13)
+
+# Blocks larger than this number of bytes are tokenized and converted in pieces. 
+# The temporary arrays of the tokenizer and of the conversion take up 
+# several times the size of the data they process, so that parsing in pieces 
+# keeps this overhead at a fixed ~100 Mb rather than a multiple of ``chunk_memory_size``. 
+_max_tokenized_block_size = 2**24
+
+
+def _isin(x, values):
+    return np.in1d(x, values)
+
+
+def _notin(x, values):
+    return ~np.in1d(x, values)
+
+# Operators permitted in the ``row_cut_predicates`` argument of TabularAsciiReader
+_row_cut_operators = {'<': np.less, '<=': np.less_equal, 
+    '>': np.greater, '>=': np.greater_equal, 
+    '==': np.equal, '!=': np.not_equal, 
+    'in': _isin, 'not in': _notin}
+
+
+def _tokenize_ascii_block(block):
+    """ Locate every whitespace-delimited entry in a block of complete lines 
+    of ASCII data with a single vectorized pass over the bytes of the block. 
+
+    Parameters 
+    -----------
+    block : bytes 
+        Consecutive lines of ASCII data. Empty lines are ignored. 
+
+    Returns 
+    --------
+    buf : array_like 
+        Numpy uint8 array viewing the bytes of ``block``
+
+    starts : array_like 
+        Integer array of shape (num_rows, num_columns) storing 
+        the index of the first byte of each entry in ``buf``, 
+        or None if the non-empty lines do not all have the same number of entries. 
+
+    ends : array_like 
+        Integer array of shape (num_rows, num_columns) storing 
+        one plus the index of the last byte of each entry in ``buf``, 
+        or None if the non-empty lines do not all have the same number of entries. 
+    """
+    buf = np.frombuffer(block, dtype=np.uint8)
+
+    is_delimiter = np.zeros(len(buf) + 2, dtype=bool)
+    is_delimiter[0] = is_delimiter[-1] = True
+    for byte in _whitespace_bytes:
+        is_delimiter[1:-1] |= (buf == byte)
+    transitions = np.diff(is_delimiter.view(np.int8))
+    starts = np.flatnonzero(transitions == -1)
+    ends = np.flatnonzero(transitions == 1)
+
+    # Count the entries on each line, ignoring empty lines 
+    line_index = np.searchsorted(np.flatnonzero(buf == 10), starts)
+    num_entries = np.bincount(line_index)
+    num_entries = num_entries[num_entries > 0]
+    if len(num_entries) == 0:
+        return buf, starts.reshape((0, 0)), ends.reshape((0, 0))
+    elif np.any(num_entries != num_entries[0]):
+        return buf, None, None
+    else:
+        num_columns = num_entries[0]
+        return buf, starts.reshape((-1, num_columns)), ends.reshape((-1, num_columns))
+
+
+def _convert_ascii_entries(buf, starts, ends, dtype):
+    """ Convert the entries of ``buf`` delimited by ``starts`` and ``ends`` 
+    to the input ``dtype``. The bytes of every entry are gathered into a 
+    fixed-width Numpy byte-string array, so that the conversion is carried out 
+    by Numpy in a single call rather than by the python interpreter for each entry. 
+    """
+    num_entries = len(starts)
+    if num_entries == 0:
+        return np.zeros(0, dtype=dtype)
+
+    widths = ends - starts
+    max_width = int(widths.max())
+    offsets = np.arange(max_width)
+    chars = buf[np.minimum(starts[:, np.newaxis] + offsets, len(buf) - 1)]
+    chars[offsets >= widths[:, np.newaxis]] = 0
+    return chars.view('S' + str(max_width)).reshape(num_entries).astype(dtype)
+
+
+def _split_ascii_block(block, piece_size):
+    """ Python generator yielding consecutive pieces of complete lines 
+    of the input block, each of approximately ``piece_size`` bytes. 
+    """
+    first = 0
+    while first < len(block):
+        last = block.find(b'\n', first + piece_size)
+        last = len(block) if last == -1 else last + 1
+        yield block[first:last]
+        first = last
+
+
+def _parse_ascii_block(block, column_indices_to_keep, dt, row_cut_clauses=()):
+    """ Parse a block of complete lines of ASCII data into a structured array. 
+    Blocks larger than ``_max_tokenized_block_size`` bytes are parsed in pieces, 
+    see `_parse_ascii_piece` for a description of the arguments. 
+    """
+    if len(block) <= _max_tokenized_block_size:
+        return _parse_ascii_piece(block, column_indices_to_keep, dt, row_cut_clauses)
+    return np.concatenate([_parse_ascii_piece(piece, column_indices_to_keep, dt, row_cut_clauses) 
+        for piece in _split_ascii_block(block, _max_tokenized_block_size)])
+
+
+def _parse_ascii_piece(block, column_indices_to_keep, dt, row_cut_clauses=()):
+    """ Parse a block of complete lines of ASCII data into a structured array. 
+
+    Only the entries in ``column_indices_to_keep`` are converted, 
+    and each is written directly into the corresponding column of the 
+    preallocated output array. If ``row_cut_clauses`` are given, 
+    the columns appearing in the clauses are converted first, 
+    and the remaining columns are only converted for the rows passing the cuts. 
+
+    Parameters 
+    -----------
+    block : bytes 
+        Consecutive lines of ASCII data. Empty lines are ignored. 
+
+    column_indices_to_keep : list 
+        Indices of the columns to keep, in the same order as the fields of ``dt``. 
+
+    dt : Numpy dtype 
+        Structured dtype of the returned array. 
+
+    row_cut_clauses : sequence, optional 
+        Sequence of (colname, operator, value) tuples, where ``operator`` is 
+        a key of ``_row_cut_operators``. Only rows passing every clause are returned. 
+        Default is an empty tuple, in which case all rows are returned. 
+
+    Returns 
+    --------
+    arr : array_like 
+        Structured Numpy array of the data in ``block``. 
+    """
+    buf, starts, ends = _tokenize_ascii_block(block)
+
+    if starts is None:
+        # The number of entries varies from line to line, 
+        # so we parse the lines one at a time instead
+        lines = (line.split() for line in block.splitlines() if line.strip())
+        arr = np.array([tuple(line[i] for i in column_indices_to_keep) 
+            for line in lines], dtype=dt)
+        return _apply_row_cut(arr, row_cut_clauses)
+
+    if starts.shape[0] == 0:
+        return np.empty(0, dtype=dt)
+
+    column_index_dict = dict(zip(dt.names, column_indices_to_keep))
+
+    # Convert the columns we cut on for all rows
+    mask = np.ones(starts.shape[0], dtype=bool)
+    cut_columns = {}
+    for colname, operator, value in row_cut_clauses:
+        if colname not in cut_columns:
+            column_index = column_index_dict[colname]
+            cut_columns[colname] = _convert_ascii_entries(buf, 
+                starts[:, column_index], ends[:, column_index], dt[colname])
+        mask &= _row_cut_operators[operator](cut_columns[colname], value)
+
+    # Convert the remaining columns only for the rows passing the cuts
+    if len(row_cut_clauses) > 0:
+        idx_kept = np.flatnonzero(mask)
+        starts, ends = starts[idx_kept], ends[idx_kept]
+    arr = np.empty(starts.shape[0], dtype=dt)
+    for name in dt.names:
+        if name in cut_columns:
+            arr[name] = cut_columns[name][idx_kept]
+        else:
+            column_index = column_index_dict[name]
+            arr[name] = _convert_ascii_entries(buf, 
+                starts[:, column_index], ends[:, column_index], dt[name])
+    return arr
+
+
+def _remove_comment_lines(block, header_char):
+    """ Remove every line of the input block beginning with ``header_char``. 
+    """
+    if header_char not in block:
+        return block
+    return b''.join(line for line in block.splitlines(True) 
+        if line[0:len(header_char)]!=header_char)
+
+
+def _apply_row_cut(array_chunk, row_cut_clauses):
+    """ Apply a boolean mask to the input array based on the input 
+    sequence of (colname, operator, value) tuples. 
+    See `TabularAsciiReader.apply_row_cut`. 
+    """
+    mask = np.ones(len(array_chunk), dtype = bool)
+
+    for colname, operator, value in row_cut_clauses:
+        mask &= _row_cut_operators[operator](array_chunk[colname], value)
+
+    return array_chunk[mask]
+
+
+def _bgzf_member_offsets(fname):
+    """ Byte offsets of the gzip members of a BGZF-compressed file. 
+
+    BGZF files (as written by ``bgzip``) are a concatenation of gzip members, 
+    each of which stores its own compressed size in the ``BC`` subfield 
+    of its header, so that the member boundaries can be found 
+    without decompressing the file. 
+
+    Parameters 
+    -----------
+    fname : string 
+        Absolute path to the file. 
+
+    Returns 
+    --------
+    offsets : array_like 
+        Integer array storing the offset of the first byte of each member, 
+        followed by the size of the file, 
+        or None if the file is not in BGZF format. 
+    """
+    file_size = os.path.getsize(fname)
+    offsets = [0]
+    with open(fname, 'rb') as f:
+        while offsets[-1] < file_size:
+            header = f.read(12)
+            if (len(header) < 12) or (header[0:3] != b'\x1f\x8b\x08') or not (ord(header[3:4]) & 4):
+                return None
+            xlen = struct.unpack('<H', header[10:12])[0]
+            extra = f.read(xlen)
+            bsize = None
+            i = 0
+            while i + 4 <= len(extra):
+                slen = struct.unpack('<H', extra[i+2:i+4])[0]
+                if (extra[i:i+2] == b'BC') and (slen == 2):
+                    bsize = struct.unpack('<H', extra[i+4:i+6])[0]
+                i += 4 + slen
+            if bsize is None:
+                return None
+            offsets.append(offsets[-1] + bsize + 1)
+            f.seek(offsets[-1])
+    if offsets[-1] != file_size:
+        return None
+    return np.array(offsets, dtype=np.int64)
+
+
+def _read_byte_range(fname, start, end, is_bgzf):
+    """ Read the bytes ``start`` through ``end`` of the input file, 
+    decompressing them if ``is_bgzf`` is True, in which case 
+    ``start`` and ``end`` must lie on member boundaries. 
+    """
+    with open(fname, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    if not is_bgzf:
+        return data
+
+    decompressed = []
+    while len(data) > 0:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        decompressed.append(decompressor.decompress(data))
+        data = decompressor.unused_data
+    return b''.join(decompressed)
+
+
+def _parse_byte_range(args):
+    """ Read, parse and cut the data stored in a range of bytes of the input file. 
+    Function is defined at module level so that it can be mapped over a process pool. 
+
+    Returns 
+    --------
+    head : bytes 
+        Bytes preceding the first newline of the range. 
+        If the range contains no newline, ``head`` stores the entire range. 
+
+    arr : array_like 
+        Structured Numpy array of the rows passing the cuts 
+        among the complete lines of the range. 
+
+    tail : bytes 
+        Bytes following the last newline of the range, 
+        or None if the range contains no newline. 
+    """
+    (fname, start, end, is_bgzf, header_char, 
+        column_indices_to_keep, dt, row_cut_clauses) = args
+
+    data = _read_byte_range(fname, start, end, is_bgzf)
+    first_newline = data.find(b'\n')
+    if first_newline == -1:
+        return data, np.zeros(0, dtype=dt), None
+    last_newline = data.rfind(b'\n')
+
+    block = _remove_comment_lines(data[first_newline+1:last_newline+1], header_char)
+    arr = _parse_ascii_block(block, column_indices_to_keep, dt, row_cut_clauses)
+    return data[:first_newline+1], arr, data[last_newline+1:]
+
+
+def _bounded_imap(pool, func, args, max_in_flight):
+    """ Python generator yielding ``func(arg)`` for each element of ``args``, in order, 
+    evaluated in the input process pool. Unlike ``pool.imap``, at most ``max_in_flight`` 
+    tasks are submitted ahead of the consumer, so that the workers cannot 
+    accumulate an unbounded number of results in memory. 
+    """
+    pending = collections.deque()
+    for arg in args:
+        pending.append(pool.apply_async(func, (arg, )))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().get()
+    while len(pending) > 0:
+        yield pending.popleft().get()
+
+
 class TabularAsciiReader(object):
     """
     Class providing a memory-efficient algorithm for 
@@ -43,13 +361,13 @@ class TabularAsciiReader(object):
 
     The algorithm assumes that data of known, unchanging type is 
     arranged in a consecutive sequence of lines within the ascii file, 
-    that the data stream begins with the first line that is not the ``header_char``, 
-    and that the first subsequent appearance of an empty line demarcates the end 
-    of the data stream. 
+    and that the data stream begins with the first line that is not the ``header_char``. 
+    Empty lines and lines beginning with ``header_char`` that appear 
+    within the data stream are ignored. 
     """
     def __init__(self, input_fname, columns_to_keep_dict, 
         header_char='#', row_cut_min_dict = {}, row_cut_max_dict = {}, 
-        row_cut_eq_dict = {}, row_cut_neq_dict = {}):
+        row_cut_eq_dict = {}, row_cut_neq_dict = {}, row_cut_predicates = []):
         """
         Parameters 
         -----------
@@ -146,6 +464,23 @@ class TabularAsciiReader(object):
             For example, if row_cut_neq_dict = {'upid': -1}, then *no* rows of the 
             returned data table will have a upid of -1. 
 
+        row_cut_predicates : list, optional 
+            List of three-element tuples (colname, operator, value) providing 
+            general row-cuts on the tabular ASCII data, where ``operator`` is one of 
+            '<', '<=', '>', '>=', '==', '!=', 'in' or 'not in'. For the 'in' and 
+            'not in' operators, ``value`` is a sequence of permitted or forbidden values. 
+            As for the row-cut dictionaries, ``colname`` must be a key of the input 
+            ``columns_to_keep_dict``. Only rows passing every predicate and 
+            every cut in the row-cut dictionaries will appear in the returned data table. 
+
+            For example, if row_cut_predicates = [('mass', '>=', 1e10), ('upid', 'in', [-1, 0])], 
+            then all rows of the returned data table will have a mass of at least 1e10 
+            and a upid of either -1 or 0. 
+
+            The columns appearing in a row-cut are parsed first, and 
+            the remaining columns are only parsed for the rows passing the cuts, 
+            so that selective cuts make reading the file proportionally faster. 
+
 
         Examples 
         ---------
@@ -192,8 +527,10 @@ class TabularAsciiReader(object):
         self.row_cut_max_dict = row_cut_max_dict
         self.row_cut_eq_dict = row_cut_eq_dict
         self.row_cut_neq_dict = row_cut_neq_dict
+        self.row_cut_predicates = list(row_cut_predicates)
 
         self._verify_input_row_cuts_keys()
+        self._verify_row_cut_predicates()
         self._verify_min_max_consistency()
         self._verify_eq_neq_consistency()
         self._enforce_no_repeated_columns()
@@ -220,6 +557,38 @@ class TabularAsciiReader(object):
                         "on a column that you do not keep.\n")
                     raise KeyError(msg)
 
+    def _verify_row_cut_predicates(self):
+        """ Require each element of ``row_cut_predicates`` to be a three-element tuple 
+        storing a kept column, a permitted operator, and a value. 
+        """
+        for predicate in self.row_cut_predicates:
+            try:
+                assert type(predicate) == tuple
+                assert len(predicate) == 3
+            except AssertionError:
+                msg = ("\nEach element of the input ``row_cut_predicates`` \n"
+                    "must be a three-element tuple (colname, operator, value).\n")
+                raise TypeError(msg)
+
+            colname, operator, value = predicate
+            try:
+                assert colname in self.columns_to_keep_dict.keys()
+            except AssertionError:
+                msg = ("\nThe ``"+colname+"`` key does not appear in the input \n"
+                    "``columns_to_keep_dict``, but it does appear in the "
+                    "input ``row_cut_predicates``. \n"
+                    "It is not permissible to place a cut "
+                    "on a column that you do not keep.\n")
+                raise KeyError(msg)
+
+            try:
+                assert operator in _row_cut_operators
+            except AssertionError:
+                msg = ("\nThe operator ``"+str(operator)+"`` appearing in the input "
+                    "``row_cut_predicates`` is not recognized.\n"
+                    "The permitted operators are " + str(sorted(_row_cut_operators.keys())) + "\n")
+                raise ValueError(msg)
+
     def _verify_min_max_consistency(self, **kwargs):
         """ Verify that no min_cut column has a value greater to the corresponding max_cut. 
 
@@ -458,6 +827,9 @@ class TabularAsciiReader(object):
         The generator only yields columns that were included 
         in the ``columns_to_keep_dict`` passed to the constructor. 
 
+        The `read_ascii` method does not use this generator, 
+        and instead parses entire blocks of lines at once with vectorized Numpy operations. 
+
         Parameters 
         -----------
         chunk_size : int 
@@ -480,6 +852,37 @@ class TabularAsciiReader(object):
             yield tuple(parsed_line[i] for i in self.column_indices_to_keep)
             cur += 1 
 
+    def _skip_header(self, f):
+        """ Advance the input open file object past the header, 
+        returning the first line of data, or an empty string if there is no data. 
+        The header is defined in the same way as in `header_len`. 
+        """
+        for line in iter(f.readline, ''):
+            if ( (line[0:len(self.header_char)]!=self.header_char) and (line!="\n") ):
+                return line
+        return ''
+
+    def _data_block_generator(self, f, block_size, first_line=''):
+        """ Python generator yielding consecutive blocks of complete lines 
+        of the input open file object, each of approximately ``block_size`` bytes. 
+        """
+        block = first_line + f.read(max(1, int(block_size)))
+        while block != '':
+            if block[-1] != '\n':
+                block += f.readline()
+            yield block
+            block = f.read(max(1, int(block_size)))
+
+    def _num_bytes_read(self, f):
+        """ Number of bytes of the input file, as stored on disk, 
+        that have been consumed by the input open file object. 
+        For compressed files, this is the position in the compressed stream. 
+        """
+        try:
+            return getattr(f, 'fileobj', f).tell()
+        except (AttributeError, IOError, ValueError):
+            return 0
+
     def apply_row_cut(self, array_chunk):
         """ Method applies a boolean mask to the input array 
         based on the row-cuts determined by the 
@@ -493,27 +896,173 @@ class TabularAsciiReader(object):
         --------
         cut_array : Numpy array             
         """ 
-        mask = np.ones(len(array_chunk), dtype = bool)
+        return _apply_row_cut(array_chunk, self._row_cut_clauses())
 
+    def _row_cut_clauses(self):
+        """ List of (colname, operator, value) tuples expressing 
+        all the row-cuts passed to the constructor. 
+        """
+        clauses = []
         for colname, lower_bound in self.row_cut_min_dict.iteritems():
-            mask *= array_chunk[colname] > lower_bound
-
+            clauses.append((colname, '>', lower_bound))
         for colname, upper_bound in self.row_cut_max_dict.iteritems():
-            mask *= array_chunk[colname] < upper_bound
-
+            clauses.append((colname, '<', upper_bound))
         for colname, equality_condition in self.row_cut_eq_dict.iteritems():
-            mask *= array_chunk[colname] == equality_condition
-
+            clauses.append((colname, '==', equality_condition))
         for colname, inequality_condition in self.row_cut_neq_dict.iteritems():
-            mask *= array_chunk[colname] != inequality_condition
+            clauses.append((colname, '!=', inequality_condition))
+        for colname, operator, value in self.row_cut_predicates:
+            clauses.append((colname, operator, value))
+        return clauses
+
+    def _append_rows(self, full_array, num_rows_kept, cut_chunk):
+        """ Append ``cut_chunk`` to the first ``num_rows_kept`` rows of ``full_array``, 
+        doubling the size of ``full_array`` if it is too small to hold the new rows. 
+        Returns the (possibly reallocated) array and the new number of rows. 
+        """
+        num_rows_needed = num_rows_kept + len(cut_chunk)
+        if num_rows_needed > len(full_array):
+            new_array = np.empty(max(num_rows_needed, 2*len(full_array)), dtype=self.dt)
+            new_array[:num_rows_kept] = full_array[:num_rows_kept]
+            full_array = new_array
+        full_array[num_rows_kept:num_rows_needed] = cut_chunk
+        return full_array, num_rows_needed
+
+    def _parse_and_cut(self, block):
+        """ Parse and cut a block of complete lines that may contain comment lines. 
+        """
+        block = _remove_comment_lines(block, self.header_char)
+        return _parse_ascii_block(block, self.column_indices_to_keep, self.dt, 
+            self._row_cut_clauses())
 
-        return array_chunk[mask]
+    def _byte_range_boundaries(self, block_size):
+        """ Split the input file into consecutive ranges of approximately ``block_size`` 
+        bytes that can be read independently of one another. 
 
-    def read_ascii(self, chunk_memory_size = 500.):
+        Uncompressed files are split at newline-aligned byte offsets, 
+        and BGZF-compressed files at gzip member boundaries. 
+
+        Returns 
+        --------
+        boundaries : array_like 
+            Integer array storing the first byte of each range, 
+            followed by the size of the file, or None if the file cannot be split. 
+
+        is_bgzf : bool 
+            True if the file is BGZF-compressed. 
+        """
+        file_size = os.path.getsize(self.input_fname)
+        targets = np.arange(block_size, file_size, block_size).astype(np.int64)
+
+        if self._compression_safe_file_opener is gzip.open:
+            member_offsets = _bgzf_member_offsets(self.input_fname)
+            if member_offsets is None:
+                return None, True
+            split_points = member_offsets[np.searchsorted(member_offsets, targets)]
+            is_bgzf = True
+        else:
+            split_points = []
+            with open(self.input_fname, 'rb') as f:
+                for target in targets:
+                    f.seek(target)
+                    _s = f.readline()
+                    split_points.append(f.tell())
+            is_bgzf = False
+
+        boundaries = np.unique(np.concatenate(([0], split_points, [file_size])))
+        return boundaries.astype(np.int64), is_bgzf
+
+    def _parallel_chunk_generator(self, boundaries, is_bgzf, num_workers):
+        """ Python generator parsing the independent ranges of bytes 
+        delimited by ``boundaries`` in a pool of ``num_workers`` processes, 
+        and yielding the results in order. At most two ranges per process 
+        are parsed ahead of the consumer of the generator. 
+
+        Lines straddling the boundary between two ranges, which can only occur 
+        for BGZF-compressed files, are reassembled and parsed by the calling process. 
+        """
+        args = [(self.input_fname, start, end, is_bgzf, self.header_char, 
+            self.column_indices_to_keep, self.dt, self._row_cut_clauses()) 
+            for start, end in zip(boundaries[:-1], boundaries[1:])]
+
+        carry = b''
+        pool = multiprocessing.Pool(num_workers)
+        try:
+            results = _bounded_imap(pool, _parse_byte_range, args, 2*num_workers)
+            for (head, arr, tail), start, end in zip(results, boundaries[:-1], boundaries[1:]):
+                if tail is None:
+                    carry += head
+                else:
+                    straddling_rows = self._parse_and_cut(carry + head)
+                    if len(straddling_rows) > 0:
+                        yield straddling_rows, int(start)
+                    carry = tail
+                yield arr, int(end)
+        finally:
+            pool.close()
+            pool.join()
+
+        straddling_rows = self._parse_and_cut(carry)
+        if len(straddling_rows) > 0:
+            yield straddling_rows, int(boundaries[-1])
+
+    def _cut_chunk_generator(self, chunk_memory_size = 500., num_workers = 1):
+        """ Python generator yielding consecutive chunks of the data 
+        that passes the row- and column-cuts, together with the number of bytes 
+        of the file, as stored on disk, that have been processed. 
+        See `read_ascii` for a description of the arguments. 
+        """
+        if chunk_memory_size <= 0:
+            msg = ("\nMust choose non-zero size for input ``chunk_memory_size``")
+            raise ValueError(msg)
+        chunk_memory_size *= 1e6 # convert to bytes to match units of file_size
+
+        if num_workers == 'max':
+            num_workers = multiprocessing.cpu_count()
+        if (type(num_workers) is not int) or (num_workers < 1):
+            msg = ("\nInput ``num_workers`` must be a positive integer or the string 'max'")
+            raise ValueError(msg)
+
+        if num_workers > 1:
+            # Use at least one chunk per process
+            file_size = os.path.getsize(self.input_fname)
+            block_size = max(1, int(min(chunk_memory_size, np.ceil(file_size/float(num_workers)))))
+            boundaries, is_bgzf = self._byte_range_boundaries(block_size)
+            if boundaries is not None:
+                for cut_chunk, num_bytes_read in self._parallel_chunk_generator(
+                        boundaries, is_bgzf, num_workers):
+                    yield cut_chunk, num_bytes_read
+                return
+            else:
+                msg = ("\nThe input file ``" + self.input_fname + "`` is gzipped \n"
+                    "but not in the BGZF format, and so cannot be split into blocks \n"
+                    "for parallel processing. Reading the file with a single process.\n"
+                    "To enable parallel processing, recompress the file with ``bgzip``.\n")
+                warn(msg)
+
+        with self._compression_safe_file_opener(self.input_fname, 'r') as f:
+
+            first_line = self._skip_header(f)
+
+            for block in self._data_block_generator(f, chunk_memory_size, first_line):
+                yield self._parse_and_cut(block), self._num_bytes_read(f)
+
+    def read_ascii(self, chunk_memory_size = 500., progress_callback = None, num_workers = 1):
         """ Method reads the input ascii and returns 
         a structured Numpy array of the data 
         that passes the row- and column-cuts. 
 
+        The file is decompressed and scanned exactly once: 
+        the data is streamed in blocks of complete lines, 
+        each block is parsed and cut, and the surviving rows are appended 
+        to an output buffer whose size is doubled whenever it fills up. 
+
+        If ``num_workers`` is larger than one, the file is instead split into 
+        independent ranges of bytes that are parsed and cut in a pool of processes. 
+        Uncompressed files are split at newline-aligned byte offsets, and gzipped files 
+        compressed in the BGZF format (e.g., with ``bgzip``) at gzip member boundaries. 
+        Ordinary gzipped files cannot be split, and are read with a single process. 
+
         Parameters 
         ----------
         chunk_memory_size : int, optional 
@@ -521,8 +1070,29 @@ class TabularAsciiReader(object):
             that will be processed in chunks. This variable 
             must be smaller than the amount of RAM on your machine; 
             choosing larger values typically improves performance. 
+            Each chunk is tokenized and converted in pieces of 16 Mb, 
+            whose temporary arrays take up an additional ~100 Mb, 
+            so that reading a chunk requires roughly ``chunk_memory_size`` + 100 Mb, 
+            plus twice the memory of the rows of the chunk passing the cuts. 
             Default is 500 Mb. 
 
+        progress_callback : callable, optional 
+            Function called after each chunk has been processed 
+            as ``progress_callback(num_bytes_read, num_bytes_total, num_rows_kept)``, 
+            where ``num_bytes_read`` and ``num_bytes_total`` refer to the 
+            file as stored on disk (i.e., compressed, for gzipped files), 
+            and ``num_rows_kept`` is the number of rows passing the cuts so far. 
+            Default is None, in which case no progress is reported. 
+
+        num_workers : int, optional 
+            Number of processes used to parse the file. 
+            If set to the string 'max', use all available cores. 
+            Each process parses chunks of ``chunk_memory_size`` Megabytes 
+            of the file as stored on disk (i.e., compressed, for BGZF files), 
+            and at most two parsed chunks per process wait to be appended to the output, 
+            so that the peak memory usage grows in proportion to ``num_workers``. 
+            Default is 1, in which case the file is parsed by the calling process. 
+
         Returns 
         --------
         full_array : array_like 
@@ -535,63 +1105,15 @@ class TabularAsciiReader(object):
         ----------
         data_chunk_generator
         """
-        print("\n...Processing ASCII data of file: \n%s\n " % self.input_fname)
-        start = time()
-
         file_size = os.path.getsize(self.input_fname) 
-        chunk_memory_size *= 1e6 # convert to bytes to match units of file_size
-        num_data_rows = self.data_len()
-        print("Total number of rows in detected data = %i" % num_data_rows)
-
-        # Set the number of chunks to be filesize/chunk_memory, 
-        # but enforcing that 0 < Nchunks <= num_data_rows
-        try:
-            Nchunks = max(1, min(file_size / chunk_memory_size, num_data_rows))
-        except ZeroDivisionError:
-            msg = ("\nMust choose non-zero size for input ``chunk_memory_size``")
-            raise ValueError(msg)
-
-        num_rows_in_chunk = int(num_data_rows / float(Nchunks))
-        num_full_chunks = num_data_rows / num_rows_in_chunk
-        num_rows_in_chunk_remainder = num_data_rows - num_rows_in_chunk*Nchunks
-
-        header_length = self.header_len()
-        print("Number of rows in detected header = %i \n" % header_length)
-
-        chunklist = []
-        with self._compression_safe_file_opener(self.input_fname, 'r') as f:
-
-            for skip_header_row in xrange(header_length):
-                _s = f.readline()
 
-            for _i in xrange(num_full_chunks):
-                print("... working on chunk "+str(_i)+" of "+str(num_full_chunks))
+        full_array = np.empty(0, dtype=self.dt)
+        num_rows_kept = 0
+        for cut_chunk, num_bytes_read in self._cut_chunk_generator(chunk_memory_size, num_workers):
+            full_array, num_rows_kept = self._append_rows(full_array, num_rows_kept, cut_chunk)
 
-                chunk_array = np.array(list(
-                    self.data_chunk_generator(num_rows_in_chunk, f)), dtype=self.dt)
-                cut_chunk = self.apply_row_cut(chunk_array)
-                chunklist.append(cut_chunk)
-
-            # Now for the remainder chunk
-            chunk_array = np.array(list(
-                self.data_chunk_generator(num_rows_in_chunk_remainder, f)), dtype=self.dt)
-            cut_chunk = self.apply_row_cut(chunk_array)
-            chunklist.append(cut_chunk)
-
-        full_array = np.concatenate(chunklist)
-                
-        end = time()
-        runtime = (end-start)
-
-        if runtime > 60:
-            runtime = runtime/60.
-            msg = "Total runtime to read in ASCII = %.1f minutes\n"
-        else:
-            msg = "Total runtime to read in ASCII = %.2f seconds\n"
-        print(msg % runtime)
-        print("\a")
+            if progress_callback is not None:
+                progress_callback(num_bytes_read, file_size, num_rows_kept)
 
+        full_array.resize(num_rows_kept, refcheck=False)
         return full_array
-
-
-
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+from __future__ import (absolute_import, division, print_function)
+
+from unittest import TestCase
+import os, shutil, sqlite3, warnings
+
+from astropy.config.paths import _find_home
+from astropy.tests.helper import pytest
+from astropy.table import Table
+
+from ..cache_log_database import CacheLogDatabase
+
+__all__ = ('TestCacheLogDatabase', )
+
+
+class TestCacheLogDatabase(TestCase):
+    """
+    """
+
+    def setUp(self):
+        self.tmpdir = os.path.join(_find_home(), '.temp_halotools_testing_dir')
+        try:
+            os.makedirs(self.tmpdir)
+        except OSError:
+            pass
+
+        self.fname = os.path.join(self.tmpdir, 'cache_log.db')
+        self.ascii_fname = os.path.join(self.tmpdir, 'cache_log.txt')
+        self.log_attributes = ['simname', 'version_name', 'redshift', 'fname']
+
+        self.rows = [
+            {'simname': 'bolshoi', 'version_name': 'v1', 'redshift': 0.0, 'fname': 'a.hdf5'},
+            {'simname': 'bolshoi', 'version_name': 'v1', 'redshift': 1.0, 'fname': 'b.hdf5'},
+            {'simname': 'bolshoi', 'version_name': 'v2', 'redshift': 1.0, 'fname': 'c.hdf5'},
+            {'simname': 'multidark', 'version_name': 'v1', 'redshift': 0.5, 'fname': 'd.hdf5'}]
+
+    def test_insert_and_lookup(self):
+        db = CacheLogDatabase(self.fname, self.log_attributes)
+        assert db.rows() == []
+
+        db.insert_rows(self.rows)
+        db.insert_rows(self.rows[0:2])
+        assert len(db.rows()) == 4
+
+        matches = db.rows(simname = 'bolshoi', redshift = 1)
+        assert [row['fname'] for row in matches] == ['b.hdf5', 'c.hdf5']
+        assert db.rows(simname = 'bolshoi', redshift = 0.98) == []
+        matches = db.rows(simname = 'bolshoi', redshift = 0.98, dz_tol = 0.05)
+        assert len(matches) == 2
+
+        with pytest.raises(KeyError):
+            _ = db.rows(halo_finder = 'rockstar')
+
+        conn = sqlite3.connect(self.fname)
+        journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        conn.close()
+        assert journal_mode.lower() == 'wal'
+
+    def test_delete_and_replace(self):
+        db = CacheLogDatabase(self.fname, self.log_attributes)
+        db.insert_rows(self.rows)
+
+        db.delete_rows(self.rows[0:1])
+        db.delete_rows(self.rows[0:1])
+        assert len(db.rows()) == 3
+        assert db.rows(fname = 'a.hdf5') == []
+
+        db.replace_rows(self.rows[2:])
+        assert [row['fname'] for row in db.rows()] == ['c.hdf5', 'd.hdf5']
+
+        # Changes made through one instance are seen by any other instance
+        db2 = CacheLogDatabase(self.fname, self.log_attributes)
+        assert db2.rows() == db.rows()
+
+    def test_ascii_migration(self):
+        t = Table(rows = [[row[attr] for attr in self.log_attributes] for row in self.rows],
+            names = self.log_attributes)
+        t.write(self.ascii_fname, format = 'ascii')
+
+        db = CacheLogDatabase(self.fname, self.log_attributes, ascii_fname = self.ascii_fname)
+        assert len(db.rows()) == 4
+        assert db.rows(simname = 'multidark')[0]['redshift'] == 0.5
+
+        # The ASCII log is only migrated once
+        db.delete_rows(self.rows)
+        db = CacheLogDatabase(self.fname, self.log_attributes, ascii_fname = self.ascii_fname)
+        assert db.rows() == []
+        assert os.path.isfile(self.ascii_fname)
+
+    def test_unreadable_ascii_log(self):
+        """ Verify that an ASCII log that cannot be read triggers a warning 
+        and is migrated once it has been fixed, rather than being silently dropped. 
+        """
+        with open(self.ascii_fname, 'w') as f:
+            f.write('simname version_name\nbolshoi v1\n')
+
+        with warnings.catch_warnings(record = True) as w:
+            warnings.simplefilter('always')
+            db = CacheLogDatabase(self.fname, self.log_attributes, ascii_fname = self.ascii_fname)
+            assert db.rows() == []
+        assert len(w) == 1
+        assert "could not be read" in str(w[0].message)
+
+        os.remove(self.ascii_fname)
+        t = Table(rows = [[row[attr] for attr in self.log_attributes] for row in self.rows],
+            names = self.log_attributes)
+        t.write(self.ascii_fname, format = 'ascii')
+        db = CacheLogDatabase(self.fname, self.log_attributes, ascii_fname = self.ascii_fname)
+        assert len(db.rows()) == 4
+
+    def test_initialize_once(self):
+        """ Verify that the tables are only created by the first connection of an instance, 
+        or after the database file has been removed. 
+        """
+        db = CacheLogDatabase(self.fname, self.log_attributes)
+        num_calls = []
+        initialize = db._initialize
+        db._initialize = lambda conn: (num_calls.append(1), initialize(conn))
+
+        db.insert_rows(self.rows)
+        assert len(db.rows()) == 4
+        db.delete_rows(self.rows[0:1])
+        assert len(num_calls) == 1
+
+        os.remove(self.fname)
+        assert db.rows() == []
+        assert len(num_calls) == 2
+
+    def tearDown(self):
+        try:
+            shutil.rmtree(self.tmpdir)
+        except:
+            pass
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+from __future__ import (absolute_import, division, print_function)
+
+from unittest import TestCase
+import os, shutil
+
+from astropy.config.paths import _find_home
+from astropy.tests.helper import pytest
+from astropy.table import Table
+
+import numpy as np
+
+try:
+    import h5py
+    HAS_H5PY = True
+except ImportError:
+    HAS_H5PY = False
+
+from .. import halo_table_cache_log_entry
+from ..derived_column_cache import (load_derived_column, store_derived_column,
+    retrieve_derived_column, rows_checksum)
+
+__all__ = ('TestDerivedColumnCache', )
+
+
+class TestDerivedColumnCache(TestCase):
+    """
+    """
+
+    def setUp(self):
+        self.tmpdir = os.path.join(_find_home(), '.temp_halotools_testing_dir')
+        try:
+            os.makedirs(self.tmpdir)
+        except OSError:
+            pass
+
+        # Keep the sidecar files out of the Halotools cache
+        self._sidecar_dirname = halo_table_cache_log_entry.sidecar_dirname
+        halo_table_cache_log_entry.sidecar_dirname = os.path.join(self.tmpdir, 'halo_table_sidecars')
+
+        Nhalos = 100
+        self.table = Table({'halo_id': np.arange(Nhalos),
+            'halo_mvir': np.logspace(10, 15, Nhalos)})
+        self.table.meta['Lbox'] = 250.
+        self.fname = os.path.join(self.tmpdir, 'derived_column_table.hdf5')
+        self.table.write(self.fname, path='data', overwrite = True)
+
+        self.num_calls = 0
+
+    def compute_log_mass(self):
+        self.num_calls += 1
+        return np.log10(self.table['halo_mvir'])
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_store_and_load(self):
+        generator = 'log10(halo_mvir), version 1'
+        assert load_derived_column(self.fname, 'halo_logmass', generator) is None
+
+        stat = os.stat(self.fname)
+        for i in range(3):
+            logmass = retrieve_derived_column(self.fname, 'halo_logmass',
+                self.compute_log_mass, generator)
+            assert np.allclose(logmass, np.log10(self.table['halo_mvir']))
+        assert self.num_calls == 1
+
+        # The hdf5 file of the halo table is never written to
+        assert os.stat(self.fname).st_mtime == stat.st_mtime
+        assert os.stat(self.fname).st_size == stat.st_size
+        f = h5py.File(self.fname, 'r')
+        assert list(f.keys()) == ['data']
+        f.close()
+
+        # Columns stored by a different version of the generating function are stale
+        assert load_derived_column(self.fname, 'halo_logmass', 'log10(halo_mvir), version 2') is None
+        # as are columns computed for a different selection of rows
+        rows = rows_checksum(self.table['halo_id'][10:])
+        assert load_derived_column(self.fname, 'halo_logmass', generator, rows = rows) is None
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_stale_after_data_modification(self):
+        generator = 'log10(halo_mvir), version 1'
+        assert store_derived_column(self.fname, 'halo_logmass',
+            self.compute_log_mass(), generator)
+        assert load_derived_column(self.fname, 'halo_logmass', generator) is not None
+
+        f = h5py.File(self.fname, 'a')
+        data = f['data'][...]
+        data['halo_mvir'][-1] *= 2
+        f['data'][...] = data
+        f.close()
+        stat = os.stat(self.fname)
+        os.utime(self.fname, (stat.st_atime + 10, stat.st_mtime + 10))
+
+        assert load_derived_column(self.fname, 'halo_logmass', generator) is None
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_unwritable_sidecar_dirname(self):
+        """ Failing to store a derived column only means that it is computed again.
+        """
+        not_a_dirname = os.path.join(self.tmpdir, 'not_a_directory')
+        open(not_a_dirname, 'w').close()
+        halo_table_cache_log_entry.sidecar_dirname = not_a_dirname
+
+        generator = 'log10(halo_mvir), version 1'
+        assert not store_derived_column(self.fname, 'halo_logmass',
+            self.compute_log_mass(), generator)
+        for i in range(2):
+            logmass = retrieve_derived_column(self.fname, 'halo_logmass',
+                self.compute_log_mass, generator)
+            assert np.allclose(logmass, np.log10(self.table['halo_mvir']))
+        assert self.num_calls == 3
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_rows_checksum(self):
+        halo_id = self.table['halo_id']
+        assert rows_checksum(halo_id) == rows_checksum(np.array(halo_id))
+        assert rows_checksum(halo_id) != rows_checksum(halo_id[::-1])
+        assert rows_checksum(halo_id) != rows_checksum(halo_id[1:])
+
+    def tearDown(self):
+        halo_table_cache_log_entry.sidecar_dirname = self._sidecar_dirname
+        try:
+            shutil.rmtree(self.tmpdir)
+        except:
+            pass
@@ -10,10 +10,19 @@ from astropy.tests.helper import remote_data, pytest
 
 import numpy as np 
 
-from ..fake_sim import FakeSim, FakeSimHalosNearBoundaries
+try:
+	import h5py
+	HAS_H5PY = True
+except ImportError:
+	HAS_H5PY = False
+
+from ..fake_sim import (FakeSim, FakeSimHalosNearBoundaries, 
+	ClusteredFakeSim, clustered_fake_halo_chunks, write_clustered_fake_sim)
+from ..halo_table_cache_log_entry import HaloTableCacheLogEntry
+from ..hdf5_table_layout import read_hdf5_table
 from ...custom_exceptions import HalotoolsError
 
-__all__ = ['TestFakeSim', 'TestFakeSimHalosNearBoundaries']
+__all__ = ['TestFakeSim', 'TestFakeSimHalosNearBoundaries', 'TestClusteredFakeSim']
 
 class TestFakeSim(TestCase):
 	"""
@@ -53,6 +62,119 @@ class TestFakeSimHalosNearBoundaries(TestCase):
 		assert not np.any( (self.fake_sim.halo_table['halo_x'] > 1) & 
 			(self.fake_sim.halo_table['halo_x'] < self.fake_sim.Lbox - 1) )
 
+class TestClusteredFakeSim(TestCase):
+	"""
+	"""
+	def setUp(self):
+		self.fake_sim = ClusteredFakeSim(num_halos = 2e4)
+		self.halo_table = self.fake_sim.halo_table
+
+		self.tmpdir = os.path.join(_find_home(), '.temp_halotools_testing_dir')
+		try:
+			os.makedirs(self.tmpdir)
+		except OSError:
+			pass
+
+	def test_subhalos(self):
+		t = self.halo_table
+		assert len(np.unique(t['halo_id'])) == len(t)
 
+		subhalo_mask = t['halo_upid'] != -1
+		assert 0.05 < subhalo_mask.mean() < 0.15
+		assert np.all(t['halo_hostid'][~subhalo_mask] == t['halo_id'][~subhalo_mask])
+		assert np.all(t['halo_hostid'][subhalo_mask] == t['halo_upid'][subhalo_mask])
+		assert set(t['halo_upid'][subhalo_mask]).issubset(set(t['halo_id'][~subhalo_mask]))
 
+		host_mass = dict(zip(t['halo_id'][~subhalo_mask], t['halo_mvir'][~subhalo_mask]))
+		subhalo_host_mass = np.array([host_mass[upid] for upid in t['halo_upid'][subhalo_mask]])
+		assert np.all(t['halo_mvir'][subhalo_mask] < subhalo_host_mass)
 
+	def test_positions(self):
+		for key in ('halo_x', 'halo_y', 'halo_z'):
+			assert np.all(self.halo_table[key] >= 0)
+			assert np.all(self.halo_table[key] < self.fake_sim.Lbox)
+		for key in ('x', 'y', 'z'):
+			assert np.all(self.fake_sim.ptcl_table[key] >= 0)
+			assert np.all(self.fake_sim.ptcl_table[key] < self.fake_sim.Lbox)
+
+	def test_clustering(self):
+		""" Halos are far more likely to have a close neighbor than uniformly distributed points, 
+		with a clustering amplitude that does not depend on the number density of halos. 
+		"""
+		def cell_averaged_xi(halo_table, Lbox, cell_size = 10.):
+			t = halo_table[halo_table['halo_upid'] == -1]
+			pos = np.vstack([t['halo_x'], t['halo_y'], t['halo_z']]).T.astype('f8')
+			num_cells_per_dim = int(Lbox/cell_size)
+			cell_ids = np.floor(pos/cell_size).astype(int) % num_cells_per_dim
+			cell_ids = np.ravel_multi_index(cell_ids.T, (num_cells_per_dim, )*3)
+			counts = np.bincount(cell_ids, minlength = num_cells_per_dim**3)
+			mean_count = counts.mean()
+			# For Poisson-distributed counts, the variance equals the mean
+			return (np.var(counts) - mean_count)/mean_count**2
+
+		xi_dense = cell_averaged_xi(ClusteredFakeSim(num_halos = 2e4, Lbox = 100.).halo_table, 100.)
+		xi_sparse = cell_averaged_xi(ClusteredFakeSim(num_halos = 2e4, Lbox = 200.).halo_table, 200.)
+		assert xi_dense > 0.5
+		assert 0.7 < xi_sparse/xi_dense < 1.4
+
+	def test_mass_function(self):
+		mass = self.halo_table['halo_mvir'][self.halo_table['halo_upid'] == -1]
+		counts = np.histogram(np.log10(mass), bins = [10, 11, 12, 13])[0]
+		assert np.all(counts[1:] < counts[:-1])
+
+		mass_bin = np.digitize(np.log10(self.halo_table['halo_mvir']), [11, 12, 13])
+		for key in ('halo_rvir', 'halo_vmax'):
+			medians = [np.median(self.halo_table[key][mass_bin == i]) for i in range(4)]
+			assert np.all(np.diff(medians) > 0)
+
+	def test_determinism(self):
+		chunks1 = list(clustered_fake_halo_chunks(1e4, seed = 13, chunk_size = 3e3))
+		chunks2 = list(clustered_fake_halo_chunks(1e4, seed = 13, chunk_size = 3e3))
+		assert len(chunks1) == len(chunks2) == 4
+		for table1, table2 in zip(chunks1, chunks2):
+			assert np.all(table1.as_array() == table2.as_array())
+
+		ids = np.concatenate([table['halo_id'] for table in chunks1])
+		assert np.all(ids == np.arange(len(ids)))
+
+		chunks3 = list(clustered_fake_halo_chunks(1e4, seed = 14, chunk_size = 3e3))
+		assert not np.all(chunks1[0]['halo_x'][0:100] == chunks3[0]['halo_x'][0:100])
+
+	def test_invalid_params(self):
+		with pytest.raises(HalotoolsError) as err:
+			_ = ClusteredFakeSim(num_halos = 100, num_clusters = 5)
+		substr = "``num_clusters`` is not a parameter of the clustered fake catalogs."
+		assert substr in err.value.message
+
+		with pytest.raises(HalotoolsError) as err:
+			_ = ClusteredFakeSim(num_halos = 100, subhalo_fraction = 1.5)
+		substr = "0 <= subhalo_fraction < 1"
+		assert substr in err.value.message
+
+	@pytest.mark.skipif('not HAS_H5PY')
+	def test_write_clustered_fake_sim(self):
+		fname = os.path.join(self.tmpdir, 'clustered_fake_sim.hdf5')
+		for hdf5_layout in ('compound', 'columnar'):
+			num_halos = write_clustered_fake_sim(fname, 1e4, chunk_size = 3e3, 
+				overwrite = True, hdf5_layout = hdf5_layout)
+			t = read_hdf5_table(fname)
+			assert len(t) == num_halos
+			chunks = list(clustered_fake_halo_chunks(1e4, chunk_size = 3e3))
+			assert np.all(t.as_array() == np.concatenate([table.as_array() for table in chunks]))
+
+			log_entry = HaloTableCacheLogEntry(simname = 'fake_clustered', 
+				halo_finder = 'fake', version_name = 'dummy_version', 
+				redshift = 0., fname = fname)
+			assert log_entry.safe_for_cache == True
+
+		with pytest.raises(HalotoolsError) as err:
+			_ = write_clustered_fake_sim(fname, 1e4)
+		substr = "The following file already exists"
+		assert substr in err.value.message
+
+	def tearDown(self):
+		del self.fake_sim
+		try:
+			shutil.rmtree(self.tmpdir)
+		except:
+			pass
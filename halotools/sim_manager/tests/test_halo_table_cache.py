@@ -215,6 +215,34 @@ class TestHaloTableCache(TestCase):
         assert new_entry in cache.log
 
 
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_sqlite_cache_log(self):
+        """ Entries added to the SQLite log by one instance of HaloTableCache 
+        are seen by every other instance, and the ASCII log written by previous versions 
+        of Halotools is migrated into the database. 
+        """
+        ascii_log_fname = os.path.join(self.dummy_cache_baseloc, 'dummy_log.txt')
+        ascii_cache = HaloTableCache(cache_log_fname = ascii_log_fname)
+        assert ascii_cache._log_database is None
+        ascii_cache.add_entry_to_cache_log(self.good_log_entry)
+
+        cache_log_fname = os.path.join(self.dummy_cache_baseloc, 'dummy_log.db')
+        cache1 = HaloTableCache(cache_log_fname = cache_log_fname)
+        cache2 = HaloTableCache(cache_log_fname = cache_log_fname)
+        assert cache1.log == [self.good_log_entry]
+
+        cache1.add_entry_to_cache_log(self.good_log_entry2)
+        matches = list(cache2.matching_log_entry_generator(simname = 'good_simname2', 
+            redshift = 0.99, dz_tol = 0.05))
+        assert matches == [self.good_log_entry2]
+
+        entry = self.good_log_entry
+        args = [getattr(entry, attr) for attr in entry.log_attributes]
+        cache2.remove_entry_from_cache_log(*args)
+        assert cache2.log == [self.good_log_entry2]
+        cache1.update_log_from_current_ascii()
+        assert cache1.log == [self.good_log_entry2]
+
     def tearDown(self):
         try:
             shutil.rmtree(self.dummy_cache_baseloc)
@@ -20,7 +20,8 @@ except ImportError:
     HAS_H5PY = False
 
 from . import helper_functions
-from ..halo_table_cache_log_entry import HaloTableCacheLogEntry
+from .. import halo_table_cache_log_entry
+from ..halo_table_cache_log_entry import HaloTableCacheLogEntry, halo_table_sidecar_fname
 
 ### Determine whether the machine is mine
 # This will be used to select tests whose 
@@ -55,6 +56,11 @@ class TestHaloTableCacheLogEntry(TestCase):
             pass
         os.makedirs(self.dummy_cache_baseloc)
 
+        # Keep the verification sidecar files out of the Halotools cache
+        self._sidecar_dirname = halo_table_cache_log_entry.sidecar_dirname
+        halo_table_cache_log_entry.sidecar_dirname = os.path.join(
+            self.dummy_cache_baseloc, 'halo_table_sidecars')
+
         self.simnames = ('bolshoi', 'consuelo', 'bolshoi', 'bolshoi', 'multidark')
         self.halo_finders = ('rockstar', 'bdm', 'bdm', 'rockstar', 'bdm')
         self.version_names = ('v0', 'v1', 'v2', 'v3', 'v4')
@@ -424,7 +430,95 @@ class TestHaloTableCacheLogEntry(TestCase):
         assert log_entry.safe_for_cache == True
         assert "The halo catalog is safe to add to the cache log." == log_entry._cache_safety_message
 
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_cached_verification(self):
+        num_scenario = 4
+
+        try:
+            os.remove(self.fnames[num_scenario])
+        except:
+            pass
+
+        log_entry = HaloTableCacheLogEntry(**self.get_scenario_kwargs(num_scenario))
+
+        self.good_table.write(self.fnames[num_scenario], path='data')
+        f = h5py.File(self.fnames[num_scenario])
+        for attr in self.hard_coded_log_attrs:
+            f.attrs[attr] = getattr(log_entry, attr)
+        f.attrs['Lbox'] = 100.
+        f.attrs['particle_mass'] = 1.e8
+        f.close()
+
+        assert log_entry._stored_halo_table_fingerprint() is None
+        stat = os.stat(self.fnames[num_scenario])
+        assert log_entry.safe_for_cache == True
+        fingerprint = log_entry._stored_halo_table_fingerprint()
+        assert fingerprint == log_entry._halo_table_fingerprint()
+
+        # The verification never writes to the halo catalog itself
+        assert os.stat(self.fnames[num_scenario]).st_mtime == stat.st_mtime
+        assert os.stat(self.fnames[num_scenario]).st_size == stat.st_size
+        assert os.path.isfile(halo_table_sidecar_fname(self.fnames[num_scenario], '.verification'))
+
+        # The stored fingerprint allows the data verification to be skipped
+        log_entry._verify_table_read = None
+        assert log_entry.safe_for_cache == True
+        del log_entry._verify_table_read
+
+        # Modifying the data invalidates the stored fingerprint
+        f = h5py.File(self.fnames[num_scenario])
+        data = f['data'][...]
+        data['halo_x'][0] = 200.
+        f['data'][...] = data
+        f.close()
+        assert log_entry._halo_table_fingerprint() != fingerprint
+        assert log_entry.safe_for_cache == False
+        assert "must be bounded by [0, Lbox]" in log_entry._cache_safety_message
+
+        # The metadata tests are always performed
+        f = h5py.File(self.fnames[num_scenario])
+        data['halo_x'][0] = 1.
+        f['data'][...] = data
+        f.close()
+        assert log_entry.safe_for_cache == True
+        f = h5py.File(self.fnames[num_scenario])
+        f.attrs['simname'] = 'Jose Canseco'
+        f.close()
+        assert log_entry.safe_for_cache == False
+        assert "does not match" in log_entry._cache_safety_message
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_unwritable_sidecar_dirname(self):
+        """ Failing to store the fingerprint only means 
+        that the data tests are performed again the next time. 
+        """
+        num_scenario = 4
+
+        try:
+            os.remove(self.fnames[num_scenario])
+        except:
+            pass
+
+        log_entry = HaloTableCacheLogEntry(**self.get_scenario_kwargs(num_scenario))
+        self.good_table.write(self.fnames[num_scenario], path='data')
+        f = h5py.File(self.fnames[num_scenario])
+        for attr in self.hard_coded_log_attrs:
+            f.attrs[attr] = getattr(log_entry, attr)
+        f.attrs['Lbox'] = 100.
+        f.attrs['particle_mass'] = 1.e8
+        f.close()
+
+        # A regular file cannot be used as the sidecar directory
+        not_a_dirname = os.path.join(self.dummy_cache_baseloc, 'not_a_directory')
+        open(not_a_dirname, 'w').close()
+        halo_table_cache_log_entry.sidecar_dirname = not_a_dirname
+
+        assert log_entry.safe_for_cache == True
+        assert log_entry._stored_halo_table_fingerprint() is None
+        assert log_entry.safe_for_cache == True
+
     def tearDown(self):
+        halo_table_cache_log_entry.sidecar_dirname = self._sidecar_dirname
         try:
             shutil.rmtree(self.dummy_cache_baseloc)
         except:
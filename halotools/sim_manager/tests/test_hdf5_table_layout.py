@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+from __future__ import (absolute_import, division, print_function)
+
+from unittest import TestCase
+import os, shutil
+
+from astropy.config.paths import _find_home
+from astropy.tests.helper import pytest
+from astropy.table import Table
+
+import numpy as np
+
+try:
+    import h5py
+    HAS_H5PY = True
+except ImportError:
+    HAS_H5PY = False
+
+from ..hdf5_table_layout import (Hdf5TableView, write_table_to_hdf5,
+    create_hdf5_table, append_to_hdf5_table, read_hdf5_table)
+from ..halo_table_cache_log_entry import halo_table_fingerprint
+from ...custom_exceptions import HalotoolsError
+
+__all__ = ('TestHdf5TableLayout', )
+
+
+class TestHdf5TableLayout(TestCase):
+    """
+    """
+
+    def setUp(self):
+        self.tmpdir = os.path.join(_find_home(), '.temp_halotools_testing_dir')
+        try:
+            os.makedirs(self.tmpdir)
+        except OSError:
+            pass
+
+        Nhalos = 1000
+        self.table = Table({'halo_id': np.arange(Nhalos),
+            'halo_mvir': np.logspace(10, 15, Nhalos).astype('f4'),
+            'halo_x': np.linspace(0, 250, Nhalos)})
+        self.fname = os.path.join(self.tmpdir, 'table_layout.hdf5')
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_round_trip(self):
+        storage_options = ({'layout': 'compound'},
+            {'layout': 'compound', 'compression': 'gzip'},
+            {'layout': 'columnar'},
+            {'layout': 'columnar', 'chunk_size': 100},
+            {'layout': 'columnar', 'compression': 'lzf', 'shuffle': True},
+            {'layout': 'columnar', 'compression': 'gzip', 'chunk_size': 64})
+
+        for options in storage_options:
+            write_table_to_hdf5(self.table, self.fname, overwrite = True, **options)
+
+            t = read_hdf5_table(self.fname)
+            assert t.keys() == self.table.keys()
+            for key in self.table.keys():
+                assert np.all(t[key] == self.table[key])
+                assert t[key].dtype == self.table[key].dtype
+
+            t = read_hdf5_table(self.fname, columns = ['halo_x', 'halo_id'], num_rows = 10)
+            assert t.keys() == ['halo_x', 'halo_id']
+            assert np.all(t['halo_x'] == self.table['halo_x'][0:10])
+
+            f = h5py.File(self.fname, 'r')
+            table = Hdf5TableView(f)
+            assert table.layout == options['layout']
+            assert table.num_rows == len(self.table)
+            assert table.colnames == self.table.keys()
+            assert np.all(table.read_rows(5, 10) == self.table.as_array()[5:10])
+            if options['layout'] == 'columnar':
+                dataset = table.column_dataset('halo_mvir')
+                assert dataset.compression == options.get('compression', None)
+                if 'chunk_size' in options:
+                    assert dataset.chunks == (options['chunk_size'], )
+            f.close()
+
+        with pytest.raises(HalotoolsError) as err:
+            write_table_to_hdf5(self.table, self.fname, layout = 'columnar')
+        substr = "The following file already exists"
+        assert substr in err.value.message
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_invalid_options(self):
+        with pytest.raises(HalotoolsError) as err:
+            write_table_to_hdf5(self.table, self.fname, layout = 'rows')
+        substr = "The input layout ``rows`` is not supported."
+        assert substr in err.value.message
+
+        with pytest.raises(HalotoolsError) as err:
+            write_table_to_hdf5(self.table, self.fname, compression = 'szip')
+        substr = "The input compression ``szip`` is not supported."
+        assert substr in err.value.message
+
+        with pytest.raises(HalotoolsError) as err:
+            write_table_to_hdf5(self.table, self.fname, chunk_size = 0)
+        substr = "The hdf5 ``chunk_size`` must be a positive integer number of rows."
+        assert substr in err.value.message
+
+        f = h5py.File(self.fname, 'w')
+        f.create_group('data')
+        f.close()
+        with pytest.raises(HalotoolsError) as err:
+            _ = read_hdf5_table(self.fname)
+        substr = "group of the hdf5 file does not store a columnar table"
+        assert substr in err.value.message
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_append(self):
+        arr = self.table.as_array()
+        for layout in ('compound', 'columnar'):
+            f = h5py.File(self.fname, 'w')
+            create_hdf5_table(f, arr.dtype, layout = layout, chunk_size = 64, resizable = True)
+            for first in range(0, len(arr), 300):
+                append_to_hdf5_table(f, arr[first:first + 300])
+            f.close()
+
+            t = read_hdf5_table(self.fname)
+            assert len(t) == len(self.table)
+            assert np.all(t.as_array() == arr)
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_fingerprint(self):
+        """ The shape, dtype and checksum recorded in the fingerprint of a table
+        do not depend on the layout in which it is stored.
+        """
+        fingerprints = []
+        for layout in ('compound', 'columnar'):
+            write_table_to_hdf5(self.table, self.fname, layout = layout, overwrite = True)
+            fingerprint = halo_table_fingerprint(self.fname)
+            assert fingerprint is not None
+            shape_and_dtype = fingerprint.split(', storage_size')[0].split(', ', 1)[1]
+            checksum = fingerprint.split('checksum = ')[1]
+            fingerprints.append((shape_and_dtype, checksum))
+        assert fingerprints[0] == fingerprints[1]
+
+    def tearDown(self):
+        try:
+            shutil.rmtree(self.tmpdir)
+        except:
+            pass
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+from __future__ import (absolute_import, division, print_function)
+
+from unittest import TestCase
+import os, shutil
+
+from astropy.config.paths import _find_home
+from astropy.tests.helper import pytest
+from astropy.table import Table
+
+import numpy as np
+
+try:
+    import h5py
+    HAS_H5PY = True
+except ImportError:
+    HAS_H5PY = False
+
+from ..lazy_hdf5_table import LazyHdf5Table, write_spatial_cell_index
+from ..hdf5_table_layout import write_table_to_hdf5
+from ...custom_exceptions import HalotoolsError
+
+__all__ = ('TestLazyHdf5Table', )
+
+
+class TestLazyHdf5Table(TestCase):
+    """
+    """
+
+    def setUp(self):
+        self.tmpdir = os.path.join(_find_home(), '.temp_halotools_testing_dir')
+        try:
+            os.makedirs(self.tmpdir)
+        except OSError:
+            pass
+
+        Nhalos = 100
+        self.table = Table({'halo_id': np.arange(Nhalos),
+            'halo_mvir': np.logspace(10, 15, Nhalos).astype('f4'),
+            'halo_x': np.linspace(0, 250, Nhalos)})
+        self.fname = os.path.join(self.tmpdir, 'lazy_table.hdf5')
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_memory_mapped_columns(self):
+        self.table.write(self.fname, path='data', overwrite = True)
+
+        lazy_table = LazyHdf5Table(self.fname)
+        assert lazy_table.is_memory_mapped
+        assert len(lazy_table) == 100
+        assert set(lazy_table.keys()) == set(self.table.keys())
+        for key in self.table.keys():
+            assert np.all(lazy_table[key] == self.table[key])
+
+        # Modifying a memory-mapped column does not change the file on disk
+        t = lazy_table.to_table(['halo_x', 'halo_mvir'])
+        assert t.keys() == ['halo_x', 'halo_mvir']
+        t['halo_x'][0] = -1
+        assert Table.read(self.fname, path='data')['halo_x'][0] == 0
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_compressed_columns(self):
+        f = h5py.File(self.fname, 'w')
+        f.create_dataset('data', data = self.table.as_array(), compression = 'gzip')
+        f.close()
+
+        lazy_table = LazyHdf5Table(self.fname, columns = ['halo_mvir'])
+        assert not lazy_table.is_memory_mapped
+        assert lazy_table.keys() == ['halo_mvir']
+        assert np.all(lazy_table['halo_mvir'] == self.table['halo_mvir'])
+
+        with pytest.raises(HalotoolsError) as err:
+            _ = lazy_table['halo_x']
+        substr = "The ``halo_x`` column is not one of the columns of the LazyHdf5Table."
+        assert substr in err.value.message
+
+        with pytest.raises(HalotoolsError) as err:
+            _ = LazyHdf5Table(self.fname, columns = ['halo_vmax'])
+        substr = "The ``halo_vmax`` column does not appear in the ``data`` dataset"
+        assert substr in err.value.message
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_select_rows(self):
+        Nhalos = 1000
+        pos = np.random.uniform(0, 250, (Nhalos, 3))
+        t = Table({'halo_id': np.arange(Nhalos),
+            'halo_mvir': np.random.uniform(1e10, 1e13, Nhalos),
+            'halo_x': pos[:, 0], 'halo_y': pos[:, 1], 'halo_z': pos[:, 2]})
+        bounding_box = [(20, 110), (0, 250), (200, 260)]
+        correct_mask = ((t['halo_mvir'] > 1e12) &
+            (t['halo_x'] >= 20) & (t['halo_x'] < 110) & (t['halo_z'] >= 200))
+
+        for compression in (None, 'gzip'):
+            f = h5py.File(self.fname, 'w')
+            f.create_dataset('data', data = t.as_array(), compression = compression)
+            f.close()
+            lazy_table = LazyHdf5Table(self.fname)
+            assert lazy_table.is_memory_mapped == (compression is None)
+            assert not lazy_table.has_spatial_cell_index
+
+            rows = lazy_table.select_rows([('halo_mvir', '>', 1e12)],
+                bounding_box = bounding_box, chunk_size = 64)
+            assert np.all(rows == np.flatnonzero(correct_mask))
+
+            write_spatial_cell_index(self.fname, 250., num_divs = 5, chunk_size = 64)
+            assert lazy_table.has_spatial_cell_index
+            rows = lazy_table.select_rows([('halo_mvir', '>', 1e12)],
+                bounding_box = bounding_box, chunk_size = 64)
+            assert np.all(rows == np.flatnonzero(correct_mask))
+
+            subset = lazy_table.to_table(['halo_id', 'halo_y'], rows = rows)
+            assert np.all(subset['halo_id'] == t['halo_id'][correct_mask])
+            assert np.all(subset['halo_y'] == t['halo_y'][correct_mask])
+
+        with pytest.raises(HalotoolsError) as err:
+            _ = lazy_table.select_rows([('halo_vmax', '>', 100)])
+        substr = "The following predicate is not permissible"
+        assert substr in err.value.message
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_indexed_select_rows_of_unselected_columns(self):
+        """ Predicate and position columns need not be among the selected columns.
+        """
+        Nhalos = 1000
+        pos = np.random.uniform(0, 250, (Nhalos, 3))
+        t = Table({'halo_id': np.arange(Nhalos),
+            'halo_mvir': np.random.uniform(1e10, 1e13, Nhalos),
+            'halo_x': pos[:, 0], 'halo_y': pos[:, 1], 'halo_z': pos[:, 2]})
+        bounding_box = [(20, 110), (0, 250), (200, 260)]
+        correct_mask = ((t['halo_mvir'] > 1e12) &
+            (t['halo_x'] >= 20) & (t['halo_x'] < 110) & (t['halo_z'] >= 200))
+
+        for layout, compression in (('compound', None), ('compound', 'gzip'),
+                ('columnar', None), ('columnar', 'lzf')):
+            write_table_to_hdf5(t, self.fname, layout = layout,
+                compression = compression, overwrite = True)
+            write_spatial_cell_index(self.fname, 250., num_divs = 5, chunk_size = 64)
+            lazy_table = LazyHdf5Table(self.fname, columns = ['halo_id'])
+            assert lazy_table.has_spatial_cell_index
+
+            rows = lazy_table.select_rows([('halo_mvir', '>', 1e12)],
+                bounding_box = bounding_box, chunk_size = 64)
+            assert np.all(rows == np.flatnonzero(correct_mask))
+            assert np.all(lazy_table.to_table(rows = rows)['halo_id'] == t['halo_id'][correct_mask])
+            assert np.all(lazy_table.read_column_rows('halo_mvir', rows) == t['halo_mvir'][correct_mask])
+
+        with pytest.raises(HalotoolsError) as err:
+            _ = lazy_table.read_column_rows('halo_vmax', rows)
+        substr = "The ``halo_vmax`` column does not appear in the ``data`` dataset"
+        assert substr in err.value.message
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_columnar_layout(self):
+        Nhalos = 1000
+        pos = np.random.uniform(0, 250, (Nhalos, 3))
+        t = Table({'halo_id': np.arange(Nhalos),
+            'halo_mvir': np.random.uniform(1e10, 1e13, Nhalos),
+            'halo_x': pos[:, 0], 'halo_y': pos[:, 1], 'halo_z': pos[:, 2]})
+        bounding_box = [(20, 110), (0, 250), (200, 260)]
+        correct_mask = ((t['halo_mvir'] > 1e12) &
+            (t['halo_x'] >= 20) & (t['halo_x'] < 110) & (t['halo_z'] >= 200))
+
+        for compression in (None, 'lzf'):
+            write_table_to_hdf5(t, self.fname, layout = 'columnar',
+                compression = compression, shuffle = (compression is not None), overwrite = True)
+            lazy_table = LazyHdf5Table(self.fname)
+            assert lazy_table.layout == 'columnar'
+            assert lazy_table.is_memory_mapped == (compression is None)
+            assert len(lazy_table) == Nhalos
+            assert lazy_table.keys() == t.keys()
+            for key in t.keys():
+                assert np.all(lazy_table[key] == t[key])
+            rows = LazyHdf5Table(self.fname).read_column_rows('halo_y', [1, 5, 900], chunk_size = 64)
+            assert np.all(rows == t['halo_y'][[1, 5, 900]])
+
+            write_spatial_cell_index(self.fname, 250., num_divs = 5, chunk_size = 64)
+            rows = lazy_table.select_rows([('halo_mvir', '>', 1e12)],
+                bounding_box = bounding_box, chunk_size = 64)
+            assert np.all(rows == np.flatnonzero(correct_mask))
+
+            subset = lazy_table.to_table(['halo_id', 'halo_y'], rows = rows)
+            assert np.all(subset['halo_id'] == t['halo_id'][correct_mask])
+
+    def tearDown(self):
+        try:
+            shutil.rmtree(self.tmpdir)
+        except:
+            pass
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+from __future__ import (absolute_import, division, print_function)
+
+from unittest import TestCase
+import os, shutil
+
+from astropy.config.paths import _find_home
+from astropy.tests.helper import pytest
+from astropy.table import Table
+
+import numpy as np
+
+try:
+    import h5py
+    HAS_H5PY = True
+except ImportError:
+    HAS_H5PY = False
+
+from ..ptcl_table_pyramid import (write_ptcl_pyramid,
+    read_ptcl_pyramid_levels, read_ptcl_table_prefix)
+
+from ...custom_exceptions import HalotoolsError
+
+__all__ = ('TestPtclTablePyramid', )
+
+
+class TestPtclTablePyramid(TestCase):
+    """
+    """
+
+    def setUp(self):
+        self.tmpdir = os.path.join(_find_home(), '.temp_halotools_testing_dir')
+        try:
+            os.makedirs(self.tmpdir)
+        except OSError:
+            pass
+        self.fname = os.path.join(self.tmpdir, 'ptcl_pyramid.hdf5')
+
+        self.num_ptcl_total = 10000
+        self.chunk_size = 1500
+        self.ptcl_id = np.arange(self.num_ptcl_total)
+
+    def chunks(self):
+        for start in range(0, self.num_ptcl_total, self.chunk_size):
+            ptcl_id = self.ptcl_id[start:start + self.chunk_size]
+            yield {'ptcl_id': ptcl_id, 'x': ptcl_id/10.}
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_write_and_read(self):
+        levels = write_ptcl_pyramid(self.fname, self.chunks(), self.num_ptcl_total,
+            (100, 1000, 5000), num_buckets = 8, seed = 43)
+        assert list(levels) == [100, 1000, 5000]
+        assert list(read_ptcl_pyramid_levels(self.fname)) == [100, 1000, 5000]
+        assert not os.path.isfile(self.fname + '.tmp_pyramid_buckets')
+
+        ptcls = read_ptcl_table_prefix(self.fname, 5000)
+        assert len(ptcls) == 5000
+        assert np.all(ptcls['x'] == ptcls['ptcl_id']/10.)
+        assert len(np.unique(ptcls['ptcl_id'])) == 5000
+
+        # The prefixes are nested random downsamplings of the snapshot
+        small_ptcls = read_ptcl_table_prefix(self.fname, 1000)
+        assert np.all(small_ptcls['ptcl_id'] == ptcls['ptcl_id'][:1000])
+        assert np.any(np.diff(small_ptcls['ptcl_id']) < 0)
+        counts = np.histogram(small_ptcls['ptcl_id'], bins = 10, range = (0, self.num_ptcl_total))[0]
+        assert np.all(counts > 50)
+
+        with pytest.raises(HalotoolsError) as err:
+            _ = read_ptcl_table_prefix(self.fname, 5001)
+        substr = "may not exceed the number of particles"
+        assert substr in err.value.message
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_levels_exceeding_snapshot(self):
+        levels = write_ptcl_pyramid(self.fname, self.chunks(), self.num_ptcl_total,
+            (1e3, 1e5), seed = 43)
+        assert list(levels) == [1000, self.num_ptcl_total]
+        ptcls = read_ptcl_table_prefix(self.fname, self.num_ptcl_total)
+        assert np.all(np.sort(ptcls['ptcl_id']) == self.ptcl_id)
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_inconsistent_num_ptcl_total(self):
+        with pytest.raises(HalotoolsError) as err:
+            write_ptcl_pyramid(self.fname, self.chunks(), self.num_ptcl_total + 1, (100, 1000))
+        substr = "but ``num_ptcl_total`` = "
+        assert substr in err.value.message
+        assert not os.path.isfile(self.fname + '.tmp_pyramid_buckets')
+
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_no_pyramid(self):
+        Table({'x': np.zeros(10)}).write(self.fname, path = 'data')
+        assert read_ptcl_pyramid_levels(self.fname) is None
+
+    def tearDown(self):
+        try:
+            shutil.rmtree(self.tmpdir)
+        except:
+            pass
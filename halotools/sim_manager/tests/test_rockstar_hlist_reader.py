@@ -9,6 +9,7 @@ from astropy.table import Table
 
 from astropy.config.paths import _find_home 
 
+from ..hdf5_table_layout import read_hdf5_table
 from ..rockstar_hlist_reader import RockstarHlistReader, _infer_redshift_from_input_fname
 from ..halo_table_cache import HaloTableCache 
 
@@ -259,6 +260,127 @@ class TestRockstarHlistReader(TestCase):
             version_name = 'dummy', Lbox = 250., particle_mass = 1.35e8, 
             )
  
+    @pytest.mark.slow
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_stream_to_disk(self):
+        """ Verify that the streamed hdf5 file stores the same catalog 
+        as the one processed in memory. 
+        """
+        hlist_fname = os.path.join(self.tmpdir, 'hlist_0.5.list')
+        with open(hlist_fname, 'w') as f:
+            f.write('# scale id x y z upid rvir rs mvir\n')
+            for i in range(100):
+                upid = -1 if i % 3 == 0 else (i+1) % 100
+                f.write('0.5 %i %.2f %.2f %.2f %i %.1f %.1f %.3e\n' % 
+                    (i, i/2., i/3., i/4., upid, 100+i, 10+i, 10**(10+i/25.)))
+
+        columns_to_keep_dict = ({
+            'halo_id': (1, 'i8'), 'halo_x': (2, 'f4'), 'halo_y': (3, 'f4'), 
+            'halo_z': (4, 'f4'), 'halo_upid': (5, 'i8'), 'halo_rvir': (6, 'f4'), 
+            'halo_rs': (7, 'f4'), 'halo_mvir': (8, 'f4')
+            })
+
+        def make_reader(output_fname):
+            return RockstarHlistReader(
+                input_fname = hlist_fname, 
+                columns_to_keep_dict = columns_to_keep_dict, 
+                output_fname = output_fname, 
+                simname = 'Jean Claude van Damme', halo_finder = 'ok usa',
+                redshift = 1, version_name = 'dummy', Lbox = 100, particle_mass = 1e8, 
+                row_cut_min_dict = {'halo_mvir': 1e11}
+                )
+
+        in_memory_progress, streamed_progress = [], []
+
+        reader = make_reader(os.path.join(self.tmpdir, 'in_memory.hdf5'))
+        reader.read_halocat(['halo_rvir', 'halo_rs'], write_to_disk = True, 
+            chunk_memory_size = 1e-3, progress_callback = lambda *args: in_memory_progress.append(args))
+        in_memory_table = Table.read(reader.output_fname, path='data')
+
+        reader = make_reader(os.path.join(self.tmpdir, 'streamed.hdf5'))
+        reader.read_halocat(['halo_rvir', 'halo_rs'], 
+            stream_to_disk = True, chunk_memory_size = 1e-3, 
+            progress_callback = lambda *args: streamed_progress.append(args))
+        streamed_table = Table.read(reader.output_fname, path='data')
+
+        assert len(streamed_table) == len(in_memory_table) == 74
+        assert len(in_memory_progress) > 1
+        assert streamed_progress == in_memory_progress
+        assert streamed_progress[-1][1:] == (os.path.getsize(hlist_fname), 74)
+        assert set(streamed_table.keys()) == set(in_memory_table.keys())
+        for key in in_memory_table.keys():
+            assert np.all(streamed_table[key] == in_memory_table[key])
+
+        f = h5py.File(reader.output_fname, 'r')
+        assert f.attrs['simname'] == 'Jean Claude van Damme'
+        assert f['data'].maxshape == (None, )
+        f.close()
+
+        with pytest.raises(HalotoolsError) as err:
+            reader.read_halocat([], stream_to_disk = True)
+        substr = "You must set ``overwrite`` to True in order to write to this location."
+        assert substr in err.value.message
+
+    @pytest.mark.slow
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_columnar_hdf5_layout(self):
+        """ Verify that catalogs written with the columnar layout, 
+        both in memory and streamed, store the same catalog as the default layout. 
+        """
+        hlist_fname = os.path.join(self.tmpdir, 'hlist_0.5.list')
+        with open(hlist_fname, 'w') as f:
+            f.write('# scale id x y z upid rvir rs mvir\n')
+            for i in range(100):
+                upid = -1 if i % 3 == 0 else (i+1) % 100
+                f.write('0.5 %i %.2f %.2f %.2f %i %.1f %.1f %.3e\n' % 
+                    (i, i/2., i/3., i/4., upid, 100+i, 10+i, 10**(10+i/25.)))
+
+        columns_to_keep_dict = ({
+            'halo_id': (1, 'i8'), 'halo_x': (2, 'f4'), 'halo_y': (3, 'f4'), 
+            'halo_z': (4, 'f4'), 'halo_upid': (5, 'i8'), 'halo_rvir': (6, 'f4'), 
+            'halo_rs': (7, 'f4'), 'halo_mvir': (8, 'f4')
+            })
+
+        def make_reader(output_fname, **kwargs):
+            return RockstarHlistReader(
+                input_fname = hlist_fname, 
+                columns_to_keep_dict = columns_to_keep_dict, 
+                output_fname = output_fname, 
+                simname = 'Jean Claude van Damme', halo_finder = 'ok usa',
+                redshift = 1, version_name = 'dummy', Lbox = 100, particle_mass = 1e8, 
+                **kwargs)
+
+        reader = make_reader(os.path.join(self.tmpdir, 'compound.hdf5'))
+        reader.read_halocat(['halo_rvir', 'halo_rs'], write_to_disk = True)
+        compound_table = Table.read(reader.output_fname, path='data')
+
+        reader = make_reader(os.path.join(self.tmpdir, 'columnar.hdf5'), 
+            hdf5_layout = 'columnar', hdf5_compression = 'gzip', hdf5_shuffle = True)
+        reader.read_halocat(['halo_rvir', 'halo_rs'], write_to_disk = True)
+        columnar_table = read_hdf5_table(reader.output_fname)
+
+        reader = make_reader(os.path.join(self.tmpdir, 'streamed.hdf5'), 
+            hdf5_layout = 'columnar', hdf5_chunk_size = 16)
+        reader.read_halocat(['halo_rvir', 'halo_rs'], 
+            stream_to_disk = True, chunk_memory_size = 1e-3)
+        streamed_table = read_hdf5_table(reader.output_fname)
+
+        f = h5py.File(reader.output_fname, 'r')
+        assert isinstance(f['data'], h5py.Group)
+        assert f['data']['halo_mvir'].chunks == (16, )
+        f.close()
+
+        assert len(compound_table) == len(columnar_table) == len(streamed_table) == 100
+        assert columnar_table.keys() == streamed_table.keys() == compound_table.keys()
+        for key in compound_table.keys():
+            assert np.all(columnar_table[key] == compound_table[key])
+            assert np.all(streamed_table[key] == compound_table[key])
+
+        with pytest.raises(HalotoolsError) as err:
+            reader = make_reader(os.path.join(self.tmpdir, 'bad.hdf5'), hdf5_compression = 'zstd')
+        substr = "The input compression ``zstd`` is not supported."
+        assert substr in err.value.message
+
     def test_infer_redshift_from_fname(self):
         fname = 'hlist_0.07812.list'
         result = _infer_redshift_from_input_fname(fname)
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 
-import os, shutil
+import os, shutil, gzip, struct, zlib, warnings
 import numpy as np
 from unittest import TestCase
 from astropy.tests.helper import pytest 
@@ -8,7 +8,9 @@ from astropy.table import Table
 
 from astropy.config.paths import _find_home 
 
-from ..tabular_ascii_reader import TabularAsciiReader
+from .. import tabular_ascii_reader
+from ..tabular_ascii_reader import (TabularAsciiReader, _parse_ascii_block, 
+    _bgzf_member_offsets, _read_byte_range, _bounded_imap)
 
 
 ### Determine whether the machine is mine
@@ -33,6 +35,34 @@ def write_tabular_data(fname):
         f.write('102  300.  1e11  3999494331\n')
         f.write('103  400.  1e12  3999494332\n')
 
+def write_many_rows(fname):
+    write_tabular_data(fname)
+    with open(fname, 'a') as f:
+        for i in range(100):
+            f.write('%i  %i.  1e13  -1\n' % (104 + i, 500 + i))
+        f.write('# trailing comment\n')
+        f.write('204  100.  1e13  -1')
+
+def write_bgzf(fname, data, member_size):
+    """ Write the input bytes to a BGZF file, as ``bgzip`` would, 
+    storing ``member_size`` uncompressed bytes in each gzip member 
+    regardless of where the lines end, and return the offsets of the members. 
+    """
+    offsets = [0]
+    with open(fname, 'wb') as f:
+        for first in list(range(0, len(data), member_size)) + [len(data)]:
+            # The last member is the empty end-of-file marker of BGZF files
+            member_data = data[first:first + member_size]
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+            cdata = compressor.compress(member_data) + compressor.flush()
+            bsize = 18 + len(cdata) + 8
+            f.write(b'\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff' + 
+                struct.pack('<H', 6) + b'BC' + struct.pack('<HH', 2, bsize - 1))
+            f.write(cdata)
+            f.write(struct.pack('<II', zlib.crc32(member_data) & 0xffffffff, len(member_data)))
+            offsets.append(offsets[-1] + bsize)
+    return offsets
+
 class TestTabularAsciiReader(TestCase):
 
     def setUp(self):
@@ -239,6 +269,225 @@ class TestTabularAsciiReader(TestCase):
         substr = "Must choose non-zero size for input ``chunk_memory_size``"
         assert substr in err.value.message
 
+    @pytest.mark.slow
+    def test_parse_ascii_block(self):
+        """ Verify that the vectorized block parser agrees with 
+        the line-by-line `data_chunk_generator`. 
+        """
+        write_tabular_data(self.dummy_fname)
+
+        columns_to_keep_dict = {'vmax': (1, 'f4'), 'id': (0, 'i8'), 'upid': (3, 'i8')}
+        reader = TabularAsciiReader(self.dummy_fname, columns_to_keep_dict)
+
+        with open(self.dummy_fname, 'r') as f:
+            _ = f.readline()
+            correct_arr = np.array(list(reader.data_chunk_generator(4, f)), dtype=reader.dt)
+
+        with open(self.dummy_fname, 'r') as f:
+            _ = f.readline()
+            block = ''.join(f.readlines())
+        arr = _parse_ascii_block(block, reader.column_indices_to_keep, reader.dt)
+        assert np.all(arr == correct_arr)
+
+        # Rows with a varying number of entries fall back to the line-by-line parser
+        arr = _parse_ascii_block(block + '104  500.  1e13  -1  7\n', 
+            reader.column_indices_to_keep, reader.dt)
+        assert len(arr) == 5
+        assert np.all(arr[:4] == correct_arr)
+        assert arr['id'][4] == 104
+
+        arr = reader.read_ascii(chunk_memory_size = 1e-4)
+        assert np.all(arr == correct_arr)
+
+    @pytest.mark.slow
+    def test_parse_ascii_block_in_pieces(self):
+        """ Verify that large blocks parsed in pieces give the same result 
+        as blocks parsed in a single pass. 
+        """
+        write_many_rows(self.dummy_fname)
+
+        columns_to_keep_dict = {'vmax': (1, 'f4'), 'id': (0, 'i8'), 'upid': (3, 'i8')}
+        reader = TabularAsciiReader(self.dummy_fname, columns_to_keep_dict)
+        with open(self.dummy_fname, 'r') as f:
+            _ = f.readline()
+            block = ''.join(line for line in f.readlines() if line[0] != '#') + '\n'
+        row_cut_clauses = [('vmax', '>', 250.)]
+        correct_arr = _parse_ascii_block(block, reader.column_indices_to_keep, reader.dt)
+        correct_cut_arr = _parse_ascii_block(block, reader.column_indices_to_keep, reader.dt, 
+            row_cut_clauses)
+
+        max_tokenized_block_size = tabular_ascii_reader._max_tokenized_block_size
+        try:
+            for piece_size in (1, 50, 500):
+                tabular_ascii_reader._max_tokenized_block_size = piece_size
+                arr = _parse_ascii_block(block, reader.column_indices_to_keep, reader.dt)
+                assert np.all(arr == correct_arr)
+                arr = _parse_ascii_block(block, reader.column_indices_to_keep, reader.dt, 
+                    row_cut_clauses)
+                assert np.all(arr == correct_cut_arr)
+        finally:
+            tabular_ascii_reader._max_tokenized_block_size = max_tokenized_block_size
+        assert len(correct_arr) == 105
+        assert np.all(correct_cut_arr['vmax'] > 250.)
+
+    @pytest.mark.slow
+    def test_read_ascii_progress_callback(self):
+        """ Verify that the progress callback is called once per chunk, 
+        and that interleaved comment lines are ignored. 
+        """
+        write_tabular_data(self.dummy_fname)
+        with open(self.dummy_fname, 'a') as f:
+            f.write('# trailing comment\n')
+            f.write('104  500.  1e13  -1\n')
+
+        columns_to_keep_dict = {'vmax': (1, 'f4'), 'id': (0, 'i8'), 'upid': (3, 'i8')}
+        reader = TabularAsciiReader(self.dummy_fname, columns_to_keep_dict, 
+            row_cut_eq_dict = {'upid': -1})
+
+        progress = []
+        def callback(num_bytes_read, num_bytes_total, num_rows_kept):
+            progress.append((num_bytes_read, num_bytes_total, num_rows_kept))
+
+        arr = reader.read_ascii(chunk_memory_size = 1e-5, progress_callback = callback)
+        assert np.all(arr['id'] == [101, 104])
+        assert len(progress) == 5
+        assert progress[-1][2] == 2
+        assert progress[-1][0] == progress[-1][1] == os.path.getsize(self.dummy_fname)
+
+    @pytest.mark.slow
+    def test_read_ascii_num_workers(self):
+        """ Verify that parsing the file in parallel blocks 
+        gives the same result as the serial read. 
+        """
+        write_many_rows(self.dummy_fname)
+
+        columns_to_keep_dict = {'vmax': (1, 'f4'), 'id': (0, 'i8'), 'upid': (3, 'i8')}
+        reader = TabularAsciiReader(self.dummy_fname, columns_to_keep_dict, 
+            row_cut_max_dict = {'vmax': 550})
+        correct_arr = reader.read_ascii()
+        assert len(correct_arr) == 55
+
+        arr = reader.read_ascii(chunk_memory_size = 1e-4, num_workers = 3)
+        assert np.all(arr == correct_arr)
+
+        with pytest.raises(ValueError) as err:
+            arr = reader.read_ascii(num_workers = 0)
+        substr = "Input ``num_workers`` must be a positive integer or the string 'max'"
+        assert substr in err.value.message
+
+    def test_bounded_imap(self):
+        """ Verify that results are yielded in order and that 
+        no more than ``max_in_flight`` tasks are submitted ahead of the consumer. 
+        """
+        class AsyncResult(object):
+            def __init__(self, pool, value):
+                self.pool, self.value = pool, value
+            def get(self):
+                self.pool.num_in_flight -= 1
+                return self.value
+
+        class SerialPool(object):
+            num_in_flight, max_num_in_flight = 0, 0
+            def apply_async(self, func, args):
+                self.num_in_flight += 1
+                self.max_num_in_flight = max(self.max_num_in_flight, self.num_in_flight)
+                return AsyncResult(self, func(*args))
+
+        pool = SerialPool()
+        result = list(_bounded_imap(pool, lambda x: x**2, range(20), 4))
+        assert result == [x**2 for x in range(20)]
+        assert pool.max_num_in_flight == 4
+        assert pool.num_in_flight == 0
+
+    @pytest.mark.slow
+    def test_read_ascii_num_workers_bgzf(self):
+        """ Verify that parsing a BGZF-compressed file in parallel blocks, 
+        whose gzip members end in the middle of lines, 
+        gives the same result as the serial read of the uncompressed file. 
+        """
+        write_many_rows(self.dummy_fname)
+        with open(self.dummy_fname, 'rb') as f:
+            data = f.read()
+
+        columns_to_keep_dict = {'vmax': (1, 'f4'), 'id': (0, 'i8'), 'upid': (3, 'i8')}
+        correct_arr = TabularAsciiReader(self.dummy_fname, columns_to_keep_dict, 
+            row_cut_max_dict = {'vmax': 550}).read_ascii()
+
+        bgzf_fname = self.dummy_fname + '.gz'
+        offsets = write_bgzf(bgzf_fname, data, 50)
+        assert np.all(_bgzf_member_offsets(bgzf_fname) == offsets)
+        assert _read_byte_range(bgzf_fname, offsets[1], offsets[3], True) == data[50:150]
+        assert _read_byte_range(bgzf_fname, 0, offsets[-1], True) == data
+
+        reader = TabularAsciiReader(bgzf_fname, columns_to_keep_dict, 
+            row_cut_max_dict = {'vmax': 550})
+        assert np.all(reader.read_ascii() == correct_arr)
+        for chunk_memory_size in (1e-4, 3e-4, 1):
+            arr = reader.read_ascii(chunk_memory_size = chunk_memory_size, num_workers = 3)
+            assert np.all(arr == correct_arr)
+
+    @pytest.mark.slow
+    def test_read_ascii_num_workers_gzip(self):
+        """ Verify that files gzipped in a single member are read serially, with a warning. 
+        """
+        write_many_rows(self.dummy_fname)
+        with open(self.dummy_fname, 'rb') as f:
+            data = f.read()
+
+        columns_to_keep_dict = {'vmax': (1, 'f4'), 'id': (0, 'i8'), 'upid': (3, 'i8')}
+        correct_arr = TabularAsciiReader(self.dummy_fname, columns_to_keep_dict, 
+            row_cut_max_dict = {'vmax': 550}).read_ascii()
+
+        gzip_fname = self.dummy_fname + '.gz'
+        f = gzip.open(gzip_fname, 'wb')
+        f.write(data)
+        f.close()
+        assert _bgzf_member_offsets(gzip_fname) is None
+
+        reader = TabularAsciiReader(gzip_fname, columns_to_keep_dict, 
+            row_cut_max_dict = {'vmax': 550})
+        with warnings.catch_warnings(record = True) as w:
+            warnings.simplefilter('always')
+            arr = reader.read_ascii(chunk_memory_size = 1e-4, num_workers = 3)
+        assert np.all(arr == correct_arr)
+        substr = "is gzipped \nbut not in the BGZF format"
+        assert any(substr in str(warning.message) for warning in w)
+
+    @pytest.mark.slow
+    def test_read_ascii_row_cut_predicates(self):
+        """ Verify that general predicates are applied correctly, 
+        both when reading the file and via the apply_row_cut method. 
+        """
+        write_tabular_data(self.dummy_fname)
+
+        columns_to_keep_dict = {'vmax': (1, 'f4'), 'id': (0, 'i8'), 'upid': (3, 'i8')}
+        reader = TabularAsciiReader(self.dummy_fname, columns_to_keep_dict, 
+            row_cut_max_dict = {'vmax': 400}, 
+            row_cut_predicates = [('vmax', '>=', 200), ('upid', 'not in', [3999494331])])
+        arr = reader.read_ascii()
+        assert np.all(arr['id'] == [101])
+
+        full_arr = TabularAsciiReader(self.dummy_fname, columns_to_keep_dict).read_ascii()
+        assert np.all(reader.apply_row_cut(full_arr) == arr)
+
+        with pytest.raises(KeyError) as err:
+            reader = TabularAsciiReader(self.dummy_fname, columns_to_keep_dict, 
+                row_cut_predicates = [('mvir', '>', 1e10)])
+        substr = 'The ``mvir`` key does not appear in the input'
+        assert substr in err.value.message
+
+        with pytest.raises(ValueError) as err:
+            reader = TabularAsciiReader(self.dummy_fname, columns_to_keep_dict, 
+                row_cut_predicates = [('vmax', '=>', 200)])
+        substr = "The operator ``=>`` appearing in the input ``row_cut_predicates`` is not recognized"
+        assert substr in err.value.message
+
+        with pytest.raises(TypeError) as err:
+            reader = TabularAsciiReader(self.dummy_fname, columns_to_keep_dict, 
+                row_cut_predicates = [('vmax', '>')])
+        substr = "must be a three-element tuple (colname, operator, value)"
+        assert substr in err.value.message
+
     def tearDown(self):
         try:
             shutil.rmtree(self.tmpdir)
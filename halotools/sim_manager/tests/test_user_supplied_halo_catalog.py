@@ -23,6 +23,7 @@ from astropy.table import Table
 from .. import UserSuppliedHaloCatalog
 from ..user_supplied_ptcl_catalog import UserSuppliedPtclCatalog
 from ..halo_table_cache import HaloTableCache
+from ..hdf5_table_layout import read_hdf5_table
 
 from ...custom_exceptions import HalotoolsError, InvalidCacheLogEntry
 
@@ -180,6 +181,41 @@ class TestUserSuppliedHaloCatalog(TestCase):
                 **bad_halocat_args)
             assert 'interpreted as metadata' in str(w[-1].message)
 
+    def test_zero_copy_memmap_columns(self):
+        memmap_columns = {}
+        for key, value in self.good_halocat_args.items():
+            fname = os.path.join(self.dummy_cache_baseloc, key + '.bin')
+            value.tofile(fname)
+            memmap_columns[key] = np.memmap(fname, dtype = value.dtype, mode = 'r')
+
+        halocat = UserSuppliedHaloCatalog(Lbox = 200, particle_mass = 100, 
+            redshift = self.redshift, copy = False, **memmap_columns)
+        assert not hasattr(halocat, 'copy')
+        for key, value in memmap_columns.items():
+            assert np.all(halocat.halo_table[key] == self.good_halocat_args[key])
+            assert np.may_share_memory(halocat.halo_table[key], value)
+            assert not halocat.halo_table[key].flags.writeable
+
+        halocat = UserSuppliedHaloCatalog(Lbox = 200, particle_mass = 100, 
+            redshift = self.redshift, **memmap_columns)
+        for key, value in memmap_columns.items():
+            assert not np.may_share_memory(halocat.halo_table[key], value)
+
+        halo_z = np.copy(self.halo_z)
+        halo_z[-1] = 101
+        halocat_args = copy(self.good_halocat_args)
+        halocat_args['halo_z'] = halo_z
+        validation_chunk_size = UserSuppliedHaloCatalog.validation_chunk_size
+        UserSuppliedHaloCatalog.validation_chunk_size = 16
+        try:
+            with pytest.raises(HalotoolsError) as err:
+                halocat = UserSuppliedHaloCatalog(Lbox = 100, particle_mass = 100, 
+                    redshift = self.redshift, copy = False, **halocat_args)
+            substr = "must only store arrays\nthat are bound by 0 and the input ``Lbox``"
+            assert substr in err.value.message
+        finally:
+            UserSuppliedHaloCatalog.validation_chunk_size = validation_chunk_size
+
     def test_ptcl_table(self):
         """ Method performs various existence and consistency tests on the input ptcl_table.
 
@@ -425,6 +461,54 @@ class TestUserSuppliedHaloCatalog(TestCase):
             update_ascii = True,
             delete_corresponding_halo_catalog = True)
 
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_add_halocat_to_cache_columnar(self):
+        halocat = UserSuppliedHaloCatalog(Lbox = 200, 
+            particle_mass = 100, redshift = self.redshift, 
+            **self.good_halocat_args)
+
+        basename = 'abc.hdf5'
+        fname = os.path.join(self.dummy_cache_baseloc, basename)
+
+        simname = 'dummy_simname'
+        halo_finder = 'dummy_halo_finder'
+        version_name = 'dummy_version_name'
+        processing_notes = 'dummy processing notes'
+
+        with pytest.raises(HalotoolsError) as err:
+            halocat.add_halocat_to_cache(
+                fname, simname, halo_finder, version_name, processing_notes, 
+                overwrite = True, hdf5_layout = 'rows')
+        substr = "The input layout ``rows`` is not supported."
+        assert substr in err.value.message
+
+        halocat.add_halocat_to_cache(
+            fname, simname, halo_finder, version_name, processing_notes, 
+            overwrite = True, hdf5_layout = 'columnar', 
+            hdf5_compression = 'lzf', hdf5_shuffle = True)
+
+        f = h5py.File(fname, 'r')
+        assert isinstance(f['data'], h5py.Group)
+        assert f['data']['halo_x'].compression == 'lzf'
+        f.close()
+
+        halo_table = read_hdf5_table(fname)
+        for key in halocat.halo_table.keys():
+            assert np.all(halo_table[key] == halocat.halo_table[key])
+
+        cache = HaloTableCache()
+        assert halocat.log_entry in cache.log
+
+        cache.remove_entry_from_cache_log(
+            halocat.log_entry.simname, 
+            halocat.log_entry.halo_finder,
+            halocat.log_entry.version_name,
+            halocat.log_entry.redshift,
+            halocat.log_entry.fname, 
+            raise_non_existence_exception = True, 
+            update_ascii = True,
+            delete_corresponding_halo_catalog = True)
+
     def tearDown(self):
         try:
             shutil.rmtree(self.dummy_cache_baseloc)
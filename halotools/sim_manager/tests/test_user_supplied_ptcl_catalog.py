@@ -272,6 +272,36 @@ class TestUserSuppliedPtclCatalog(TestCase):
             update_ascii = True,
             delete_corresponding_ptcl_catalog = True)
 
+    @pytest.mark.skipif('not HAS_H5PY')
+    def test_add_ptcl_pyramid_to_cache(self):
+        fname = os.path.join(self.dummy_cache_baseloc, 'abc.hdf5')
+
+        def chunks():
+            for start in range(0, len(self.good_ptcl_table), 3000):
+                yield self.good_ptcl_table[start:start + 3000]
+
+        log_entry = UserSuppliedPtclCatalog.add_ptcl_pyramid_to_cache(
+            chunks(), len(self.good_ptcl_table), fname, 
+            'dummy_simname', 'dummy_version_name', 'dummy processing notes', 
+            redshift = self.redshift, Lbox = self.Lbox, particle_mass = 100, 
+            pyramid_levels = (1e3, 5e3), seed = 43)
+
+        cache = PtclTableCache()
+        assert log_entry in cache.log
+
+        f = h5py.File(fname, 'r')
+        assert list(f.attrs['ptcl_pyramid_levels']) == [1000, 5000]
+        assert f['data'].shape == (5000, )
+        assert float(f.attrs['Lbox']) == self.Lbox
+        f.close()
+
+        cache.remove_entry_from_cache_log(
+            log_entry.simname, log_entry.version_name, 
+            log_entry.redshift, log_entry.fname, 
+            raise_non_existence_exception = True, 
+            update_ascii = True,
+            delete_corresponding_ptcl_catalog = True)
+
 
     def tearDown(self):
         try:
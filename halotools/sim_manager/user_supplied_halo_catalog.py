@@ -20,6 +20,7 @@ except ImportError:
 from .halo_table_cache import HaloTableCache 
 from .halo_table_cache_log_entry import HaloTableCacheLogEntry, get_redshift_string
 from .user_supplied_ptcl_catalog import UserSuppliedPtclCatalog
+from .hdf5_table_layout import write_table_to_hdf5, _verify_layout_options
 
 from ..utils.array_utils import custom_len, convert_to_ndarray
 from ..custom_exceptions import HalotoolsError
@@ -33,6 +34,10 @@ class UserSuppliedHaloCatalog(object):
     See :ref:`user_supplied_halo_catalogs` for a tutorial on this class. 
     
     """
+
+    # Number of rows of the halo table scanned at a time during validation 
+    validation_chunk_size = 2**20
+
     def __init__(self, **kwargs):
         """
         Parameters 
@@ -63,6 +68,16 @@ class UserSuppliedHaloCatalog(object):
             randomly selected from the snapshot. At a minimum, the table must have 
             columns ``x``, ``y`` and ``z``. Default is None. 
 
+        copy : bool, optional 
+            If True, the ``halo_table`` stores copies of the input columns. 
+            If False, the columns of the ``halo_table`` are views of the input arrays, 
+            which may be `numpy.memmap` views of a binary file opened in read-only mode, 
+            so that constructing the catalog requires no additional memory. 
+            In this case, the columns are validated in chunks of 
+            ``validation_chunk_size`` rows, any in-place modification of the 
+            ``halo_table`` also modifies the input arrays, and columns of 
+            read-only arrays remain read-only. Default is True. 
+
         Notes 
         -------
         This class is tested by 
@@ -129,10 +144,16 @@ class UserSuppliedHaloCatalog(object):
         >>> ptclcat = UserSuppliedPtclCatalog(x = ptcl_x, y = ptcl_y, z = ptcl_z, Lbox = Lbox, particle_mass = particle_mass, redshift = redshift)
         >>> halo_catalog = UserSuppliedHaloCatalog(user_supplied_ptclcat = ptclcat, redshift = redshift, halo_spin = spin, simname = simname, Lbox = Lbox, particle_mass = particle_mass, halo_x = x, halo_y = y, halo_z = z, halo_id = ids, halo_mvir = mass)
 
+        Catalogs too large to be copied in memory can be supplied 
+        as memory-mapped views of a binary file with the ``copy`` keyword: 
+
+        >>> halo_x = np.memmap('halo_x.bin', dtype = 'f4', mode = 'r') # doctest: +SKIP
+        >>> halo_catalog = UserSuppliedHaloCatalog(copy = False, redshift = redshift, Lbox = Lbox, particle_mass = particle_mass, halo_x = halo_x, halo_y = halo_y, halo_z = halo_z, halo_id = halo_id, halo_mvir = halo_mvir) # doctest: +SKIP
 
         """
+        copy = kwargs.pop('copy', True)
         halo_table_dict, metadata_dict = self._parse_constructor_kwargs(**kwargs)
-        self.halo_table = Table(halo_table_dict)
+        self.halo_table = Table(halo_table_dict, copy = copy)
 
         self._test_metadata_dict(**metadata_dict)
         for key, value in metadata_dict.iteritems():
@@ -160,7 +181,7 @@ class UserSuppliedHaloCatalog(object):
 
         try:
             halo_id = kwargs['halo_id']
-            assert type(halo_id) is np.ndarray 
+            assert isinstance(halo_id, np.ndarray)
             Nhalos = custom_len(halo_id)
             assert Nhalos > 1
         except KeyError, AssertionError:
@@ -170,7 +191,7 @@ class UserSuppliedHaloCatalog(object):
 
         halo_table_dict = (
             {key: kwargs[key] for key in kwargs 
-            if (type(kwargs[key]) is np.ndarray) 
+            if isinstance(kwargs[key], np.ndarray) 
             and (custom_len(kwargs[key]) == Nhalos) 
             and (key[:5] == 'halo_')}
             )
@@ -216,17 +237,15 @@ class UserSuppliedHaloCatalog(object):
 
         Lbox = metadata_dict['Lbox']
         try:
-            x, y, z = (
-                self.halo_table['halo_x'], 
-                self.halo_table['halo_y'], 
-                self.halo_table['halo_z']
-                )
-            assert np.all(x >= 0)
-            assert np.all(x <= Lbox)
-            assert np.all(y >= 0)
-            assert np.all(y <= Lbox)
-            assert np.all(z >= 0)
-            assert np.all(z <= Lbox)
+            # Scan the positions in chunks, so that no temporary 
+            # arrays of length Nhalos are created 
+            Nhalos = len(self.halo_table)
+            for first in range(0, Nhalos, self.validation_chunk_size):
+                last = min(first + self.validation_chunk_size, Nhalos)
+                for key in ('halo_x', 'halo_y', 'halo_z'):
+                    pos = self.halo_table[key][first:last]
+                    assert np.min(pos) >= 0
+                    assert np.max(pos) <= Lbox
         except AssertionError:
             msg = ("The ``halo_x``, ``halo_y`` and ``halo_z`` columns must only store arrays\n"
                 "that are bound by 0 and the input ``Lbox``. \n")
@@ -240,7 +259,7 @@ class UserSuppliedHaloCatalog(object):
             raise HalotoolsError(msg)
 
         for key, value in metadata_dict.iteritems():
-            if (type(value) == np.ndarray):
+            if isinstance(value, np.ndarray):
                 if custom_len(value) == len(self.halo_table['halo_id']):
                     msg = ("\nThe input ``" + key + "`` argument stores a length-Nhalos ndarray.\n"
                         "However, this key is being interpreted as metadata because \n"
@@ -302,7 +321,8 @@ class UserSuppliedHaloCatalog(object):
 
     def add_halocat_to_cache(self, 
         fname, simname, halo_finder, version_name, processing_notes, 
-        overwrite = False, **additional_metadata):
+        overwrite = False, hdf5_layout = 'compound', hdf5_chunk_size = None, 
+        hdf5_compression = None, hdf5_shuffle = False, **additional_metadata):
         """
         Parameters 
         ------------
@@ -334,6 +354,27 @@ class UserSuppliedHaloCatalog(object):
             If the chosen ``fname`` already exists, then you must set ``overwrite`` 
             to True in order to write the file to disk. Default is False. 
 
+        hdf5_layout : string, optional 
+            Layout of the halo table in the hdf5 file, either ``compound``, 
+            in which the table is a single structured dataset, or ``columnar``, 
+            in which each column is stored as a separate dataset, so that 
+            reading one column of the cached catalog reads no other column. 
+            Both layouts are understood by `~halotools.sim_manager.CachedHaloCatalog`. 
+            Default is ``compound``. 
+
+        hdf5_chunk_size : int, optional 
+            Number of rows of each hdf5 chunk. Default is None, in which case 
+            uncompressed tables are stored contiguously, so that they can be memory-mapped, 
+            and all other tables in chunks of roughly 1Mb. 
+
+        hdf5_compression : string, optional 
+            Compression filter applied to the halo table, either None, ``lzf`` or ``gzip``. 
+            Default is None. 
+
+        hdf5_shuffle : bool, optional 
+            If True, the hdf5 shuffle filter is applied, which typically improves compression. 
+            Default is False. 
+
         **additional_metadata : sequence of strings, optional 
             Each keyword of ``additional_metadata`` defines the name 
             of a piece of metadata stored in the hdf5 file. The 
@@ -392,11 +433,14 @@ class UserSuppliedHaloCatalog(object):
                     "``"+key+"`` keyword is not representable as a string.\n")
                 raise HalotoolsError(msg)
 
+        _verify_layout_options(hdf5_layout, hdf5_chunk_size, hdf5_compression, hdf5_shuffle)
 
         ############################################################
         ## Now write the file to disk and add the appropriate metadata 
 
-        self.halo_table.write(fname, path='data', overwrite = overwrite)
+        write_table_to_hdf5(self.halo_table, fname, path='data', 
+            layout = hdf5_layout, chunk_size = hdf5_chunk_size, 
+            compression = hdf5_compression, shuffle = hdf5_shuffle, overwrite = overwrite)
 
         f = h5py.File(fname)
 
@@ -20,6 +20,7 @@ except ImportError:
 from .ptcl_table_cache import PtclTableCache 
 from .ptcl_table_cache_log_entry import PtclTableCacheLogEntry
 from .halo_table_cache_log_entry import get_redshift_string
+from .ptcl_table_pyramid import write_ptcl_pyramid
 
 from ..utils.array_utils import custom_len, convert_to_ndarray
 from ..custom_exceptions import HalotoolsError
@@ -135,6 +136,10 @@ class UserSuppliedPtclCatalog(object):
 
         >>> array_of_x_positions = halocat.ptcl_table['x'] # doctest: +SKIP
 
+        If your particle catalog is a full snapshot that is too large to load into memory, 
+        the `add_ptcl_pyramid_to_cache` method can be used to store a random downsampling 
+        of the snapshot that supports loading particle tables of several different sizes. 
+
         If you do not wish to store your particle catalog in cache, 
         see the :ref:`using_user_supplied_ptcl_catalog_without_the_cache` section 
         of the :ref:`working_with_alternative_particle_data` tutorial. 
@@ -223,7 +228,8 @@ class UserSuppliedPtclCatalog(object):
 
 
     def add_ptclcat_to_cache(self, 
-        fname, simname, version_name, processing_notes, overwrite = False):
+        fname, simname, version_name, processing_notes, overwrite = False, 
+        pyramid_levels = None):
         """
         Parameters 
         ------------
@@ -250,6 +256,138 @@ class UserSuppliedPtclCatalog(object):
             If the chosen ``fname`` already exists, then you must set ``overwrite`` 
             to True in order to write the file to disk. Default is False. 
 
+        pyramid_levels : sequence of int, optional 
+            If given, the particles are stored in a random order, together with the sizes 
+            of the nested random downsamplings listed in ``pyramid_levels``, 
+            so that the ``num_ptcl`` argument of `~halotools.sim_manager.CachedHaloCatalog` 
+            only reads the requested number of particles from disk. 
+            Only the largest downsampling is stored. See `add_ptcl_pyramid_to_cache`. 
+            Default is None, in which case all particles are stored in their original order. 
+
+        """
+        self._verify_cache_location(fname, simname, version_name, processing_notes, overwrite)
+
+        if pyramid_levels is None:
+            self.ptcl_table.write(fname, path='data', overwrite = overwrite)
+        else:
+            write_ptcl_pyramid(fname, [self.ptcl_table], len(self.ptcl_table), 
+                pyramid_levels, overwrite = overwrite)
+
+        self.log_entry = self._store_metadata_and_update_cache_log(fname, simname, version_name, 
+            processing_notes, self.redshift, self.Lbox, self.particle_mass)
+
+    @classmethod
+    def add_ptcl_pyramid_to_cache(cls, chunks, num_ptcl_total, 
+        fname, simname, version_name, processing_notes, 
+        redshift, Lbox, particle_mass, 
+        pyramid_levels = (1e5, 1e6, 1e7, 1e8), overwrite = False, seed = None):
+        """ Store a random downsampling of a full particle snapshot in cache, 
+        streaming through the snapshot one chunk at a time so that neither the snapshot 
+        nor the downsampling need fit in memory. 
+
+        The particles are stored in a uniformly random order, so that the first *num_ptcl* 
+        particles are themselves a random downsampling of the snapshot. 
+        The particle table of any size up to the largest of the ``pyramid_levels`` 
+        can then be loaded by reading only that many particles from disk, 
+        either with the ``num_ptcl`` argument of `~halotools.sim_manager.CachedHaloCatalog` 
+        or with its `~halotools.sim_manager.CachedHaloCatalog.load_ptcl_table` method. 
+        Smaller particle tables are always subsets of larger ones. 
+
+        Parameters 
+        ------------
+        chunks : iterable 
+            Iterable of the chunks of the snapshot, e.g., a generator reading one 
+            file of a multi-file snapshot at a time. Each chunk is an Astropy `~astropy.table.Table`, 
+            a structured array or a dictionary of equal-length arrays. 
+            Every chunk must store the same columns, including ``x``, ``y`` and ``z``. 
+
+        num_ptcl_total : int 
+            Total number of particles in the snapshot, i.e., the sum of the lengths of the chunks. 
+
+        fname : string 
+            Absolute path of the file to be stored in cache. 
+            Must conclude with an `.hdf5` extension. 
+
+        simname : string 
+            Nickname of the simulation, which must match the simname of the associated halo catalog. 
+
+        version_name : string 
+            Nickname of the version of the particle catalog. 
+
+        processing_notes : string 
+            String used to provide supplementary notes that will be attached to 
+            the hdf5 file storing your particle data. 
+
+        redshift : float 
+            Redshift of the snapshot. 
+
+        Lbox : float 
+            Size of the simulation box in Mpc/h. 
+
+        particle_mass : float 
+            Mass of each particle in Msun/h. 
+
+        pyramid_levels : sequence of int, optional 
+            Sizes of the nested random downsamplings. 
+            Only the largest downsampling is stored. 
+            Default is (1e5, 1e6, 1e7, 1e8). 
+
+        overwrite : bool, optional 
+            If the chosen ``fname`` already exists, then you must set ``overwrite`` 
+            to True in order to write the file to disk. Default is False. 
+
+        seed : int, optional 
+            Seed of the random number generator used to select and shuffle the particles. 
+            Default is None. 
+
+        Returns 
+        --------
+        log_entry : `~halotools.sim_manager.PtclTableCacheLogEntry` 
+            Entry of the cache log storing the particle catalog. 
+
+        Examples 
+        ----------
+        >>> def snapshot_chunks(snapshot_fnames): # doctest: +SKIP
+        >>>     for snapshot_fname in snapshot_fnames: # doctest: +SKIP
+        >>>         yield read_my_snapshot_file(snapshot_fname) # doctest: +SKIP
+        >>> UserSuppliedPtclCatalog.add_ptcl_pyramid_to_cache(snapshot_chunks(snapshot_fnames), 2048**3, my_fname, my_simname, my_version_name, my_processing_notes, redshift = 0, Lbox = 250., particle_mass = 1.55e8) # doctest: +SKIP
+        >>> halocat = CachedHaloCatalog(simname = my_simname, redshift = 0, ptcl_version_name = my_version_name, num_ptcl = 1e7) # doctest: +SKIP
+
+        """
+        cls._verify_cache_location(fname, simname, version_name, processing_notes, overwrite)
+
+        try:
+            assert float(Lbox) > 0
+            assert float(particle_mass) > 0
+            redshift = float(redshift)
+        except (AssertionError, TypeError, ValueError):
+            msg = ("\nThe ``redshift``, ``Lbox`` and ``particle_mass`` of the particle catalog \n"
+                "must be floats, with ``Lbox`` and ``particle_mass`` positive.\n")
+            raise HalotoolsError(msg)
+
+        def verified_chunks():
+            for chunk in chunks:
+                try:
+                    x, y, z = chunk['x'], chunk['y'], chunk['z']
+                except (KeyError, ValueError, IndexError, TypeError):
+                    msg = ("\nEach chunk of particles must store ``x``, ``y`` and ``z`` columns.\n")
+                    raise HalotoolsError(msg)
+                for pos in (x, y, z):
+                    if (np.any(pos < 0)) or (np.any(pos > Lbox)):
+                        msg = ("The ``x``, ``y`` and ``z`` columns must only store arrays\n"
+                            "that are bound by 0 and the input ``Lbox``. \n")
+                        raise HalotoolsError(msg)
+                yield chunk
+
+        write_ptcl_pyramid(fname, verified_chunks(), num_ptcl_total, pyramid_levels, 
+            overwrite = overwrite, seed = seed)
+
+        return cls._store_metadata_and_update_cache_log(fname, simname, version_name, 
+            processing_notes, redshift, Lbox, particle_mass)
+
+    @staticmethod
+    def _verify_cache_location(fname, simname, version_name, processing_notes, overwrite):
+        """
         """
         try:
             import h5py 
@@ -289,22 +427,23 @@ class UserSuppliedPtclCatalog(object):
                 "and ``processing_notes``\nmust all be strings.")
             raise HalotoolsError(msg)
 
-        ############################################################
-        ## Now write the file to disk and add the appropriate metadata 
-
-        self.ptcl_table.write(fname, path='data', overwrite = overwrite)
-
+    @staticmethod
+    def _store_metadata_and_update_cache_log(fname, simname, version_name, 
+        processing_notes, redshift, Lbox, particle_mass):
+        """ Add the metadata to the hdf5 file that has just been written to disk, 
+        and add the file to the cache log. 
+        """
         f = h5py.File(fname)
 
-        redshift_string = str(get_redshift_string(self.redshift))
+        redshift_string = str(get_redshift_string(redshift))
 
         f.attrs.create('simname', str(simname))
         f.attrs.create('version_name', str(version_name))
         f.attrs.create('redshift', redshift_string)
         f.attrs.create('fname', str(fname))
 
-        f.attrs.create('Lbox', self.Lbox)
-        f.attrs.create('particle_mass', self.particle_mass)
+        f.attrs.create('Lbox', Lbox)
+        f.attrs.create('particle_mass', particle_mass)
 
         time_right_now = str(datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
         f.attrs.create('time_catalog_was_originally_cached', time_right_now)
@@ -319,23 +458,7 @@ class UserSuppliedPtclCatalog(object):
 
         log_entry = PtclTableCacheLogEntry(
             simname = simname, version_name = version_name, 
-            redshift = self.redshift, fname = fname)
+            redshift = redshift, fname = fname)
 
         cache.add_entry_to_cache_log(log_entry, update_ascii = True)
-        self.log_entry = log_entry
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+        return log_entry
@@ -11,4 +11,6 @@ from .array_utils import *
 from .io_utils import *
 from .table_utils import *
 from .value_added_halo_table_functions import *
-from .group_member_generator import group_member_generator
\ No newline at end of file
+from .group_member_generator import group_member_generator
+from .group_aggregation import GroupBy
+from .instrumentation import *
@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+
+""" Module containing the `GroupBy` class,
+which performs vectorized calculations over groups of data
+sharing a common grouping key.
+"""
+
+import numpy as np
+
+from ..custom_exceptions import HalotoolsError
+
+__all__ = ('GroupBy', )
+
+
+class GroupBy(object):
+    """ Class used to perform vectorized calculations over grouped data,
+    e.g., group richness, total group stellar mass, host halo mass,
+    or the rank of each satellite within its host.
+
+    Whereas `~halotools.utils.group_member_generator` yields the members
+    of one group at a time, so that intra-group calculations are
+    performed at the speed of the python interpreter,
+    every method of `GroupBy` operates on all groups at once,
+    with a cost scaling linearly with the number of rows of the data.
+    Reductions are carried out with the ``reduceat`` method of Numpy ufuncs.
+
+    The input ``data`` need not be sorted by the ``grouping_key``.
+    If it is not, `GroupBy` sorts a copy of the grouping key
+    once during instantiation, and all results are returned in the
+    original order of the rows of ``data``.
+    Within each group, members appear in the order of the rows of ``data``.
+    """
+
+    def __init__(self, data, grouping_key):
+        """
+        Parameters
+        ------------
+        data : Structured Numpy `~numpy.ndarray` or Astropy `~astropy.table.Table`
+
+        grouping_key : string
+            Name of the column that defines how the input ``data`` are grouped,
+            e.g., ``group_id`` or ``halo_hostid``.
+
+        Examples
+        ----------
+        >>> from halotools.sim_manager import FakeSim
+        >>> halos = FakeSim().halo_table
+        >>> groups = GroupBy(halos, 'halo_hostid')
+
+        Each reduction returns one value per group.
+        The ``group_ids`` attribute stores the value of the
+        grouping key of each group, in increasing order:
+
+        >>> total_mass = groups.sum('halo_mvir')
+        >>> assert len(total_mass) == len(groups.group_ids)
+
+        With ``broadcast`` set to True, the value of each group is instead
+        returned for every group member, which is convenient for creating new columns:
+
+        >>> halos['group_richness'] = groups.count(broadcast = True)
+        >>> halos['group_total_mass'] = groups.sum('halo_mvir', broadcast = True)
+
+        Because host halos have ``halo_upid`` = -1,
+        the host of each group has rank 0 when the members are ranked by ``halo_upid``:
+
+        >>> is_host = groups.rank('halo_upid') == 0
+
+        See also
+        ----------
+        `~halotools.utils.group_member_generator`
+        """
+        try:
+            available_columns = data.dtype.names
+            assert available_columns is not None
+        except (AttributeError, AssertionError):
+            msg = ("The input ``data`` must be an Astropy Table or Numpy Structured Array")
+            raise TypeError(msg)
+
+        try:
+            assert grouping_key in available_columns
+        except AssertionError:
+            msg = ("Input ``grouping_key`` must be a column name of the input ``data``")
+            raise KeyError(msg)
+
+        self.data = data
+        self.grouping_key = grouping_key
+
+        group_id_array = np.asarray(data[grouping_key])
+        self.num_rows = len(group_id_array)
+
+        if np.all(group_id_array[1:] >= group_id_array[:-1]):
+            self._idx_sorted = None
+            sorted_group_ids = group_id_array
+        else:
+            self._idx_sorted = np.argsort(group_id_array, kind = 'mergesort')
+            sorted_group_ids = group_id_array[self._idx_sorted]
+
+        is_first_member = np.ones(self.num_rows, dtype = bool)
+        is_first_member[1:] = sorted_group_ids[1:] != sorted_group_ids[:-1]
+
+        self._group_first_idx = np.flatnonzero(is_first_member)
+        self._sorted_group_index = np.cumsum(is_first_member) - 1
+
+        self.group_ids = sorted_group_ids[self._group_first_idx]
+        self.num_groups = len(self.group_ids)
+        self.group_richness = np.diff(np.append(self._group_first_idx, self.num_rows))
+
+    @property
+    def group_index(self):
+        """ Array of length ``num_rows`` storing the index of the
+        group of each row, such that ``group_ids[group_index]`` is equal to
+        the grouping key of each row.
+        """
+        try:
+            return self._group_index
+        except AttributeError:
+            self._group_index = self._unsort(self._sorted_group_index)
+            return self._group_index
+
+    def _sorted_values(self, values):
+        """ Array storing the input values in the order of the sorted grouping key.
+        The input may either be a column name of ``data`` or an array of length ``num_rows``.
+        """
+        if type(values) in (str, unicode):
+            try:
+                values = self.data[values]
+            except (KeyError, ValueError):
+                msg = ("\nThe input ``" + values + "`` is not a column name of the input ``data``\n")
+                raise KeyError(msg)
+
+        values = np.asarray(values)
+        if len(values) != self.num_rows:
+            msg = ("\nInput arrays passed to the methods of GroupBy must have \n"
+                "the same length as the input ``data``\n")
+            raise HalotoolsError(msg)
+
+        if self._idx_sorted is None:
+            return values
+        else:
+            return values[self._idx_sorted]
+
+    def _unsort(self, sorted_result):
+        """ Array storing the input per-row values, given in the order of the sorted grouping key,
+        in the original order of the rows of ``data``.
+        """
+        if self._idx_sorted is None:
+            return sorted_result
+        else:
+            result = np.empty_like(sorted_result)
+            result[self._idx_sorted] = sorted_result
+            return result
+
+    def _reduceat(self, ufunc, values, broadcast):
+        """ Apply the input ufunc to the members of each group.
+        """
+        sorted_values = self._sorted_values(values)
+        if self.num_rows == 0:
+            result = np.zeros(0, dtype = sorted_values.dtype)
+        else:
+            result = ufunc.reduceat(sorted_values, self._group_first_idx)
+        return self._result(result, broadcast)
+
+    def _result(self, group_values, broadcast):
+        if broadcast is True:
+            return self.broadcast(group_values)
+        else:
+            return group_values
+
+    def broadcast(self, group_values):
+        """ Broadcast an array storing one value per group to every group member.
+
+        Parameters
+        -----------
+        group_values : array_like
+            Array of length ``num_groups``, ordered like ``group_ids``.
+
+        Returns
+        --------
+        result : array_like
+            Array of length ``num_rows`` storing the value of the group of each row.
+        """
+        group_values = np.asarray(group_values)
+        if len(group_values) != self.num_groups:
+            msg = ("\nThe input ``group_values`` must have one entry per group\n")
+            raise HalotoolsError(msg)
+        return group_values[self.group_index]
+
+    def count(self, broadcast = False):
+        """ Number of members in each group.
+
+        Parameters
+        -----------
+        broadcast : bool, optional
+            If True, return the result for every row of ``data``,
+            rather than once per group. Default is False.
+
+        Returns
+        --------
+        result : array_like
+        """
+        return self._result(self.group_richness, broadcast)
+
+    def sum(self, values, broadcast = False):
+        """ Sum of the input values over the members of each group.
+
+        Parameters
+        -----------
+        values : string or array_like
+            Column name of ``data``, or array of length ``num_rows``.
+
+        broadcast : bool, optional
+            If True, return the result for every row of ``data``,
+            rather than once per group. Default is False.
+
+        Returns
+        --------
+        result : array_like
+        """
+        return self._reduceat(np.add, values, broadcast)
+
+    def mean(self, values, broadcast = False):
+        """ Mean of the input values over the members of each group.
+
+        Parameters
+        -----------
+        values : string or array_like
+            Column name of ``data``, or array of length ``num_rows``.
+
+        broadcast : bool, optional
+            If True, return the result for every row of ``data``,
+            rather than once per group. Default is False.
+
+        Returns
+        --------
+        result : array_like
+        """
+        total = self._reduceat(np.add, values, False)
+        return self._result(total/self.group_richness.astype(float), broadcast)
+
+    def min(self, values, broadcast = False):
+        """ Minimum of the input values over the members of each group.
+
+        Parameters
+        -----------
+        values : string or array_like
+            Column name of ``data``, or array of length ``num_rows``.
+
+        broadcast : bool, optional
+            If True, return the result for every row of ``data``,
+            rather than once per group. Default is False.
+
+        Returns
+        --------
+        result : array_like
+        """
+        return self._reduceat(np.minimum, values, broadcast)
+
+    def max(self, values, broadcast = False):
+        """ Maximum of the input values over the members of each group.
+
+        Parameters
+        -----------
+        values : string or array_like
+            Column name of ``data``, or array of length ``num_rows``.
+
+        broadcast : bool, optional
+            If True, return the result for every row of ``data``,
+            rather than once per group. Default is False.
+
+        Returns
+        --------
+        result : array_like
+        """
+        return self._reduceat(np.maximum, values, broadcast)
+
+    def reduce(self, ufunc, values, broadcast = False):
+        """ Reduce the input values over the members of each group
+        with a user-supplied binary Numpy ufunc, e.g., `~numpy.multiply` or `~numpy.logical_or`.
+
+        Parameters
+        -----------
+        ufunc : `~numpy.ufunc`
+            Numpy ufunc taking two input arguments.
+
+        values : string or array_like
+            Column name of ``data``, or array of length ``num_rows``.
+
+        broadcast : bool, optional
+            If True, return the result for every row of ``data``,
+            rather than once per group. Default is False.
+
+        Returns
+        --------
+        result : array_like
+
+        Examples
+        ---------
+        >>> data = np.zeros(6, dtype = [('group_id', 'i8'), ('is_red', bool)])
+        >>> data['group_id'] = [0, 0, 1, 1, 1, 2]
+        >>> data['is_red'] = [True, False, True, True, True, False]
+        >>> groups = GroupBy(data, 'group_id')
+        >>> all_red = groups.reduce(np.logical_and, 'is_red')
+        """
+        try:
+            assert isinstance(ufunc, np.ufunc)
+            assert ufunc.nin == 2
+        except AssertionError:
+            msg = ("\nThe input ``ufunc`` must be a Numpy ufunc taking two input arguments\n")
+            raise TypeError(msg)
+        return self._reduceat(ufunc, values, broadcast)
+
+    def first(self, values, broadcast = False):
+        """ Value of the first member of each group.
+
+        Parameters
+        -----------
+        values : string or array_like
+            Column name of ``data``, or array of length ``num_rows``.
+
+        broadcast : bool, optional
+            If True, return the result for every row of ``data``,
+            rather than once per group. Default is False.
+
+        Returns
+        --------
+        result : array_like
+        """
+        sorted_values = self._sorted_values(values)
+        return self._result(sorted_values[self._group_first_idx], broadcast)
+
+    def last(self, values, broadcast = False):
+        """ Value of the last member of each group.
+
+        Parameters
+        -----------
+        values : string or array_like
+            Column name of ``data``, or array of length ``num_rows``.
+
+        broadcast : bool, optional
+            If True, return the result for every row of ``data``,
+            rather than once per group. Default is False.
+
+        Returns
+        --------
+        result : array_like
+        """
+        sorted_values = self._sorted_values(values)
+        return self._result(sorted_values[self._group_first_idx + self.group_richness - 1], broadcast)
+
+    def rank(self, values = None, ascending = True):
+        """ Rank of each row within its group, starting from 0.
+
+        Parameters
+        -----------
+        values : string or array_like, optional
+            Column name of ``data``, or array of length ``num_rows``,
+            according to which the members of each group are ranked.
+            Ties are broken by the order of the rows of ``data``.
+            Default is None, in which case members are ranked
+            by the order of the rows of ``data``.
+
+        ascending : bool, optional
+            If True, the member with the smallest value has rank 0.
+            If False, the member with the largest value has rank 0.
+            Default is True.
+
+        Returns
+        --------
+        rank : array_like
+            Integer array of length ``num_rows``.
+        """
+        position_in_group = (np.arange(self.num_rows) -
+            self._group_first_idx[self._sorted_group_index])
+
+        if values is None:
+            sorted_rank = position_in_group
+        else:
+            sorted_values = self._sorted_values(values)
+            order = np.lexsort((sorted_values, self._sorted_group_index))
+            sorted_rank = np.empty(self.num_rows, dtype = position_in_group.dtype)
+            sorted_rank[order] = position_in_group
+
+        if ascending is False:
+            sorted_rank = self.group_richness[self._sorted_group_index] - 1 - sorted_rank
+
+        return self._unsort(sorted_rank)
+
+    def percentile(self, values, ascending = True):
+        """ Percentile of the input values of each row within its group,
+        defined as (rank + 1)/richness,
+        following the convention of `~halotools.utils.compute_conditional_percentiles`.
+
+        Parameters
+        -----------
+        values : string or array_like
+            Column name of ``data``, or array of length ``num_rows``.
+
+        ascending : bool, optional
+            If True, the member with the largest value has percentile 1.
+            If False, the member with the smallest value has percentile 1.
+            Default is True.
+
+        Returns
+        --------
+        percentile : array_like
+            Float array of length ``num_rows`` with values in the interval (0, 1].
+        """
+        rank = self.rank(values, ascending = ascending)
+        return (rank + 1.)/self.count(broadcast = True)
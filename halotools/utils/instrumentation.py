@@ -0,0 +1,163 @@
+""" Module storing the lightweight instrumentation of the hot paths of Halotools,
+i.e., the pair counters of `~halotools.mock_observables` and the mock population
+of `~halotools.empirical_models`.
+
+Instrumentation is disabled unless an `instrument` context is active
+or a callback has been registered with `register_instrumentation_callback`,
+in which case each instrumented function checks a single flag per call
+and otherwise runs exactly as before. When enabled, every call of an instrumented
+function produces a dictionary recording where the time went,
+which is appended to the report of each active `instrument` context
+and passed to each registered callback.
+"""
+import os
+from time import time
+from contextlib import contextmanager
+
+from ..custom_exceptions import HalotoolsError
+
+__all__ = ('instrument', 'instrumentation_enabled',
+    'register_instrumentation_callback', 'unregister_instrumentation_callback')
+
+_active_reports = []
+_callbacks = []
+
+
+def instrumentation_enabled():
+    """ Returns True if an `instrument` context is active
+    or an instrumentation callback is registered.
+    """
+    return bool(_active_reports) or bool(_callbacks)
+
+
+@contextmanager
+def instrument():
+    """ Context manager recording the instrumentation of the calls
+    of the pair counters and mock population methods made inside the context.
+
+    The yielded report is a dictionary storing, for each instrumented function called
+    inside the context, the list of the records of its calls in order.
+    The records of the pair counters, e.g., ``report['npairs']``, store
+    the ``tree_build_time``, ``counting_time`` and ``total_time`` in seconds,
+    the number of ``cells_visited``, of ``distance_evaluations`` and of ``pairs_binned``,
+    i.e., of pairs separated by less than the largest bin, and the ``worker_wall_time``,
+    the list of the seconds spent counting pairs by each process.
+    The records of the mock population, e.g., ``report['HodMockFactory.populate']``,
+    store the ``total_time`` and the ``step_time`` dictionary of the seconds spent in each
+    step of the mock-generation calling sequence, together with the ``calling_sequence``
+    listing the steps in the order they were called.
+
+    Examples
+    ---------
+    >>> import numpy as np
+    >>> from halotools.mock_observables import npairs
+    >>> data = np.random.uniform(0, 250, (1000, 3))
+    >>> with instrument() as report:
+    ...     counts = npairs(data, data, np.logspace(-1, 1, 10), period = 250)
+    >>> record = report['npairs'][0]
+    >>> total_distance_evaluations = record['distance_evaluations']
+    """
+    report = {}
+    _active_reports.append(report)
+    try:
+        yield report
+    finally:
+        _active_reports.remove(report)
+
+
+def register_instrumentation_callback(callback):
+    """ Register a function called as ``callback(name, record)`` after each call
+    of an instrumented function, where ``name`` is the name of the function,
+    e.g., ``npairs``, and ``record`` is the dictionary documented in `instrument`.
+    Instrumentation remains enabled until the callback is unregistered
+    with `unregister_instrumentation_callback`.
+    """
+    if not callable(callback):
+        msg = ("\nThe input ``callback`` must be a callable object.\n")
+        raise HalotoolsError(msg)
+    _callbacks.append(callback)
+
+
+def unregister_instrumentation_callback(callback):
+    """ Unregister a function registered with `register_instrumentation_callback`.
+    """
+    try:
+        _callbacks.remove(callback)
+    except ValueError:
+        msg = ("\nThe input ``callback`` is not a registered instrumentation callback.\n")
+        raise HalotoolsError(msg)
+
+
+def record_call(name, record):
+    """ Append the input record of a call of the instrumented function ``name``
+    to the report of each active `instrument` context and pass it to each registered callback.
+    """
+    for report in _active_reports:
+        report.setdefault(name, []).append(record)
+    for callback in list(_callbacks):
+        callback(name, record)
+
+
+class StepTimer(object):
+    """ Timer recording the wall-clock time elapsed between consecutive calls
+    to its `lap` method, each of which ends a named step.
+    """
+
+    def __init__(self):
+        self.step_time = {}
+        self.calling_sequence = []
+        self._start = time()
+        self._last = self._start
+
+    def lap(self, step):
+        """ End the input step, which started at the previous call to `lap`,
+        or when the timer was created. Time spent in steps of the same name is accumulated.
+        """
+        now = time()
+        if step not in self.step_time:
+            self.step_time[step] = 0.
+            self.calling_sequence.append(step)
+        self.step_time[step] += now - self._last
+        self._last = now
+
+    def record(self, name, **kwargs):
+        """ Record the call of the instrumented function ``name``
+        with the step times and any additional entries passed as keyword arguments.
+        """
+        record = dict(kwargs)
+        record['total_time'] = time() - self._start
+        record['step_time'] = dict(self.step_time)
+        record['calling_sequence'] = list(self.calling_sequence)
+        record_call(name, record)
+
+
+class _DisabledStepTimer(object):
+    """ Step timer whose methods do nothing, used while instrumentation is disabled.
+    """
+
+    def lap(self, step):
+        pass
+
+    def record(self, name, **kwargs):
+        pass
+
+_disabled_step_timer = _DisabledStepTimer()
+
+
+def step_timer():
+    """ Returns a new `StepTimer` if instrumentation is enabled,
+    and otherwise a timer whose methods do nothing.
+    """
+    if _active_reports or _callbacks:
+        return StepTimer()
+    return _disabled_step_timer
+
+
+def timed_call(func, arg):
+    """ Call ``func(arg)``, returning the result together with the
+    identifier of the calling process and the wall-clock time of the call.
+    Used to record the time spent by each process of a multiprocessing pool.
+    """
+    start = time()
+    result = func(arg)
+    return result, os.getpid(), time() - start
@@ -3,10 +3,14 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-from time import time
-import sys, urllib
+from time import time, sleep
+import sys, os, urllib
+import hashlib, json, threading
 
-__all__ = ['file_len', 'download_file_from_url']
+from ..custom_exceptions import HalotoolsError
+
+__all__ = ['file_len', 'download_file_from_url', 
+    'download_file_with_resume', 'read_checksum_manifest']
 
 def file_len(fname):
     with open(fname) as f:
@@ -49,5 +53,335 @@ def download_file_from_url(url, fname):
     urllib.urlretrieve(url, fname, reporthook)
 
 
+def read_checksum_manifest(manifest_url, timeout = 60):
+    """ Function to retrieve a checksum manifest published on the web. 
+
+    The manifest is an ASCII file in the format written by the ``sha256sum`` 
+    and ``md5sum`` command-line utilities, with one line per file storing 
+    the hexadecimal checksum of the file followed by its basename. 
+
+    Parameters 
+    ----------
+    manifest_url : string 
+        Web location of the manifest, e.g., 
+        ``http://www.some.website.com/dirname/checksums.sha256``. 
+
+    timeout : float, optional 
+        Number of seconds to wait for the server. Default is 60. 
+
+    Returns 
+    -------
+    checksums : dict 
+        Dictionary whose keys are the basenames of the files 
+        and whose values are their checksums. 
+        If the manifest does not exist, the dictionary is empty. 
+    """
+    import requests
+
+    response = requests.get(manifest_url, timeout = timeout)
+    if response.status_code == 404:
+        return {}
+    response.raise_for_status()
+
+    checksums = {}
+    for line in response.text.splitlines():
+        line = line.strip()
+        if (line == '') or line.startswith('#'):
+            continue
+        checksum, basename = line.split(None, 1)
+        # sha256sum prefixes the filename with an asterisk in binary mode
+        checksums[basename.lstrip('*').strip()] = checksum.lower()
+    return checksums
+
+
+def _atomic_replace(src, dst):
+    """ Rename ``src`` to ``dst``, replacing any existing file. 
+    On POSIX systems the rename is atomic, so that ``dst`` never stores a partial file. 
+    """
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        if (os.name == 'nt') and os.path.isfile(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+def _file_checksum(fname, checksum_algorithm, block_size = 2**22):
+    """ Hexadecimal checksum of the input file, read in blocks of ``block_size`` bytes. 
+    """
+    hasher = hashlib.new(checksum_algorithm)
+    with open(fname, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class _SegmentedDownload(object):
+    """ Private class used by `download_file_with_resume` to download a file 
+    one byte range at a time into a preallocated partial file, 
+    recording the completed ranges so that an interrupted download can be resumed. 
+    """
+
+    def __init__(self, url, part_fname, progress_fname, size, validator, 
+        segment_size, max_retries, timeout, verbose):
+        self.url = url
+        self.part_fname = part_fname
+        self.progress_fname = progress_fname
+        self.size = size
+        self.validator = validator
+        self.segment_size = segment_size
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.verbose = verbose
+
+        self.segments = [(first, min(first + segment_size, size)) 
+            for first in range(0, size, segment_size)]
+        self.completed = self._load_progress()
+        self._save_progress()
+
+        self._lock = threading.Lock()
+        self._remaining = [s for s in self.segments if s[0] not in self.completed]
+        self._errors = []
+        self._start = time()
+        self._last_report = 0
+
+    def _load_progress(self):
+        """ Set of the first bytes of the segments completed by a previous download 
+        of the same file, or an empty set if the partial file cannot be resumed. 
+        """
+        try:
+            with open(self.progress_fname) as f:
+                progress = json.load(f)
+            assert progress['url'] == self.url
+            assert progress['size'] == self.size
+            assert progress['validator'] == self.validator
+            assert progress['segment_size'] == self.segment_size
+            assert os.path.getsize(self.part_fname) == self.size
+            return set(progress['completed'])
+        except (IOError, OSError, ValueError, KeyError, AssertionError):
+            # Preallocate the partial file
+            with open(self.part_fname, 'wb') as f:
+                f.truncate(self.size)
+            return set()
+
+    def _save_progress(self):
+        tmp_fname = self.progress_fname + '.tmp'
+        with open(tmp_fname, 'w') as f:
+            json.dump({'url': self.url, 'size': self.size, 'validator': self.validator, 
+                'segment_size': self.segment_size, 'completed': sorted(self.completed)}, f)
+        _atomic_replace(tmp_fname, self.progress_fname)
+
+    def _next_segment(self):
+        with self._lock:
+            if (len(self._remaining) == 0) or (len(self._errors) > 0):
+                return None
+            return self._remaining.pop(0)
+
+    def _download_segment(self, first, last):
+        """ Download bytes ``first`` through ``last``, retrying from the first 
+        byte not yet written each time the transfer is interrupted. 
+        """
+        import requests
+
+        offset, num_failures = first, 0
+        while offset < last:
+            response = None
+            try:
+                headers = {'Range': 'bytes={0}-{1}'.format(offset, last - 1)}
+                response = requests.get(self.url, headers = headers, 
+                    stream = True, timeout = self.timeout)
+                if (response.status_code >= 500) or (response.status_code == 429):
+                    # Server overloaded or rate limiting: retry after the usual backoff
+                    raise IOError("Status code {0} for bytes {1}-{2}".format(
+                        response.status_code, offset, last - 1))
+                if response.status_code != 206:
+                    msg = ("\nThe server did not honor the request for bytes {0}-{1} "
+                        "of the following url:\n{2}\nStatus code = {3}\n".format(
+                            offset, last - 1, self.url, response.status_code))
+                    raise HalotoolsError(msg)
+                with open(self.part_fname, 'r+b') as f:
+                    f.seek(offset)
+                    for block in response.iter_content(2**16):
+                        block = block[:last - offset]
+                        f.write(block)
+                        offset += len(block)
+                        if offset == last:
+                            break
+                if offset < last:
+                    raise IOError("Connection closed after byte {0}".format(offset))
+            except (requests.RequestException, IOError):
+                num_failures += 1
+                if num_failures > self.max_retries:
+                    raise
+            finally:
+                if response is not None:
+                    response.close()
+            if offset < last:
+                sleep(min(2**num_failures, 60))
+
+        with self._lock:
+            self.completed.add(first)
+            self._save_progress()
+            self._report_progress()
+
+    def _report_progress(self):
+        if self.verbose is False:
+            return
+        num_bytes = sum(last - first for first, last in self.segments if first in self.completed)
+        frac_complete = num_bytes / float(self.size)
+        if (frac_complete - self._last_report >= 0.05) or (frac_complete == 1):
+            self._last_report = frac_complete
+            runtime = time() - self._start
+            print("{0:.0f}% complete, elapsed time = {1:.0f} seconds".format(frac_complete*100, runtime))
+            sys.stdout.flush()
+
+    def _worker(self):
+        segment = self._next_segment()
+        while segment is not None:
+            try:
+                self._download_segment(*segment)
+            except Exception as err:
+                with self._lock:
+                    self._errors.append(err)
+                return
+            segment = self._next_segment()
+
+    def run(self, num_connections):
+        threads = [threading.Thread(target = self._worker) 
+            for i in range(max(1, min(num_connections, len(self._remaining))))]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            # A timeout keeps the main thread responsive to KeyboardInterrupt
+            while thread.is_alive():
+                thread.join(1)
+        if len(self._errors) > 0:
+            raise self._errors[0]
 
 
+def download_file_with_resume(url, fname, num_connections = 4, 
+    expected_checksum = None, checksum_algorithm = 'sha256', 
+    segment_size = 2**26, max_retries = 5, timeout = 60, verbose = True):
+    """ Function to download a file from the web to a specific location 
+    over several simultaneous connections, resuming any previously interrupted 
+    download of the same file and verifying its checksum. 
+
+    If the server supports HTTP byte-range requests, the file is split into segments 
+    of ``segment_size`` bytes that are downloaded in parallel into a preallocated 
+    partial file ``fname + '.part'``. The completed segments are recorded in 
+    ``fname + '.part.progress'``, so that if the download is interrupted, 
+    calling the function again only downloads the missing segments. 
+    Otherwise, the file is downloaded with a single sequential stream. 
+    Once the download is complete, the checksum of the partial file 
+    is computed in a single pass and compared to ``expected_checksum``, 
+    after which the partial file is renamed to ``fname``. 
+    Since the rename is atomic, ``fname`` never stores an incomplete or corrupted file. 
+
+    Parameters 
+    ----------
+    url : string 
+        web location of desired file, e.g., 
+        ``http://www.some.website.com/somefile.txt``. 
+
+    fname : string 
+        Location and filename to store the downloaded file, e.g., 
+        ``/Users/username/dirname/possibly_new_filename.txt``
+
+    num_connections : int, optional 
+        Number of simultaneous connections to the server. Default is 4. 
+
+    expected_checksum : string, optional 
+        Hexadecimal checksum the downloaded file must have, 
+        e.g., as published in a manifest read with `read_checksum_manifest`. 
+        Default is None, in which case the checksum is computed but not verified. 
+
+    checksum_algorithm : string, optional 
+        Name of any algorithm supported by the ``hashlib`` module. Default is 'sha256'. 
+
+    segment_size : int, optional 
+        Number of bytes of each segment. Default is 2**26. 
+
+    max_retries : int, optional 
+        Number of times the download of a segment is retried before giving up. 
+        Default is 5. 
+
+    timeout : float, optional 
+        Number of seconds to wait for the server. Default is 60. 
+
+    verbose : bool, optional 
+        If True, progress is printed to stdout. Default is True. 
+
+    Returns 
+    -------
+    checksum : string 
+        Hexadecimal checksum of the downloaded file. 
+
+    Examples 
+    --------
+    >>> url = 'http://www.some.website.com/halo_catalogs/hlist_1.00035.list.hdf5'
+    >>> checksums = read_checksum_manifest(os.path.dirname(url) + '/checksums.sha256') # doctest: +SKIP
+    >>> download_file_with_resume(url, fname, expected_checksum = checksums[os.path.basename(url)]) # doctest: +SKIP
+    """
+    import requests
+
+    part_fname = fname + '.part'
+    progress_fname = fname + '.part.progress'
+
+    if verbose:
+        print("\n... Downloading data from the following location: \n%s\n" % url)
+        print(" ... Saving the data with the following filename: \n%s\n" % fname) 
+
+    response = requests.head(url, allow_redirects = True, timeout = timeout)
+    response.raise_for_status()
+    url = response.url
+    try:
+        size = int(response.headers['Content-Length'])
+    except (KeyError, ValueError):
+        size = -1
+    accepts_ranges = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+    validator = response.headers.get('ETag', response.headers.get('Last-Modified', ''))
+
+    if accepts_ranges and (size > 0):
+        download = _SegmentedDownload(url, part_fname, progress_fname, size, validator, 
+            int(segment_size), max_retries, timeout, verbose)
+        download.run(num_connections)
+    else:
+        _download_sequentially(url, part_fname, max_retries, timeout)
+
+    checksum = _file_checksum(part_fname, checksum_algorithm)
+    if (expected_checksum is not None) and (checksum != expected_checksum.lower()):
+        os.remove(part_fname)
+        if os.path.isfile(progress_fname):
+            os.remove(progress_fname)
+        msg = ("\nThe " + checksum_algorithm + " checksum of the file downloaded from "
+            "the following url:\n" + url + "\nis " + checksum + ", but the expected checksum is " 
+            + str(expected_checksum) + ".\nThe corrupted download has been deleted.\n")
+        raise HalotoolsError(msg)
+
+    _atomic_replace(part_fname, fname)
+    if os.path.isfile(progress_fname):
+        os.remove(progress_fname)
+    return checksum
+
+
+def _download_sequentially(url, part_fname, max_retries, timeout):
+    """ Download the input url with a single stream, for servers that do not 
+    support byte-range requests. Each retry starts again from the first byte. 
+    """
+    import requests
+
+    num_failures = 0
+    while True:
+        try:
+            response = requests.get(url, stream = True, timeout = timeout)
+            response.raise_for_status()
+            with open(part_fname, 'wb') as f:
+                for block in response.iter_content(2**16):
+                    f.write(block)
+            return
+        except (requests.RequestException, IOError):
+            num_failures += 1
+            if num_failures > max_retries:
+                raise
+            sleep(min(2**num_failures, 60))
@@ -60,12 +60,27 @@ def compute_conditional_percentiles(**kwargs):
         Logarithmic spacing of bins of the mass-like variable within which 
         we will assign secondary property percentiles. Default is 0.2. 
 
+    window_length : int, optional 
+        If passed, rather than binning by ``prim_haloprop``, the percentile of each point 
+        is computed with respect to the ``window_length`` points closest to it 
+        in rank-order of ``prim_haloprop``, including the point itself. 
+        Near the smallest and largest values of ``prim_haloprop``, the window 
+        is shifted so that it always contains ``window_length`` points. 
+        In this case the ``prim_haloprop_bin_boundaries`` and 
+        ``dlog10_prim_haloprop`` arguments are ignored. 
+        Default is None, in which case the percentiles are computed in bins. 
+
     Examples 
     --------
     >>> from halotools.sim_manager import FakeSim
     >>> fakesim = FakeSim()
     >>> result = compute_conditional_percentiles(table = fakesim.halo_table, prim_haloprop_key = 'halo_mvir', sec_haloprop_key = 'halo_vmax')
 
+    The percentiles can also be computed in a sliding window of halos 
+    with similar ``halo_mvir``, avoiding the discreteness of the bins:
+
+    >>> result = compute_conditional_percentiles(table = fakesim.halo_table, prim_haloprop_key = 'halo_mvir', sec_haloprop_key = 'halo_vmax', window_length = 101)
+
 
     Notes
     -----
@@ -73,6 +88,11 @@ def compute_conditional_percentiles(**kwargs):
     *smaller* values of the secondary property 
     receive *smaller* values of the returned percentile. 
 
+    The percentiles are computed with a single sort of the input points, 
+    so that the runtime is insensitive to the number of bins. 
+    Within each bin, the point with the *k*-th smallest value of ``sec_haloprop`` 
+    (counting from 1) is assigned a percentile of *k*/*N*, 
+    where *N* is the number of points in the bin. 
     """
 
     if 'table' in kwargs:
@@ -97,6 +117,13 @@ def compute_conditional_percentiles(**kwargs):
             raise HalotoolsError(msg)
 
 
+    prim_haloprop = np.asarray(prim_haloprop)
+    sec_haloprop = np.asarray(sec_haloprop)
+
+    if kwargs.get('window_length', None) is not None:
+        return _sliding_conditional_percentiles(prim_haloprop, sec_haloprop, 
+            kwargs['window_length'])
+
     def compute_prim_haloprop_bins(dlog10_prim_haloprop=0.05, **kwargs):
         """
         Parameters
@@ -166,27 +193,89 @@ def compute_conditional_percentiles(**kwargs):
         pass
     prim_haloprop_bins = compute_prim_haloprop_bins(**compute_prim_haloprop_bins_dict)
 
-    output = np.zeros_like(prim_haloprop)
+    # sort by bin, and by the secondary property within each bin. 
+    # This is equivalent to np.lexsort((sec_haloprop, prim_haloprop_bins)), 
+    # but a stable sort of the integer bins is considerably faster. 
+    idx_sorted = np.argsort(sec_haloprop)
+    idx_sorted = idx_sorted[np.argsort(prim_haloprop_bins[idx_sorted], kind='mergesort')]
+    sorted_bins = prim_haloprop_bins[idx_sorted]
+
+    num_in_bin = np.bincount(sorted_bins)
+    first_idx_of_bin = np.cumsum(num_in_bin) - num_in_bin
 
-    # sort on secondary property only with each mass bin
-    bins_in_halocat = set(prim_haloprop_bins)
-    for ibin in bins_in_halocat:
-        indices_of_prim_haloprop_bin = np.where(prim_haloprop_bins == ibin)[0]
+    output = np.zeros(len(prim_haloprop))
+    output[idx_sorted] = ((np.arange(len(prim_haloprop)) - first_idx_of_bin[sorted_bins] + 1.0) 
+        / num_in_bin[sorted_bins])
 
-        num_in_bin = len(sec_haloprop[indices_of_prim_haloprop_bin])
+    return output
 
-        # Find the indices that sort by the secondary property
-        ind_sorted = np.argsort(sec_haloprop[indices_of_prim_haloprop_bin])
 
-        percentiles = np.zeros(num_in_bin)
-        percentiles[ind_sorted] = (np.arange(num_in_bin) + 1.0) / float(num_in_bin)
-        
-        # place the percentiles into the catalog
-        output[indices_of_prim_haloprop_bin] = percentiles
+def _sliding_conditional_percentiles(prim_haloprop, sec_haloprop, window_length):
+    """ Percentile of each value of ``sec_haloprop`` among the ``window_length`` points 
+    closest in rank-order of ``prim_haloprop``. 
 
+    With the points sorted by ``prim_haloprop``, the window of each point is a 
+    contiguous range of positions. The number of points in the window with a 
+    smaller ``sec_haloprop`` is computed exactly by decomposing the window 
+    into aligned blocks whose lengths are powers of two, 
+    so that the runtime scales as N*log(window_length)*log(N). 
+    """
+    try:
+        window_length = int(window_length)
+        assert window_length > 0
+    except (TypeError, ValueError, AssertionError):
+        msg = ("\nThe input ``window_length`` must be a positive integer\n")
+        raise HalotoolsError(msg)
+
+    num_points = len(prim_haloprop)
+    output = np.zeros(num_points)
+    if num_points == 0:
+        return output
+    window_length = min(window_length, num_points)
+
+    # rank of each point in prim_haloprop, and rank in sec_haloprop 
+    # of the points when sorted by prim_haloprop
+    idx_prim_sorted = np.argsort(prim_haloprop, kind='mergesort')
+    sec_rank = np.empty(num_points, dtype=np.int64)
+    sec_rank[np.argsort(sec_haloprop[idx_prim_sorted], kind='mergesort')] = np.arange(num_points)
+
+    # window of each position, shifted at the edges to always contain window_length points
+    positions = np.arange(num_points, dtype=np.int64)
+    window_start = np.clip(positions - window_length//2, 0, num_points - window_length)
+    window_end = window_start + window_length
+
+    # The window [start, end) of each point is the difference of the prefixes 
+    # from the beginning of the block of length 2**num_levels containing start or end. 
+    # Each prefix is the union of the blocks of length 2**level for which the bit 
+    # of the corresponding position is set. If start and end lie in different blocks 
+    # of length 2**num_levels, the full block containing start is also added. 
+    num_levels = max(1, int(np.ceil(np.log2(window_length))))
+    num_smaller = np.zeros(num_points, dtype=np.int64)
+    for level in range(num_levels):
+        sorted_block_keys = np.sort((positions >> level)*num_points + sec_rank)
+        for boundary, sign in ((window_end, 1), (window_start, -1)):
+            mask = ((boundary >> level) & 1) == 1
+            block_idx = (boundary[mask] >> (level + 1)) << 1
+            num_smaller[mask] += sign*_num_smaller_in_blocks(sorted_block_keys, 
+                level, block_idx, sec_rank[mask], num_points)
+
+    sorted_block_keys = np.sort((positions >> num_levels)*num_points + sec_rank)
+    mask = (window_end >> num_levels) != (window_start >> num_levels)
+    num_smaller[mask] += _num_smaller_in_blocks(sorted_block_keys, 
+        num_levels, window_start[mask] >> num_levels, sec_rank[mask], num_points)
+
+    output[idx_prim_sorted] = (num_smaller + 1.0)/window_length
     return output
 
 
+def _num_smaller_in_blocks(sorted_block_keys, level, block_idx, sec_rank, num_points):
+    """ Number of points in the blocks of length 2**level with the input indices 
+    whose rank is smaller than the input ``sec_rank``. 
+    """
+    idx = np.searchsorted(sorted_block_keys, block_idx*num_points + sec_rank)
+    return idx - (block_idx << level)
+
+
 
 
 class SampleSelector(object):
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+from __future__ import (absolute_import, division, print_function)
+
+from unittest import TestCase
+
+import numpy as np 
+
+from astropy.tests.helper import pytest
+from astropy.table import Table 
+
+from ..group_aggregation import GroupBy
+from ..group_member_generator import group_member_generator
+
+from ...custom_exceptions import HalotoolsError
+
+__all__ = ['TestGroupBy']
+
+class TestGroupBy(TestCase):
+    """ Class providing tests of the `~halotools.utils.GroupBy` class. 
+    """
+    def setUp(self):
+        np.random.seed(43)
+        num_rows = 1000
+        self.data = Table({'group_id': np.random.randint(0, 100, num_rows), 
+            'mass': np.random.random(num_rows), 
+            'is_red': np.random.random(num_rows) > 0.5})
+
+        self.sorted_data = self.data[np.argsort(self.data['group_id'], kind = 'mergesort')]
+
+    def test_reductions(self):
+        """ Verify that the reductions agree with the results of the 
+        `~halotools.utils.group_member_generator`, for both sorted and unsorted data. 
+        """
+        group_gen = group_member_generator(self.sorted_data, 'group_id', ['mass', 'is_red'])
+        correct = dict((key, []) for key in ('count', 'sum', 'mean', 'min', 'max', 
+            'first', 'last', 'any_red'))
+        for first, last, (mass, is_red) in group_gen:
+            correct['count'].append(last - first)
+            correct['sum'].append(np.sum(mass))
+            correct['mean'].append(np.mean(mass))
+            correct['min'].append(np.min(mass))
+            correct['max'].append(np.max(mass))
+            correct['first'].append(mass[0])
+            correct['last'].append(mass[-1])
+            correct['any_red'].append(np.any(is_red))
+
+        for data in (self.data, self.sorted_data):
+            groups = GroupBy(data, 'group_id')
+            assert np.all(groups.group_ids == np.unique(data['group_id']))
+            assert np.all(groups.count() == correct['count'])
+            assert np.allclose(groups.sum('mass'), correct['sum'])
+            assert np.allclose(groups.mean(data['mass']), correct['mean'])
+            assert np.all(groups.min('mass') == correct['min'])
+            assert np.all(groups.max('mass') == correct['max'])
+            assert np.all(groups.first('mass') == correct['first'])
+            assert np.all(groups.last('mass') == correct['last'])
+            assert np.all(groups.reduce(np.logical_or, 'is_red') == correct['any_red'])
+
+            broadcast_sum = groups.sum('mass', broadcast = True)
+            for i in np.random.choice(len(data), 20, replace = False):
+                mask = data['group_id'] == data['group_id'][i]
+                assert np.allclose(broadcast_sum[i], np.sum(data['mass'][mask]))
+                assert groups.count(broadcast = True)[i] == np.count_nonzero(mask)
+
+    def test_rank_and_percentile(self):
+        """ Verify the within-group ranks and percentiles in the original order of the rows. 
+        """
+        groups = GroupBy(self.data, 'group_id')
+        rank = groups.rank('mass')
+        descending_rank = groups.rank('mass', ascending = False)
+        percentile = groups.percentile('mass')
+        row_order_rank = groups.rank()
+
+        for group_id in np.unique(self.data['group_id'])[0:10]:
+            idx = np.flatnonzero(self.data['group_id'] == group_id)
+            mass = self.data['mass'][idx]
+            correct_rank = np.argsort(np.argsort(mass))
+            assert np.all(rank[idx] == correct_rank)
+            assert np.all(descending_rank[idx] == len(idx) - 1 - correct_rank)
+            assert np.allclose(percentile[idx], (correct_rank + 1.)/len(idx))
+            assert np.all(row_order_rank[idx] == np.arange(len(idx)))
+
+    def test_exception_handling(self):
+        """ 
+        """
+        with pytest.raises(TypeError) as err:
+            _ = GroupBy(np.arange(4), 'group_id')
+        substr = "The input ``data`` must be an Astropy Table or Numpy Structured Array"
+        assert substr in err.value.message
+
+        groups = GroupBy(self.data, 'group_id')
+        with pytest.raises(HalotoolsError) as err:
+            _ = groups.sum(np.ones(5))
+        substr = "must have \nthe same length as the input ``data``"
+        assert substr in err.value.message
+
+        with pytest.raises(TypeError) as err:
+            _ = groups.reduce(np.sqrt, 'mass')
+        substr = "The input ``ufunc`` must be a Numpy ufunc taking two input arguments"
+        assert substr in err.value.message
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+from __future__ import (absolute_import, division, print_function)
+
+from unittest import TestCase
+
+from astropy.tests.helper import pytest
+
+from ..instrumentation import (instrument, instrumentation_enabled,
+    register_instrumentation_callback, unregister_instrumentation_callback,
+    record_call, step_timer, StepTimer, timed_call)
+
+from ...custom_exceptions import HalotoolsError
+
+__all__ = ['TestInstrumentation']
+
+
+class TestInstrumentation(TestCase):
+    """ Class providing tests of the `~halotools.utils.instrument` context manager
+    and of the instrumentation callback registry.
+    """
+
+    def test_instrument(self):
+        assert instrumentation_enabled() is False
+        with instrument() as report:
+            assert instrumentation_enabled() is True
+            record_call('npairs', {'pairs_binned': 1.})
+            with instrument() as inner_report:
+                record_call('npairs', {'pairs_binned': 2.})
+            record_call('s_mu_npairs', {'pairs_binned': 3.})
+        assert instrumentation_enabled() is False
+
+        assert report == {'npairs': [{'pairs_binned': 1.}, {'pairs_binned': 2.}],
+            's_mu_npairs': [{'pairs_binned': 3.}]}
+        assert inner_report == {'npairs': [{'pairs_binned': 2.}]}
+
+        record_call('npairs', {'pairs_binned': 4.})
+        assert len(report['npairs']) == 2
+
+    def test_instrument_exception(self):
+        with pytest.raises(ValueError):
+            with instrument() as report:
+                raise ValueError
+        assert instrumentation_enabled() is False
+
+    def test_callbacks(self):
+        calls = []
+        callback = lambda name, record: calls.append((name, record))
+
+        register_instrumentation_callback(callback)
+        try:
+            assert instrumentation_enabled() is True
+            record_call('npairs', {'pairs_binned': 1.})
+        finally:
+            unregister_instrumentation_callback(callback)
+        assert instrumentation_enabled() is False
+        record_call('npairs', {'pairs_binned': 2.})
+        assert calls == [('npairs', {'pairs_binned': 1.})]
+
+        with pytest.raises(HalotoolsError) as err:
+            register_instrumentation_callback('npairs')
+        substr = "The input ``callback`` must be a callable object."
+        assert substr in err.value.message
+
+        with pytest.raises(HalotoolsError) as err:
+            unregister_instrumentation_callback(callback)
+        substr = "The input ``callback`` is not a registered instrumentation callback."
+        assert substr in err.value.message
+
+    def test_step_timer(self):
+        steps = step_timer()
+        assert not isinstance(steps, StepTimer)
+        steps.lap('mc_occupation_centrals')
+        steps.record('HodMockFactory.populate', num_galaxies = 0)
+
+        with instrument() as report:
+            steps = step_timer()
+            assert isinstance(steps, StepTimer)
+            for step in ('mc_occupation_centrals', 'assign_phase_space', 'mc_occupation_centrals'):
+                steps.lap(step)
+            steps.record('HodMockFactory.populate', num_galaxies = 10)
+
+        record = report['HodMockFactory.populate'][0]
+        assert record['num_galaxies'] == 10
+        assert record['calling_sequence'] == ['mc_occupation_centrals', 'assign_phase_space']
+        assert set(record['step_time'].keys()) == set(record['calling_sequence'])
+        assert sum(record['step_time'].values()) <= record['total_time']
+
+    def test_timed_call(self):
+        result, pid, wall_time = timed_call(sum, [1, 2, 3])
+        assert result == 6
+        assert wall_time >= 0
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+from __future__ import (absolute_import, division, print_function)
+
+from unittest import TestCase
+import os, shutil, json, hashlib, threading
+
+from astropy.config.paths import _find_home
+from astropy.tests.helper import pytest
+
+import numpy as np
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+
+from .. import io_utils
+from ..io_utils import download_file_with_resume, read_checksum_manifest
+from ...custom_exceptions import HalotoolsError
+
+__all__ = ('TestDownloadFileWithResume', )
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _RangeRequestHandler(BaseHTTPRequestHandler):
+    """ Minimal stand-in for the web server hosting the catalogs,
+    serving the files stored in the ``files`` dictionary of the server,
+    optionally honoring byte-range requests.
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def _send_headers(self):
+        try:
+            content = self.server.files[self.path]
+        except KeyError:
+            self.send_error(404)
+            return None, None, None
+
+        first, last = 0, len(content) - 1
+        range_header = self.headers.get('Range')
+        if (range_header is not None) and self.server.accept_ranges:
+            first, last = [int(x) for x in range_header.split('=')[1].split('-')]
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {0}-{1}/{2}'.format(first, last, len(content)))
+        else:
+            self.send_response(200)
+        if self.server.accept_ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(last - first + 1))
+        self.send_header('ETag', '"' + hashlib.md5(content).hexdigest() + '"')
+        self.end_headers()
+        return content, first, last
+
+    def do_HEAD(self):
+        self._send_headers()
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests.append(self.headers.get('Range'))
+            num_failures = self.server.num_failures
+            self.server.num_failures = max(0, num_failures - 1)
+            error_status = (self.server.error_statuses.pop(0)
+                if len(self.server.error_statuses) > 0 else None)
+
+        if error_status is not None:
+            self.send_error(error_status)
+            return
+        content, first, last = self._send_headers()
+        if content is None:
+            return
+        data = content[first:last + 1]
+        if num_failures > 0:
+            # Simulate a dropped connection
+            data = data[:len(data)//2]
+        self.wfile.write(data)
+
+
+class TestDownloadFileWithResume(TestCase):
+    """
+    """
+
+    def setUp(self):
+        self.tmpdir = os.path.join(_find_home(), '.temp_halotools_testing_dir')
+        try:
+            os.makedirs(self.tmpdir)
+        except OSError:
+            pass
+
+        self.content = np.random.RandomState(43).bytes(2**20 + 123)
+        self.checksum = hashlib.sha256(self.content).hexdigest()
+        manifest = (self.checksum + '  catalog.hdf5\n' +
+            hashlib.sha256(b'').hexdigest() + ' *empty.hdf5\n')
+
+        self.server = _ThreadingHTTPServer(('127.0.0.1', 0), _RangeRequestHandler)
+        self.server.files = {'/catalog.hdf5': self.content,
+            '/checksums.sha256': manifest.encode('ascii')}
+        self.server.accept_ranges = True
+        self.server.num_failures = 0
+        self.server.error_statuses = []
+        self.server.requests = []
+        self.server.lock = threading.Lock()
+        self.server_thread = threading.Thread(target = self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
+        self.baseurl = 'http://127.0.0.1:{0}'.format(self.server.server_address[1])
+        self.url = self.baseurl + '/catalog.hdf5'
+        self.fname = os.path.join(self.tmpdir, 'catalog.hdf5')
+
+        self._sleep = io_utils.sleep
+        io_utils.sleep = lambda seconds: None
+
+    def stored_content(self):
+        with open(self.fname, 'rb') as f:
+            return f.read()
+
+    def test_parallel_download(self):
+        checksum = download_file_with_resume(self.url, self.fname,
+            num_connections = 4, segment_size = 2**16,
+            expected_checksum = self.checksum, verbose = False)
+        assert checksum == self.checksum
+        assert self.stored_content() == self.content
+        assert len(self.server.requests) == 17
+        assert os.listdir(self.tmpdir) == ['catalog.hdf5']
+
+    def test_resume(self):
+        # The next requests fail, so that a download without retries is interrupted
+        self.server.num_failures = 10
+        with pytest.raises(Exception):
+            download_file_with_resume(self.url, self.fname,
+                num_connections = 1, segment_size = 2**16, max_retries = 0, verbose = False)
+        assert not os.path.isfile(self.fname)
+        with open(self.fname + '.part.progress') as f:
+            assert json.load(f)['completed'] == []
+
+        # Retried segments resume from the first byte not yet written
+        self.server.requests = []
+        checksum = download_file_with_resume(self.url, self.fname,
+            num_connections = 2, segment_size = 2**18, max_retries = 10, verbose = False)
+        assert checksum == self.checksum
+        assert self.stored_content() == self.content
+        first_bytes = [int(r.split('=')[1].split('-')[0]) for r in self.server.requests]
+        assert 2**17 in first_bytes
+
+        # Interrupt a download after some of the segments have been completed
+        os.remove(self.fname)
+        self.server.requests = []
+        self.server.num_failures = 0
+        download = io_utils._SegmentedDownload(self.url, self.fname + '.part',
+            self.fname + '.part.progress', len(self.content),
+            '"' + hashlib.md5(self.content).hexdigest() + '"', 2**16, 0, 60, False)
+        for first, last in download.segments[0:10]:
+            download._download_segment(first, last)
+        assert len(self.server.requests) == 10
+
+        self.server.requests = []
+        checksum = download_file_with_resume(self.url, self.fname,
+            num_connections = 3, segment_size = 2**16, verbose = False)
+        assert checksum == self.checksum
+        assert self.stored_content() == self.content
+        assert len(self.server.requests) == 7
+        assert os.listdir(self.tmpdir) == ['catalog.hdf5']
+
+    def test_error_status(self):
+        # Overloaded and rate-limiting servers are retried
+        self.server.error_statuses = [503, 429]
+        checksum = download_file_with_resume(self.url, self.fname,
+            num_connections = 1, segment_size = 2**18, verbose = False)
+        assert checksum == self.checksum
+        assert self.stored_content() == self.content
+        assert len(self.server.requests) == 7
+
+        # Other errors are not
+        os.remove(self.fname)
+        self.server.requests = []
+        self.server.error_statuses = [403]
+        with pytest.raises(HalotoolsError):
+            download_file_with_resume(self.url, self.fname,
+                num_connections = 1, segment_size = 2**18, verbose = False)
+        assert len(self.server.requests) == 1
+
+    def test_checksum_mismatch(self):
+        with pytest.raises(HalotoolsError) as err:
+            download_file_with_resume(self.url, self.fname, segment_size = 2**16,
+                expected_checksum = hashlib.sha256(b'abc').hexdigest(), verbose = False)
+        substr = "The corrupted download has been deleted."
+        assert substr in err.value.message
+        assert os.listdir(self.tmpdir) == []
+
+    def test_no_range_support(self):
+        self.server.accept_ranges = False
+        self.server.num_failures = 1
+        checksum = download_file_with_resume(self.url, self.fname,
+            expected_checksum = self.checksum, verbose = False)
+        assert checksum == self.checksum
+        assert self.stored_content() == self.content
+        assert self.server.requests == [None, None]
+
+    def test_read_checksum_manifest(self):
+        checksums = read_checksum_manifest(self.baseurl + '/checksums.sha256')
+        assert checksums == {'catalog.hdf5': self.checksum,
+            'empty.hdf5': hashlib.sha256(b'').hexdigest()}
+        assert read_checksum_manifest(self.baseurl + '/dne.sha256') == {}
+
+    def tearDown(self):
+        io_utils.sleep = self._sleep
+        self.server.shutdown()
+        self.server.server_close()
+        try:
+            shutil.rmtree(self.tmpdir)
+        except:
+            pass
@@ -144,15 +144,38 @@ class TestComputeConditionalPercentiles(TestCase):
     	low_zform, high_zform = self.custom_halo_table[split], self.custom_halo_table[np.invert(split)]
     	assert len(low_zform) == len(high_zform)
 
-
-
-
-
-
-
-
-
-
-
-
-
+    def test_binned_percentiles_brute_force(self):
+        np.random.seed(43)
+        prim_haloprop = 10**np.random.uniform(10, 15, 1000)
+        sec_haloprop = np.random.random(1000)
+        prim_haloprop_bin_boundaries = np.logspace(10, 15, 6)
+
+        percentiles = compute_conditional_percentiles(
+            prim_haloprop = prim_haloprop, sec_haloprop = sec_haloprop, 
+            prim_haloprop_bin_boundaries = prim_haloprop_bin_boundaries)
+
+        bins = np.digitize(prim_haloprop, prim_haloprop_bin_boundaries)
+        for ibin in set(bins):
+            idx = np.where(bins == ibin)[0]
+            correct_rank = np.argsort(np.argsort(sec_haloprop[idx]))
+            assert np.allclose(percentiles[idx], (correct_rank + 1.)/len(idx))
+
+    def test_sliding_window_percentiles_brute_force(self):
+        np.random.seed(43)
+        npts = 300
+        prim_haloprop = 10**np.random.uniform(10, 15, npts)
+        sec_haloprop = np.random.random(npts)
+        idx_prim_sorted = np.argsort(prim_haloprop)
+
+        for window_length in (1, 8, 31, 100, 1000):
+            percentiles = compute_conditional_percentiles(
+                prim_haloprop = prim_haloprop, sec_haloprop = sec_haloprop, 
+                window_length = window_length)
+            window_length = min(window_length, npts)
+
+            for i in np.random.choice(npts, 30, replace = False):
+                ipos = np.where(idx_prim_sorted == i)[0][0]
+                start = min(max(ipos - window_length//2, 0), npts - window_length)
+                window = idx_prim_sorted[start:start + window_length]
+                num_smaller = np.count_nonzero(sec_haloprop[window] < sec_haloprop[i])
+                assert np.allclose(percentiles[i], (num_smaller + 1.)/window_length)
@@ -91,6 +91,44 @@ class TestValueAddedHaloTableFunctions(TestCase):
         
         del t
 
+    def test_broadcast_host_halo_mass5(self):
+        """ Verify that the rows of the input table are not reordered, 
+        that several properties can be broadcast in a single call, 
+        and that the results agree with a brute-force calculation. 
+        """
+        t = deepcopy(self.table)
+        np.random.seed(43)
+        t = t[np.random.permutation(len(t))]
+        original_halo_id = deepcopy(t['halo_id'].data)
+
+        broadcast_host_halo_property(t, ['halo_mvir', 'halo_x'])
+        assert np.all(t['halo_id'] == original_halo_id)
+
+        for key in ('halo_mvir', 'halo_x'):
+            for i in np.random.choice(len(t), 50, replace = False):
+                members = t[t['halo_hostid'] == t['halo_hostid'][i]]
+                members.sort(['halo_upid'])
+                assert t[key + '_host_halo'][i] == members[key][0]
+
+        with pytest.raises(HalotoolsError) as err:
+            broadcast_host_halo_property(t, ['halo_vmax', 'halo_mvir'])
+        substr = "Your input table already has an existing new_colname column name."
+        assert substr in err.value.message
+        assert 'halo_vmax_host_halo' not in t.keys()
+
+    def test_broadcast_host_halo_mass6(self):
+        """ Verify that skipping the sort of a properly sorted table
+        gives the same result.
+        """
+        t = deepcopy(self.table)
+        t.sort(['halo_hostid', 'halo_upid'])
+        broadcast_host_halo_property(t, 'halo_mvir')
+        correct_result = deepcopy(t['halo_mvir_host_halo'].data)
+
+        broadcast_host_halo_property(t, 'halo_mvir', table_is_already_sorted = True,
+            delete_possibly_existing_column = True)
+        assert np.all(t['halo_mvir_host_halo'] == correct_result)
+
     def test_add_halo_hostid1(self):
         """
         """
@@ -13,8 +13,6 @@ from warnings import warn
 
 from astropy.table import Table 
 
-from .group_member_generator import group_member_generator
-
 from ..custom_exceptions import HalotoolsError 
 
 
@@ -26,25 +24,27 @@ def broadcast_host_halo_property(table, halo_property_key,
     and broadcast that property to all group members, 
     e.g., calculate host halo mass or group central star formation rate. 
 
+    The calculation is fully vectorized and the order of the rows 
+    of the input table is left unchanged. 
+
     Parameters 
     -----------
     table : Astropy `~astropy.table.Table` 
         Table storing the halo catalog. 
 
-    halo_property_key : string 
-        Name of the column to be broadcasted to all halo members 
+    halo_property_key : string or list of strings 
+        Name of the column(s) to be broadcasted to all halo members 
 
     table_is_already_sorted : bool, optional 
-        If set to True, `group_member_generator` will skip the pre-processing 
-        step of sorting the table. This improves performance, 
-        but `group_member_generator` will return incorrect values 
-        if the table has not been sorted properly. 
-        Default is False, in which case the returned table will 
-        generally be sorted in a different order than the input table. 
+        If set to True, the rows of the input table are assumed to be sorted 
+        by ['halo_hostid', 'halo_upid'], and the sorting step is skipped. 
+        This improves performance, but `broadcast_host_halo_property` 
+        will return incorrect values if the table has not been sorted properly. 
+        Default is False. In either case, the order of the rows is left unchanged. 
 
     delete_possibly_existing_column : bool, optional 
-        If set to False, `add_halo_hostid` will raise an Exception 
-        if the input table already contains a ``halo_hostid`` column.
+        If set to False, `broadcast_host_halo_property` will raise an Exception 
+        if the input table already contains a ``halo_property_key_host_halo`` column.
         If True, the column will be deleted if it exists, 
         and no action will be taken if it does not exist.  
         Default is False. 
@@ -52,11 +52,22 @@ def broadcast_host_halo_property(table, halo_property_key,
     Notes
     --------
     This function is primarily for use with Halotools-formatted halo tables. 
-    For example, this function assumes that the table is sorted 
-    by ['halo_upid', 'halo_hostid'], 
+    For example, this function assumes that the table has 
+    ``halo_hostid`` and ``halo_upid`` columns, 
     and that the new column will be named ``halo_property_key_host_halo``. 
+    The host of each group is taken to be the first member of the group 
+    when the table is sorted by ['halo_hostid', 'halo_upid'], i.e., the member 
+    with ``halo_upid`` = -1 whenever the host halo appears in the table, 
+    with any remaining ties broken by the order of the rows. 
     For more general functionality, 
     use `~halotools.utils.group_member_generator` instead. 
+
+    Examples 
+    ---------
+    >>> from halotools.sim_manager import FakeSim
+    >>> halos = FakeSim().halo_table
+    >>> broadcast_host_halo_property(halos, ['halo_mvir', 'halo_x'])
+    >>> assert 'halo_mvir_host_halo' in halos.keys()
     """
 
     try:
@@ -65,39 +76,58 @@ def broadcast_host_halo_property(table, halo_property_key,
         msg = ("\nThe input ``table`` must be an Astropy `~astropy.table.Table` object\n")
         raise HalotoolsError(msg)
 
-    try:
-        assert halo_property_key in table.keys()
-        assert 'halo_id' in table.keys()
-    except AssertionError:
-        msg = ("\nThe input table does not the input ``halo_property_key`` = "+str(halo_property_key)+" column")
-        raise HalotoolsError(msg)
-
-    new_colname = halo_property_key + '_host_halo'
-    if (new_colname in table.keys()) & (delete_possibly_existing_column is False):
-        msg = ("\nYour input table already has an existing new_colname column name.\n"
-            "If you want to overwrite this column, "
-            "you must set ``delete_possibly_existing_column`` to True.\n")
-        raise HalotoolsError(msg)
-    elif (new_colname in table.keys()) & (delete_possibly_existing_column is True):
-        del table[new_colname]
-
-
-    if table_is_already_sorted is True:
-        pass
+    if isinstance(halo_property_key, (list, tuple)):
+        halo_property_keys = list(halo_property_key)
     else:
-        table.sort(['halo_hostid', 'halo_upid'])
-
-    grouping_key = 'halo_hostid'
-    requested_columns = [halo_property_key]
-    group_gen = group_member_generator(table, grouping_key, requested_columns)
-
-    result = np.zeros(len(table), dtype = table[halo_property_key].dtype)
-    for first, last, member_props in group_gen:
-        prop = member_props[0]
-        hostprop = prop[0]
-        result[first:last] = hostprop
-    table[new_colname] = result
+        halo_property_keys = [halo_property_key]
+
+    for key in halo_property_keys:
+        try:
+            assert key in table.keys()
+            assert 'halo_id' in table.keys()
+        except AssertionError:
+            msg = ("\nThe input table does not the input ``halo_property_key`` = "+str(key)+" column")
+            raise HalotoolsError(msg)
+
+        new_colname = key + '_host_halo'
+        if (new_colname in table.keys()) & (delete_possibly_existing_column is False):
+            msg = ("\nYour input table already has an existing new_colname column name.\n"
+                "If you want to overwrite this column, "
+                "you must set ``delete_possibly_existing_column`` to True.\n")
+            raise HalotoolsError(msg)
+
+    for key in halo_property_keys:
+        new_colname = key + '_host_halo'
+        if new_colname in table.keys():
+            del table[new_colname]
+
+    host_row = _host_halo_row_indices(table['halo_hostid'].data, table['halo_upid'].data, 
+        is_sorted = table_is_already_sorted)
+    for key in halo_property_keys:
+        table[key + '_host_halo'] = table[key].data[host_row]
+
+
+def _host_halo_row_indices(halo_hostid, halo_upid, is_sorted = False):
+    """ For every row, the index of the row storing the first member of its group 
+    when the rows are sorted by (``halo_hostid``, ``halo_upid``). 
+    If ``is_sorted`` is True, the rows are assumed to be sorted already. 
+    """
+    num_rows = len(halo_hostid)
+    if num_rows == 0:
+        return np.zeros(0, dtype = int)
 
+    if is_sorted is True:
+        idx_sorted = np.arange(num_rows)
+    else:
+        idx_sorted = np.lexsort((halo_upid, halo_hostid))
+    sorted_hostid = halo_hostid[idx_sorted]
+    is_first_member = np.ones(num_rows, dtype = bool)
+    is_first_member[1:] = sorted_hostid[1:] != sorted_hostid[:-1]
+    group_index = np.cumsum(is_first_member) - 1
+
+    host_row = np.empty(num_rows, dtype = int)
+    host_row[idx_sorted] = idx_sorted[is_first_member][group_index]
+    return host_row
 
 
 def add_halo_hostid(table, delete_possibly_existing_column = False):
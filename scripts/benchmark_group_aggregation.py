@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""Command-line script to compare the runtime of group-wise calculations
+performed with the `~halotools.utils.GroupBy` class
+against the same calculations performed by looping over
+the `~halotools.utils.group_member_generator`.
+
+The benchmark is run on randomly generated groups. For each group,
+the richness, the total and maximum member mass,
+and the mass of the first member are computed,
+and each result is broadcast to every group member.
+
+$ python scripts/benchmark_group_aggregation.py -num_groups 100000 -mean_richness 5
+
+"""
+from __future__ import print_function
+
+from time import time
+import numpy as np
+from astropy.table import Table
+
+from halotools.utils import GroupBy, group_member_generator
+
+import argparse
+parser = argparse.ArgumentParser()
+parser.add_argument("-num_groups", type = int, default = 100000,
+    help = "Number of groups. Default is 100000.")
+parser.add_argument("-mean_richness", type = float, default = 5.,
+    help = "Mean number of members per group. Default is 5.")
+parser.add_argument("-seed", type = int, default = 43,
+    help = "Seed of the random number generator. Default is 43.")
+args = parser.parse_args()
+
+np.random.seed(args.seed)
+richness = 1 + np.random.poisson(args.mean_richness - 1, args.num_groups)
+data = Table({'group_id': np.repeat(np.arange(args.num_groups), richness),
+    'mass': 10**np.random.uniform(10, 15, np.sum(richness))})
+num_rows = len(data)
+
+
+def generator_calculation(data):
+    output = dict((key, np.zeros(len(data))) for key in
+        ('richness', 'total_mass', 'max_mass', 'first_mass'))
+    group_gen = group_member_generator(data, 'group_id', ['mass'])
+    for first, last, member_props in group_gen:
+        mass = member_props[0]
+        output['richness'][first:last] = last - first
+        output['total_mass'][first:last] = np.sum(mass)
+        output['max_mass'][first:last] = np.max(mass)
+        output['first_mass'][first:last] = mass[0]
+    return output
+
+
+def groupby_calculation(data):
+    groups = GroupBy(data, 'group_id')
+    output = {}
+    output['richness'] = groups.count(broadcast = True)
+    output['total_mass'] = groups.sum('mass', broadcast = True)
+    output['max_mass'] = groups.max('mass', broadcast = True)
+    output['first_mass'] = groups.first('mass', broadcast = True)
+    return output
+
+
+start = time()
+generator_output = generator_calculation(data)
+generator_runtime = time() - start
+
+start = time()
+groupby_output = groupby_calculation(data)
+groupby_runtime = time() - start
+
+for key in generator_output.keys():
+    assert np.allclose(generator_output[key], groupby_output[key])
+
+print("\nNumber of groups = {0}, number of rows = {1}\n".format(args.num_groups, num_rows))
+print("group_member_generator runtime = {0:.3f} seconds".format(generator_runtime))
+print("GroupBy runtime                = {0:.3f} seconds".format(groupby_runtime))
+print("Speedup                        = {0:.1f}\n".format(generator_runtime/groupby_runtime))
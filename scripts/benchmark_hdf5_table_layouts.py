@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""Command-line script to compare the read throughput of halo tables
+stored in the different layouts supported by
+`~halotools.sim_manager.hdf5_table_layout.write_table_to_hdf5`.
+
+The benchmark writes a randomly generated table with ``num_columns`` columns
+in each of the following storage options:
+
+    * the default ``compound`` layout, a single structured dataset,
+
+    * the ``columnar`` layout, one contiguous dataset per column,
+
+    * the ``columnar`` layout compressed with lzf and the shuffle filter,
+
+    * the ``columnar`` layout compressed with gzip and the shuffle filter.
+
+For each file, the script reports the file size and the throughput of
+reading a few columns, and of reading the entire table, with
+`~halotools.sim_manager.hdf5_table_layout.read_hdf5_table`.
+Cold reads are timed after asking the operating system to evict the file
+from its page cache, which requires ``os.posix_fadvise``;
+where this is not available, cold reads may be partially served from memory.
+Warm reads are timed immediately after a previous read of the same data.
+
+$ python scripts/benchmark_hdf5_table_layouts.py -num_halos 1000000 -num_columns 40
+
+"""
+from __future__ import print_function
+
+import os, shutil, tempfile
+from time import time
+import numpy as np
+from astropy.table import Table
+
+from halotools.sim_manager.hdf5_table_layout import write_table_to_hdf5, read_hdf5_table
+
+import argparse
+parser = argparse.ArgumentParser()
+parser.add_argument("-num_halos", type = int, default = 1000000,
+    help = "Number of rows of the table. Default is 1000000.")
+parser.add_argument("-num_columns", type = int, default = 40,
+    help = "Number of columns of the table. Default is 40.")
+parser.add_argument("-num_trials", type = int, default = 3,
+    help = "Number of times each read is timed; the fastest time is reported. Default is 3.")
+parser.add_argument("-dirname", type = str, default = None,
+    help = "Directory in which the files are written. Default is a temporary directory.")
+parser.add_argument("-seed", type = int, default = 43,
+    help = "Seed of the random number generator. Default is 43.")
+args = parser.parse_args()
+
+storage_options = (
+    ('compound', {'layout': 'compound'}),
+    ('columnar', {'layout': 'columnar'}),
+    ('columnar+lzf', {'layout': 'columnar', 'compression': 'lzf', 'shuffle': True}),
+    ('columnar+gzip', {'layout': 'columnar', 'compression': 'gzip', 'shuffle': True}))
+
+np.random.seed(args.seed)
+data = {'halo_id': np.arange(args.num_halos, dtype = np.int64)}
+for key in ('halo_x', 'halo_y', 'halo_z'):
+    data[key] = np.random.uniform(0, 250, args.num_halos).astype('f4')
+data['halo_mvir'] = (10**np.random.uniform(10, 15, args.num_halos)).astype('f4')
+for i in range(max(0, args.num_columns - len(data))):
+    # Quantities stored with a single decimal digit,
+    # which compress about as well as typical halo properties
+    data['halo_prop' + str(i)] = np.round(np.random.lognormal(3, 1, args.num_halos), 1).astype('f4')
+table = Table(data)
+selected_columns = ['halo_x', 'halo_y', 'halo_z', 'halo_mvir']
+
+
+def drop_from_page_cache(fname):
+    """ Ask the operating system to evict the input file from its page cache.
+    Returns False if this is not supported.
+    """
+    try:
+        fadvise, dontneed = os.posix_fadvise, os.POSIX_FADV_DONTNEED
+    except AttributeError:
+        return False
+    fd = os.open(fname, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        fadvise(fd, 0, 0, dontneed)
+    finally:
+        os.close(fd)
+    return True
+
+
+def time_read(fname, columns, cold):
+    runtimes = []
+    for i in range(args.num_trials):
+        if cold:
+            drop_from_page_cache(fname)
+        else:
+            _ = read_hdf5_table(fname, columns = columns)
+        start = time()
+        _ = read_hdf5_table(fname, columns = columns)
+        runtimes.append(time() - start)
+    return min(runtimes)
+
+
+dirname = args.dirname
+if dirname is None:
+    dirname = tempfile.mkdtemp()
+cold_reads_supported = hasattr(os, 'posix_fadvise')
+
+try:
+    selected_nbytes = sum(table[key].nbytes for key in selected_columns)
+    total_nbytes = sum(table[key].nbytes for key in table.keys())
+    print("\nNumber of halos = {0}, number of columns = {1}, table size = {2:.1f} Mb".format(
+        args.num_halos, len(table.keys()), total_nbytes/1e6))
+    if not cold_reads_supported:
+        print("os.posix_fadvise is not available: cold reads may be served from the page cache")
+
+    print("\n{0:<15} {1:>10} {2:>12} {3:>12} {4:>12} {5:>12}".format('layout', 'size (Mb)',
+        'write (Mb/s)', 'cold 4 cols', 'warm 4 cols', 'cold table'))
+    for name, options in storage_options:
+        fname = os.path.join(dirname, name.replace('+', '_') + '.hdf5')
+        start = time()
+        write_table_to_hdf5(table, fname, overwrite = True, **options)
+        write_runtime = time() - start
+
+        cold_selected = time_read(fname, selected_columns, cold = True)
+        warm_selected = time_read(fname, selected_columns, cold = False)
+        cold_table = time_read(fname, None, cold = True)
+
+        print("{0:<15} {1:>10.1f} {2:>12.1f} {3:>12.1f} {4:>12.1f} {5:>12.1f}".format(name,
+            os.path.getsize(fname)/1e6, total_nbytes/1e6/write_runtime,
+            selected_nbytes/1e6/cold_selected, selected_nbytes/1e6/warm_selected,
+            total_nbytes/1e6/cold_table))
+        os.remove(fname)
+    print("\nRead throughputs are in Mb/s of uncompressed data.\n")
+finally:
+    if args.dirname is None:
+        shutil.rmtree(dirname)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+"""Command-line script summarizing the changes in the results of the
+airspeed velocity (asv) benchmarks in the ``benchmarks`` directory
+between two commits, flagging the benchmarks that became slower.
+
+Unlike ``asv compare``, which assumes that smaller values are always better,
+the report treats the throughputs recorded by the ``track_*`` benchmarks,
+whose units are per second (e.g., pairs/sec or MB/sec), as slower when they decrease.
+A benchmark is flagged as slower when its runtime increased,
+or its throughput decreased, by more than ``factor``.
+The script exits with status 1 if any benchmark became slower,
+so that it can be used in continuous integration.
+
+First run the benchmarks for both commits, e.g.,
+
+$ asv run master^! && asv run HEAD^!
+
+and then compare the results:
+
+$ python scripts/benchmark_report.py master HEAD -factor 1.1
+
+"""
+from __future__ import print_function
+
+import os, sys, json, glob, subprocess, itertools, math
+
+import argparse
+parser = argparse.ArgumentParser()
+parser.add_argument("old_commit", type = str,
+    help = "Git revision or hash prefix of the reference commit.")
+parser.add_argument("new_commit", type = str,
+    help = "Git revision or hash prefix of the commit being compared.")
+parser.add_argument("-results_dir", type = str, default = os.path.join('.asv', 'results'),
+    help = "Directory storing the asv results. Default is .asv/results.")
+parser.add_argument("-machine", type = str, default = None,
+    help = "Name of the machine whose results are compared. "
+    "Default is None, in which case the results directory must store a single machine.")
+parser.add_argument("-factor", type = float, default = 1.1,
+    help = "Minimum ratio of the results flagged as a change. Default is 1.1.")
+parser.add_argument("-only_changed", action = 'store_true',
+    help = "Only list the benchmarks whose results changed.")
+args = parser.parse_args()
+
+
+def commit_hash(revision):
+    """ Full hash of the input git revision, or the input itself
+    if it is not a revision of the repository, e.g., a hash prefix.
+    """
+    with open(os.devnull, 'w') as devnull:
+        try:
+            output = subprocess.check_output(['git', 'rev-parse', '--verify', '-q',
+                revision + '^{commit}'], stderr = devnull)
+            return output.decode('ascii').strip()
+        except (subprocess.CalledProcessError, OSError):
+            return revision
+
+
+def machine_dirname():
+    dirnames = [d for d in sorted(os.listdir(args.results_dir))
+        if os.path.isdir(os.path.join(args.results_dir, d))]
+    if args.machine is not None:
+        if args.machine not in dirnames:
+            sys.exit("No results of machine ``{0}`` in {1}".format(args.machine, args.results_dir))
+        return os.path.join(args.results_dir, args.machine)
+    if len(dirnames) != 1:
+        sys.exit("The results directory stores the results of the machines {0}.\n"
+            "Choose one with the -machine option.".format(dirnames))
+    return os.path.join(args.results_dir, dirnames[0])
+
+
+def load_results(dirname, revision):
+    """ Dictionary of the results of the input commit, with one entry per
+    benchmark, environment and combination of parameters.
+    """
+    sha = commit_hash(revision)
+    fnames = [fname for fname in glob.glob(os.path.join(dirname, '*.json'))
+        if os.path.basename(fname) != 'machine.json']
+    fnames = [fname for fname in fnames
+        if json.load(open(fname)).get('commit_hash', '').startswith(sha[0:8])]
+    if len(fnames) == 0:
+        sys.exit("No results of commit ``{0}`` in {1}".format(revision, dirname))
+
+    results = {}
+    for fname in fnames:
+        data = json.load(open(fname))
+        env_name = data.get('env_name', '')
+        columns = data.get('result_columns', ['result', 'params'])
+        for name, entry in data['results'].items():
+            if isinstance(entry, list):
+                # Results files of asv 0.5 and later
+                entry = dict(zip(columns, entry))
+            elif not isinstance(entry, dict):
+                entry = {'result': entry, 'params': []}
+            values = entry.get('result')
+            params = entry.get('params') or []
+            if not isinstance(values, list):
+                values = [values]
+            for param_values, value in zip(itertools.product(*params), values):
+                results[(name, env_name, param_values)] = value
+    return results
+
+
+def load_units():
+    """ Dictionary storing the unit of each benchmark.
+    """
+    try:
+        benchmarks = json.load(open(os.path.join(args.results_dir, 'benchmarks.json')))
+    except (IOError, ValueError):
+        benchmarks = {}
+    return dict((name, entry.get('unit', 'seconds')) for name, entry in benchmarks.items()
+        if isinstance(entry, dict))
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not math.isnan(value)
+
+
+def format_value(value, unit):
+    if not is_number(value):
+        return 'failed'
+    return '{0:.4g} {1}'.format(value, unit)
+
+
+dirname = machine_dirname()
+old_results = load_results(dirname, args.old_commit)
+new_results = load_results(dirname, args.new_commit)
+units = load_units()
+
+rows = {'slower': [], 'faster': [], 'unchanged': [], 'failed': []}
+for key in sorted(set(old_results.keys()) & set(new_results.keys())):
+    name, env_name, param_values = key
+    old, new = old_results[key], new_results[key]
+    unit = units.get(name, 'seconds' if name.split('.')[-1].startswith('time_') else '')
+    higher_is_better = unit.endswith('/sec')
+
+    if not is_number(new):
+        status, ratio = ('failed' if is_number(old) else 'unchanged'), None
+    elif not is_number(old) or old == 0 or new == 0:
+        status, ratio = 'unchanged', None
+    else:
+        ratio = new/float(old)
+        slowdown = (old/float(new)) if higher_is_better else ratio
+        if slowdown > args.factor:
+            status = 'slower'
+        elif slowdown < 1./args.factor:
+            status = 'faster'
+        else:
+            status = 'unchanged'
+
+    label = name + ('(' + ', '.join(param_values) + ')' if param_values else '')
+    if env_name:
+        label += ' [' + env_name + ']'
+    ratio = '{0:.2f}'.format(ratio) if ratio is not None else '-'
+    rows[status].append((format_value(old, unit), format_value(new, unit), ratio, label))
+
+print("\nComparing {0} to {1}, flagging changes by more than a factor {2}\n".format(
+    args.old_commit, args.new_commit, args.factor))
+print("   {0:>18} {1:>18} {2:>7}  {3}".format('before', 'after', 'ratio', 'benchmark'))
+markers = {'slower': '!', 'failed': 'x', 'faster': '+', 'unchanged': ' '}
+for status in ('slower', 'failed', 'faster', 'unchanged'):
+    if args.only_changed and status == 'unchanged':
+        continue
+    for old, new, ratio, label in rows[status]:
+        print(" {0} {1:>18} {2:>18} {3:>7}  {4}".format(markers[status], old, new, ratio, label))
+
+print("\n{0} slower, {1} failed, {2} faster, {3} unchanged".format(
+    len(rows['slower']), len(rows['failed']), len(rows['faster']), len(rows['unchanged'])))
+if len(rows['slower']) + len(rows['failed']) > 0:
+    print("BENCHMARKS BECAME SLOWER\n")
+    sys.exit(1)
+print("")
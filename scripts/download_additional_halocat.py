@@ -21,11 +21,11 @@ $HOME/.astropy/cache/halotools/halo_catalogs/simname/halo_finder
 
 With each download, your cache log is updated so that Halotools creates 
 a persistent memory of where your simulations are located. 
-Your cache log is an ASCII file located here:
+Your cache log is an SQLite database located here:
 
-$HOME/.astropy/cache/halotools/halo_table_cache_log.txt 
+$HOME/.astropy/cache/halotools/halo_table_cache_log.db 
 
-Manually deleting a line from this log erases the memory 
+Manually deleting a row from this log erases the memory 
 of the corresponding catalog. In case the cache log becomes corrupted 
 for any reason, you can attempt to rebuild it 
 by running the following script:
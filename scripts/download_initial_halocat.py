@@ -9,10 +9,10 @@ will be stored in the following location on disk:
 $HOME/.astropy/cache/halotools/halo_catalogs/bolshoi/rockstar
 
 Executing this script also sets up your log of cached simulations. 
-The cache log is an ASCII file stored at the following location:
-$HOME/.astropy/cache/halotools/halo_table_cache_log.txt 
+The cache log is an SQLite database stored at the following location:
+$HOME/.astropy/cache/halotools/halo_table_cache_log.db 
 
-Manually deleting a line from this log erases the memory 
+Manually deleting a row from this log erases the memory 
 of the corresponding catalog. In case the cache log becomes corrupted 
 for any reason, you can attempt to rebuild it 
 by running the following script:
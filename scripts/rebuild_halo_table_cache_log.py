@@ -3,8 +3,8 @@
 Command-line script to rebuild the halo table cache log 
 in the event that the log is lost or becomes corrupted. 
 
-The cache log is an ASCII file stored at the following location:
-$HOME/.astropy/cache/halotools/halo_table_cache_log.txt 
+The cache log is an SQLite database stored at the following location:
+$HOME/.astropy/cache/halotools/halo_table_cache_log.db 
 
 This file is used by Halotools to create a persistent memory of 
 the locations of your halo catalogs on disk. If you accidentally 
@@ -27,7 +27,7 @@ $HOME/.astropy/cache/halotools/rejected_halo_table_filenames.txt
 The previously existing log is saved to the following location 
 so that no information is destroyed in the rebuilding process:
 
-$HOME/.astropy/cache/halotools/corrupted_halo_table_cache_log.txt 
+$HOME/.astropy/cache/halotools/corrupted_halo_table_cache_log.db 
 """
 
 import argparse, os, fnmatch
@@ -49,7 +49,7 @@ old_cache = HaloTableCache()
 old_cache_log_exists = os.path.isfile(old_cache.cache_log_fname)
 
 cache_log_dirname = os.path.dirname(old_cache.cache_log_fname)
-corrupted_cache_log_basename = 'corrupted_halo_table_cache_log.txt'
+corrupted_cache_log_basename = 'corrupted_' + os.path.basename(old_cache.cache_log_fname)
 corrupted_cache_log_fname = os.path.join(cache_log_dirname, corrupted_cache_log_basename)
 
 rejected_filename_log_fname = 'rejected_halo_table_filenames.txt'
@@ -65,8 +65,8 @@ if os.path.isfile(corrupted_cache_log_fname):
         "but that you may have repaired in the interim.\n\n"
         "It is not permissible to run this script with this corrupted log in place, "
         "so here is how to proceed.\n"
-        "Use a text editor to manually compare the "
-        "corrupted and working copies of the cache log:\n\n"
+        "Use a text editor, or the sqlite3 command-line tool for logs with a .db extension, \n"
+        "to manually compare the corrupted and working copies of the cache log:\n\n"
         + old_cache.cache_log_fname + "\n"
         + corrupted_cache_log_fname + "\n\n"
         "For any row of the corrupted log corresponding to a halo catalog \n"
@@ -164,9 +164,11 @@ if os.path.isfile(rejected_filename_log_fname):
 if old_cache_log_exists:
     os.rename(old_cache.cache_log_fname, corrupted_cache_log_fname)
 
-if len(new_cache.log) > 0:
-    new_cache._overwrite_log_ascii(new_cache.log)
+# The new log is written even if it is empty, so that the entries of 
+# any ASCII log used by previous versions of Halotools are not migrated again 
+new_cache._overwrite_log_ascii(new_cache.log)
 
+if len(new_cache.log) > 0:
     print("\n")
     print("The following log entries have been verified "
         "and added to your new cache log:\n")
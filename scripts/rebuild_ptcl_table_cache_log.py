@@ -21,7 +21,7 @@ old_cache = PtclTableCache()
 old_cache_log_exists = os.path.isfile(old_cache.cache_log_fname)
 
 cache_log_dirname = os.path.dirname(old_cache.cache_log_fname)
-corrupted_cache_log_basename = 'corrupted_ptcl_table_cache_log.txt'
+corrupted_cache_log_basename = 'corrupted_' + os.path.basename(old_cache.cache_log_fname)
 corrupted_cache_log_fname = os.path.join(cache_log_dirname, corrupted_cache_log_basename)
 
 rejected_filename_log_fname = 'rejected_ptcl_table_filenames.txt'
@@ -37,8 +37,8 @@ if os.path.isfile(corrupted_cache_log_fname):
         "but that you may have repaired in the interim.\n\n"
         "It is not permissible to run this script with this corrupted log in place, "
         "so here is how to proceed.\n"
-        "Use a text editor to manually compare the "
-        "corrupted and working copies of the cache log:\n\n"
+        "Use a text editor, or the sqlite3 command-line tool for logs with a .db extension, \n"
+        "to manually compare the corrupted and working copies of the cache log:\n\n"
         + old_cache.cache_log_fname + "\n"
         + corrupted_cache_log_fname + "\n\n"
         "For any row of the corrupted log corresponding to a particle catalog \n"
@@ -136,9 +136,11 @@ if os.path.isfile(rejected_filename_log_fname):
 if old_cache_log_exists:
     os.rename(old_cache.cache_log_fname, corrupted_cache_log_fname)
 
-if len(new_cache.log) > 0:
-    new_cache._overwrite_log_ascii(new_cache.log)
+# The new log is written even if it is empty, so that the entries of 
+# any ASCII log used by previous versions of Halotools are not migrated again 
+new_cache._overwrite_log_ascii(new_cache.log)
 
+if len(new_cache.log) > 0:
     print("\n")
     print("The following log entries have been verified "
         "and added to your new cache log:\n")